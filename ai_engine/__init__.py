@@ -1,7 +1,9 @@
 # AI Engine for Mochi-1 video generation 
 from .mochi_wrapper import MochiWrapper
 from .video_processor import VideoProcessor
+from .frame_sink import FrameSink
+from .frame_store import FrameStore
 from .utils.preprocessing import preprocess_prompt
 
 __version__ = "0.1.0"
-__all__ = ['MochiWrapper', 'VideoProcessor', 'preprocess_prompt'] 
\ No newline at end of file
+__all__ = ['MochiWrapper', 'VideoProcessor', 'FrameSink', 'FrameStore', 'preprocess_prompt'] 
\ No newline at end of file
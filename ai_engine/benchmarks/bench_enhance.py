@@ -0,0 +1,76 @@
+"""
+CPU benchmark for VideoProcessor.enhance_frames.
+
+Compares the previous per-frame loop (convertScaleAbs + filter2D one frame
+at a time) with the chunked, thread-pooled implementation across clip
+lengths and resolutions, and checks that both produce identical frames.
+
+Usage (from the repository root):
+    python -m ai_engine.benchmarks.bench_enhance --frames 24 129 --sizes 640x360 1280x720
+"""
+import time
+import argparse
+
+import cv2
+import numpy as np
+
+from ai_engine.video_processor import VideoProcessor
+
+
+def legacy_enhance(frames):
+    """The CPU path enhance_frames used to run."""
+    enhanced_frames = []
+    for frame in frames:
+        enhanced = cv2.convertScaleAbs(frame, alpha=1.2, beta=10)
+        kernel = np.array([[-1, -1, -1],
+                           [-1,  9, -1],
+                           [-1, -1, -1]])
+        enhanced = cv2.filter2D(enhanced, -1, kernel)
+        enhanced_frames.append(enhanced)
+    return enhanced_frames
+
+
+def make_frames(count, width, height, seed=0):
+    rng = np.random.default_rng(seed)
+    base = rng.integers(0, 256, size=(height, width, 3), dtype=np.uint8)
+    return [np.roll(base, i, axis=1) for i in range(count)]
+
+
+def best_of(repeat, func, *args):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args)
+        times.append(time.perf_counter() - start)
+    return min(times), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--frames", type=int, nargs="+", default=[24, 129], help="Clip lengths in frames")
+    parser.add_argument("--sizes", nargs="+", default=["640x360", "1280x720"], help="Frame sizes WxH")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[8, 16, 32])
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per case; the best is reported")
+    args = parser.parse_args()
+
+    processor = VideoProcessor()
+    processor.use_gpu = False
+    print(f"CPU workers: {processor.enhance_workers}")
+    print(f"{'size':>10} {'frames':>7} {'legacy':>9} " + " ".join(f"{'b=' + str(b):>9}" for b in args.batch_sizes))
+
+    for size in args.sizes:
+        width, height = (int(v) for v in size.split("x"))
+        for count in args.frames:
+            frames = make_frames(count, width, height)
+            legacy_time, expected = best_of(args.repeat, legacy_enhance, frames)
+            row = [f"{size:>10} {count:>7} {legacy_time:8.3f}s"]
+            for batch_size in args.batch_sizes:
+                elapsed, result = best_of(args.repeat, processor.enhance_frames, frames, batch_size)
+                if not all(np.array_equal(a, b) for a, b in zip(expected, result)):
+                    raise SystemExit(f"Output mismatch at {size}, {count} frames, batch {batch_size}")
+                row.append(f"{elapsed:8.3f}s")
+            print(" ".join(row) + f"   ({legacy_time / elapsed:.1f}x at b={args.batch_sizes[-1]})")
+
+
+if __name__ == "__main__":
+    main()
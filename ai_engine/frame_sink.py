@@ -0,0 +1,290 @@
+import os
+import queue
+import asyncio
+import threading
+import subprocess
+from collections import deque
+from pathlib import Path
+from typing import AsyncIterable, Iterable, List, Optional, Union
+
+import numpy as np
+import torch
+from PIL import Image
+
+Frame = Union[np.ndarray, torch.Tensor, Image.Image]
+
+# Encoded frames waiting for ffmpeg; memory use is (queue_size + 2) frames
+DEFAULT_QUEUE_SIZE = 8
+STDERR_TAIL_LINES = 50
+
+
+class FrameSink:
+    """
+    Streaming video encoder with bounded memory
+
+    Frames (numpy RGB arrays, PyTorch tensors or PIL Images) are converted
+    one at a time into a small pool of reused uint8 HxWx3 buffers and handed
+    to a background thread that pipes them into ffmpeg. The producer only
+    blocks when the encoder falls `queue_size` frames behind, so generation
+    and encoding overlap and memory does not grow with clip length.
+
+    Usage:
+        with FrameSink("out.mp4", fps=24) as sink:
+            for frame in frames:
+                sink.write(frame)
+    """
+    def __init__(
+        self,
+        output_path: Union[str, Path],
+        fps: int = 24,
+        audio_path: Optional[Union[str, Path]] = None,
+        queue_size: int = DEFAULT_QUEUE_SIZE,
+        ffmpeg_path: Optional[str] = None,
+        crf: int = 18,
+        preset: str = "veryfast"
+    ):
+        """
+        Initialize the sink; ffmpeg starts when the first frame arrives
+
+        Args:
+            output_path: Path to save the output video
+            fps: Frames per second
+            audio_path: Optional audio file muxed in the same pass (trimmed to the video)
+            queue_size: Frames that may wait for the encoder before write() blocks
+            ffmpeg_path: FFmpeg executable (default: $FFMPEG_PATH or "ffmpeg")
+            crf: x264 quality
+            preset: x264 speed preset
+        """
+        self.output_path = Path(output_path)
+        self.fps = fps
+        self.audio_path = Path(audio_path) if audio_path else None
+        self.queue_size = max(1, queue_size)
+        self.ffmpeg_path = ffmpeg_path or os.getenv("FFMPEG_PATH", "ffmpeg")
+        self.crf = crf
+        self.preset = preset
+
+        self.width: Optional[int] = None
+        self.height: Optional[int] = None
+        self.frames_written = 0
+
+        self._process: Optional[subprocess.Popen] = None
+        self._pending: Optional[queue.Queue] = None
+        self._free: Optional[queue.Queue] = None
+        self._buffers: List[np.ndarray] = []
+        self._encoder: Optional[threading.Thread] = None
+        self._stderr_reader: Optional[threading.Thread] = None
+        self._stderr_tail: deque = deque(maxlen=STDERR_TAIL_LINES)
+        self._error: Optional[BaseException] = None
+        self._closed = False
+
+    # --- lifecycle ---------------------------------------------------------
+
+    def __enter__(self) -> "FrameSink":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+        return False
+
+    def _command(self) -> List[str]:
+        cmd = [
+            self.ffmpeg_path, "-y", "-loglevel", "error",
+            "-f", "rawvideo", "-pix_fmt", "rgb24",
+            "-s", f"{self.width}x{self.height}", "-r", str(self.fps),
+            "-i", "pipe:0"
+        ]
+        if self.audio_path:
+            cmd += ["-i", str(self.audio_path), "-map", "0:v:0", "-map", "1:a:0", "-c:a", "aac", "-shortest"]
+        cmd += [
+            "-c:v", "libx264", "-preset", self.preset, "-crf", str(self.crf),
+            "-pix_fmt", "yuv420p",
+            # x264 needs even dimensions for 4:2:0
+            "-vf", "pad=ceil(iw/2)*2:ceil(ih/2)*2",
+            "-movflags", "+faststart",
+            str(self.output_path)
+        ]
+        return cmd
+
+    def _start(self, height: int, width: int) -> None:
+        self.height, self.width = height, width
+        os.makedirs(self.output_path.parent, exist_ok=True)
+
+        self._buffers = [np.empty((height, width, 3), dtype=np.uint8) for _ in range(self.queue_size + 2)]
+        self._free = queue.Queue()
+        for index in range(len(self._buffers)):
+            self._free.put(index)
+        self._pending = queue.Queue(maxsize=self.queue_size)
+
+        self._process = subprocess.Popen(
+            self._command(),
+            stdin=subprocess.PIPE,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE
+        )
+        self._stderr_reader = threading.Thread(target=self._drain_stderr, daemon=True)
+        self._stderr_reader.start()
+        self._encoder = threading.Thread(target=self._encode, daemon=True)
+        self._encoder.start()
+
+    def _drain_stderr(self) -> None:
+        for line in self._process.stderr:
+            self._stderr_tail.append(line.decode(errors="replace").rstrip())
+
+    def _encode(self) -> None:
+        """Encoder thread: pipe queued buffers into ffmpeg and recycle them"""
+        stdin = self._process.stdin
+        while True:
+            index = self._pending.get()
+            if index is None:
+                break
+            try:
+                if self._error is None:
+                    stdin.write(memoryview(self._buffers[index]))
+            except (BrokenPipeError, OSError) as e:
+                self._error = e
+            finally:
+                self._free.put(index)
+        try:
+            stdin.close()
+        except OSError:
+            pass
+
+    def _check(self) -> None:
+        if self._error is not None:
+            raise RuntimeError(f"Video encoder failed: {self._stderr()}") from self._error
+
+    def _stderr(self) -> str:
+        return "\n".join(self._stderr_tail) or "no output from ffmpeg"
+
+    # --- writing -----------------------------------------------------------
+
+    def write(self, frame: Frame) -> None:
+        """
+        Convert a frame into a free buffer and queue it for encoding
+
+        Blocks while `queue_size` frames are already waiting for the encoder.
+        """
+        if self._closed:
+            raise RuntimeError("FrameSink is closed")
+        if self._process is None:
+            self._start(*frame_size(frame))
+        self._check()
+
+        index = self._free.get()
+        try:
+            to_rgb_uint8(frame, self._buffers[index])
+        except Exception:
+            self._free.put(index)
+            raise
+        self._pending.put(index)
+        self.frames_written += 1
+
+    def write_all(self, frames: Iterable[Frame]) -> "FrameSink":
+        """Write every frame from an iterable (list, generator, ...)"""
+        for frame in frames:
+            self.write(frame)
+        return self
+
+    async def write_all_async(self, frames: Union[AsyncIterable[Frame], Iterable[Frame]]) -> "FrameSink":
+        """Write frames from an async (or plain) iterable without blocking the event loop"""
+        if hasattr(frames, "__aiter__"):
+            async for frame in frames:
+                await asyncio.to_thread(self.write, frame)
+        else:
+            for frame in frames:
+                await asyncio.to_thread(self.write, frame)
+        return self
+
+    def close(self) -> Path:
+        """
+        Flush queued frames and wait for ffmpeg to finish
+
+        Returns:
+            Path to the output video
+
+        Raises:
+            RuntimeError: If no frames were written or ffmpeg failed
+        """
+        if self._closed:
+            return self.output_path
+        self._closed = True
+        if self._process is None:
+            raise RuntimeError("No frames were written")
+
+        self._pending.put(None)
+        self._encoder.join()
+        returncode = self._process.wait()
+        self._stderr_reader.join()
+        if self._error is not None or returncode != 0:
+            raise RuntimeError(f"Video encoder failed with status {returncode}: {self._stderr()}")
+        return self.output_path
+
+    def abort(self) -> None:
+        """Stop encoding and remove the partial output"""
+        if self._closed:
+            return
+        self._closed = True
+        if self._process is None:
+            return
+        self._error = self._error or RuntimeError("aborted")
+        self._process.kill()
+        self._pending.put(None)
+        self._encoder.join()
+        self._process.wait()
+        if self.output_path.exists():
+            os.remove(self.output_path)
+
+
+def frame_size(frame: Frame) -> tuple:
+    """(height, width) of a frame in any supported format"""
+    if isinstance(frame, Image.Image):
+        return frame.height, frame.width
+    shape = tuple(frame.shape)
+    if len(shape) == 3 and shape[0] in (1, 3, 4) and shape[2] not in (1, 3, 4):
+        # Channel-first tensor/array
+        return shape[1], shape[2]
+    return shape[0], shape[1]
+
+
+def to_rgb_uint8(frame: Frame, out: np.ndarray) -> np.ndarray:
+    """
+    Write a frame into `out` (HxWx3 uint8 RGB) without allocating a new frame
+
+    Float inputs are treated as 0..1; channel-first tensors/arrays are
+    transposed; grayscale is broadcast to three channels and alpha dropped.
+    CUDA tensors are scaled and cast on the GPU, then copied straight into
+    the host buffer.
+    """
+    if isinstance(frame, Image.Image):
+        if frame.mode != "RGB":
+            frame = frame.convert("RGB")
+        np.copyto(out, np.asarray(frame))
+        return out
+
+    if isinstance(frame, torch.Tensor):
+        tensor = frame.detach()
+        if tensor.dim() == 3 and tensor.shape[0] in (1, 3, 4) and tensor.shape[2] not in (1, 3, 4):
+            tensor = tensor.permute(1, 2, 0)
+        if tensor.is_floating_point():
+            tensor = (tensor * 255).clamp_(0, 255)
+        if tensor.dim() == 2:
+            tensor = tensor.unsqueeze(-1)
+        if tensor.shape[-1] == 1:
+            tensor = tensor.expand(-1, -1, 3)
+        # copy_ casts and moves device memory straight into the host buffer
+        torch.from_numpy(out).copy_(tensor[..., :3])
+        return out
+
+    array = np.asarray(frame)
+    if array.ndim == 3 and array.shape[0] in (1, 3, 4) and array.shape[2] not in (1, 3, 4):
+        array = array.transpose(1, 2, 0)
+    if array.ndim == 2:
+        array = array[..., None]
+    if array.dtype.kind == "f":
+        array = np.clip(array * 255, 0, 255)
+    # Broadcasting fills all three channels from a single grayscale one
+    np.copyto(out, array[..., :3], casting="unsafe")
+    return out
@@ -0,0 +1,256 @@
+import os
+import json
+import uuid
+import tempfile
+import subprocess
+from pathlib import Path
+from typing import Callable, Iterable, Iterator, Optional, Tuple, Union
+
+import cv2
+import numpy as np
+
+from .frame_sink import Frame, FrameSink, frame_size, to_rgb_uint8
+
+CHANNELS = 3
+
+
+def default_scratch_dir() -> Path:
+    """Scratch directory for frame stores: $FRAME_STORE_DIR or the system temp dir"""
+    return Path(os.getenv("FRAME_STORE_DIR") or tempfile.gettempdir())
+
+
+class FrameStore:
+    """
+    Disk-backed clip of uint8 HxWx3 RGB frames
+
+    Frames live in a raw file mapped with numpy.memmap, so a clip can be much
+    larger than RAM: the OS pages frames in and out as they are touched.
+    Indexing and slicing return memmap views (no copies), and a JSON sidecar
+    records the layout so another stage or process can reopen the same file
+    with FrameStore.open().
+
+    Usage:
+        with FrameStore.from_video("in.mp4") as store:
+            for start, batch in store.batches(16):
+                batch[:] = process(batch)
+            store.to_video("out.mp4", fps=24)
+    """
+    def __init__(self, path: Union[str, Path], count: int, height: int, width: int,
+                 fps: Optional[float] = None, mode: str = "r+", owned: bool = False):
+        """
+        Map an existing raw frame file; use the create/open/from_* constructors instead
+
+        Args:
+            path: Raw frame file
+            count: Number of frames
+            height: Frame height in pixels
+            width: Frame width in pixels
+            fps: Frame rate, if known
+            mode: numpy.memmap mode ("r" for read-only, "r+" for read-write)
+            owned: Delete the files when the store is closed
+        """
+        self.path = Path(path)
+        self.shape = (count, height, width, CHANNELS)
+        self.fps = fps
+        self.owned = owned
+        if count:
+            self.array = np.memmap(self.path, dtype=np.uint8, mode=mode, shape=self.shape)
+        else:
+            # numpy cannot map an empty file
+            self.array = np.empty(self.shape, dtype=np.uint8)
+
+    # --- constructors ------------------------------------------------------
+
+    @staticmethod
+    def _new_path(scratch_dir: Optional[Union[str, Path]]) -> Path:
+        directory = Path(scratch_dir) if scratch_dir else default_scratch_dir()
+        os.makedirs(directory, exist_ok=True)
+        return directory / f"frames_{uuid.uuid4().hex}.raw"
+
+    @classmethod
+    def create(cls, count: int, height: int, width: int, fps: Optional[float] = None,
+               scratch_dir: Optional[Union[str, Path]] = None) -> "FrameStore":
+        """Allocate an empty (zero-filled, sparse where supported) store"""
+        path = cls._new_path(scratch_dir)
+        with open(path, "wb") as f:
+            f.truncate(count * height * width * CHANNELS)
+        store = cls(path, count, height, width, fps=fps, owned=True)
+        store._write_meta()
+        return store
+
+    @classmethod
+    def open(cls, path: Union[str, Path], mode: str = "r+") -> "FrameStore":
+        """Reopen a store written by another stage, using its sidecar metadata"""
+        path = Path(path)
+        with open(cls._meta_path(path)) as f:
+            meta = json.load(f)
+        return cls(path, meta["count"], meta["height"], meta["width"], fps=meta.get("fps"), mode=mode)
+
+    @classmethod
+    def from_frames(cls, frames: Iterable[Frame], fps: Optional[float] = None,
+                    scratch_dir: Optional[Union[str, Path]] = None) -> "FrameStore":
+        """
+        Spool frames (numpy, tensors or PIL Images) to disk one at a time
+
+        Only one frame buffer is held in memory, so generators of any length work.
+        """
+        path = cls._new_path(scratch_dir)
+        count, height, width = 0, 0, 0
+        buffer = None
+        try:
+            with open(path, "wb") as f:
+                for frame in frames:
+                    if buffer is None:
+                        height, width = frame_size(frame)
+                        buffer = np.empty((height, width, CHANNELS), dtype=np.uint8)
+                    f.write(memoryview(to_rgb_uint8(frame, buffer)))
+                    count += 1
+        except BaseException:
+            os.remove(path)
+            raise
+        store = cls(path, count, height, width, fps=fps, owned=True)
+        store._write_meta()
+        return store
+
+    @classmethod
+    def from_video(cls, video_path: Union[str, Path], scratch_dir: Optional[Union[str, Path]] = None,
+                   ffmpeg_path: Optional[str] = None) -> "FrameStore":
+        """
+        Decode a video straight into a store
+
+        ffmpeg writes raw RGB frames directly into the backing file, so
+        decoded frames never pass through Python.
+
+        Raises:
+            RuntimeError: If the video cannot be opened or decoded
+        """
+        capture = cv2.VideoCapture(str(video_path))
+        try:
+            if not capture.isOpened():
+                raise RuntimeError(f"Cannot open video {video_path}")
+            width = int(capture.get(cv2.CAP_PROP_FRAME_WIDTH))
+            height = int(capture.get(cv2.CAP_PROP_FRAME_HEIGHT))
+            fps = capture.get(cv2.CAP_PROP_FPS) or None
+        finally:
+            capture.release()
+
+        path = cls._new_path(scratch_dir)
+        cmd = [
+            ffmpeg_path or os.getenv("FFMPEG_PATH", "ffmpeg"), "-v", "error",
+            "-i", str(video_path),
+            "-f", "rawvideo", "-pix_fmt", "rgb24", "-s", f"{width}x{height}",
+            "pipe:1"
+        ]
+        with open(path, "wb") as f:
+            result = subprocess.run(cmd, stdout=f, stderr=subprocess.PIPE)
+        if result.returncode != 0:
+            os.remove(path)
+            raise RuntimeError(f"Failed to decode {video_path}: {result.stderr.decode(errors='replace')[-2000:]}")
+
+        count = os.path.getsize(path) // (width * height * CHANNELS)
+        store = cls(path, count, height, width, fps=fps, owned=True)
+        store._write_meta()
+        return store
+
+    # --- metadata ----------------------------------------------------------
+
+    @staticmethod
+    def _meta_path(path: Path) -> Path:
+        return path.with_suffix(".json")
+
+    def _write_meta(self) -> None:
+        count, height, width, _ = self.shape
+        with open(self._meta_path(self.path), "w") as f:
+            json.dump({"count": count, "height": height, "width": width, "fps": self.fps, "dtype": "uint8"}, f)
+
+    # --- access ------------------------------------------------------------
+
+    def __len__(self) -> int:
+        return self.shape[0]
+
+    def __getitem__(self, index):
+        """Frames or slices of frames as memmap views (no copy)"""
+        return self.array[index]
+
+    def __iter__(self) -> Iterator[np.ndarray]:
+        return iter(self.array)
+
+    @property
+    def height(self) -> int:
+        return self.shape[1]
+
+    @property
+    def width(self) -> int:
+        return self.shape[2]
+
+    @property
+    def nbytes(self) -> int:
+        return int(np.prod(self.shape))
+
+    def batches(self, batch_size: int) -> Iterator[Tuple[int, np.ndarray]]:
+        """Yield (start, view) for consecutive batches of frames"""
+        for start in range(0, len(self), batch_size):
+            yield start, self.array[start:start + batch_size]
+
+    def map_batches(self, func: Callable[[np.ndarray], np.ndarray], batch_size: int = 16,
+                    out: Optional["FrameStore"] = None) -> "FrameStore":
+        """
+        Apply func to each batch view and write the result into `out`
+
+        Args:
+            func: Takes a (B, H, W, 3) uint8 view and returns an array of the same shape
+            batch_size: Frames per batch
+            out: Destination store (default: this store, in place)
+
+        Returns:
+            The destination store
+        """
+        out = out or self
+        for start, batch in self.batches(batch_size):
+            result = func(batch)
+            if result is None:
+                # func modified the batch in place
+                result = batch
+            if out is not self or result is not batch:
+                np.copyto(out.array[start:start + len(batch)], result)
+        out.flush()
+        return out
+
+    def empty_like(self, scratch_dir: Optional[Union[str, Path]] = None) -> "FrameStore":
+        """New store with the same layout, e.g. as the output of a pass"""
+        count, height, width, _ = self.shape
+        return FrameStore.create(count, height, width, fps=self.fps, scratch_dir=scratch_dir or self.path.parent)
+
+    # --- output ------------------------------------------------------------
+
+    def to_video(self, output_path: Union[str, Path], fps: Optional[float] = None,
+                 audio_path: Optional[Union[str, Path]] = None, batch_size: int = 16) -> Path:
+        """Encode the store with a FrameSink, reading it batch by batch"""
+        fps = fps or self.fps or 24
+        with FrameSink(output_path, fps=fps, audio_path=audio_path) as sink:
+            for _, batch in self.batches(batch_size):
+                sink.write_all(batch)
+        return sink.output_path
+
+    # --- lifecycle ---------------------------------------------------------
+
+    def flush(self) -> None:
+        if isinstance(self.array, np.memmap) and self.array.mode != "r":
+            self.array.flush()
+
+    def close(self) -> None:
+        """Release the mapping; files of stores created here are deleted"""
+        self.flush()
+        self.array = None
+        if self.owned:
+            # On POSIX, views still held elsewhere keep the pages mapped
+            for path in (self.path, self._meta_path(self.path)):
+                if path.exists():
+                    os.remove(path)
+
+    def __enter__(self) -> "FrameStore":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
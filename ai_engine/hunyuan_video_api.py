@@ -2,14 +2,11 @@
 import os
 import time
 import uuid
-import json
 import logging
 import argparse
 import threading
-from pathlib import Path
 from flask import Flask, request, jsonify, send_file, render_template_string
 import torch
-import requests
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -407,38 +404,15 @@ def run_generation(generation_id):
         # Create a dummy MP4 file if it doesn't exist (for demo purposes)
         if not os.path.exists(output_path):
             try:
-                # Try to create a dummy video file
-                import numpy as np
-                import cv2
+                # Imported here so the API starts without the demo renderer's dependencies
+                from synthetic_video import synthetic_frames, write_clip
                 
-                # Create a simple color gradient video
-                dummy_frames = []
-                frame_count = min(video_length, 129)  # Max 129 frames like Replicate example
-                for i in range(frame_count):
-                    frame = np.zeros((height, width, 3), dtype=np.uint8)
-                    # Create a gradient based on frame number
-                    r = int(255 * (i / frame_count))
-                    g = int(255 * (1 - i / frame_count))
-                    b = int(255 * (0.5 + 0.5 * np.sin(i / frame_count * 6 * np.pi)))
-                    
-                    # Fill the frame with the color
-                    frame[:, :, 0] = b
-                    frame[:, :, 1] = g
-                    frame[:, :, 2] = r
-                    
-                    # Add a text with the prompt
-                    prompt_short = prompt[:30] + "..." if len(prompt) > 30 else prompt
-                    cv2.putText(frame, prompt_short, (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 
-                                0.8, (255, 255, 255), 2)
-                    
-                    dummy_frames.append(frame)
-                
-                # Write frames to video
-                fourcc = cv2.VideoWriter_fourcc(*'mp4v')
-                out = cv2.VideoWriter(output_path, fourcc, fps, (width, height))
-                for frame in dummy_frames:
-                    out.write(frame)
-                out.release()
+                # Render a dummy clip (max 129 frames like Replicate example),
+                # streaming frames straight into the encoder
+                frame_count = min(video_length, 129)
+                prompt_short = prompt[:30] + "..." if len(prompt) > 30 else prompt
+                frames = synthetic_frames(width, height, frame_count, fps, text=prompt_short)
+                write_clip(frames, output_path, width, height, fps)
                 
             except Exception as e:
                 logger.error(f"Error creating dummy video: {str(e)}")
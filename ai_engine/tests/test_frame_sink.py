@@ -0,0 +1,96 @@
+import os
+import shutil
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from ai_engine.frame_sink import FrameSink
+
+FFMPEG = shutil.which(os.getenv("FFMPEG_PATH", "ffmpeg"))
+posix_only = pytest.mark.skipif(os.name == "nt", reason="fake encoders are shell scripts")
+
+# Larger than a pipe buffer, so an encoder that stops reading blocks the pipe
+FRAME = np.zeros((256, 256, 3), dtype=np.uint8)
+
+
+def fake_encoder(tmp_path, script: str) -> str:
+    """Executable standing in for ffmpeg."""
+    path = tmp_path / "fake_ffmpeg.sh"
+    path.write_text("#!/bin/sh\n" + script + "\n")
+    path.chmod(0o755)
+    return str(path)
+
+
+@posix_only
+def test_write_blocks_when_encoder_falls_behind(tmp_path):
+    """Test that the producer stalls after queue_size frames and abort() releases it."""
+    output = tmp_path / "out.mp4"
+    sink = FrameSink(output, queue_size=2, ffmpeg_path=fake_encoder(tmp_path, "exec sleep 30"))
+
+    def produce():
+        try:
+            for _ in range(50):
+                sink.write(FRAME)
+        except RuntimeError:
+            pass
+
+    producer = threading.Thread(target=produce)
+    producer.start()
+    time.sleep(0.5)
+
+    assert producer.is_alive()
+    # One frame stuck in the pipe write plus queue_size waiting
+    assert sink.frames_written <= sink.queue_size + 1
+
+    sink.abort()
+    producer.join(5)
+    assert not producer.is_alive()
+    assert sink._process.returncode is not None
+    assert not output.exists()
+
+
+@posix_only
+def test_encoder_exit_reaches_the_producer(tmp_path):
+    """Test that an ffmpeg that dies makes write() and close() raise with its stderr."""
+    sink = FrameSink(tmp_path / "out.mp4", queue_size=2, ffmpeg_path=fake_encoder(tmp_path, "echo 'bad option' >&2; exit 1"))
+
+    with pytest.raises(RuntimeError, match="Video encoder failed"):
+        for _ in range(200):
+            sink.write(FRAME)
+    with pytest.raises(RuntimeError, match="status 1.*bad option"):
+        sink.close()
+
+
+@pytest.mark.skipif(FFMPEG is None, reason="ffmpeg not available")
+def test_close_encodes_every_frame(tmp_path):
+    """Test a normal encode and that closing twice is harmless."""
+    frames = (np.full((90, 161, 3), i * 10, dtype=np.uint8) for i in range(12))
+    with FrameSink(tmp_path / "out.mp4", fps=12, ffmpeg_path=FFMPEG) as sink:
+        sink.write_all(frames)
+
+    assert sink.frames_written == 12
+    assert sink.output_path.stat().st_size > 0
+    assert sink.close() == sink.output_path
+
+
+@pytest.mark.skipif(FFMPEG is None, reason="ffmpeg not available")
+def test_error_in_with_block_aborts(tmp_path):
+    """Test that an exception inside the with block kills ffmpeg and removes the partial file."""
+    output = tmp_path / "out.mp4"
+    with pytest.raises(ValueError):
+        with FrameSink(output, ffmpeg_path=FFMPEG) as sink:
+            sink.write(FRAME)
+            raise ValueError("generation failed")
+
+    assert sink._process.returncode is not None
+    assert not output.exists()
+    with pytest.raises(RuntimeError, match="closed"):
+        sink.write(FRAME)
+
+
+def test_close_without_frames_fails(tmp_path):
+    """Test that closing an unused sink reports that nothing was written."""
+    with pytest.raises(RuntimeError, match="No frames"):
+        FrameSink(tmp_path / "out.mp4").close()
@@ -0,0 +1,84 @@
+import os
+import shutil
+
+import numpy as np
+import pytest
+
+from ai_engine.frame_store import FrameStore
+
+FFMPEG = shutil.which(os.getenv("FFMPEG_PATH", "ffmpeg"))
+
+
+def make_frames(count=5, height=16, width=24):
+    rng = np.random.default_rng(0)
+    return [rng.integers(0, 256, size=(height, width, 3), dtype=np.uint8) for _ in range(count)]
+
+
+def test_memmap_round_trip(tmp_path):
+    """Test that spooled frames read back unchanged as views of the backing file."""
+    frames = make_frames()
+    with FrameStore.from_frames(iter(frames), fps=12, scratch_dir=tmp_path) as store:
+        assert len(store) == 5 and (store.height, store.width) == (16, 24)
+        assert store.path.stat().st_size == store.nbytes
+        np.testing.assert_array_equal(np.asarray(store[:]), np.stack(frames))
+        assert isinstance(store[1:3], np.memmap)
+
+        # Writes through a batch view land in the file
+        for _, batch in store.batches(2):
+            batch[:] = 255 - batch
+        store.flush()
+        on_disk = np.fromfile(store.path, dtype=np.uint8).reshape(store.shape)
+        np.testing.assert_array_equal(on_disk, 255 - np.stack(frames))
+
+
+def test_reopen_existing_store(tmp_path):
+    """Test that another stage can reopen a store from its sidecar metadata."""
+    with FrameStore.create(3, 8, 10, fps=24, scratch_dir=tmp_path) as store:
+        store.array[2] = 7
+        store.flush()
+
+        reopened = FrameStore.open(store.path, mode="r")
+        assert reopened.shape == store.shape and reopened.fps == 24
+        assert int(reopened[2].max()) == 7 and int(reopened[0].max()) == 0
+        # A reopened store does not own the files
+        reopened.close()
+        assert store.path.exists()
+
+
+def test_close_deletes_owned_files(tmp_path):
+    """Test cleanup of the raw file and sidecar, including after a failed spool."""
+    store = FrameStore.create(2, 4, 4, scratch_dir=tmp_path)
+    assert len(list(tmp_path.iterdir())) == 2
+    store.close()
+    assert list(tmp_path.iterdir()) == []
+
+    def failing():
+        yield make_frames(1)[0]
+        raise RuntimeError("generator failed")
+
+    with pytest.raises(RuntimeError):
+        FrameStore.from_frames(failing(), scratch_dir=tmp_path)
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_map_batches_into_another_store(tmp_path):
+    """Test a pass that writes its results into a new store of the same layout."""
+    with FrameStore.from_frames(make_frames(), scratch_dir=tmp_path) as store:
+        with store.empty_like() as out:
+            store.map_batches(lambda batch: batch // 2, batch_size=2, out=out)
+            np.testing.assert_array_equal(np.asarray(out[:]), np.asarray(store[:]) // 2)
+
+
+@pytest.mark.skipif(FFMPEG is None, reason="ffmpeg not available")
+def test_video_round_trip(tmp_path):
+    """Test encoding a store and decoding the video back into a new store."""
+    frames = [np.full((32, 48, 3), value, dtype=np.uint8) for value in range(0, 240, 30)]
+    with FrameStore.from_frames(frames, fps=8, scratch_dir=tmp_path) as store:
+        video = store.to_video(tmp_path / "clip.mp4")
+
+    with FrameStore.from_video(video, scratch_dir=tmp_path, ffmpeg_path=FFMPEG) as decoded:
+        assert decoded.shape == (8, 32, 48, 3)
+        assert decoded.fps == pytest.approx(8)
+        # Lossy, but flat grey frames survive closely
+        means = np.asarray(decoded[:]).reshape(8, -1).mean(axis=1)
+        np.testing.assert_allclose(means, np.arange(0, 240, 30), atol=3)
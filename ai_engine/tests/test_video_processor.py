@@ -0,0 +1,91 @@
+import asyncio
+import os
+import shutil
+
+import cv2
+import numpy as np
+import pytest
+
+from ai_engine.video_processor import VideoProcessor
+
+FFMPEG = shutil.which(os.getenv("FFMPEG_PATH", "ffmpeg"))
+
+
+def legacy_enhance(frames):
+    """The whole-clip, frame-by-frame CPU path enhance_frames used to run."""
+    kernel = np.array([[-1, -1, -1], [-1, 9, -1], [-1, -1, -1]])
+    return [cv2.filter2D(cv2.convertScaleAbs(frame, alpha=1.2, beta=10), -1, kernel) for frame in frames]
+
+
+@pytest.fixture
+def processor():
+    processor = VideoProcessor()
+    processor.use_gpu = False
+    processor.enhance_workers = 3
+    return processor
+
+
+def make_frames(count=11, height=20, width=30):
+    rng = np.random.default_rng(1)
+    return [rng.integers(0, 256, size=(height, width, 3), dtype=np.uint8) for _ in range(count)]
+
+
+@pytest.mark.parametrize("batch_size", [1, 4, 16])
+def test_chunked_cpu_enhance_matches_whole_clip(processor, batch_size):
+    """Test that the chunked, threaded CPU path gives the frames the old loop gave."""
+    frames = make_frames()
+    expected = legacy_enhance(frames)
+
+    enhanced = processor.enhance_frames(frames, batch_size=batch_size)
+
+    np.testing.assert_array_equal(np.stack(enhanced), np.stack(expected))
+
+
+def test_enhance_into_strided_output(processor):
+    """Test that results reach an output that is not C-contiguous."""
+    frames = make_frames()
+    backing = np.zeros((len(frames), 20, 30, 6), dtype=np.uint8)
+    out = backing[..., :3]
+    assert not out.flags.c_contiguous
+
+    processor.enhance_frames(frames, batch_size=4, out=out)
+
+    np.testing.assert_array_equal(out, np.stack(legacy_enhance(frames)))
+    assert not backing[..., 3:].any()
+
+
+def test_enhance_in_place(processor):
+    """Test enhancing a clip array into itself."""
+    frames = np.stack(make_frames())
+    expected = np.stack(legacy_enhance(list(frames)))
+
+    processor.enhance_frames(frames, batch_size=4, out=frames)
+
+    np.testing.assert_array_equal(frames, expected)
+
+
+@pytest.mark.skipif(FFMPEG is None, reason="ffmpeg not available")
+def test_frames_to_video_streams_a_generator(processor, tmp_path, monkeypatch):
+    """Test encoding frames from a generator through the streaming sink."""
+    monkeypatch.setenv("FFMPEG_PATH", FFMPEG)
+    frames = (np.full((36, 64, 3), i, dtype=np.uint8) for i in range(10))
+
+    output = processor.frames_to_video(frames, tmp_path / "clip.mp4", fps=10)
+
+    assert output.stat().st_size > 0
+
+
+@pytest.mark.skipif(FFMPEG is None, reason="ffmpeg not available")
+def test_frames_to_video_async_aborts_on_producer_error(processor, tmp_path, monkeypatch):
+    """Test that a failing async producer removes the partial video."""
+    monkeypatch.setenv("FFMPEG_PATH", FFMPEG)
+    output = tmp_path / "clip.mp4"
+
+    async def frames():
+        for i in range(3):
+            yield np.full((36, 64, 3), i, dtype=np.uint8)
+        raise RuntimeError("model crashed")
+
+    with pytest.raises(RuntimeError, match="model crashed"):
+        asyncio.run(processor.frames_to_video_async(frames(), output))
+    assert not output.exists()
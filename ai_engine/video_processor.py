@@ -1,11 +1,14 @@
 import os
 import cv2
+import asyncio
 import numpy as np
 from pathlib import Path
-from typing import List, Union, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterable, Iterable, List, Sequence, Union, Optional
 import torch
 from PIL import Image
-import moviepy.editor as mp
+
+from .frame_sink import FrameSink, DEFAULT_QUEUE_SIZE
 
 class VideoProcessor:
     """
@@ -16,6 +19,10 @@ class VideoProcessor:
         self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
         self.use_gpu = torch.cuda.is_available()
         
+        # Chunking for enhance_frames: frames per chunk and CPU worker threads
+        self.enhance_batch_size = int(os.getenv("ENHANCE_BATCH_SIZE", "16"))
+        self.enhance_workers = int(os.getenv("ENHANCE_WORKERS", "0")) or os.cpu_count() or 4
+        
         if self.use_gpu:
             # Enable GPU acceleration for OpenCV if CUDA is available in the OpenCV build
             # Check if GPU acceleration is available in OpenCV
@@ -26,18 +33,42 @@ class VideoProcessor:
             else:
                 print("OpenCV without CUDA support. Using PyTorch GPU acceleration where possible.")
     
+    def open_sink(
+        self,
+        output_path: Union[str, Path],
+        fps: int = 24,
+        audio_path: Optional[Union[str, Path]] = None,
+        queue_size: int = DEFAULT_QUEUE_SIZE
+    ) -> FrameSink:
+        """
+        Open a streaming sink that encodes frames as they are produced
+        
+        Args:
+            output_path: Path to save the output video
+            fps: Frames per second
+            audio_path: Optional path to an audio file to add to the video
+            queue_size: Frames buffered between the producer and the encoder
+            
+        Returns:
+            FrameSink to write frames to; close it (or use it as a context manager) to finish
+        """
+        return FrameSink(output_path, fps=fps, audio_path=audio_path, queue_size=queue_size)
+    
     def frames_to_video(
         self, 
-        frames: List[Union[np.ndarray, torch.Tensor, Image.Image]], 
+        frames: Iterable[Union[np.ndarray, torch.Tensor, Image.Image]], 
         output_path: Union[str, Path], 
         fps: int = 24,
         audio_path: Optional[Union[str, Path]] = None
     ) -> Path:
         """
-        Convert a list of frames to a video file with GPU acceleration when possible
+        Encode frames to an H.264 video, streaming them through ffmpeg
+        
+        Frames are converted one at a time into reused buffers, so a generator
+        keeps memory constant regardless of clip length.
         
         Args:
-            frames: List of frames (as numpy arrays, PyTorch tensors, or PIL Images)
+            frames: Frames (as RGB numpy arrays, PyTorch tensors, or PIL Images); any iterable
             output_path: Path to save the output video
             fps: Frames per second
             audio_path: Optional path to an audio file to add to the video
@@ -45,166 +76,158 @@ class VideoProcessor:
         Returns:
             Path to the output video
         """
-        output_path = Path(output_path)
-        os.makedirs(output_path.parent, exist_ok=True)
-        
-        # Ensure all frames are numpy arrays
-        np_frames = []
-        for frame in frames:
-            if isinstance(frame, torch.Tensor):
-                # Handle PyTorch tensors efficiently with GPU
-                if frame.device.type != 'cpu' and self.use_gpu:
-                    # If tensor is on GPU and we have GPU, process it there
-                    if frame.shape[0] == 3:  # Channel-first format
-                        frame = frame.permute(1, 2, 0)
-                    frame = (frame * 255).clamp(0, 255).to(torch.uint8)
-                    frame = frame.cpu().numpy()
-                else:
-                    # Move to CPU for processing
-                    frame = frame.cpu().numpy()
-                    # Convert from CxHxW to HxWxC and scale to 0-255
-                    if frame.shape[0] == 3:  # Channel-first format
-                        frame = frame.transpose(1, 2, 0)
-                    frame = (frame * 255).astype(np.uint8)
-            elif isinstance(frame, Image.Image):
-                frame = np.array(frame)
-            
-            np_frames.append(frame)
-        
-        # Get dimensions from the first frame
-        height, width = np_frames[0].shape[:2]
-        
-        # Create temporary file for video without audio
-        temp_path = output_path.with_suffix('.temp.mp4')
+        with self.open_sink(output_path, fps, audio_path) as sink:
+            sink.write_all(frames)
         
-        # Create video writer
-        fourcc = cv2.VideoWriter_fourcc(*'mp4v')
-        out = cv2.VideoWriter(str(temp_path), fourcc, fps, (width, height))
-        
-        # Process frames in batches for better efficiency
-        batch_size = 10  # Process 10 frames at a time
-        for i in range(0, len(np_frames), batch_size):
-            batch_frames = np_frames[i:i+batch_size]
-            
-            # Process each frame in the batch
-            for frame in batch_frames:
-                # Convert frame to BGR if it's RGB
-                if frame.shape[2] == 3:  # RGB
-                    frame = cv2.cvtColor(frame, cv2.COLOR_RGB2BGR)
-                out.write(frame)
-        
-        out.release()
-        
-        # Add audio if provided
-        if audio_path:
-            video = mp.VideoFileClip(str(temp_path))
-            audio = mp.AudioFileClip(str(audio_path))
-            
-            # If audio is longer than video, trim it
-            if audio.duration > video.duration:
-                audio = audio.subclip(0, video.duration)
-            
-            # Set audio
-            final_video = video.set_audio(audio)
-            final_video.write_videofile(str(output_path), codec='libx264', audio_codec='aac')
+        if self.use_gpu:
+            # Clear GPU memory
+            torch.cuda.empty_cache()
             
-            # Clean up
-            video.close()
-            audio.close()
-            os.remove(temp_path)
-        else:
-            # If no audio, just rename the temp file
-            os.rename(temp_path, output_path)
+        return sink.output_path
+    
+    async def frames_to_video_async(
+        self,
+        frames: Union[AsyncIterable[Union[np.ndarray, torch.Tensor, Image.Image]], Iterable[Union[np.ndarray, torch.Tensor, Image.Image]]],
+        output_path: Union[str, Path],
+        fps: int = 24,
+        audio_path: Optional[Union[str, Path]] = None
+    ) -> Path:
+        """
+        Async variant of frames_to_video for frames produced by an async generator
+        
+        Conversion and the blocking hand-off to the encoder run in a worker
+        thread, so the event loop stays responsive.
+        """
+        sink = self.open_sink(output_path, fps, audio_path)
+        try:
+            await sink.write_all_async(frames)
+        except BaseException:
+            await asyncio.to_thread(sink.abort)
+            raise
+        await asyncio.to_thread(sink.close)
         
         if self.use_gpu:
-            # Clear GPU memory
             torch.cuda.empty_cache()
             
-        return output_path
+        return sink.output_path
     
-    def enhance_frames(self, frames: List[np.ndarray]) -> List[np.ndarray]:
+    def enhance_frames(
+        self,
+        frames: Sequence[np.ndarray],
+        batch_size: Optional[int] = None,
+        out: Optional[np.ndarray] = None
+    ) -> List[np.ndarray]:
         """
         Apply post-processing enhancements to generated frames using GPU acceleration when possible
         
+        Frames are processed in chunks of `batch_size`, converting uint8 to
+        float and back per chunk, so device memory is bounded by one chunk
+        instead of the whole clip. Results are written into one preallocated
+        uint8 array.
+        
         Args:
-            frames: List of frames as numpy arrays
+            frames: Sequence of HxWx3 uint8 frames as numpy arrays, or a FrameStore
+            batch_size: Frames per chunk (default: ENHANCE_BATCH_SIZE, 16)
+            out: Optional (N, H, W, 3) uint8 destination, e.g. FrameStore.array;
+                may be the input array itself to enhance in place
             
         Returns:
-            List of enhanced frames
+            List of enhanced frames (views into a single array)
         """
-        enhanced_frames = []
+        if len(frames) == 0:
+            return []
+        batch_size = max(1, batch_size or self.enhance_batch_size)
+        output = out if out is not None else np.empty((len(frames),) + frames[0].shape, dtype=np.uint8)
         
-        # Use batch processing when possible
         if self.use_gpu:
-            # Convert to torch tensor for GPU processing
-            batch = []
-            for frame in frames:
-                # Convert to float32 tensor
-                tensor_frame = torch.from_numpy(frame).float().to(self.device) / 255.0
-                # Convert from HWC to CHW format
-                if tensor_frame.shape[2] == 3:  # HWC format
-                    tensor_frame = tensor_frame.permute(2, 0, 1)
-                batch.append(tensor_frame)
-            
-            # Stack frames into a batch
-            if batch:
-                batch_tensor = torch.stack(batch)
-                
-                # Apply enhancements on GPU
-                with torch.no_grad():
-                    # Apply contrast and brightness adjustment
-                    alpha = 1.2  # Contrast control
-                    beta = 0.1    # Brightness control (in normalized space)
-                    
-                    # Apply contrast and brightness
-                    enhanced_batch = alpha * batch_tensor + beta
-                    enhanced_batch = torch.clamp(enhanced_batch, 0.0, 1.0)
-                    
-                    # Apply simple sharpening
-                    # Define 3x3 sharpening kernel
-                    kernel = torch.tensor([
-                        [-1, -1, -1],
-                        [-1,  9, -1],
-                        [-1, -1, -1]
-                    ], dtype=torch.float32, device=self.device).view(1, 1, 3, 3).repeat(3, 1, 1, 1)
-                    
-                    # Apply 2D convolution for sharpening
-                    # We need padding=1 to maintain the same dimensions
-                    enhanced_batch = torch.nn.functional.conv2d(
-                        enhanced_batch,
-                        kernel,
-                        padding=1,
-                        groups=3  # Apply separately to each channel
-                    )
-                    
-                    # Ensure values are in valid range
-                    enhanced_batch = torch.clamp(enhanced_batch, 0.0, 1.0)
+            self._enhance_gpu(frames, output, batch_size)
+        else:
+            self._enhance_cpu(frames, output, batch_size)
+        
+        return list(output)
+    
+    def _enhance_gpu(self, frames: Sequence[np.ndarray], output: np.ndarray, batch_size: int) -> None:
+        """Contrast/brightness and sharpening on the GPU, one chunk at a time"""
+        alpha = 1.2  # Contrast control
+        beta = 0.1    # Brightness control (in normalized space)
+        
+        # 3x3 sharpening kernel, applied separately to each channel
+        kernel = torch.tensor([
+            [-1, -1, -1],
+            [-1,  9, -1],
+            [-1, -1, -1]
+        ], dtype=torch.float32, device=self.device).view(1, 1, 3, 3).repeat(3, 1, 1, 1)
+        
+        # Pinned uint8 staging buffer reused for every chunk; the host->device
+        # copy is asynchronous and the float conversion happens on the GPU
+        staging = torch.empty((batch_size,) + output.shape[1:], dtype=torch.uint8, pin_memory=True)
+        staging_np = staging.numpy()
+        
+        with torch.no_grad():
+            for start in range(0, len(frames), batch_size):
+                chunk = frames[start:start + batch_size]
+                count = len(chunk)
+                np.stack(chunk, out=staging_np[:count])
                 
-                # Convert back to numpy arrays
-                for enhanced in enhanced_batch:
-                    # Convert from CHW to HWC format
-                    enhanced = enhanced.permute(1, 2, 0)
-                    # Convert to uint8
-                    enhanced = (enhanced * 255).cpu().numpy().astype(np.uint8)
-                    enhanced_frames.append(enhanced)
+                batch = staging[:count].to(self.device, non_blocking=True)
+                batch = batch.permute(0, 3, 1, 2).float().div_(255.0)
                 
-                # Free GPU memory
-                torch.cuda.empty_cache()
-        else:
-            # CPU processing for each frame
-            for frame in frames:
-                # Apply simple enhancements for demonstration
-                # Increase contrast
-                alpha = 1.2  # Contrast control (1.0-3.0)
-                beta = 10    # Brightness control (0-100)
-                enhanced = cv2.convertScaleAbs(frame, alpha=alpha, beta=beta)
+                # Apply contrast and brightness
+                batch.mul_(alpha).add_(beta).clamp_(0.0, 1.0)
                 
-                # Apply slight sharpening
-                kernel = np.array([[-1, -1, -1], 
-                                   [-1,  9, -1], 
-                                   [-1, -1, -1]])
-                enhanced = cv2.filter2D(enhanced, -1, kernel)
+                # Apply 2D convolution for sharpening
+                # We need padding=1 to maintain the same dimensions
+                batch = torch.nn.functional.conv2d(batch, kernel, padding=1, groups=3)
+                batch.clamp_(0.0, 1.0)
                 
-                enhanced_frames.append(enhanced)
+                # Back to uint8 HWC on the device, then one copy into the output slice
+                result = batch.mul_(255.0).to(torch.uint8).permute(0, 2, 3, 1)
+                torch.from_numpy(output[start:start + count]).copy_(result)
         
-        return enhanced_frames 
\ No newline at end of file
+        # Free GPU memory
+        torch.cuda.empty_cache()
+    
+    def _enhance_cpu(self, frames: Sequence[np.ndarray], output: np.ndarray, batch_size: int) -> None:
+        """Contrast/brightness and sharpening with OpenCV, chunks spread over a thread pool"""
+        chunks = [
+            (start, min(start + batch_size, len(frames)))
+            for start in range(0, len(frames), batch_size)
+        ]
+        if len(chunks) == 1:
+            enhance_chunk_cpu(frames, output, *chunks[0])
+            return
+        # OpenCV releases the GIL, so threads give real parallelism here
+        with ThreadPoolExecutor(max_workers=min(self.enhance_workers, len(chunks))) as pool:
+            list(pool.map(lambda bounds: enhance_chunk_cpu(frames, output, *bounds), chunks))
+
+
+# Contrast (1.0-3.0) and brightness (0-100) used on the CPU path
+CPU_CONTRAST = 1.2
+CPU_BRIGHTNESS = 10
+SHARPEN_KERNEL = np.array([[-1, -1, -1],
+                           [-1,  9, -1],
+                           [-1, -1, -1]], dtype=np.float32)
+
+
+def enhance_chunk_cpu(frames: Sequence[np.ndarray], output: np.ndarray, start: int, end: int) -> None:
+    """
+    Enhance frames[start:end] into output[start:end]
+    
+    The chunk is stacked into the output slice, contrast/brightness runs as
+    a single convertScaleAbs over the whole chunk, and sharpening runs per
+    frame in place so the kernel never reads across frame borders. The
+    in-place work needs a C-contiguous slice (reshape would silently copy
+    anything else); for a strided output it runs on a scratch chunk that
+    is then copied back.
+    """
+    chunk = output[start:end]
+    work = chunk if chunk.flags.c_contiguous else np.empty(chunk.shape, dtype=np.uint8)
+    np.stack(frames[start:end], out=work)
+    flat = work.reshape(len(work) * work.shape[1], -1)
+    if not np.shares_memory(flat, work):
+        raise RuntimeError("Frame chunk could not be flattened in place; the enhancement would be lost")
+    cv2.convertScaleAbs(flat, dst=flat, alpha=CPU_CONTRAST, beta=CPU_BRIGHTNESS)
+    for frame in work:
+        cv2.filter2D(frame, -1, SHARPEN_KERNEL, dst=frame)
+    if work is not chunk:
+        np.copyto(chunk, work)
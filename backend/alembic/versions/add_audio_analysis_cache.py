@@ -0,0 +1,56 @@
+"""add content hash cache columns to audio analyses
+
+Revision ID: 5c1d8e2f9a47
+Revises: 37a24f31e5a9
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '5c1d8e2f9a47'
+down_revision = '37a24f31e5a9'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+
+    if not inspector.has_table('audio_analyses'):
+        # The table used to be created by create_all only
+        op.create_table(
+            'audio_analyses',
+            sa.Column('id', sa.Integer(), primary_key=True, index=True),
+            sa.Column('video_id', sa.String(), nullable=True, index=True),
+            sa.Column('beats', sa.JSON(), nullable=True),
+            sa.Column('tempo', sa.Float(), nullable=True),
+            sa.Column('segments', sa.JSON(), nullable=True),
+            sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()')),
+        )
+
+        existing = set()
+    else:
+        # create_all may already have added the new columns
+        existing = {column['name'] for column in inspector.get_columns('audio_analyses')}
+
+    # Cache key and full result
+    if 'content_hash' not in existing:
+        op.add_column('audio_analyses', sa.Column('content_hash', sa.String(64), nullable=True))
+        op.create_index('ix_audio_analyses_content_hash', 'audio_analyses', ['content_hash'])
+    if 'params_key' not in existing:
+        op.add_column('audio_analyses', sa.Column('params_key', sa.String(64), nullable=True))
+        op.create_unique_constraint(
+            'uq_audio_analyses_content_params', 'audio_analyses', ['content_hash', 'params_key']
+        )
+    if 'analysis' not in existing:
+        op.add_column('audio_analyses', sa.Column('analysis', sa.JSON(), nullable=True))
+
+
+def downgrade():
+    op.drop_constraint('uq_audio_analyses_content_params', 'audio_analyses', type_='unique')
+    op.drop_index('ix_audio_analyses_content_hash', table_name='audio_analyses')
+    op.drop_column('audio_analyses', 'analysis')
+    op.drop_column('audio_analyses', 'params_key')
+    op.drop_column('audio_analyses', 'content_hash')
@@ -20,6 +20,8 @@ from typing import Union, List, Optional, Dict, Any, Tuple, Callable, Awaitable
 from app.utils.config import get_settings
 from app.utils.file_utils import ensure_directory
 from app.utils.gpu_info import get_gpu_info, get_gpu_acceleration_info
+from app.utils.media.executor import media_executor
+from app.utils.media.subtitles import burn_subtitles
 # Import the HunyuanVideoGenerator
 from app.models.hunyuan.hunyuan_video import HunyuanVideoGenerator
 
@@ -167,10 +169,13 @@ def extract_prompt_attributes(prompt: str) -> Dict[str, Any]:
     
     return attributes
 
-def add_subtitles_to_video(video_path, subtitles, subtitle_style):
+async def add_subtitles_to_video(video_path, subtitles, subtitle_style):
     """
     Add subtitles to a video file
     
+    The subtitles are rendered to ASS and burned in with a single ffmpeg
+    filter pass; audio is stream-copied.
+    
     Args:
         video_path: Path to the video file
         subtitles: List of SubtitleEntry objects
@@ -179,65 +184,18 @@ def add_subtitles_to_video(video_path, subtitles, subtitle_style):
     Returns:
         Path to the video with subtitles
     """
-    import moviepy.editor as mp
-    from moviepy.video.tools.subtitles import SubtitlesClip
-    import os
-    
     logger.info(f"Adding subtitles to video: {video_path}")
     
     # Create output path for subtitled video
-    filename, ext = os.path.splitext(video_path)
+    filename, ext = os.path.splitext(str(video_path))
     output_path = f"{filename}_subtitled{ext}"
     
-    # Load the video
-    video = mp.VideoFileClip(video_path)
-    
-    # Convert subtitles to the format expected by moviepy
-    subs = []
-    for sub in subtitles:
-        subs.append(((sub["start"], sub["end"]), sub["text"]))
-    
-    # Create subtitles clip
-    font_size = subtitle_style.get("font_size", 24)
-    font_color = subtitle_style.get("font_color", "white")
-    
-    generator = lambda txt: mp.TextClip(
-        txt, 
-        font='Arial', 
-        fontsize=font_size, 
-        color=font_color,
-        bg_color=subtitle_style.get("background_color", "black") if subtitle_style.get("background", True) else None,
-        size=(video.w, None),
-        method='caption'
-    )
-    
-    if subtitle_style.get("background", True):
-        generator = lambda txt: mp.TextClip(
-            txt, 
-            font='Arial', 
-            fontsize=font_size, 
-            color=font_color,
-            bg_color=subtitle_style.get("background_color", "black"),
-            size=(video.w, None),
-            method='caption'
-        ).set_opacity(subtitle_style.get("background_opacity", 0.5))
-    
-    subtitles_clip = SubtitlesClip(subs, generator)
-    
-    # Position the subtitles
-    position = lambda t: ('center', 'bottom')
-    subtitles_clip = subtitles_clip.set_position(position)
-    
-    # Composite video with subtitles
-    final_video = mp.CompositeVideoClip([video, subtitles_clip])
-    
-    # Write output
-    final_video.write_videofile(output_path, codec="libx264", audio_codec="aac")
+    await burn_subtitles(video_path, subtitles, output_path, style=subtitle_style or {})
     
     logger.info(f"Subtitles added successfully: {output_path}")
     return output_path
 
-def apply_lip_sync(video_path, audio_path, subtitles):
+async def apply_lip_sync(video_path, audio_path, subtitles):
     """
     Apply lip sync to a video using the audio and subtitles for timing
         
@@ -251,7 +209,6 @@ def apply_lip_sync(video_path, audio_path, subtitles):
     """
     import os
     from datetime import datetime
-    import subprocess
     
     logger.info(f"Applying lip sync to video: {video_path}")
     
@@ -276,7 +233,7 @@ def apply_lip_sync(video_path, audio_path, subtitles):
             output_path
         ]
         
-        subprocess.run(command, check=True)
+        await media_executor.run(command)
         logger.info(f"Lip sync (audio overlay) applied successfully: {output_path}")
         
         # Note for production: Replace with actual lip sync implementation
@@ -397,14 +354,14 @@ class HunyuanWrapper:
             # Apply subtitles if provided
             if subtitles and len(subtitles) > 0:
                 self.logger.info(f"Adding subtitles to video: {video_path}")
-                video_path = add_subtitles_to_video(video_path, subtitles, subtitle_style)
+                video_path = await add_subtitles_to_video(video_path, subtitles, subtitle_style)
                 
                 # Apply lip sync if requested and subtitles are available
                 if enable_lip_sync:
                     # For lip sync, we would need an audio file
                     # This is a placeholder - a real implementation would need an audio file to sync with
                     # audio_path = "path_to_audio_file.wav"  # This should be provided or generated
-                    # video_path = apply_lip_sync(video_path, audio_path, subtitles)
+                    # video_path = await apply_lip_sync(video_path, audio_path, subtitles)
                     self.logger.warning("Lip sync requested but not implemented yet")
             
             return str(video_path)
@@ -19,6 +19,8 @@ from app.middleware.error_handlers import register_error_handlers
 from app.middleware.request_logger import RequestLoggerMiddleware
 from app.services.queue_service import video_queue
 from app.services.database_service import db_service
+from app.utils.http_pool import close_http_client
+from app.utils.audio.analysis_pool import analysis_pool
 from app.controllers import (
     video_controller,
     lyrics_controller, 
@@ -52,6 +54,8 @@ async def lifespan(app: FastAPI):
     # Shutdown: Stop the queue processor
     print("Application shutdown: Stopping video queue processor...")
     await video_queue.stop_processor()
+    await close_http_client()
+    analysis_pool.shutdown()
     print("Application shutdown complete.")
 
 def create_app() -> FastAPI:
@@ -4,10 +4,10 @@ Hunyuan API client for backwards compatibility.
 This module forwards to the hunyuan_service for MVC structure compatibility.
 """
 import logging
-from pathlib import Path
 from typing import Dict, Any
 
 from ..services.hunyuan_service import hunyuan_service
+from ..utils.http_pool import close_http_client
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -34,7 +34,8 @@ class HunyuanClient:
             # Run the async function in the loop
             return loop.run_until_complete(hunyuan_service.check_health())
         finally:
-            # Close the loop
+            # Close this loop's pooled HTTP client, then the loop
+            loop.run_until_complete(close_http_client())
             loop.close()
     
     def generate_video(self, prompt, num_inference_steps=50, height=320, width=576, output_format="gif") -> Dict[str, Any]:
@@ -57,7 +58,8 @@ class HunyuanClient:
                 )
             )
         finally:
-            # Close the loop
+            # Close this loop's pooled HTTP client, then the loop
+            loop.run_until_complete(close_http_client())
             loop.close()
 
 # Create singleton instance
@@ -189,4 +189,38 @@ def create_audio_analysis(
 
 def get_audio_analysis(db: Session, video_id: str) -> Optional[models.AudioAnalysis]:
     """Get audio analysis by video ID"""
-    return db.query(models.AudioAnalysis).filter(models.AudioAnalysis.video_id == video_id).first() 
\ No newline at end of file
+    return db.query(models.AudioAnalysis).filter(models.AudioAnalysis.video_id == video_id).first()
+
+def get_audio_analysis_by_hash(db: Session, content_hash: str, params_key: str) -> Optional[models.AudioAnalysis]:
+    """Get a cached audio analysis by content hash and analysis parameters"""
+    return db.query(models.AudioAnalysis).filter(
+        models.AudioAnalysis.content_hash == content_hash,
+        models.AudioAnalysis.params_key == params_key
+    ).first()
+
+def save_audio_analysis(
+    db: Session,
+    content_hash: str,
+    params_key: str,
+    analysis: dict,
+    video_id: Optional[str] = None
+) -> models.AudioAnalysis:
+    """Store an analysis result for some audio content (first writer wins)"""
+    db_analysis = models.AudioAnalysis(
+        video_id=video_id,
+        beats=analysis.get("beat_timestamps"),
+        tempo=analysis.get("tempo_bpm"),
+        content_hash=content_hash,
+        params_key=params_key,
+        analysis=analysis
+    )
+    
+    db.add(db_analysis)
+    try:
+        db.commit()
+    except IntegrityError:
+        # Stored concurrently by another request
+        db.rollback()
+        return get_audio_analysis_by_hash(db, content_hash, params_key)
+    db.refresh(db_analysis)
+    return db_analysis 
\ No newline at end of file
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Boolean, Float, JSON
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Boolean, Float, JSON, UniqueConstraint
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from .database import Base
@@ -53,10 +53,16 @@ class LyricPrompt(Base):
     
 class AudioAnalysis(Base):
     __tablename__ = "audio_analyses"
+    __table_args__ = (
+        UniqueConstraint("content_hash", "params_key", name="uq_audio_analyses_content_params"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     video_id = Column(String, index=True)  # Reference to the video
     beats = Column(JSON, nullable=True)  # Beat timestamps
     tempo = Column(Float, nullable=True)  # Tempo in BPM
     segments = Column(JSON, nullable=True)  # Audio segments
+    content_hash = Column(String(64), nullable=True, index=True)  # SHA-256 of the audio content
+    params_key = Column(String(64), nullable=True)  # Fingerprint of the analysis parameters
+    analysis = Column(JSON, nullable=True)  # Full analysis result
     created_at = Column(DateTime(timezone=True), server_default=func.now()) 
\ No newline at end of file
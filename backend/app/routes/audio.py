@@ -1,15 +1,27 @@
 from fastapi import APIRouter, UploadFile, File, HTTPException
-from fastapi.responses import JSONResponse
-import tempfile
-import os
+from fastapi.responses import JSONResponse, StreamingResponse
+import json
 from typing import Dict, Any, List
-import shutil
 
-from ..utils.audio.beat_detector import get_beat_timestamps, analyze_beats
+from ..utils.audio.beat_detector import analyze_beats
+from ..utils.audio.analysis_cache import analysis_cache
+from ..utils.audio.analysis_jobs import analysis_jobs
+from ..utils.audio.analysis_pool import AnalysisPoolError, analysis_pool
+from ..utils.audio.ingest import AudioHandle, AudioIngestError, spooled_upload
 
 router = APIRouter(prefix="/audio", tags=["audio"])
 
 
+async def _cached_analysis(audio: AudioHandle) -> Dict[str, Any]:
+    """Beat analysis of spooled audio, reused for identical content."""
+    async def compute():
+        # Decoding and beat tracking run in a worker process, off the event loop
+        return await analysis_pool.run(analyze_beats, str(audio.path))
+
+    analysis, _ = await analysis_cache.get_or_compute(audio.sha256, compute)
+    return analysis
+
+
 @router.post("/beats")
 async def detect_beats(file: UploadFile = File(...)) -> Dict[str, List[float]]:
     """
@@ -25,26 +37,18 @@ async def detect_beats(file: UploadFile = File(...)) -> Dict[str, List[float]]:
     if not file.content_type or not file.content_type.startswith(("audio/", "video/")):
         raise HTTPException(status_code=400, detail="File must be an audio file")
     
-    # Create a temporary file to save the uploaded audio
-    temp_dir = tempfile.mkdtemp()
     try:
-        temp_file_path = os.path.join(temp_dir, file.filename)
-        
-        # Save uploaded file
-        with open(temp_file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-        
-        # Get beat timestamps
-        beat_times = get_beat_timestamps(temp_file_path)
+        # Spool the upload to a temporary file (removed afterwards) in chunks
+        async with spooled_upload(file) as audio:
+            # Beat timestamps come from the (cached) full analysis
+            analysis = await _cached_analysis(audio)
         
-        return {"beat_timestamps": beat_times}
+        return {"beat_timestamps": analysis["beat_timestamps"]}
     
+    except (AudioIngestError, AnalysisPoolError) as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error detecting beats: {str(e)}")
-    
-    finally:
-        # Clean up temporary files
-        shutil.rmtree(temp_dir)
 
 
 @router.post("/analyze")
@@ -62,28 +66,88 @@ async def analyze_audio(file: UploadFile = File(...)) -> Dict[str, Any]:
     if not file.content_type or not file.content_type.startswith(("audio/", "video/")):
         raise HTTPException(status_code=400, detail="File must be an audio file")
     
-    # Create a temporary file to save the uploaded audio
-    temp_dir = tempfile.mkdtemp()
     try:
-        temp_file_path = os.path.join(temp_dir, file.filename)
-        
-        # Save uploaded file
-        with open(temp_file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
+        # Spool the upload to a temporary file (removed afterwards) in chunks
+        async with spooled_upload(file) as audio:
+            # Get comprehensive beat analysis
+            analysis = await _cached_analysis(audio)
         
-        # Get comprehensive beat analysis
-        analysis = analyze_beats(temp_file_path)
-        
-        # Ensure all values are JSON serializable
-        for key, value in analysis.items():
-            if hasattr(value, 'tolist'):
-                analysis[key] = value.tolist()
-                
-        return analysis
+        # Ensure all values are JSON serializable (without touching the cached dict)
+        return {
+            key: value.tolist() if hasattr(value, 'tolist') else value
+            for key, value in analysis.items()
+        }
     
+    except (AudioIngestError, AnalysisPoolError) as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error analyzing audio: {str(e)}")
+
+
+@router.post("/analyses", status_code=202)
+async def submit_analysis(file: UploadFile = File(...)) -> Dict[str, Any]:
+    """
+    Start a background beat analysis, for files too long to analyse within one request.
     
-    finally:
-        # Clean up temporary files
-        shutil.rmtree(temp_dir) 
\ No newline at end of file
+    Args:
+        file: Uploaded audio file
+        
+    Returns:
+        The analysis id with URLs to poll or subscribe to its status
+    """
+    if not file.content_type or not file.content_type.startswith(("audio/", "video/")):
+        raise HTTPException(status_code=400, detail="File must be an audio file")
+    
+    try:
+        job = await analysis_jobs.submit(file)
+    except (AudioIngestError, AnalysisPoolError) as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
+    
+    return {
+        "analysis_id": job.analysis_id,
+        "status": job.status,
+        "status_url": f"/audio/analyses/{job.analysis_id}",
+        "events_url": f"/audio/analyses/{job.analysis_id}/events"
+    }
+
+
+@router.get("/analyses/{analysis_id}")
+async def get_analysis(analysis_id: str) -> Dict[str, Any]:
+    """
+    Get the status of a background analysis, with the result once completed.
+    """
+    job = analysis_jobs.get(analysis_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Analysis {analysis_id} not found")
+    return job.model_dump()
+
+
+@router.get("/analyses/{analysis_id}/events")
+async def analysis_events(analysis_id: str):
+    """
+    Subscribe to a background analysis: a server-sent event per status change,
+    ending with the completed or failed status.
+    """
+    if analysis_jobs.get(analysis_id) is None:
+        raise HTTPException(status_code=404, detail=f"Analysis {analysis_id} not found")
+    
+    async def event_stream():
+        async for job in analysis_jobs.watch(analysis_id):
+            yield f"data: {json.dumps(job.model_dump())}\n\n"
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no"  # Prevents buffering for nginx
+        }
+    )
+
+
+@router.get("/pool")
+async def analysis_pool_status() -> Dict[str, Any]:
+    """
+    Load of the audio analysis process pool.
+    """
+    return analysis_pool.metrics()
@@ -1,9 +1,9 @@
 from fastapi import APIRouter, HTTPException, BackgroundTasks
 from app.models.lyrics import LyricsToVideoRequest, LyricsToVideoResponse
-from app.services.lyrics_service import LyricsService
+# Use the shared service so every route sees the same jobs
+from app.services.lyrics_service import lyrics_service
 
 router = APIRouter()
-lyrics_service = LyricsService()
 
 @router.post("/generate", response_model=LyricsToVideoResponse)
 async def generate_video_from_lyrics(request: LyricsToVideoRequest):
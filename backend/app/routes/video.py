@@ -9,7 +9,6 @@ import time
 import random
 import logging
 import asyncio
-import subprocess
 import re
 import traceback
 from typing import Dict, Any, Optional, List, Union
@@ -21,7 +20,6 @@ import openai
 import ffmpeg
 import httpx
 import zipfile
-import requests
 import tempfile
 import shutil
 from fastapi.responses import StreamingResponse
@@ -29,8 +27,16 @@ from fastapi.responses import StreamingResponse
 from ..utils.config import get_settings
 from ..ai_core import HunyuanWrapper
 from ..utils.gpu_info import get_gpu_info, get_gpu_acceleration_info
+from ..utils.http_pool import ArtifactError, download_artifact
 from ..services.video_queue import video_queue, VideoQueue, VideoStatus
 from ..models.video import VideoGenerationRequest, VideoGenerationResponse, VideoGenerationStatus
+from ..utils.media.hls import HLSPlaylist
+from ..utils.media.executor import media_executor, MediaProcessError, PRIORITY_PROBE
+from ..utils.media.probe import media_probe, concat_compatible, MediaProbeError
+from ..utils.media.segment_planner import Segment, plan_segments
+from ..utils.media.stitch import stitch_segments
+from ..utils.media.subtitles import build_srt, burn_subtitle_file, mux_soft_subtitles, segment_cues
+from ..services.workflow_engine import Workflow, Node, WorkflowError
 # Import our fixed function
 from .video_fix import setup_openai_api_key, generate_sequential_prompts_fixed
 
@@ -41,6 +47,11 @@ settings = get_settings()
 # Initialize the video generator
 model = HunyuanWrapper()
 
+# How many long-video segments are generated on Replicate at the same time
+LONG_VIDEO_SEGMENT_CONCURRENCY = 4
+# Most frames the Replicate video model renders in one segment
+REPLICATE_MAX_FRAMES = 96
+
 # --- Add OpenAI Client Initialization ---
 if settings.OPENAI_API_KEY:
     openai.api_key = settings.OPENAI_API_KEY
@@ -67,6 +78,7 @@ async def video_health_check():
                 "memory": f"{gpu_info.get('gpu_memory', 0):.1f} GB" if gpu_info["available"] else "N/A",
                 "cuda_version": acceleration_info.get("cuda_version", "N/A")
             },
+            "media_executor": media_executor.metrics(),
             "service": "Video Generation API"
         }
     except Exception as e:
@@ -245,7 +257,7 @@ async def generate_video(
                         input_params = {
                             "prompt": prompt,
                             "negative_prompt": "low quality, blurry, noisy, text, watermark, signature, low-res, bad anatomy, bad proportions, deformed body, duplicate, extra limbs",
-                            "num_frames": min(96, fps * duration), # Cap at 96 frames which is typical limit
+                            "num_frames": min(REPLICATE_MAX_FRAMES, fps * duration),
                             "width": width,
                             "height": height,
                             "fps": fps,
@@ -610,6 +622,7 @@ async def generate_long_video(
     width: int = Query(1920, gt=0, description="Video width in pixels"),
     height: int = Query(1080, gt=0, description="Video height in pixels"),
     seed: Optional[int] = None,
+    burn_subtitles: bool = Query(False, description="Burn subtitles into the picture instead of adding a subtitle track"),
     background_tasks: BackgroundTasks = BackgroundTasks()
 ):
     """
@@ -629,6 +642,8 @@ async def generate_long_video(
         width: Video width
         height: Video height
         seed: Random seed for reproducibility
+        burn_subtitles: Burn the prompt subtitles into the picture; by default
+            they are added as a soft subtitle track without re-encoding
         
     Returns:
         JSON response with job ID and status URL
@@ -636,60 +651,31 @@ async def generate_long_video(
     # Initialize OpenAI API key
     setup_openai_api_key()
     
-    # Calculate number of segments needed
-    num_segments = total_duration // segment_duration
-    if num_segments < 1:
-        num_segments = 1  # Minimum 1 segment
+    # Calculate number of segments needed; segments longer than the model's
+    # frame limit are split, so the count comes from the same plan the job uses
+    num_segments = len(plan_long_video(total_duration, segment_duration, fps))
     
-    # Adjust segment duration if rounding occurred
-    if num_segments * segment_duration < total_duration:
-        num_segments += 1
-        
     # Generate a unique ID for this long video job
     job_id = f"longvid_{uuid.uuid4().hex[:8]}"
     output_dir = Path(settings.OUTPUT_DIR) / job_id
     os.makedirs(output_dir, exist_ok=True)
     
-    # Create output paths
-    final_video_path = output_dir / f"final_video_{job_id}.mp4"
-    srt_path = output_dir / f"subtitles_{job_id}.srt"
-    
-    # Define the background task BEFORE referencing it
-    async def generate_long_video_task():
-        try:
-            # 1. Update initial status
-            await update_status(job_id, "processing", 0, "Starting long video generation...")
-            
-            # 2. Generate evolving prompts using OpenAI
-            await update_status(job_id, "processing", 5, f"Generating {num_segments} evolving prompts...")
-            # Use our fixed function instead of the original
-            prompts = await generate_sequential_prompts_fixed(initial_prompt, num_segments, segment_duration)
-            
-            # 3. Generate SRT subtitles from prompts
-            await update_status(job_id, "processing", 10, "Creating subtitles...")
-            await generate_srt_subtitles(prompts, segment_duration, str(srt_path))
-            
-            # 4. Generate each video segment in parallel
-            await update_status(job_id, "processing", 15, f"Generating {num_segments} video segments in parallel...")
-
-            # 5. Download video segments
-            await update_status(job_id, "processing", 20, f"Downloading {num_segments} video segments...")
-            segment_video_paths = await download_videos(prompts, output_dir)
-            
-            # 6. Stitch videos and add subtitles
-            await update_status(job_id, "processing", 80, f"Stitching {num_segments} segments and adding subtitles...")
-            await stitch_videos_with_subtitles(segment_video_paths, str(srt_path), str(final_video_path))
-            
-            # 7. Final Success Status
-            await update_status(job_id, "completed", 100, f"Long video generation complete ({num_segments} segments generated).")
-
-        except Exception as e:
-            logging.error(f"Job {job_id} failed: {str(e)}")
-            logging.error(traceback.format_exc())
-            await update_status(job_id, "failed", 0, f"Error: {str(e)}")
+    # Persist the request so the job can be resumed after a crash or failure
+    params = {
+        "initial_prompt": initial_prompt,
+        "num_segments": num_segments,
+        "segment_duration": segment_duration,
+        "total_duration": total_duration,
+        "fps": fps,
+        "width": width,
+        "height": height,
+        "seed": seed,
+        "burn_subtitles": burn_subtitles
+    }
+    with open(output_dir / "params.json", "w") as f:
+        json.dump(params, f)
     
-    # Add the generation task to the background AFTER defining it
-    background_tasks.add_task(generate_long_video_task)
+    background_tasks.add_task(run_long_video_job, job_id, params)
     
     # Return immediate response with job ID
     return {
@@ -697,128 +683,299 @@ async def generate_long_video(
         "job_id": job_id,
         "status_url": f"/video/job-status/{job_id}",
         "expected_output": f"/output/{job_id}/final_video_{job_id}.mp4",
+        "playlist_url": f"/output/{job_id}/playlist.m3u8",
         "estimated_segments": num_segments
     }
 
+@router.post("/generate-long/{job_id}/resume")
+async def resume_long_video(job_id: str, background_tasks: BackgroundTasks = BackgroundTasks()):
+    """
+    Resume a long video job from its last completed workflow nodes.
+    
+    Prompts, subtitles and segments that finished in an earlier run are
+    restored from their checkpoints; only the missing work is redone.
+    """
+    params_path = Path(settings.OUTPUT_DIR) / job_id / "params.json"
+    if not params_path.exists():
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found or not resumable")
+    
+    with open(params_path, "r") as f:
+        params = json.load(f)
+    
+    setup_openai_api_key()
+    background_tasks.add_task(run_long_video_job, job_id, params)
+    
+    return {
+        "message": "Long video generation resumed",
+        "job_id": job_id,
+        "status_url": f"/video/job-status/{job_id}"
+    }
+
+def plan_long_video(total_duration: float, segment_duration: float, fps: float) -> List[Segment]:
+    """
+    Segments of a long video: every segment_duration seconds, with the last
+    one taking the remainder, and none longer than REPLICATE_MAX_FRAMES.
+    """
+    return plan_segments(total_duration, fps, target_seconds=segment_duration, max_frames=REPLICATE_MAX_FRAMES)
+
+async def run_long_video_job(job_id: str, params: Dict[str, Any]):
+    """
+    Run (or resume) a long video job as a workflow.
+    
+    The DAG is prompts -> subtitles, prompts -> segment_i (in parallel),
+    segments -> assemble and assemble + subtitles -> captions. Every node is
+    checkpointed in the job directory, so running the same job again only
+    redoes what is missing.
+    """
+    initial_prompt = params["initial_prompt"]
+    segment_duration = params["segment_duration"]
+    output_dir = Path(settings.OUTPUT_DIR) / job_id
+    final_video_path = output_dir / f"final_video_{job_id}.mp4"
+    stitched_path = output_dir / f"stitched_{job_id}.mp4"
+    srt_path = output_dir / f"subtitles_{job_id}.srt"
+    
+    # Exact frames per segment, so the last one stops at total_duration
+    # instead of rendering a full segment that is then played past the end,
+    # and no segment asks for more frames than the model renders
+    total_duration = params.get("total_duration", params["num_segments"] * segment_duration)
+    segment_frames = [segment.num_frames for segment in plan_long_video(total_duration, segment_duration, params["fps"])]
+    num_segments = len(segment_frames)
+    
+    # Every finished segment is remuxed into an HLS playlist right away so
+    # playback can start early.
+    ffmpeg_path = await get_ffmpeg_path()
+    playlist = HLSPlaylist(output_dir, segment_duration, ffmpeg_path=ffmpeg_path) if ffmpeg_path else None
+    playlist_url = f"/output/{job_id}/{playlist.playlist_path.name}" if playlist else None
+    segments_done = 0
+    
+    async def make_prompts(initial_prompt: str, num_segments: int) -> List[str]:
+        return await generate_sequential_prompts_fixed(initial_prompt, num_segments, segment_duration)
+    
+    async def make_subtitles(prompts: List[str]) -> Path:
+        await generate_srt_subtitles(prompts, segment_frames, params["fps"], str(srt_path))
+        return srt_path
+    
+    async def make_segment(prompts: List[str], index: int) -> Path:
+        local_path = await generate_video_segment(
+            prompts[index], index, output_dir,
+            fps=params["fps"], width=params["width"], height=params["height"],
+            segment_duration=segment_duration, seed=params.get("seed"),
+            num_frames=segment_frames[index]
+        )
+        return Path(local_path)
+    
+    async def assemble(segments: List[Path]) -> Path:
+        # The HLS pieces can only be joined by stream copy if every segment
+        # was remuxed (a skipped one would shift every later subtitle cue)
+        # and all share one profile; otherwise stitch the segments themselves,
+        # conforming the odd ones out
+        try:
+            uniform = concat_compatible(await media_probe.probe_many(segments))
+        except MediaProbeError as e:
+            logging.warning(f"Could not probe segments of {job_id}, stitching them instead of the HLS pieces: {e}")
+            uniform = False
+        if playlist and len(playlist.segment_paths) == num_segments and uniform:
+            await playlist.finalize(stitched_path)
+        else:
+            await stitch_videos_with_subtitles([str(p) for p in segments], str(srt_path), str(stitched_path))
+        return stitched_path
+    
+    async def add_captions(video: Path, subtitles: Path, burn: bool) -> Path:
+        if burn:
+            await burn_subtitle_file(video, subtitles, final_video_path, ffmpeg_path=ffmpeg_path or "ffmpeg")
+        else:
+            await mux_soft_subtitles(video, subtitles, final_video_path, ffmpeg_path=ffmpeg_path or "ffmpeg")
+        return final_video_path
+    
+    async def on_node_complete(name: str, output: Any, cached: bool):
+        nonlocal segments_done
+        if name == "prompts":
+            await update_status(job_id, "processing", 10, "Creating subtitles and video segments...", playlist_url=playlist_url)
+        elif name.startswith("segment_"):
+            segments_done += 1
+            if playlist:
+                await playlist.add_segment(int(name.split("_")[1]), output)
+            progress = 15 + int(65 * segments_done / num_segments)
+            await update_status(
+                job_id,
+                "processing",
+                progress,
+                f"Segment {segments_done}/{num_segments} finished" + (" (restored)" if cached else ""),
+                playlist_url=playlist_url
+            )
+        elif name == "assemble":
+            await update_status(job_id, "processing", 90, "Adding subtitles...", playlist_url=playlist_url)
+    
+    workflow = Workflow(
+        f"long_video:{job_id}",
+        store_dir=output_dir / "workflow",
+        pools={"segments": LONG_VIDEO_SEGMENT_CONCURRENCY},
+        on_node_complete=on_node_complete
+    )
+    workflow.add(Node(
+        "prompts",
+        make_prompts,
+        params={"initial_prompt": initial_prompt, "num_segments": num_segments},
+        output_type=list
+    ))
+    workflow.add(Node("subtitles", make_subtitles, deps={"prompts": "prompts"}, output_type=Path))
+    segment_nodes = [
+        workflow.add(Node(
+            f"segment_{i}",
+            make_segment,
+            deps={"prompts": "prompts"},
+            params={"index": i},
+            output_type=Path,
+            pool="segments"
+        )).name
+        for i in range(num_segments)
+    ]
+    workflow.add(Node("assemble", assemble, deps={"segments": segment_nodes}, output_type=Path))
+    workflow.add(Node(
+        "captions",
+        add_captions,
+        deps={"video": "assemble", "subtitles": "subtitles"},
+        params={"burn": params.get("burn_subtitles", False)},
+        output_type=Path
+    ))
+    
+    try:
+        await update_status(job_id, "processing", 5, f"Generating {num_segments} evolving prompts...", playlist_url=playlist_url)
+        await workflow.run()
+        await update_status(
+            job_id,
+            "completed",
+            100,
+            f"Long video generation complete ({num_segments} segments generated).",
+            playlist_url=playlist_url,
+            timings=workflow.timings
+        )
+    except WorkflowError as e:
+        logging.error(f"Job {job_id} failed: {str(e)}")
+        await update_status(
+            job_id,
+            "failed",
+            0,
+            f"Error: {str(e)}. Completed steps are kept; POST /video/generate-long/{job_id}/resume to retry the rest.",
+            playlist_url=playlist_url,
+            timings=workflow.timings
+        )
+    except Exception as e:
+        logging.error(f"Job {job_id} failed: {str(e)}")
+        logging.error(traceback.format_exc())
+        await update_status(job_id, "failed", 0, f"Error: {str(e)}")
+
 # === Helper Functions for Long Video Workflow ===
 
-async def download_videos(prompts: List[str], output_dir: Path) -> List[str]:
-    """Generates videos from prompts and downloads them."""
-    local_paths = []
+async def generate_video_segment(
+    prompt: str,
+    index: int,
+    output_dir: Path,
+    fps: int = 30,
+    width: int = 1920,
+    height: int = 1080,
+    segment_duration: int = 3,
+    seed: Optional[int] = None,
+    num_frames: Optional[int] = None
+) -> str:
+    """
+    Generates a single video segment on Replicate and downloads it.
+    
+    num_frames requests an exact length (e.g. from a segment plan) instead
+    of a full segment_duration; either way REPLICATE_MAX_FRAMES applies.
     
+    Returns:
+        Local path of the downloaded segment
+        
+    Raises:
+        RuntimeError: If the token is missing, the prediction fails or the download fails
+    """
     # Import replicate here to avoid dependency issues if it's not installed
     import replicate
-    replicate_token = os.environ.get("REPLICATE_API_TOKEN", "")
-    if not replicate_token:
-        logging.error("Replicate API token not set. Cannot generate videos.")
-        return []
+    if not os.environ.get("REPLICATE_API_TOKEN", ""):
+        raise RuntimeError("Replicate API token not set. Cannot generate videos.")
     
     # Set the model ID using the version the user has permission for
     model_id = "tencent/hunyuan-video"
     
-    for i, prompt in enumerate(prompts):
-        try:
-            segment_filename = f"segment_{i+1}.mp4"
-            local_path = output_dir / segment_filename
-            logging.info(f"Generating video for prompt {i+1}: {prompt[:50]}...")
-            
-            # Create the parameters for the Hunyuan model
-            input_params = {
-                "prompt": prompt,
-                "negative_prompt": "low quality, blurry, noisy, text, watermark, signature, low-res, bad anatomy, bad proportions, deformed body, duplicate, extra limbs",
-                "num_frames": min(96, fps * segment_duration), # Cap at 96 frames which is typical limit
-                "width": width,
-                "height": height,
-                "fps": fps,
-                "guidance_scale": 9.0, # Increased for better prompt adherence
-                "num_inference_steps": 50,
-                "seed": seed if seed is not None else random.randint(1, 100000)
-            }
-            
-            # Create a prediction
-            prediction = replicate.predictions.create(
-                version=model_id.split(':')[1],
-                input=input_params
-            )
-            
-            # Instead of using wait() method, poll for completion
-            prediction_id = prediction.id
-            logging.info(f"Created prediction with ID: {prediction_id}")
-            
-            # Poll for completion - much longer timeout as requested by user
-            max_polls = 6000  # 6000 polls * 5 seconds = 30000 seconds (500 minutes)
-            status = "processing"
-            
-            for poll in range(max_polls):
-                # Get the latest prediction status
-                prediction = replicate.predictions.get(prediction_id)
-                status = prediction.status
-                
-                if poll % 10 == 0:  # Only log every 10th poll to reduce log spam
-                    logging.info(f"Prediction status: {status} (poll {poll+1}/{max_polls})")
-                
-                if status == "succeeded":
-                    logging.info(f"Prediction succeeded after {poll+1} polls!")
-                    break
-                elif status in ["failed", "canceled"]:
-                    logging.error(f"Prediction failed with status: {status}, Error: {prediction.error}")
-                    break
-                
-                # Wait 5 seconds before polling again
-                await asyncio.sleep(5)
-            
-            # Check if prediction succeeded and download the video
-            if status == "succeeded" and prediction.output:
-                # Get the output URL
-                video_url = prediction.output[0] if isinstance(prediction.output, list) else prediction.output
-                
-                # Download the video
-                logging.info(f"Downloading video from {video_url} to {local_path}")
-                import requests
-                response = requests.get(video_url, stream=True)
-                if response.status_code == 200:
-                    with open(local_path, 'wb') as f:
-                        for chunk in response.iter_content(chunk_size=8192):
-                            f.write(chunk)
-                    local_paths.append(str(local_path))
-                    logging.info(f"Successfully downloaded video to {local_path}")
-                else:
-                    logging.error(f"Failed to download video: HTTP {response.status_code}")
-            else:
-                logging.error(f"Replicate prediction failed or timed out: {status}, Error: {getattr(prediction, 'error', 'Unknown')}")
-        except Exception as e:
-            logging.error(f"Error generating/downloading video for prompt {i+1}: {str(e)}")
-            logging.exception("Full traceback:")
+    segment_filename = f"segment_{index+1}.mp4"
+    local_path = output_dir / segment_filename
+    logging.info(f"Generating video for prompt {index+1}: {prompt[:50]}...")
     
-    logging.info(f"Downloaded {len(local_paths)} out of {len(prompts)} videos")
-    return local_paths
-
-async def generate_srt_subtitles(prompts: List[str], segment_duration: int, output_srt_path: str):
-    """Generates an SRT subtitle file from a list of prompts."""
-    srt_content = ""
-    start_time = 0.0
-    for i, prompt in enumerate(prompts):
-        end_time = start_time + segment_duration
-        # Format start/end times (HH:MM:SS,ms)
-        start_h, start_rem = divmod(start_time, 3600)
-        start_m, start_s = divmod(start_rem, 60)
-        start_ms = int((start_s - int(start_s)) * 1000)
-        
-        end_h, end_rem = divmod(end_time, 3600)
-        end_m, end_s = divmod(end_rem, 60)
-        end_ms = int((end_s - int(end_s)) * 1000)
+    # Create the parameters for the Hunyuan model
+    input_params = {
+        "prompt": prompt,
+        "negative_prompt": "low quality, blurry, noisy, text, watermark, signature, low-res, bad anatomy, bad proportions, deformed body, duplicate, extra limbs",
+        "num_frames": min(REPLICATE_MAX_FRAMES, num_frames or fps * segment_duration),
+        "width": width,
+        "height": height,
+        "fps": fps,
+        "guidance_scale": 9.0, # Increased for better prompt adherence
+        "num_inference_steps": 50,
+        "seed": seed if seed is not None else random.randint(1, 100000)
+    }
+    
+    # Create a prediction; the Replicate client blocks, so it runs in a thread
+    # to keep the event loop free for the other segments
+    prediction = await asyncio.to_thread(
+        replicate.predictions.create,
+        version=model_id.split(':')[1],
+        input=input_params
+    )
+    
+    # Instead of using wait() method, poll for completion
+    prediction_id = prediction.id
+    logging.info(f"Created prediction with ID: {prediction_id}")
+    
+    # Poll for completion - much longer timeout as requested by user
+    max_polls = 6000  # 6000 polls * 5 seconds = 30000 seconds (500 minutes)
+    status = "processing"
+    
+    for poll in range(max_polls):
+        # Get the latest prediction status
+        prediction = await asyncio.to_thread(replicate.predictions.get, prediction_id)
+        status = prediction.status
         
-        start_str = f"{int(start_h):02}:{int(start_m):02}:{int(start_s):02},{start_ms:03}"
-        end_str = f"{int(end_h):02}:{int(end_m):02}:{int(end_s):02},{end_ms:03}"
+        if poll % 10 == 0:  # Only log every 10th poll to reduce log spam
+            logging.info(f"Prediction status: {status} (poll {poll+1}/{max_polls})")
         
-        # Clean up prompt for subtitle display (optional)
-        subtitle_text = prompt.replace('\n', ' ') 
+        if status == "succeeded":
+            logging.info(f"Prediction succeeded after {poll+1} polls!")
+            break
+        elif status in ["failed", "canceled"]:
+            logging.error(f"Prediction failed with status: {status}, Error: {prediction.error}")
+            break
         
-        srt_content += f"{i+1}\n{start_str} --> {end_str}\n{subtitle_text}\n\n"
-        start_time = end_time # Move to next segment start
+        # Wait 5 seconds before polling again
+        await asyncio.sleep(5)
+    
+    # Check if prediction succeeded and download the video
+    if status != "succeeded" or not prediction.output:
+        raise RuntimeError(f"Replicate prediction failed or timed out: {status}, Error: {getattr(prediction, 'error', 'Unknown')}")
+    
+    # Get the output URL
+    video_url = prediction.output[0] if isinstance(prediction.output, list) else prediction.output
+    
+    # Download the video through the shared connection pool
+    logging.info(f"Downloading video from {video_url} to {local_path}")
+    try:
+        await download_artifact(video_url, local_path)
+    except (ArtifactError, httpx.HTTPError) as e:
+        raise RuntimeError(f"Failed to download video: {e}") from e
+    logging.info(f"Successfully downloaded video to {local_path}")
+    return str(local_path)
+
+async def generate_srt_subtitles(prompts: List[str], segment_frames: List[int], fps: float, output_srt_path: str):
+    """
+    Generates an SRT subtitle file from a list of prompts, one cue per segment.
 
+    Each cue spans the frames its segment is requested with, so the cues
+    stay on the segments when the last one is shorter.
+    """
+    # Clean up prompts for subtitle display
+    entries = segment_cues([prompt.replace('\n', ' ') for prompt in prompts], segment_frames, fps)
     with open(output_srt_path, "w", encoding='utf-8') as f:
-        f.write(srt_content)
+        f.write(build_srt(entries))
 
 async def stitch_videos_with_subtitles(video_paths: List[str], subtitle_path: str, output_path: str):
     """Stitches video segments together and adds subtitles using FFmpeg."""
@@ -855,7 +1012,7 @@ async def stitch_videos_with_subtitles(video_paths: List[str], subtitle_path: st
     logging.info(f"Proceeding with {len(valid_video_paths)} valid videos")
     
     # Use the helper function to find FFmpeg
-    ffmpeg_path = get_ffmpeg_path()
+    ffmpeg_path = await get_ffmpeg_path()
     
     if not ffmpeg_path:
         logging.error("FFmpeg is not available. Please install it or use the /video/install-ffmpeg endpoint.")
@@ -878,94 +1035,10 @@ async def stitch_videos_with_subtitles(video_paths: List[str], subtitle_path: st
     # Proceed with video stitching since FFmpeg is available
     logging.info(f"Using FFmpeg at: {ffmpeg_path}")
     
-    # Create a temporary file listing the video segments for FFmpeg concat demuxer
-    list_file_path = Path(valid_video_paths[0]).parent / "ffmpeg_list.txt"
-    logging.info(f"Creating ffmpeg list file: {list_file_path}")
-    
-    with open(list_file_path, "w") as f:
-        for path in valid_video_paths:
-            # Use absolute paths with escaped backslashes
-            abs_path = os.path.abspath(path).replace('\\', '\\\\')
-            f.write(f"file '{abs_path}'\n")
-            logging.info(f"Added to list: {abs_path}")
-
-    # First attempt - concatenate the videos without using subtitles
-    try:
-        cmd = [
-            ffmpeg_path,
-            '-f', 'concat',
-            '-safe', '0',
-            '-i', str(list_file_path),
-            '-c', 'copy',
-            '-y',  # Overwrite output file if it exists
-            output_path
-        ]
-        logging.info(f"Running FFmpeg command: {' '.join(cmd)}")
-        
-        result = subprocess.run(
-            cmd, 
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            check=True
-        )
-        logging.info(f"FFmpeg stitching successful without subtitles")
-        logging.info(f"Output file created: {output_path} ({os.path.getsize(output_path)} bytes)")
-        return
-    except subprocess.CalledProcessError as e:
-        logging.error(f"FFmpeg error: {e.stderr.decode()}")
-        
-        # Try without stream copy
-        logging.info("Retrying FFmpeg without stream copy...")
-        try:
-            cmd = [
-                ffmpeg_path,
-                '-f', 'concat',
-                '-safe', '0',
-                '-i', str(list_file_path),
-                '-c:v', 'libx264',  # Specify video codec explicitly
-                '-c:a', 'aac',
-                '-strict', 'experimental',
-                '-y',
-                output_path
-            ]
-            result = subprocess.run(
-                cmd, 
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                check=True
-            )
-            logging.info(f"FFmpeg retry successful: {os.path.getsize(output_path)} bytes")
-            return
-        except subprocess.CalledProcessError as e2:
-            logging.error(f"FFmpeg retry error: {e2.stderr.decode()}")
-            
-    # If we're here, both attempts failed - try a different approach with one file at a time
-    logging.info("Trying to stitch videos one by one")
-    try:
-        # Copy the first video as a base
-        import shutil
-        shutil.copy2(valid_video_paths[0], output_path)
-        logging.info(f"Copied first video to {output_path}")
-        
-        if len(valid_video_paths) > 1:
-            # Create a text file explaining what happened
-            with open(f"{output_path}.txt", 'w') as f:
-                f.write(f"NOTE: FFmpeg failed to stitch all videos. Only the first segment is included.\n")
-                f.write(f"Generated {len(valid_video_paths)} videos but failed to combine them.\n")
-                f.write(f"\nIndividual video segments are available at:\n")
-                for i, path in enumerate(valid_video_paths):
-                    f.write(f"Segment {i+1}: {path}\n")
-        
-        return
-    except Exception as copy_error:
-        logging.error(f"Failed to copy first video: {str(copy_error)}")
-        # Create a text file with error message
-        with open(output_path, 'w') as f:
-            f.write(f"ERROR: Failed to stitch videos and even copy failed: {str(copy_error)}")
-    finally:
-        # Clean up the temporary list file
-        if list_file_path.exists():
-            os.remove(list_file_path)
+    # Only segments that differ from the dominant stream profile are
+    # re-encoded; everything is then joined with stream copy
+    await stitch_segments(valid_video_paths, output_path, ffmpeg_path=ffmpeg_path)
+    logging.info(f"Output file created: {output_path} ({os.path.getsize(output_path)} bytes)")
 
 # Add this route after the other routes
 @router.get("/install-ffmpeg")
@@ -978,53 +1051,20 @@ async def install_ffmpeg():
         """Generate server-sent events for progress updates."""
         # Define a helper function to send progress events
         def send_event(event_type, data):
-            event_json = json.dumps({"type": event_type, "data": data, "timestamp": datetime.datetime.now().isoformat()})
+            event_json = json.dumps({"type": event_type, "data": data, "timestamp": datetime.now().isoformat()})
             return f"data: {event_json}\n\n"
         
         yield send_event("log", {"level": "info", "message": "Starting FFmpeg installation check..."})
         
-        # Common paths where FFmpeg might be found
-        ffmpeg_candidates = [
-            os.path.join(os.getcwd(), 'ffmpeg', 'bin', 'ffmpeg.exe'),  # backend/ffmpeg/bin
-            os.path.join(os.path.dirname(os.getcwd()), 'ffmpeg', 'bin', 'ffmpeg.exe'),  # parent/ffmpeg/bin
-            os.path.join(os.getcwd(), '..', 'ffmpeg', 'bin', 'ffmpeg.exe'),  # relative path
-            'ffmpeg',  # system PATH
-            os.path.join(os.path.expanduser('~'), 'ffmpeg', 'bin', 'ffmpeg.exe'),  # user home
-        ]
-        
         # Check each location
-        for candidate in ffmpeg_candidates:
-            try:
-                yield send_event("log", {"level": "info", "message": f"Checking for FFmpeg at: {candidate}"})
-                
-                # Test if path exists
-                if os.path.exists(candidate) and os.path.isfile(candidate):
-                    # Try to run FFmpeg
-                    process = subprocess.run([candidate, "-version"], 
-                                           stdout=subprocess.PIPE, 
-                                           stderr=subprocess.PIPE,
-                                           text=True,
-                                           check=True)
-                    
-                    ffmpeg_version = process.stdout.split('\n')[0]
-                    yield send_event("log", {"level": "success", "message": f"Found working FFmpeg: {ffmpeg_version}"})
-                    yield send_event("result", {"status": "success", "path": candidate, "already_installed": True})
-                    return
-                    
-                # For the PATH version, just try running it
-                elif candidate == 'ffmpeg':
-                    process = subprocess.run([candidate, "-version"], 
-                                           stdout=subprocess.PIPE, 
-                                           stderr=subprocess.PIPE,
-                                           text=True)
-                    
-                    if process.returncode == 0:
-                        ffmpeg_version = process.stdout.split('\n')[0]
-                        yield send_event("log", {"level": "success", "message": f"Found FFmpeg in PATH: {ffmpeg_version}"})
-                        yield send_event("result", {"status": "success", "path": "ffmpeg", "already_installed": True})
-                        return
-            except Exception as e:
-                yield send_event("log", {"level": "warning", "message": f"FFmpeg not found at {candidate}: {str(e)}"})
+        for candidate in FFMPEG_CANDIDATES:
+            yield send_event("log", {"level": "info", "message": f"Checking for FFmpeg at: {candidate}"})
+            ffmpeg_version = await _ffmpeg_version(candidate)
+            if ffmpeg_version:
+                yield send_event("log", {"level": "success", "message": f"Found working FFmpeg: {ffmpeg_version}"})
+                yield send_event("result", {"status": "success", "path": candidate, "already_installed": True})
+                return
+            yield send_event("log", {"level": "warning", "message": f"FFmpeg not found at {candidate}"})
         
         # If we get here, FFmpeg was not found - install it
         yield send_event("log", {"level": "info", "message": "FFmpeg not found. Installing..."})
@@ -1047,73 +1087,74 @@ async def install_ffmpeg():
             with tempfile.NamedTemporaryFile(delete=False, suffix='.zip') as tmp_file:
                 tmp_path = tmp_file.name
                 
-            # Stream the download with progress updates
-            with requests.get(ffmpeg_url, stream=True) as response:
-                response.raise_for_status()
-                total_size = int(response.headers.get('content-length', 0))
-                downloaded = 0
-                
-                with open(tmp_path, 'wb') as f:
-                    for chunk in response.iter_content(chunk_size=8192):
-                        f.write(chunk)
-                        downloaded += len(chunk)
-                        progress = int(downloaded / total_size * 100) if total_size > 0 else 0
-                        
-                        # Send progress updates at 10% intervals to reduce events
-                        if progress % 10 == 0:
-                            yield send_event("progress", {"percent": progress, "action": "downloading"})
+            # Stream the download with progress updates without blocking the event loop
+            async with httpx.AsyncClient(follow_redirects=True, timeout=httpx.Timeout(60.0, read=300.0)) as client:
+                async with client.stream("GET", ffmpeg_url) as response:
+                    response.raise_for_status()
+                    total_size = int(response.headers.get('content-length', 0))
+                    downloaded = 0
+                    last_reported = -1
+                    
+                    with open(tmp_path, 'wb') as f:
+                        async for chunk in response.aiter_bytes(chunk_size=1024 * 1024):
+                            f.write(chunk)
+                            downloaded += len(chunk)
+                            progress = int(downloaded / total_size * 100) if total_size > 0 else 0
+                            
+                            # Send progress updates at 10% intervals to reduce events
+                            if progress // 10 != last_reported:
+                                last_reported = progress // 10
+                                yield send_event("progress", {"percent": progress, "action": "downloading"})
             
             # Extract the zip file
             yield send_event("log", {"level": "info", "message": "Download complete. Extracting FFmpeg..."})
             
-            # Create a temporary extraction directory
-            with tempfile.TemporaryDirectory() as extract_dir:
-                # Extract the zip
-                with zipfile.ZipFile(tmp_path, 'r') as zip_ref:
-                    zip_ref.extractall(extract_dir)
-                
-                # Find the extracted folder (should contain a 'bin' directory)
-                extracted_bin = None
-                for root, dirs, files in os.walk(extract_dir):
-                    if 'bin' in dirs:
-                        extracted_bin = os.path.join(root, 'bin')
-                        break
-                
-                if not extracted_bin:
-                    raise Exception("Could not find 'bin' directory in extracted files")
-                
-                # Copy the bin contents to our bin directory
-                yield send_event("log", {"level": "info", "message": "Copying FFmpeg files to installation directory..."})
-                for item in os.listdir(extracted_bin):
-                    src = os.path.join(extracted_bin, item)
-                    dst = os.path.join(bin_dir, item)
-                    if os.path.isfile(src):
-                        shutil.copy2(src, dst)
+            def extract_bin():
+                # Create a temporary extraction directory
+                with tempfile.TemporaryDirectory() as extract_dir:
+                    with zipfile.ZipFile(tmp_path, 'r') as zip_ref:
+                        zip_ref.extractall(extract_dir)
+                    
+                    # Find the extracted folder (should contain a 'bin' directory)
+                    extracted_bin = None
+                    for root, dirs, files in os.walk(extract_dir):
+                        if 'bin' in dirs:
+                            extracted_bin = os.path.join(root, 'bin')
+                            break
+                    
+                    if not extracted_bin:
+                        raise Exception("Could not find 'bin' directory in extracted files")
+                    
+                    # Copy the bin contents to our bin directory
+                    for item in os.listdir(extracted_bin):
+                        src = os.path.join(extracted_bin, item)
+                        dst = os.path.join(bin_dir, item)
+                        if os.path.isfile(src):
+                            shutil.copy2(src, dst)
+            
+            yield send_event("log", {"level": "info", "message": "Copying FFmpeg files to installation directory..."})
+            await asyncio.to_thread(extract_bin)
             
             # Clean up the temporary files
             if os.path.exists(tmp_path):
                 os.unlink(tmp_path)
             
             # Verify the installation
-            if os.path.exists(ffmpeg_exe):
-                process = subprocess.run([ffmpeg_exe, "-version"], 
-                                       stdout=subprocess.PIPE, 
-                                       stderr=subprocess.PIPE,
-                                       text=True)
-                
-                if process.returncode == 0:
-                    ffmpeg_version = process.stdout.split('\n')[0]
-                    yield send_event("log", {"level": "success", "message": f"FFmpeg installed successfully: {ffmpeg_version}"})
-                    yield send_event("result", {
-                        "status": "success", 
-                        "path": ffmpeg_exe, 
-                        "already_installed": False,
-                        "version": ffmpeg_version
-                    })
-                else:
-                    raise Exception(f"FFmpeg installation verification failed: {process.stderr}")
-            else:
+            if not os.path.exists(ffmpeg_exe):
                 raise Exception(f"FFmpeg executable not found at expected location: {ffmpeg_exe}")
+            
+            ffmpeg_version = await _ffmpeg_version(ffmpeg_exe)
+            if not ffmpeg_version:
+                raise Exception("FFmpeg installation verification failed")
+            
+            await get_ffmpeg_path(refresh=True)
+            yield send_event("log", {"level": "success", "message": f"FFmpeg installed successfully: {ffmpeg_version}"})
+            yield send_event("result", {
+                "status": "success", 
+                "path": ffmpeg_exe, 
+                "already_installed": False,
+                "version": ffmpeg_version
+            })
                 
         except Exception as e:
             error_message = f"FFmpeg installation failed: {str(e)}"
@@ -1132,39 +1173,58 @@ async def install_ffmpeg():
     )
 
 # Add a function to check for FFmpeg in usual locations
-def get_ffmpeg_path():
-    """Find FFmpeg executable at common locations."""
-    ffmpeg_candidates = [
-        os.path.join(os.getcwd(), 'ffmpeg', 'bin', 'ffmpeg.exe'),
-        os.path.join(os.path.dirname(os.getcwd()), 'ffmpeg', 'bin', 'ffmpeg.exe'),
-        'ffmpeg',  # Check in PATH
-        os.path.join(os.path.expanduser('~'), 'ffmpeg', 'bin', 'ffmpeg.exe'),
-    ]
+FFMPEG_CANDIDATES = [
+    os.path.join(os.getcwd(), 'ffmpeg', 'bin', 'ffmpeg.exe'),  # backend/ffmpeg/bin
+    os.path.join(os.path.dirname(os.getcwd()), 'ffmpeg', 'bin', 'ffmpeg.exe'),  # parent/ffmpeg/bin
+    'ffmpeg',  # system PATH
+    os.path.join(os.path.expanduser('~'), 'ffmpeg', 'bin', 'ffmpeg.exe'),  # user home
+]
+
+_ffmpeg_path: Optional[str] = None
+
+async def _ffmpeg_version(candidate: str) -> Optional[str]:
+    """Return the first line of `ffmpeg -version`, or None if the candidate does not run."""
+    if candidate != 'ffmpeg' and (not os.path.exists(candidate) or not os.path.isfile(candidate)):
+        return None
+    try:
+        result = await media_executor.run([candidate, "-version"], priority=PRIORITY_PROBE, capture_stdout=True, timeout=30)
+    except (OSError, MediaProcessError) as e:
+        logging.debug(f"FFmpeg not found at {candidate}: {str(e)}")
+        return None
+    return (result.stdout or b"").decode(errors="replace").split('\n')[0]
+
+async def get_ffmpeg_path(refresh: bool = False) -> Optional[str]:
+    """Find FFmpeg executable at common locations; the result is cached."""
+    global _ffmpeg_path
+    if _ffmpeg_path and not refresh:
+        return _ffmpeg_path
     
-    for candidate in ffmpeg_candidates:
-        try:
-            # Check if file exists for path-based candidates
-            if candidate != 'ffmpeg' and (not os.path.exists(candidate) or not os.path.isfile(candidate)):
-                continue
-            
-            # Try to run the executable
-            process = subprocess.run(
-                [candidate, "-version"], 
-                stdout=subprocess.PIPE, 
-                stderr=subprocess.PIPE,
-                check=True
-            )
-            
-            # If we get here, it worked
+    for candidate in FFMPEG_CANDIDATES:
+        if await _ffmpeg_version(candidate):
             logging.info(f"Found working FFmpeg at: {candidate}")
+            _ffmpeg_path = candidate
             return candidate
-        except Exception as e:
-            logging.debug(f"FFmpeg not found at {candidate}: {str(e)}")
     
     return None
 
+def _public_output_url(relative_url: str) -> str:
+    """Join a /output/... path with VIDEO_BASE_URL without doubling /output."""
+    base_url = settings.VIDEO_BASE_URL.rstrip('/')
+    if base_url.endswith('/output') and relative_url.startswith('/output'):
+        return f"{base_url}{relative_url[len('/output'):]}"
+    elif not relative_url.startswith('http'):
+        return f"{base_url}{relative_url}"
+    return relative_url
+
 # Make sure update_status function is defined before its first use
-async def update_status(job_id: str, status: str, progress: float = 0, message: str = ""):
+async def update_status(
+    job_id: str,
+    status: str,
+    progress: float = 0,
+    message: str = "",
+    playlist_url: Optional[str] = None,
+    timings: Optional[Dict[str, float]] = None
+):
     status_path = os.path.join(settings.OUTPUT_DIR, job_id, "status.json")
     output_filename = f"final_video_{job_id}.mp4" # Use final video name
     data = {
@@ -1175,18 +1235,18 @@ async def update_status(job_id: str, status: str, progress: float = 0, message:
         "updated_at": datetime.now().isoformat(),
     }
     
+    # Expose the HLS playlist while segments are still being produced
+    if playlist_url:
+        data["playlist_url"] = _public_output_url(playlist_url)
+    
+    # Per-step wall-clock seconds of the job's workflow
+    if timings is not None:
+        data["timings"] = timings
+    
     if status == "completed":
         # Construct final video URL correctly
-        base_url = settings.VIDEO_BASE_URL.rstrip('/') 
-        relative_url = f"/output/{job_id}/{output_filename}"
-        if base_url.endswith('/output') and relative_url.startswith('/output'):
-            correct_relative_path = relative_url[len('/output'):]
-            data["video_url"] = f"{base_url}{correct_relative_path}"
-        elif not relative_url.startswith('http'):
-            data["video_url"] = f"{base_url}{relative_url}"
-        else:
-            data["video_url"] = relative_url # Should not happen here but safe fallback
+        data["video_url"] = _public_output_url(f"/output/{job_id}/{output_filename}")
             
     os.makedirs(os.path.dirname(status_path), exist_ok=True)
     with open(status_path, "w") as f:
-        f.write(json.dumps(data)) 
\ No newline at end of file
+        f.write(json.dumps(data)) 
@@ -4,13 +4,12 @@ Hunyuan video generation service.
 import os
 import time
 import logging
-import base64
 from pathlib import Path
-from typing import Dict, Any, Optional
-import requests
+from typing import Dict, Any
 from datetime import datetime
 
 from ..config.settings import settings
+from ..utils.http_pool import ArtifactError, get_http_client, request_artifact
 from .log_service import log_service
 
 # Configure logging
@@ -34,7 +33,7 @@ class HunyuanService:
     async def check_health(self) -> Dict[str, Any]:
         """Check if the Hunyuan API is healthy."""
         try:
-            response = requests.get(self.health_url, timeout=10)
+            response = await get_http_client().get(self.health_url, timeout=10)
             if response.status_code == 200:
                 return response.json()
             else:
@@ -89,60 +88,50 @@ class HunyuanService:
                 "output_format": output_format
             }
             
-            # Make the request to the API
+            # Make the request to the API; the video is streamed to disk
+            # (base64 JSON replies from older servers are still decoded)
             logger.info(f"Sending request to {self.generate_url}")
-            response = requests.post(self.generate_url, json=data, timeout=300)  # 5 minute timeout
-            
-            # Calculate generation time
-            end_time = datetime.utcnow()
-            generation_time_ms = (end_time - start_time).total_seconds() * 1000
-            
-            if response.status_code != 200:
-                logger.error(f"Error generating video: {response.status_code}")
-                logger.error(response.text)
+            output_dir = self.output_dir / request_id
+            ext = "gif" if output_format == "gif" else "mp4"
+            output_file = output_dir / f"generated_video.{ext}"
+            try:
+                result, saved = await request_artifact(
+                    self.generate_url, data, output_file, timeout=300  # 5 minute timeout
+                )
+            except ArtifactError as e:
+                if e.status_code is None:
+                    raise
+                logger.error(f"Error generating video: {e.status_code}")
+                logger.error(e.body)
                 
                 # Log the error
                 if log_entry:
                     await log_service.log_response(
                         log_entry,
-                        response.status_code,
-                        error=f"API returned status code {response.status_code}: {response.text}"
+                        e.status_code,
+                        error=f"API returned status code {e.status_code}: {e.body}"
                     )
                 
                 return {
                     "success": False, 
-                    "error": f"API returned status code {response.status_code}",
-                    "details": response.text
+                    "error": f"API returned status code {e.status_code}",
+                    "details": e.body
                 }
             
-            # Parse the response
-            result = response.json()
+            # Calculate generation time
+            end_time = datetime.utcnow()
+            generation_time_ms = (end_time - start_time).total_seconds() * 1000
             
-            # If the API returned base64 encoded video data, decode and save it
-            if "video_base64" in result:
-                output_dir = self.output_dir / request_id
-                output_dir.mkdir(exist_ok=True, parents=True)
-                
-                # Decode and save the video
-                video_data = base64.b64decode(result["video_base64"])
-                ext = "gif" if output_format == "gif" else "mp4"
-                output_file = output_dir / f"generated_video.{ext}"
-                
-                with open(output_file, "wb") as f:
-                    f.write(video_data)
-                
+            if saved is not None:
                 # Update the result with the local file path
                 result["local_video_path"] = str(output_file)
                 result["web_video_path"] = f"/{settings.OUTPUT_DIR}/{request_id}/generated_video.{ext}"
-                
-                # Remove the base64 data to save memory
-                del result["video_base64"]
             
             # Log successful response
             if log_entry:
                 await log_service.log_response(
                     log_entry,
-                    response.status_code,
+                    200,
                     response_data={
                         "success": True,
                         "request_id": request_id,
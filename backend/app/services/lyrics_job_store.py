@@ -0,0 +1,127 @@
+"""
+Durable registry of lyrics-to-video jobs.
+
+Every job record (request parameters, status, prompts and finished clips)
+is written through to SQLite as the job progresses, so status survives a
+restart and every process sees the same jobs. Only jobs that are still
+running are kept in memory by LyricsService. Finished and failed jobs are
+evicted once they are older than the retention period or exceed the
+terminal job limit, oldest first.
+"""
+import json
+import time
+import sqlite3
+import logging
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+TERMINAL_STATUSES = ("completed", "failed")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS lyrics_jobs (
+    id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS lyrics_jobs_status ON lyrics_jobs (status, updated_at);
+"""
+
+
+class LyricsJobStore:
+    """SQLite-backed store of lyrics job records."""
+
+    def __init__(
+        self,
+        path: Union[str, Path],
+        max_terminal_jobs: int = 1000,
+        retention_seconds: Optional[float] = 7 * 24 * 3600
+    ):
+        """
+        Open (or create) the job database.
+
+        Args:
+            path: SQLite file
+            max_terminal_jobs: Finished/failed jobs kept before the oldest are evicted
+            retention_seconds: Age after which finished/failed jobs are evicted (None: never)
+        """
+        self.path = Path(path)
+        self.max_terminal_jobs = max_terminal_jobs
+        self.retention_seconds = retention_seconds
+        self._lock = threading.Lock()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SCHEMA)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def save(self, job: Dict[str, Any]) -> None:
+        """
+        Insert or replace a job record.
+
+        The record must have "id" and "status" and be JSON-serializable
+        (paths are stored as strings). Saving a finished or failed job
+        also evicts old terminal jobs.
+        """
+        now = time.time()
+        data = json.dumps(job, default=str)
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO lyrics_jobs (id, status, created_at, updated_at, data) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT(id) DO UPDATE SET status = excluded.status, updated_at = excluded.updated_at, "
+                "data = excluded.data",
+                (job["id"], job["status"], now, now, data)
+            )
+        if job["status"] in TERMINAL_STATUSES:
+            self.prune()
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Load a job record, or None if it is unknown or was evicted."""
+        with self._lock:
+            row = self._conn.execute("SELECT data FROM lyrics_jobs WHERE id = ?", (job_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def unfinished(self) -> List[Dict[str, Any]]:
+        """Jobs that were still running, oldest first (e.g. when the process died)."""
+        placeholders = ",".join("?" * len(TERMINAL_STATUSES))
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT data FROM lyrics_jobs WHERE status NOT IN ({placeholders}) ORDER BY created_at",
+                TERMINAL_STATUSES
+            ).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def prune(self) -> int:
+        """
+        Evict expired terminal jobs and the oldest ones over the limit.
+
+        Returns:
+            Number of jobs removed
+        """
+        placeholders = ",".join("?" * len(TERMINAL_STATUSES))
+        with self._lock:
+            removed = 0
+            if self.retention_seconds:
+                removed += self._conn.execute(
+                    f"DELETE FROM lyrics_jobs WHERE status IN ({placeholders}) AND updated_at < ?",
+                    (*TERMINAL_STATUSES, time.time() - self.retention_seconds)
+                ).rowcount
+            removed += self._conn.execute(
+                f"DELETE FROM lyrics_jobs WHERE id IN (SELECT id FROM lyrics_jobs WHERE status IN ({placeholders}) "
+                "ORDER BY updated_at DESC LIMIT -1 OFFSET ?)",
+                (*TERMINAL_STATUSES, self.max_terminal_jobs)
+            ).rowcount
+        if removed:
+            logger.info(f"Evicted {removed} finished lyrics jobs")
+        return removed
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM lyrics_jobs").fetchone()[0]
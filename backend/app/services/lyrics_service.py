@@ -1,30 +1,41 @@
 import os
 import sys
 import uuid
-import base64
 import asyncio
-import httpx
-import tempfile
 from pathlib import Path
-from typing import Dict, Any, List, Optional, Union
+from typing import AsyncIterator, Dict, Any, List, Optional, Tuple, Union
 import json
+import hashlib
 import logging
 from openai import AsyncOpenAI
-import aiofiles
-import ffmpeg
-import requests
-from urllib.parse import urlparse
 from datetime import datetime
 
 from app.utils.config import get_settings
-from app.utils.utils import stitch_videos_async
+from app.utils.rate_limiter import get_rate_limiter
+from app.utils.http_pool import request_artifact
+from app.utils.audio.analysis_cache import analysis_cache
+from app.utils.audio.analysis_pool import analysis_pool
+from app.utils.audio.beat_detector import analyze_beats
+from app.utils.audio.ingest import AudioIngestError, ingest_audio
+from app.utils.media.segment_planner import plan_from_analysis, split_segment
+from app.utils.media.stitch import stitch_segments
+from app.utils.media.synthetic import render_placeholder_clip
 from app.services.log_service import log_service
+from app.services.prompt_batching import (
+    build_batch_messages,
+    chunk_by_token_budget,
+    max_output_tokens,
+    parse_batch_response
+)
+from app.services.prompt_cache import PromptCache, normalize_line
+from app.services.lyrics_job_store import LyricsJobStore
+from app.services.workflow_engine import Workflow, Node
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Sample Hindi-to-English prompt translations as examples
+# Sample Hindi-to-English prompt translations, seeded into the prompt cache as pinned entries
 HINDI_EXAMPLES = {
     "Main tujhe chaand laake dunga": "A man under a moonlit sky holding a gift box in his hands.",
     "Tere naam se zindagi ik nayi si ho gayi hai": "A person looking hopeful as the sunrise bathes their face in warm golden light.",
@@ -43,11 +54,40 @@ class LyricsService:
         self.base_url = self.settings.VIDEO_BASE_URL
         self.mochi_api_url = self.settings.MOCHI_API_URL
         self.openai_api_key = self.settings.OPENAI_API_KEY
+        # Jobs running in this process; every job is persisted in job_store
         self.active_jobs: Dict[str, Any] = {}
+        self._job_tasks: Dict[str, asyncio.Task] = {}
+        # Upper bound on clips requested from the video service at once
+        self.max_concurrent_clips = 4
+        # Frame rate clips are requested and planned at
+        self.clip_fps = 24
+        # Most frames requested in one clip; longer lines are rendered in parts
+        self.max_clip_frames = int(os.getenv("LYRICS_CLIP_MAX_FRAMES", "96"))
+        # Upper bound on OpenAI prompt requests in flight per song
+        self.max_concurrent_prompts = int(os.getenv("LYRICS_PROMPT_CONCURRENCY", "16"))
+        self.openai_limiter = get_rate_limiter("openai")
+        # Send whole songs (or token-budgeted chunks) in one request
+        self.prompt_batch_mode = os.getenv("LYRICS_PROMPT_BATCH", "true").lower() == "true"
+        self.prompt_batch_token_budget = int(os.getenv("LYRICS_PROMPT_BATCH_TOKENS", "3000"))
+        self.prompt_model = "gpt-3.5-turbo"
         
         # Create the output directory if it doesn't exist
         os.makedirs(self.output_dir, exist_ok=True)
         
+        # Prompts persist across jobs, keyed by (normalized line, language, style, model)
+        self.prompt_cache = PromptCache(
+            os.getenv("PROMPT_CACHE_PATH", str(self.output_dir / "prompt_cache.sqlite3")),
+            max_entries=int(os.getenv("PROMPT_CACHE_MAX_ENTRIES", "50000")),
+            ttl_seconds=float(os.getenv("PROMPT_CACHE_TTL_DAYS", "30")) * 24 * 3600
+        )
+        self.prompt_cache.seed(HINDI_EXAMPLES, "hindi")
+        
+        self.job_store = LyricsJobStore(
+            os.getenv("LYRICS_JOB_DB_PATH", str(self.output_dir / "lyrics_jobs.sqlite3")),
+            max_terminal_jobs=int(os.getenv("LYRICS_JOB_MAX_FINISHED", "1000")),
+            retention_seconds=float(os.getenv("LYRICS_JOB_RETENTION_DAYS", "7")) * 24 * 3600
+        )
+        
         # Initialize OpenAI client
         self.openai_client = AsyncOpenAI(api_key=self.openai_api_key) if self.openai_api_key else None
         
@@ -63,9 +103,31 @@ class LyricsService:
         Returns:
             List of dictionaries with prompt data:
             [
-                {"prompt": "A cinematic scene...", "line": "Original lyrics line", "index": 0},
+                {"prompt": "A cinematic scene...", "line": "Original lyrics line", "index": 0, "source_index": 0},
                 ...
             ]
+            Repeated lines are prompted once; "source_index" is the first
+            occurrence whose prompt a line shares.
+        """
+        try:
+            prompts = [prompt async for prompt in self.stream_prompts_from_lyrics(lyrics, language, style)]
+        except Exception:
+            # Already logged by the stream; return empty list on error
+            return []
+        return sorted(prompts, key=lambda p: p["index"])
+    
+    async def stream_prompts_from_lyrics(self, lyrics: str, language: str = "english", style: Optional[str] = None) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Generate prompts for song lyrics, yielding each one as soon as it exists.
+        
+        Cached lines come first, then every batch as its response arrives and
+        finally lines that needed a request of their own, so callers can start
+        work on early lines while later ones are still being generated. Each
+        line of the song is yielded exactly once, in completion order, in the
+        format returned by generate_prompts_from_lyrics.
+        
+        Raises:
+            Exception: If generation fails unexpectedly (the error is logged first)
         """
         # Start timing for logging
         start_time = datetime.utcnow()
@@ -91,7 +153,7 @@ class LyricsService:
             }
         })
         
-        # If no lines, return empty list
+        # If no lines, there is nothing to yield
         if not lyrics_lines:
             # Log empty result
             if log_entry:
@@ -100,9 +162,7 @@ class LyricsService:
                     200,
                     response_data={"prompts": [], "message": "No lyrics lines found"}
                 )
-            return []
-        
-        prompts = []
+            return
         
         # Prepare style instruction
         style_instruction = f" in {style} style" if style else ""
@@ -114,62 +174,129 @@ class LyricsService:
             f"The prompt should be visually descriptive and capture the emotion and meaning of the lyrics."
         )
         
-        try:
-            for i, line in enumerate(lyrics_lines):
-                # If no OpenAI client or for Hindi examples, use fallback/example mappings
-                if not self.openai_client or (language.lower() == "hindi" and line in HINDI_EXAMPLES):
-                    if language.lower() == "hindi" and line in HINDI_EXAMPLES:
-                        # Use predefined examples for Hindi lyrics
-                        prompt = HINDI_EXAMPLES[line]
-                    else:
-                        # Fallback simple prompt generation
-                        prompt = f"A cinematic scene showing {line}"
-                        if style:
-                            prompt += f" in {style} style"
-                    
-                    prompts.append({
-                        "prompt": prompt,
-                        "line": line,
-                        "index": i
-                    })
-                    continue
-                
+        # Requests run concurrently; the semaphore bounds requests in flight and
+        # the shared limiter keeps all jobs together under the OpenAI rate
+        semaphore = asyncio.Semaphore(self.max_concurrent_prompts)
+        usage = {"requests": 0, "total_tokens": 0}
+        # Only genuine model output is cached, never fallbacks
+        generated: Dict[str, str] = {}
+        
+        async def complete(messages: List[Dict[str, str]], max_tokens: int, **kwargs):
+            async with semaphore:
+                await self.openai_limiter.acquire()
                 try:
-                    # Real OpenAI API call
                     response = await self.openai_client.chat.completions.create(
-                        model="gpt-3.5-turbo",
-                        messages=[
-                            {"role": "system", "content": system_prompt},
-                            {"role": "user", "content": f"Lyrics line: {line}"}
-                        ],
-                        max_tokens=150,
-                        temperature=0.7
+                        model=self.prompt_model,
+                        messages=messages,
+                        max_tokens=max_tokens,
+                        temperature=0.7,
+                        **kwargs
                     )
-                    
-                    # Extract the prompt from the response
-                    prompt = response.choices[0].message.content.strip()
-                    
-                    prompts.append({
-                        "prompt": prompt,
-                        "line": line,
-                        "index": i
-                    })
-                    
-                    # Be nice to API rate limits
-                    await asyncio.sleep(0.5)
-                    
                 except Exception as e:
-                    logger.error(f"Error generating prompt for line {i}: {e}")
-                    # Fallback
-                    prompt = f"A cinematic scene showing {line}"
-                    if style:
-                        prompt += f" in {style} style"
-                        
-                    prompts.append({
-                        "prompt": prompt,
-                        "line": line,
-                        "index": i
-                    })
+                    if getattr(e, "status_code", None) == 429:
+                        # Slow every caller of the shared limiter down, not just this job
+                        self.openai_limiter.penalize(1.0)
+                    raise
+            usage["requests"] += 1
+            usage["total_tokens"] += getattr(getattr(response, "usage", None), "total_tokens", 0) or 0
+            return response
+        
+        async def batch_prompts(chunk: List[Tuple[int, str]]) -> Dict[int, str]:
+            # One request for a whole chunk of lines, answered as a JSON array
+            try:
+                response = await complete(
+                    build_batch_messages(system_prompt, chunk),
+                    max_output_tokens(chunk),
+                    response_format={"type": "json_object"}
+                )
+                results = parse_batch_response(response.choices[0].message.content or "", [i for i, _ in chunk])
+            except Exception as e:
+                logger.warning(f"Batch prompt request for {len(chunk)} lines failed: {e}")
+                return {}
+            if len(results) < len(chunk):
+                logger.info(f"Batch prompt response covered {len(results)}/{len(chunk)} lines; requesting the rest per line")
+            generated.update((lyrics_lines[i], prompt) for i, prompt in results.items())
+            return results
+        
+        async def prompt_for_line(i: int, line: str) -> Dict[int, str]:
+            # Without an OpenAI client, use the fallback prompt
+            if not self.openai_client:
+                return {i: self._fallback_prompt(line, style)}
+            
+            try:
+                # Real OpenAI API call
+                response = await complete(
+                    [
+                        {"role": "system", "content": system_prompt},
+                        {"role": "user", "content": f"Lyrics line: {line}"}
+                    ],
+                    150
+                )
+                
+                # Extract the prompt from the response
+                prompt = response.choices[0].message.content.strip()
+                generated[line] = prompt
+            except Exception as e:
+                logger.error(f"Error generating prompt for line {i}: {e}")
+                prompt = self._fallback_prompt(line, style)
+            
+            return {i: prompt}
+        
+        prompts: List[Dict[str, Any]] = []
+        tasks: Dict[asyncio.Task, List[Tuple[int, str]]] = {}
+        try:
+            # Repeated lines (choruses) are prompted once and reused at every occurrence
+            first_index: Dict[str, int] = {}
+            source_of = [first_index.setdefault(normalize_line(line), i) for i, line in enumerate(lyrics_lines)]
+            unique_lines = [(i, lyrics_lines[i]) for i in first_index.values()]
+            occurrences: Dict[int, List[int]] = {}
+            for i, source in enumerate(source_of):
+                occurrences.setdefault(source, []).append(i)
+            
+            def records(results: Dict[int, str]) -> List[Dict[str, Any]]:
+                return [
+                    {"prompt": prompt, "line": lyrics_lines[i], "index": i, "source_index": source}
+                    for source, prompt in results.items()
+                    for i in occurrences[source]
+                ]
+            
+            try:
+                cached = await asyncio.to_thread(
+                    self.prompt_cache.lookup, [line for _, line in unique_lines], language, style, self.prompt_model
+                )
+            except Exception as e:
+                logger.warning(f"Prompt cache lookup failed: {e}")
+                cached = {}
+            for record in records({i: cached[line] for i, line in unique_lines if line in cached}):
+                prompts.append(record)
+                yield record
+            
+            pending = [(i, line) for i, line in unique_lines if line not in cached]
+            if self.openai_client and self.prompt_batch_mode and len(pending) > 1:
+                for chunk in chunk_by_token_budget(pending, self.prompt_batch_token_budget):
+                    tasks[asyncio.create_task(batch_prompts(chunk))] = chunk
+            else:
+                for i, line in pending:
+                    tasks[asyncio.create_task(prompt_for_line(i, line))] = []
+            
+            while tasks:
+                done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    chunk = tasks.pop(task)
+                    results = task.result()
+                    # Lines a batch did not cover go out one by one
+                    for i, line in chunk:
+                        if i not in results:
+                            tasks[asyncio.create_task(prompt_for_line(i, line))] = []
+                    for record in records(results):
+                        prompts.append(record)
+                        yield record
+            
+            if generated:
+                try:
+                    await asyncio.to_thread(self.prompt_cache.store, generated, language, style, self.prompt_model)
+                except Exception as e:
+                    logger.warning(f"Prompt cache update failed: {e}")
             
             # Calculate processing time
             end_time = datetime.utcnow()
@@ -181,13 +308,15 @@ class LyricsService:
                     log_entry,
                     200,
                     response_data={
-                        "prompts": prompts,
+                        "prompts": sorted(prompts, key=lambda p: p["index"]),
                         "count": len(prompts),
-                        "processing_time_ms": processing_time_ms
+                        "processing_time_ms": processing_time_ms,
+                        "unique_lines": len(unique_lines),
+                        "cache_hits": len(cached),
+                        "openai_requests": usage["requests"],
+                        "openai_tokens": usage["total_tokens"]
                     }
                 )
-                
-            return prompts
             
         except Exception as e:
             logger.error(f"Error generating prompts from lyrics: {e}")
@@ -199,9 +328,21 @@ class LyricsService:
                     500,
                     error=str(e)
                 )
-                
-            # Return empty list on error
-            return []
+            raise
+        finally:
+            # The consumer may stop early; don't leave requests running
+            for task in tasks:
+                task.cancel()
+    
+    @staticmethod
+    def _fallback_prompt(line: str, style: Optional[str] = None) -> str:
+        """
+        Simple prompt used when OpenAI is unavailable or fails for a line
+        """
+        prompt = f"A cinematic scene showing {line}"
+        if style:
+            prompt += f" in {style} style"
+        return prompt
     
     def generate_prompts_from_lyrics_sync(self, lyrics: str, language: str = "english", style: Optional[str] = None) -> List[Dict[str, Any]]:
         """
@@ -232,20 +373,22 @@ class LyricsService:
         job_dir = self.output_dir / job_id
         os.makedirs(job_dir, exist_ok=True)
         
-        # Record job information
-        self.active_jobs[job_id] = {
+        # Record job information; the request is kept so the job can resume after a restart
+        job = {
             "id": job_id,
             "status": "processing",
             "lyrics": lyrics,
             "language": language,
             "style": style,
+            "audio_file": audio_file,
             "clips": [],
             "prompts": [],
-            "output_path": job_dir / f"{job_id}.mp4"
+            "output_path": str(job_dir / f"{job_id}.mp4")
         }
+        await asyncio.to_thread(self.job_store.save, job)
         
         # Start processing in the background
-        asyncio.create_task(self._process_lyrics_to_video(job_id, lyrics, language, style, audio_file))
+        self._start_job(job)
         
         # Return response with job information
         return {
@@ -257,6 +400,44 @@ class LyricsService:
             "status": "processing"
         }
     
+    def _start_job(self, job: Dict[str, Any]) -> None:
+        """
+        Run a job record in the background of this process
+        """
+        job_id = job["id"]
+        self.active_jobs[job_id] = job
+        task = asyncio.create_task(self._process_lyrics_to_video(
+            job_id, job["lyrics"], job["language"], job.get("style"), job.get("audio_file")
+        ))
+        self._job_tasks[job_id] = task
+        
+        def finished(_):
+            self._job_tasks.pop(job_id, None)
+            self.active_jobs.pop(job_id, None)
+        
+        task.add_done_callback(finished)
+    
+    async def resume_unfinished_jobs(self) -> List[str]:
+        """
+        Restart jobs interrupted by a shutdown or crash.
+        
+        Call once at startup. Completed prompts and clips are restored from
+        the workflow checkpoints in each job directory, so a job continues
+        from its last finished clip.
+        
+        Returns:
+            IDs of the resumed jobs
+        """
+        jobs = await asyncio.to_thread(self.job_store.unfinished)
+        resumed = []
+        for job in jobs:
+            if job["id"] in self.active_jobs:
+                continue
+            logger.info(f"Resuming lyrics job {job['id']} ({len(job.get('clips', []))} clips already done)")
+            self._start_job(job)
+            resumed.append(job["id"])
+        return resumed
+    
     async def _process_lyrics_to_video(
         self, 
         job_id: str, 
@@ -266,44 +447,155 @@ class LyricsService:
         audio_file: Optional[str] = None
     ):
         """
-        Process lyrics to video in the background
+        Process lyrics to video in the background.
+        
+        The job runs as a streaming workflow: prompts are generated for the
+        whole song at once (batched and cached) but each line's prompt node
+        completes as soon as its own prompt arrives, and its clip starts
+        rendering in a bounded pool of clip workers once the segment plan is
+        ready, so total latency approaches the slower of prompting and
+        rendering rather than their sum. The plan node downloads and
+        beat-analyses the audio alongside the prompts and lays the lines out
+        on the music: every line gets a segment cut on a downbeat or beat,
+        split on beats into parts of at most max_clip_frames, and each part
+        is requested with exactly the frames it shows (a repeated line with
+        the longest of its occurrences, the others being cut at the stitch),
+        so the model does not render frames the edit throws away and no
+        request exceeds the service's frame limit. Without audio, every line
+        gets one clip of the default length. Node
+        outputs are checkpointed in the job directory, so running the same job again only redoes the steps
+        that did not finish. Progress is written to the job store after every
+        node, so status survives a restart and resume_unfinished_jobs picks the
+        job up from its last finished clip.
         """
+        job = self.active_jobs[job_id]
+        job_dir = self.output_dir / job_id
+        output_path = job_dir / f"{job_id}.mp4"
+        
+        # 1. Split lyrics into lines; each distinct line gets one clip node whose
+        # clips are reused wherever the line repeats (same grouping as the prompts)
+        lyrics_lines = self._split_lyrics(lyrics)
+        first_index: Dict[str, int] = {}
+        source_of = [first_index.setdefault(normalize_line(line), i) for i, line in enumerate(lyrics_lines)]
+        finished_prompts: Dict[int, str] = {}
+        finished_clips: Dict[int, List[str]] = {}
+        
+        # Prompt nodes wait on these; one stream over the whole song fills them
+        loop = asyncio.get_running_loop()
+        prompt_futures = {i: loop.create_future() for i in first_index.values()}
+        stream_task: Optional[asyncio.Task] = None
+        
+        async def feed_prompts():
+            try:
+                async for record in self.stream_prompts_from_lyrics(lyrics, language, style):
+                    future = prompt_futures.get(record["index"])
+                    if future is not None and not future.done():
+                        future.set_result(record["prompt"])
+            except Exception as e:
+                logger.error(f"Prompt stream for job {job_id} failed: {e}")
+            finally:
+                # Lines the stream never produced get the simple fallback
+                for i, future in prompt_futures.items():
+                    if not future.done():
+                        future.set_result(self._fallback_prompt(lyrics_lines[i], style))
+        
+        async def make_prompt(line: str, index: int, language: str, style: Optional[str]) -> str:
+            nonlocal stream_task
+            # Started by the first prompt that is not restored from a checkpoint
+            if stream_task is None:
+                stream_task = asyncio.create_task(feed_prompts())
+            return await prompt_futures[index]
+        
+        async def make_audio(audio_file: Optional[str]) -> Optional[Path]:
+            return await self._process_audio(audio_file, job_dir) if audio_file else None
+        
+        def clip_name(index: int, part: int) -> str:
+            return f"clip_{index:03d}.mp4" if part == 0 else f"clip_{index:03d}_{part}.mp4"
+        
+        async def make_plan(audio: Optional[Path], count: int) -> Optional[List[List[int]]]:
+            return await self._plan_clip_frames(audio, count) if audio else None
+        
+        async def make_clip(prompt: str, plan: Optional[List[List[int]]], index: int, occurrences: List[int]) -> List[Path]:
+            if not plan:
+                return [await self._generate_clip(prompt, job_dir / clip_name(index, 0))]
+            # Part p is rendered for the longest p-th part over the line's occurrences
+            parts = []
+            for part in range(max(len(plan[j]) for j in occurrences)):
+                num_frames = max(plan[j][part] for j in occurrences if part < len(plan[j]))
+                parts.append(await self._generate_clip(prompt, job_dir / clip_name(index, part), num_frames))
+            return parts
+        
+        async def stitch(clips: List[List[Path]], audio: Optional[Path], plan: Optional[List[List[int]]]) -> Path:
+            if not plan:
+                return await self._stitch_clips([parts[0] for parts in clips], output_path, audio)
+            clip_paths = [path for parts, frames in zip(clips, plan) for path in parts[:len(frames)]]
+            frame_counts = [count for frames in plan for count in frames]
+            return await self._stitch_clips(clip_paths, output_path, audio, frame_counts=frame_counts)
+        
+        async def on_node_complete(name: str, output: Any, cached: bool):
+            if name.startswith("prompt_"):
+                finished_prompts[int(name.split("_")[1])] = output
+                job["prompts"] = [finished_prompts[s] for s in source_of if s in finished_prompts]
+            elif name.startswith("clip_"):
+                index = int(name.split("_")[1])
+                finished_clips[index] = [f"{self.base_url}/{job_id}/{clip_name(index, part)}" for part in range(len(output))]
+                job["clips"] = [url for i in sorted(finished_clips) for url in finished_clips[i]]
+            else:
+                return
+            await asyncio.to_thread(self.job_store.save, job)
+        
+        workflow = Workflow(
+            f"lyrics:{job_id}",
+            store_dir=job_dir / "workflow",
+            # Prompt nodes mostly wait on the stream; rendering is bounded by the clips pool
+            max_concurrency=len(first_index) + self.max_concurrent_clips + 2,
+            pools={"clips": self.max_concurrent_clips},
+            on_node_complete=on_node_complete
+        )
+        workflow.add(Node("audio", make_audio, params={"audio_file": audio_file}, output_type=(Path, type(None))))
+        # Frames of each part of each timeline entry, or None when there is no usable audio
+        workflow.add(Node(
+            "plan",
+            make_plan,
+            deps={"audio": "audio"},
+            params={"count": len(source_of)},
+            output_type=(list, type(None))
+        ))
+        clip_nodes: Dict[int, str] = {}
+        for i in first_index.values():
+            workflow.add(Node(
+                f"prompt_{i}",
+                make_prompt,
+                params={"line": lyrics_lines[i], "index": i, "language": language, "style": style},
+                output_type=str
+            ))
+            clip_nodes[i] = workflow.add(Node(
+                f"clip_{i}",
+                make_clip,
+                deps={"prompt": f"prompt_{i}", "plan": "plan"},
+                params={"index": i, "occurrences": [j for j, source in enumerate(source_of) if source == i]},
+                output_type=list,
+                pool="clips"
+            )).name
+        timeline = [clip_nodes[source] for source in source_of]
+        workflow.add(Node("stitch", stitch, deps={"clips": timeline, "audio": "audio", "plan": "plan"}, output_type=Path))
+        
         try:
-            job = self.active_jobs[job_id]
-            job_dir = self.output_dir / job_id
-            
-            # 1. Split lyrics into lines
-            lyrics_lines = self._split_lyrics(lyrics)
-            
-            # 2. Generate video prompts for each line using GPT
-            prompts = await self.generate_prompts_from_lyrics(lyrics, language, style)
-            job["prompts"] = [p["prompt"] for p in prompts]
-            
-            # 3. Generate video clips for each prompt
-            clip_paths = []
-            for i, prompt_data in enumerate(prompts):
-                clip_path = job_dir / f"clip_{i:03d}.mp4"
-                await self._generate_clip(prompt_data["prompt"], clip_path)
-                clip_paths.append(clip_path)
-                job["clips"].append(f"{self.base_url}/{job_id}/clip_{i:03d}.mp4")
-            
-            # 4. Process audio file if provided
-            audio_path = None
-            if audio_file:
-                audio_path = await self._process_audio(audio_file, job_dir)
-            
-            # 5. Stitch clips together
-            output_path = job_dir / f"{job_id}.mp4"
-            await self._stitch_clips(clip_paths, output_path, audio_path)
-            
-            # Update job status
+            await workflow.run()
             job["status"] = "completed"
-            
         except Exception as e:
             logger.error(f"Error in video generation: {e}")
-            if job_id in self.active_jobs:
-                self.active_jobs[job_id]["status"] = "failed"
-                self.active_jobs[job_id]["error"] = str(e)
+            job["status"] = "failed"
+            job["error"] = str(e)
+        finally:
+            if stream_task is not None and not stream_task.done():
+                stream_task.cancel()
+            job["timings"] = workflow.timings
+            # A cancelled job (e.g. at shutdown) stays "processing" and is resumed on restart
+            try:
+                await asyncio.shield(asyncio.to_thread(self.job_store.save, job))
+            except Exception as e:
+                logger.error(f"Could not persist lyrics job {job_id}: {e}")
     
     def _split_lyrics(self, lyrics: str) -> List[str]:
         """
@@ -313,157 +605,99 @@ class LyricsService:
         lines = [line.strip() for line in lyrics.split('\n') if line.strip()]
         return lines
     
-    async def _generate_clip(self, prompt: str, output_path: Path) -> Path:
+    async def _plan_clip_frames(self, audio_path: Path, count: int) -> Optional[List[List[int]]]:
         """
-        Generate a video clip based on the provided prompt
+        Frames each of count timeline entries shows, cut on the song's beats.
+        
+        Entries longer than max_clip_frames are split on beats into parts
+        that each fit one clip request, so every entry maps to a list of
+        part lengths. The analysis runs in the audio analysis pool and is
+        shared with the /audio endpoints through the content-hash cache.
+        Returns None if the audio cannot be analysed, in which case clips
+        keep the default length.
         """
         try:
-            async with httpx.AsyncClient(timeout=60.0) as client:
-                # Call the Mochi service
-                response = await client.post(
-                    f"{self.mochi_api_url}/generate",
-                    json={"prompt": prompt}
+            def digest() -> str:
+                sha256 = hashlib.sha256()
+                with open(audio_path, "rb") as f:
+                    for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                        sha256.update(chunk)
+                return sha256.hexdigest()
+            
+            async def compute():
+                return await analysis_pool.run(analyze_beats, str(audio_path))
+            
+            analysis, _ = await analysis_cache.get_or_compute(await asyncio.to_thread(digest), compute)
+            segments = plan_from_analysis(analysis, self.clip_fps, count=count)
+            parts = [
+                split_segment(
+                    segment,
+                    self.clip_fps,
+                    self.max_clip_frames,
+                    beats=analysis.get("beat_timestamps", ()),
+                    downbeats=analysis.get("downbeat_timestamps", ())
                 )
-                
-                if response.status_code != 200:
-                    logger.error(f"Error from Mochi service: {response.text}")
-                    raise Exception(f"Failed to generate clip: {response.text}")
-                
-                # For demo purposes, if Mochi service isn't available, create a placeholder
-                if "video_data" not in response.json():
-                    logger.warning("No video data in response. Creating placeholder.")
-                    return await self._create_placeholder_clip(prompt, output_path)
-                
-                # Save the video data
-                video_data = base64.b64decode(response.json()["video_data"])
-                async with aiofiles.open(output_path, "wb") as f:
-                    await f.write(video_data)
-                
-                return output_path
+                for segment in segments
+            ]
+        except Exception as e:
+            logger.warning(f"Could not plan clips on the beats of {audio_path}, using the default length: {e}")
+            return None
+        
+        aligned = sum(1 for entry in parts for part in entry if part.anchor)
+        total_parts = sum(len(entry) for entry in parts)
+        logger.info(f"Planned {count} lines in {total_parts} clips over {analysis['duration']:.1f}s; {aligned} cuts on beats")
+        return [[part.num_frames for part in entry] for entry in parts]
+    
+    async def _generate_clip(self, prompt: str, output_path: Path, num_frames: Optional[int] = None) -> Path:
+        """
+        Generate a video clip based on the provided prompt
+        
+        With num_frames the clip is requested at exactly that many frames at
+        clip_fps, as planned on the song's beats.
+        """
+        payload: Dict[str, Any] = {"prompt": prompt}
+        if num_frames:
+            payload.update({"num_frames": num_frames, "fps": self.clip_fps})
+        try:
+            # Call the Mochi service; the clip is streamed straight to disk
+            _, saved = await request_artifact(
+                f"{self.mochi_api_url}/generate",
+                payload,
+                output_path,
+                timeout=60.0
+            )
+            
+            # For demo purposes, if Mochi service isn't available, create a placeholder
+            if saved is None:
+                logger.warning("No video data in response. Creating placeholder.")
+                return await self._create_placeholder_clip(prompt, output_path, num_frames)
+            
+            return output_path
         except Exception as e:
             logger.error(f"Error generating clip: {e}")
             # Create a placeholder clip as fallback
-            return await self._create_placeholder_clip(prompt, output_path)
+            return await self._create_placeholder_clip(prompt, output_path, num_frames)
     
-    async def _create_placeholder_clip(self, prompt: str, output_path: Path) -> Path:
+    async def _create_placeholder_clip(self, prompt: str, output_path: Path, num_frames: Optional[int] = None) -> Path:
         """
         Create a placeholder clip with text (for demo/fallback purposes)
         """
-        import cv2
-        import numpy as np
-        
-        # Create a simple text video (5 seconds at 24fps)
-        width, height = 640, 360
-        fps = 24
-        duration = 5  # seconds
-        
-        # Create a temporary directory for individual frames
-        with tempfile.TemporaryDirectory() as temp_dir:
-            frames_dir = Path(temp_dir)
-            
-            # Generate frames
-            for i in range(duration * fps):
-                # Create a frame with text
-                frame = np.zeros((height, width, 3), dtype=np.uint8)
-                
-                # Add a gradient background
-                for y in range(height):
-                    for x in range(width):
-                        frame[y, x] = [
-                            int(100 + 50 * np.sin(i / (fps * 2) + x / 100)),
-                            int(100 + 50 * np.cos(i / (fps * 2) + y / 100)),
-                            int(150 + 50 * np.sin(i / (fps * 2) + (x+y) / 200))
-                        ]
-                
-                # Add the prompt text, wrapped to fit on screen
-                font = cv2.FONT_HERSHEY_SIMPLEX
-                font_scale = 0.7
-                font_color = (255, 255, 255)
-                line_type = 2
-                
-                # Simple text wrapping
-                words = prompt.split()
-                lines = []
-                current_line = ""
-                max_width = width - 40
-                
-                for word in words:
-                    test_line = current_line + word + " "
-                    text_size = cv2.getTextSize(test_line, font, font_scale, line_type)[0]
-                    
-                    if text_size[0] > max_width:
-                        lines.append(current_line)
-                        current_line = word + " "
-                    else:
-                        current_line = test_line
-                        
-                if current_line:
-                    lines.append(current_line)
-                
-                # Draw each line
-                y_position = height // 2 - (len(lines) * 30) // 2
-                for line in lines:
-                    text_size = cv2.getTextSize(line, font, font_scale, line_type)[0]
-                    x_position = (width - text_size[0]) // 2
-                    
-                    # Add text shadow for better readability
-                    cv2.putText(
-                        frame, line, (x_position + 2, y_position + 2), 
-                        font, font_scale, (0, 0, 0), line_type
-                    )
-                    
-                    cv2.putText(
-                        frame, line, (x_position, y_position), 
-                        font, font_scale, font_color, line_type
-                    )
-                    
-                    y_position += 30
-                
-                # Save the frame
-                frame_path = frames_dir / f"frame_{i:04d}.jpg"
-                cv2.imwrite(str(frame_path), frame)
-            
-            # Use ffmpeg to create a video from the frames
-            (
-                ffmpeg
-                .input(f"{frames_dir}/frame_%04d.jpg", framerate=fps)
-                .output(str(output_path), vcodec='libx264', pix_fmt='yuv420p')
-                .run(capture_stdout=True, capture_stderr=True, overwrite_output=True)
-            )
-            
+        # num_frames (5 seconds by default) at clip_fps, rendered in memory and piped straight into ffmpeg
+        duration = num_frames / self.clip_fps if num_frames else 5
+        await render_placeholder_clip(prompt, output_path, width=640, height=360, fps=self.clip_fps, duration=duration)
         return output_path
     
     async def _process_audio(self, audio_file: str, job_dir: Path) -> Optional[Path]:
         """
         Process the provided audio file (URL or base64)
         """
-        audio_path = job_dir / "audio.mp3"
-        
         try:
-            # Check if it's a URL
-            parsed_url = urlparse(audio_file)
-            if parsed_url.scheme and parsed_url.netloc:
-                # Download the audio file
-                async with httpx.AsyncClient() as client:
-                    response = await client.get(audio_file)
-                    if response.status_code == 200:
-                        async with aiofiles.open(audio_path, "wb") as f:
-                            await f.write(response.content)
-                        return audio_path
-                    else:
-                        logger.error(f"Failed to download audio: {response.status_code}")
-                        return None
-            else:
-                # Assume it's base64 encoded
-                try:
-                    # Try to decode as base64
-                    audio_data = base64.b64decode(audio_file)
-                    async with aiofiles.open(audio_path, "wb") as f:
-                        await f.write(audio_data)
-                    return audio_path
-                except Exception as e:
-                    logger.error(f"Failed to decode audio data: {e}")
-                    return None
+            # URLs and base64 payloads are streamed to disk in chunks
+            audio = await ingest_audio(audio_file, job_dir, filename="audio.mp3")
+            return audio.path
+        except AudioIngestError as e:
+            logger.error(f"Failed to ingest audio: {e}")
+            return None
         except Exception as e:
             logger.error(f"Error processing audio: {e}")
             return None
@@ -472,67 +706,47 @@ class LyricsService:
         self, 
         clip_paths: List[Path], 
         output_path: Path,
-        audio_path: Optional[Path] = None
+        audio_path: Optional[Path] = None,
+        frame_counts: Optional[List[int]] = None
     ) -> Path:
         """
-        Stitch multiple video clips together and optionally add audio
+        Stitch multiple video clips together and optionally add audio.
+        
+        The concat and the audio mux run as one ffmpeg invocation with video
+        stream copy and -shortest, so no full-length intermediate is written.
+        frame_counts cuts each entry to its planned length, for repeated
+        lines whose clip was rendered for a longer occurrence.
         """
         if not clip_paths:
             raise ValueError("No clips to stitch together")
         
-        # Convert Path objects to strings for stitch_videos function
-        clip_paths_str = [str(path) for path in clip_paths]
-        
-        # First stitch videos without audio
         if audio_path:
-            # If we need to add audio, use a temporary file first
-            temp_output = output_path.with_suffix(".temp.mp4")
-            await stitch_videos_async(clip_paths_str, str(temp_output))
-            
-            # Then add audio
             try:
-                (
-                    ffmpeg
-                    .input(str(temp_output))
-                    .input(str(audio_path))
-                    .output(
-                        str(output_path), 
-                        codec="copy", 
-                        acodec="aac", 
-                        strict="experimental", 
-                        shortest=None
-                    )
-                    .run(capture_stdout=True, capture_stderr=True, overwrite_output=True)
-                )
-                
-                # Remove temporary file
-                os.remove(temp_output)
-            except Exception as e:
+                await stitch_segments(clip_paths, output_path, audio_path=audio_path, frame_counts=frame_counts)
+                return output_path
+            except RuntimeError as e:
                 # If adding audio fails, just use the video without audio
                 logger.error(f"Error adding audio to stitched video: {e}")
-                if os.path.exists(temp_output):
-                    os.rename(temp_output, output_path)
-        else:
-            # No audio, just stitch the videos
-            await stitch_videos_async(clip_paths_str, str(output_path))
-            
+        
+        await stitch_segments(clip_paths, output_path, frame_counts=frame_counts)
         return output_path
     
     async def get_job_status(self, job_id: str) -> Dict[str, Any]:
         """
         Get the status of a job
         """
-        if job_id not in self.active_jobs:
+        job = self.active_jobs.get(job_id) or await asyncio.to_thread(self.job_store.get, job_id)
+        if job is None:
             return {"status": "not_found"}
         
-        job = self.active_jobs[job_id]
         return {
             "video_id": job_id,
             "video_url": f"{self.base_url}/{job_id}/{job_id}.mp4" if job["status"] == "completed" else None,
             "status": job["status"],
             "lyrics": job["lyrics"],
             "clips": job["clips"],
-            "prompts": job["prompts"]
+            "prompts": job["prompts"],
+            "timings": job.get("timings", {})
         }
 
 # Create singleton instance
@@ -0,0 +1,185 @@
+"""
+Batch prompting helpers for lyrics-to-prompt generation.
+
+Instead of one chat completion per lyric line, lines are grouped into
+chunks that fit a token budget and each chunk is sent as a single request
+asking for a JSON array of prompts keyed by line index. Model output is
+not always well-formed, so parse_batch_response accepts the common shape
+variations, repairs what it can and reports only the lines it could not
+recover; the caller falls back to per-line requests for those.
+"""
+import re
+import json
+import logging
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Rough English/Latin tokenizer ratio; good enough for budgeting
+CHARS_PER_TOKEN = 4
+# Expected completion tokens per generated prompt (the per-line call allowed 150)
+OUTPUT_TOKENS_PER_LINE = 120
+# Overhead of the JSON wrapper per line, in tokens
+TOKENS_PER_ENTRY = 12
+
+IndexedLine = Tuple[int, str]
+
+BATCH_INSTRUCTIONS = (
+    "You will receive a JSON array of objects with an \"index\" and a lyrics \"line\". "
+    "Write one prompt per line and reply with only a JSON object of the form "
+    "{\"prompts\": [{\"index\": <index>, \"prompt\": \"<prompt>\"}, ...]} "
+    "containing exactly one entry for every index you received."
+)
+
+_INDEX_KEYS = ("index", "line_index", "idx", "id", "i")
+_PROMPT_KEYS = ("prompt", "scene", "description", "text", "visual_prompt")
+_LIST_KEYS = ("prompts", "results", "items", "data", "scenes")
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate token count of a piece of text."""
+    return max(1, len(text) // CHARS_PER_TOKEN)
+
+
+def line_cost(line: str) -> int:
+    """Estimated tokens a line adds to a batch request, input and output."""
+    return estimate_tokens(line) + TOKENS_PER_ENTRY + OUTPUT_TOKENS_PER_LINE
+
+
+def chunk_by_token_budget(lines: Iterable[IndexedLine], budget: int, max_lines: Optional[int] = None) -> List[List[IndexedLine]]:
+    """
+    Group indexed lines into consecutive chunks whose estimated cost fits the budget.
+
+    A single line larger than the budget still gets a chunk of its own.
+
+    Args:
+        lines: (index, line) pairs in song order
+        budget: Estimated tokens (input + output) per request
+        max_lines: Optional hard cap on lines per chunk
+
+    Returns:
+        List of chunks
+    """
+    chunks: List[List[IndexedLine]] = []
+    current: List[IndexedLine] = []
+    used = 0
+    for index, line in lines:
+        cost = line_cost(line)
+        full = max_lines is not None and len(current) >= max_lines
+        if current and (used + cost > budget or full):
+            chunks.append(current)
+            current, used = [], 0
+        current.append((index, line))
+        used += cost
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def build_batch_messages(system_prompt: str, chunk: List[IndexedLine]) -> List[Dict[str, str]]:
+    """Chat messages asking for all prompts of a chunk in one JSON reply."""
+    payload = json.dumps([{"index": index, "line": line} for index, line in chunk], ensure_ascii=False)
+    return [
+        {"role": "system", "content": f"{system_prompt} {BATCH_INSTRUCTIONS}"},
+        {"role": "user", "content": payload},
+    ]
+
+
+def max_output_tokens(chunk: List[IndexedLine]) -> int:
+    """Completion token limit for a chunk."""
+    return OUTPUT_TOKENS_PER_LINE * len(chunk) + 50
+
+
+def _loads_lenient(text: str) -> Any:
+    """json.loads that tolerates code fences, surrounding prose and trailing commas."""
+    text = text.strip()
+    fenced = re.search(r"```(?:json)?\s*(.*?)```", text, re.DOTALL)
+    if fenced:
+        text = fenced.group(1).strip()
+    try:
+        return json.loads(text)
+    except ValueError:
+        pass
+
+    # Take the outermost JSON object/array embedded in prose
+    starts = [pos for pos in (text.find("{"), text.find("[")) if pos != -1]
+    if not starts:
+        raise ValueError("No JSON found in response")
+    start = min(starts)
+    end = max(text.rfind("}"), text.rfind("]"))
+    candidate = text[start:end + 1]
+    candidate = re.sub(r",\s*([}\]])", r"\1", candidate)
+    return json.loads(candidate)
+
+
+def _first(entry: Dict[str, Any], keys: Tuple[str, ...]) -> Any:
+    for key in keys:
+        if key in entry:
+            return entry[key]
+    return None
+
+
+def _as_index(value: Any) -> Optional[int]:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def parse_batch_response(text: str, expected: List[int]) -> Dict[int, str]:
+    """
+    Extract {line index: prompt} from a batch reply, repairing common shape problems.
+
+    Accepted shapes include {"prompts": [{"index", "prompt"}, ...]}, a bare
+    list of such objects, {"<index>": "<prompt>"} mappings and a bare list
+    of strings (mapped positionally when its length matches). Entries for
+    unexpected indices and empty prompts are dropped.
+
+    Args:
+        text: Raw completion content
+        expected: Line indices that were sent
+
+    Returns:
+        Prompts for the indices that could be recovered
+    """
+    expected_set = set(expected)
+    try:
+        data = _loads_lenient(text)
+    except ValueError as e:
+        logger.warning(f"Unparseable batch prompt response: {e}")
+        return {}
+
+    if isinstance(data, dict):
+        nested = next((data[key] for key in _LIST_KEYS if isinstance(data.get(key), (list, dict))), None)
+        if nested is not None:
+            data = nested
+
+    results: Dict[int, str] = {}
+    if isinstance(data, dict):
+        # {"0": "prompt", "1": "prompt"} or {"0": {"prompt": ...}}
+        for key, value in data.items():
+            index = _as_index(key)
+            if isinstance(value, dict):
+                value = _first(value, _PROMPT_KEYS)
+            if index is not None and isinstance(value, str):
+                results[index] = value
+    elif isinstance(data, list):
+        if all(isinstance(item, str) for item in data):
+            if len(data) == len(expected):
+                results = dict(zip(expected, data))
+            else:
+                logger.warning(f"Batch returned {len(data)} unkeyed prompts for {len(expected)} lines; ignoring")
+        else:
+            for item in data:
+                if not isinstance(item, dict):
+                    continue
+                index = _as_index(_first(item, _INDEX_KEYS))
+                prompt = _first(item, _PROMPT_KEYS)
+                if index is not None and isinstance(prompt, str):
+                    results[index] = prompt
+
+    return {
+        index: prompt.strip()
+        for index, prompt in results.items()
+        if index in expected_set and prompt and prompt.strip()
+    }
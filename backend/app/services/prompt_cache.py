@@ -0,0 +1,210 @@
+"""
+Persistent cache of lyric-line -> video prompt translations.
+
+Popular songs are submitted again and again and choruses repeat within a
+song, so prompts are cached in SQLite keyed by (normalized line, language,
+style, model). Entries expire after a TTL and the least recently used ones
+are evicted beyond a size limit. Hand-written translations (such as the
+Hindi examples) are stored as pinned entries that match any style and
+model and never expire.
+"""
+import re
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+import unicodedata
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+# Model name for pinned entries that match every model and style
+ANY_MODEL = "*"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS prompts (
+    key TEXT PRIMARY KEY,
+    line TEXT NOT NULL,
+    language TEXT NOT NULL,
+    style TEXT NOT NULL,
+    model TEXT NOT NULL,
+    prompt TEXT NOT NULL,
+    pinned INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS prompts_last_used ON prompts (pinned, last_used);
+"""
+
+# SQLite limits bound parameters per statement
+LOOKUP_BATCH = 500
+
+
+def normalize_line(line: str) -> str:
+    """
+    Canonical form of a lyric line for cache keys and in-song deduplication.
+
+    Case, Unicode form, surrounding punctuation and repeated whitespace are
+    ignored, so "Jab tak hai jaan!" and "jab tak  hai jaan" match.
+    """
+    line = unicodedata.normalize("NFKC", line).casefold()
+    line = re.sub(r"\s+", " ", line).strip()
+    return line.strip(" .,!?;:'\"-…")
+
+
+def cache_key(line: str, language: str, style: Optional[str], model: str) -> str:
+    """Stable key for a (line, language, style, model) combination."""
+    parts = (normalize_line(line), language.strip().lower(), (style or "").strip().lower(), model)
+    return hashlib.sha256("\x1f".join(parts).encode("utf-8")).hexdigest()
+
+
+class PromptCache:
+    """SQLite-backed LRU/TTL cache of generated prompts."""
+
+    def __init__(
+        self,
+        path: Union[str, Path],
+        max_entries: int = 50_000,
+        ttl_seconds: Optional[float] = 30 * 24 * 3600
+    ):
+        """
+        Open (or create) the cache database.
+
+        Args:
+            path: SQLite file
+            max_entries: Unpinned entries kept before least recently used ones are evicted
+            ttl_seconds: Age after which unpinned entries expire (None: never)
+        """
+        self.path = Path(path)
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SCHEMA)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def _fresh_after(self, now: float) -> float:
+        return now - self.ttl_seconds if self.ttl_seconds else float("-inf")
+
+    def lookup(
+        self,
+        lines: Iterable[str],
+        language: str,
+        style: Optional[str],
+        model: str
+    ) -> Dict[str, str]:
+        """
+        Find cached prompts for several lines.
+
+        A prompt cached for this exact language/style/model wins over a
+        pinned entry for the line.
+
+        Returns:
+            {line: prompt} for the lines that were found (keys as passed in)
+        """
+        wanted: Dict[str, List[str]] = {}
+        for line in lines:
+            wanted.setdefault(cache_key(line, language, style, model), []).append(line)
+            wanted.setdefault(cache_key(line, language, None, ANY_MODEL), []).append(line)
+        if not wanted:
+            return {}
+
+        now = time.time()
+        found: Dict[str, Tuple[int, str]] = {}
+        keys = list(wanted)
+        with self._lock:
+            for start in range(0, len(keys), LOOKUP_BATCH):
+                batch = keys[start:start + LOOKUP_BATCH]
+                rows = self._conn.execute(
+                    f"SELECT key, prompt, pinned FROM prompts WHERE key IN ({','.join('?' * len(batch))}) "
+                    "AND (pinned = 1 OR created_at >= ?)",
+                    (*batch, self._fresh_after(now))
+                ).fetchall()
+                for key, prompt, pinned in rows:
+                    for line in wanted[key]:
+                        # Prefer exact (unpinned) entries over pinned fallbacks
+                        if line not in found or found[line][0] > pinned:
+                            found[line] = (pinned, prompt)
+                if rows:
+                    self._conn.execute(
+                        f"UPDATE prompts SET last_used = ? WHERE key IN ({','.join('?' * len(rows))})",
+                        (now, *(row[0] for row in rows))
+                    )
+        return {line: prompt for line, (_, prompt) in found.items()}
+
+    def store(
+        self,
+        prompts: Dict[str, str],
+        language: str,
+        style: Optional[str],
+        model: str,
+        pinned: bool = False
+    ) -> None:
+        """
+        Cache prompts for lines.
+
+        Args:
+            prompts: {line: prompt}
+            language: Language of the lines
+            style: Style the prompts were generated for
+            model: Model that generated them (ANY_MODEL for pinned translations)
+            pinned: Never expire or evict these entries
+        """
+        if not prompts:
+            return
+        now = time.time()
+        rows = [
+            (
+                cache_key(line, language, None if pinned else style, ANY_MODEL if pinned else model),
+                normalize_line(line), language.strip().lower(), "" if pinned else (style or "").strip().lower(),
+                ANY_MODEL if pinned else model, prompt, int(pinned), now, now
+            )
+            for line, prompt in prompts.items()
+        ]
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO prompts "
+                "(key, line, language, style, model, prompt, pinned, created_at, last_used) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows
+            )
+        if not pinned:
+            self.prune()
+
+    def seed(self, translations: Dict[str, str], language: str) -> None:
+        """Store hand-written translations as pinned entries (idempotent)."""
+        self.store(translations, language, None, ANY_MODEL, pinned=True)
+
+    def prune(self) -> int:
+        """
+        Drop expired entries and evict least recently used ones over the limit.
+
+        Returns:
+            Number of entries removed
+        """
+        with self._lock:
+            removed = self._conn.execute(
+                "DELETE FROM prompts WHERE pinned = 0 AND created_at < ?",
+                (self._fresh_after(time.time()),)
+            ).rowcount
+            excess = self._conn.execute("SELECT COUNT(*) FROM prompts WHERE pinned = 0").fetchone()[0] - self.max_entries
+            if excess > 0:
+                removed += self._conn.execute(
+                    "DELETE FROM prompts WHERE key IN "
+                    "(SELECT key FROM prompts WHERE pinned = 0 ORDER BY last_used LIMIT ?)",
+                    (excess,)
+                ).rowcount
+        if removed:
+            logger.debug(f"Prompt cache pruned {removed} entries")
+        return removed
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM prompts").fetchone()[0]
@@ -4,10 +4,8 @@ Video generation service.
 import os
 import time
 import logging
-import asyncio
 import subprocess
 import tempfile
-import json
 from pathlib import Path
 from typing import Dict, Any, List, Optional
 
@@ -15,6 +13,8 @@ from ..models.video import Video
 from ..schemas.video import VideoGenerationRequest
 from ..config.settings import settings
 from .database_service import DatabaseService
+from ..utils.media.probe import media_probe, MediaProbeError
+from ..utils.media.stitch import stitch_segments
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -115,53 +115,27 @@ class VideoService:
             if not os.path.exists(path):
                 raise ValueError(f"Video file not found: {path}")
         
-        # Verify that all videos have the same resolution and frame rate
+        # Verify that all videos have the same resolution and frame rate.
+        # Files are probed concurrently and cached, so repeated stitches of
+        # the same segments do not spawn ffprobe again.
         if len(video_paths) > 1:
-            # Get information about the first video
-            cmd = [
-                "ffprobe", "-v", "error", "-select_streams", "v:0",
-                "-show_entries", "stream=width,height,r_frame_rate",
-                "-of", "json", video_paths[0]
-            ]
-            
-            result = subprocess.run(cmd, capture_output=True, text=True, check=True)
-            first_video_info = json.loads(result.stdout)
-            
             try:
-                first_width = first_video_info["streams"][0]["width"]
-                first_height = first_video_info["streams"][0]["height"]
-                first_frame_rate = first_video_info["streams"][0]["r_frame_rate"]
-            except (KeyError, IndexError) as e:
-                raise ValueError(f"Could not parse video info for {video_paths[0]}: {e}")
+                infos = media_probe.probe_many_sync(video_paths)
+            except MediaProbeError as e:
+                raise ValueError(f"Could not read video info: {e}")
             
-            # Check all other videos
-            for path in video_paths[1:]:
-                cmd = [
-                    "ffprobe", "-v", "error", "-select_streams", "v:0",
-                    "-show_entries", "stream=width,height,r_frame_rate",
-                    "-of", "json", path
-                ]
-                
-                result = subprocess.run(cmd, capture_output=True, text=True, check=True)
-                video_info = json.loads(result.stdout)
-                
-                try:
-                    width = video_info["streams"][0]["width"]
-                    height = video_info["streams"][0]["height"]
-                    frame_rate = video_info["streams"][0]["r_frame_rate"]
-                except (KeyError, IndexError) as e:
-                    raise ValueError(f"Could not parse video info for {path}: {e}")
-                
-                if width != first_width or height != first_height:
+            first = infos[0]
+            for info in infos[1:]:
+                if info.width != first.width or info.height != first.height:
                     raise ValueError(
-                        f"Video resolution mismatch: {path} has {width}x{height}, "
-                        f"but first video has {first_width}x{first_height}"
+                        f"Video resolution mismatch: {info.path} has {info.width}x{info.height}, "
+                        f"but first video has {first.width}x{first.height}"
                     )
                 
-                if frame_rate != first_frame_rate:
+                if info.frame_rate != first.frame_rate:
                     raise ValueError(
-                        f"Video frame rate mismatch: {path} has {frame_rate} fps, "
-                        f"but first video has {first_frame_rate} fps"
+                        f"Video frame rate mismatch: {info.path} has {info.frame_rate} fps, "
+                        f"but first video has {first.frame_rate} fps"
                     )
         
         # Create a temporary file with the list of videos to concatenate
@@ -201,7 +175,11 @@ class VideoService:
     
     async def stitch_videos_async(self, video_paths: List[str], output_path: str) -> str:
         """
-        Asynchronous version of stitch_videos
+        Asynchronously stitch videos, conforming mismatched ones.
+        
+        Unlike stitch_videos this does not reject segments with a different
+        resolution, frame rate or codec: only those segments are re-encoded
+        to the dominant profile before the stream-copy concat.
         
         Args:
             video_paths: List of paths to video files to stitch together
@@ -210,5 +188,7 @@ class VideoService:
         Returns:
             Path to the stitched video file
         """
-        # Run the synchronous function in a thread pool executor
-        return await asyncio.to_thread(self.stitch_videos, video_paths, output_path) 
\ No newline at end of file
+        for path in video_paths:
+            if not os.path.exists(path):
+                raise ValueError(f"Video file not found: {path}")
+        return await stitch_segments(video_paths, output_path)
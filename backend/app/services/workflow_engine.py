@@ -0,0 +1,380 @@
+"""
+Workflow engine for multi-stage video jobs.
+
+A job is described as a DAG of named nodes. Each node is an async function
+whose keyword arguments are static parameters plus the outputs of the nodes
+it depends on. The engine runs every node whose dependencies are satisfied
+concurrently, checkpoints each output in the job directory under a hash of
+the node's inputs, and skips nodes whose checkpoint still matches when the
+same job is run again. A crashed or partially failed job therefore resumes
+from the last completed nodes instead of starting over.
+"""
+
+import os
+import json
+import time
+import asyncio
+import hashlib
+import logging
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple, Type, Union
+
+from pydantic import BaseModel
+
+logger = logging.getLogger(__name__)
+
+# Dependencies map a keyword argument either to a single node or to an
+# ordered list of nodes whose outputs are passed as a list.
+DependencySpec = Union[str, List[str]]
+NodeCallback = Callable[[str, Any, bool], Awaitable[None]]
+
+
+class WorkflowError(Exception):
+    """Raised when one or more workflow nodes fail."""
+
+    def __init__(self, failed: Dict[str, BaseException], skipped: List[str]):
+        self.failed = failed
+        self.skipped = skipped
+        details = "; ".join(f"{name}: {error}" for name, error in failed.items())
+        super().__init__(f"{len(failed)} workflow node(s) failed ({details})")
+
+
+class NodeRun(BaseModel):
+    """Execution record of a single workflow node."""
+    name: str
+    status: str = "pending"  # pending, running, completed, cached, failed, skipped
+    started_at: Optional[float] = None
+    duration: Optional[float] = None
+    error: Optional[str] = None
+
+
+class Node:
+    """A unit of work in a workflow."""
+
+    def __init__(
+        self,
+        name: str,
+        func: Callable[..., Awaitable[Any]],
+        deps: Optional[Dict[str, DependencySpec]] = None,
+        params: Optional[Dict[str, Any]] = None,
+        output_type: Union[Type, Tuple[Type, ...]] = object,
+        cache: bool = True,
+        pool: Optional[str] = None
+    ):
+        """
+        Describe a workflow node.
+
+        Args:
+            name: Unique node name within the workflow
+            func: Async function producing the node's output
+            deps: Keyword argument name -> node name (or list of node names)
+            params: Static keyword arguments; part of the cache key
+            output_type: Expected type of the output, checked after every run
+            cache: Whether the output may be checkpointed and reused
+            pool: Optional concurrency pool limiting how many nodes of this kind run at once
+        """
+        self.name = name
+        self.func = func
+        self.deps = deps or {}
+        self.params = params or {}
+        self.output_type = output_type
+        self.cache = cache
+        self.pool = pool
+
+    @property
+    def upstream(self) -> List[str]:
+        """Names of all nodes this node depends on."""
+        names: List[str] = []
+        for spec in self.deps.values():
+            names.extend([spec] if isinstance(spec, str) else spec)
+        return names
+
+
+def encode_artifact(value: Any) -> Any:
+    """Convert a node output into JSON, tagging paths so they round-trip."""
+    if isinstance(value, Path):
+        return {"__path__": str(value)}
+    if isinstance(value, dict):
+        return {str(key): encode_artifact(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [encode_artifact(item) for item in value]
+    if isinstance(value, BaseModel):
+        return encode_artifact(value.model_dump())
+    return value
+
+
+def decode_artifact(value: Any) -> Any:
+    """Inverse of encode_artifact."""
+    if isinstance(value, dict):
+        if set(value) == {"__path__"}:
+            return Path(value["__path__"])
+        return {key: decode_artifact(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [decode_artifact(item) for item in value]
+    return value
+
+
+def _artifact_files(value: Any) -> List[Path]:
+    """All file paths referenced by an artifact."""
+    if isinstance(value, Path):
+        return [value]
+    if isinstance(value, dict):
+        return [path for item in value.values() for path in _artifact_files(item)]
+    if isinstance(value, (list, tuple)):
+        return [path for item in value for path in _artifact_files(item)]
+    return []
+
+
+def artifact_digest(value: Any) -> str:
+    """
+    Content digest of an artifact used to key downstream nodes.
+
+    Files contribute their size and modification time, so replacing a file
+    on disk invalidates everything built from it.
+    """
+    files = []
+    for path in _artifact_files(value):
+        try:
+            stat = path.stat()
+            files.append([str(path), stat.st_size, stat.st_mtime_ns])
+        except OSError:
+            files.append([str(path), None, None])
+    payload = json.dumps({"value": encode_artifact(value), "files": files}, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class WorkflowStore:
+    """Checkpoint store keeping one JSON file per node and input hash."""
+
+    def __init__(self, directory: Union[str, Path]):
+        self.directory = Path(directory)
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _path(self, node_name: str, input_hash: str) -> Path:
+        safe_name = "".join(c if c.isalnum() or c in "-_" else "_" for c in node_name)
+        return self.directory / f"{safe_name}-{input_hash[:16]}.json"
+
+    def load(self, node_name: str, input_hash: str) -> Tuple[bool, Any]:
+        """
+        Look up a checkpoint.
+
+        Returns:
+            (found, output). A checkpoint whose files have disappeared is treated as missing.
+        """
+        path = self._path(node_name, input_hash)
+        if not path.exists():
+            return False, None
+        try:
+            with open(path, "r") as f:
+                record = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable checkpoint {path}: {e}")
+            return False, None
+
+        if record.get("input_hash") != input_hash:
+            return False, None
+
+        output = decode_artifact(record.get("output"))
+        missing = [str(p) for p in _artifact_files(output) if not p.exists()]
+        if missing:
+            logger.info(f"Checkpoint for {node_name} references missing files {missing}, recomputing")
+            return False, None
+        return True, output
+
+    def save(self, node_name: str, input_hash: str, output: Any, duration: float) -> None:
+        """Atomically write a checkpoint."""
+        path = self._path(node_name, input_hash)
+        record = {
+            "node": node_name,
+            "input_hash": input_hash,
+            "output": encode_artifact(output),
+            "duration": duration,
+            "completed_at": time.time()
+        }
+        temp_path = path.with_suffix(".json.tmp")
+        with open(temp_path, "w") as f:
+            json.dump(record, f, default=str)
+        os.replace(temp_path, path)
+
+
+class Workflow:
+    """
+    DAG of nodes executed with maximum safe concurrency.
+
+    Independent nodes run at the same time, bounded by max_concurrency and by
+    per-pool limits. When a node fails its dependents are skipped but
+    unrelated branches still finish, so their checkpoints are available to
+    the next run.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        store_dir: Optional[Union[str, Path]] = None,
+        max_concurrency: int = 8,
+        pools: Optional[Dict[str, int]] = None,
+        on_node_complete: Optional[NodeCallback] = None
+    ):
+        """
+        Initialize an empty workflow.
+
+        Args:
+            name: Workflow name used in logs
+            store_dir: Directory for checkpoints; None disables caching and resume
+            max_concurrency: Upper bound on nodes running at once
+            pools: Pool name -> maximum concurrent nodes in that pool
+            on_node_complete: Awaited with (node_name, output, cached) after each successful node
+        """
+        self.name = name
+        self.store = WorkflowStore(store_dir) if store_dir is not None else None
+        self.nodes: Dict[str, Node] = {}
+        self.runs: Dict[str, NodeRun] = {}
+        self.outputs: Dict[str, Any] = {}
+        self.on_node_complete = on_node_complete
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._pools = {pool: asyncio.Semaphore(limit) for pool, limit in (pools or {}).items()}
+
+    def add(self, node: Node) -> Node:
+        """Register a node. Dependencies must already be registered."""
+        if node.name in self.nodes:
+            raise ValueError(f"Duplicate workflow node: {node.name}")
+        unknown = [dep for dep in node.upstream if dep not in self.nodes]
+        if unknown:
+            raise ValueError(f"Node {node.name} depends on unknown node(s): {unknown}")
+        if node.pool is not None and node.pool not in self._pools:
+            raise ValueError(f"Node {node.name} uses undefined pool: {node.pool}")
+        self.nodes[node.name] = node
+        self.runs[node.name] = NodeRun(name=node.name)
+        return node
+
+    @property
+    def timings(self) -> Dict[str, float]:
+        """Wall-clock seconds spent in each node that has finished."""
+        return {
+            name: round(run.duration, 3)
+            for name, run in self.runs.items()
+            if run.duration is not None
+        }
+
+    def report(self) -> List[Dict[str, Any]]:
+        """Per-node status and timing in registration order."""
+        return [self.runs[name].model_dump() for name in self.nodes]
+
+    async def run(self) -> Dict[str, Any]:
+        """
+        Execute the workflow.
+
+        Returns:
+            Outputs of all nodes keyed by node name
+
+        Raises:
+            WorkflowError: If any node failed
+        """
+        started = time.perf_counter()
+        pending = set(self.nodes)
+        running: Dict[asyncio.Task, str] = {}
+        failed: Dict[str, BaseException] = {}
+        skipped: List[str] = []
+
+        try:
+            while pending or running:
+                for name in [n for n in self.nodes if n in pending]:
+                    upstream = self.nodes[name].upstream
+                    if any(dep in failed or dep in skipped for dep in upstream):
+                        pending.discard(name)
+                        skipped.append(name)
+                        self.runs[name].status = "skipped"
+                    elif all(dep in self.outputs for dep in upstream):
+                        pending.discard(name)
+                        running[asyncio.create_task(self._execute(self.nodes[name]))] = name
+
+                if not running:
+                    break
+
+                done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    name = running.pop(task)
+                    error = task.exception()
+                    if error is not None:
+                        failed[name] = error
+                        self.runs[name].status = "failed"
+                        self.runs[name].error = str(error)
+                        logger.error(f"Workflow {self.name}: node {name} failed: {error}")
+        finally:
+            for task in running:
+                task.cancel()
+
+        logger.info(
+            f"Workflow {self.name} finished in {time.perf_counter() - started:.2f}s: "
+            + ", ".join(f"{name}={run.status}" for name, run in self.runs.items())
+        )
+        if failed:
+            raise WorkflowError(failed, skipped)
+        return dict(self.outputs)
+
+    def _input_hash(self, node: Node) -> str:
+        """Hash of the node's static parameters and the digests of its inputs."""
+        deps = {
+            arg: ([artifact_digest(self.outputs[spec])] if isinstance(spec, str)
+                  else [artifact_digest(self.outputs[dep]) for dep in spec])
+            for arg, spec in node.deps.items()
+        }
+        payload = json.dumps(
+            {"node": node.name, "params": encode_artifact(node.params), "deps": deps},
+            sort_keys=True,
+            default=str
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _kwargs(self, node: Node) -> Dict[str, Any]:
+        kwargs = dict(node.params)
+        for arg, spec in node.deps.items():
+            kwargs[arg] = self.outputs[spec] if isinstance(spec, str) else [self.outputs[dep] for dep in spec]
+        return kwargs
+
+    async def _execute(self, node: Node) -> None:
+        run = self.runs[node.name]
+        input_hash = self._input_hash(node)
+
+        if node.cache and self.store is not None:
+            found, output = self.store.load(node.name, input_hash)
+            if found:
+                run.status = "cached"
+                run.duration = 0.0
+                self.outputs[node.name] = output
+                logger.info(f"Workflow {self.name}: node {node.name} restored from checkpoint")
+                if self.on_node_complete:
+                    await self.on_node_complete(node.name, output, True)
+                return
+
+        # The pool slot is taken before the global one, so nodes queued on a
+        # full pool do not hold global slots other nodes could run in
+        pool = self._pools.get(node.pool) if node.pool else None
+        if pool is not None:
+            await pool.acquire()
+        try:
+            async with self._semaphore:
+                run.status = "running"
+                run.started_at = time.time()
+                started = time.perf_counter()
+                try:
+                    output = await node.func(**self._kwargs(node))
+                finally:
+                    run.duration = time.perf_counter() - started
+        finally:
+            if pool is not None:
+                pool.release()
+
+        if not isinstance(output, node.output_type):
+            raise TypeError(
+                f"Node {node.name} returned {type(output).__name__}, expected {node.output_type}"
+            )
+
+        if node.cache and self.store is not None:
+            self.store.save(node.name, input_hash, output, run.duration)
+        self.outputs[node.name] = output
+        run.status = "completed"
+        logger.info(f"Workflow {self.name}: node {node.name} completed in {run.duration:.2f}s")
+
+        if self.on_node_complete:
+            await self.on_node_complete(node.name, output, False)
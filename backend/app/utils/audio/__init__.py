@@ -1,7 +1,26 @@
 """
-Audio utilities for beat detection and analysis.
+Audio utilities for ingest, beat detection, analysis, caching and background jobs.
 """
 
 from .beat_detector import get_beat_timestamps, analyze_beats
+from .analysis_cache import AnalysisCache, analysis_cache
+from .analysis_pool import AnalysisPool, AnalysisPoolError, analysis_pool
+from .analysis_jobs import AnalysisJob, analysis_jobs
+from .ingest import AudioHandle, AudioIngestError, ingest_audio, ingest_upload, spooled_upload
 
-__all__ = ["get_beat_timestamps", "analyze_beats"] 
\ No newline at end of file
+__all__ = [
+    "get_beat_timestamps",
+    "analyze_beats",
+    "AnalysisCache",
+    "analysis_cache",
+    "AnalysisPool",
+    "AnalysisPoolError",
+    "analysis_pool",
+    "AnalysisJob",
+    "analysis_jobs",
+    "AudioHandle",
+    "AudioIngestError",
+    "ingest_audio",
+    "ingest_upload",
+    "spooled_upload"
+] 
\ No newline at end of file
@@ -0,0 +1,333 @@
+"""
+Single-decode audio analysis engine.
+
+An AudioAnalyzer decodes a file once to a mono buffer at the analysis rate
+(AUDIO_ANALYSIS_SR, 22050 Hz by default; 0 keeps the native rate) and
+computes every result lazily from shared intermediates: the onset strength
+envelope is computed once, beat tracking runs once on it, and tempo,
+downbeats, intervals and regularity are all derived from those beats.
+Beat tracking only looks at the onset envelope, so analysing at 22050 Hz
+(23 ms frames) instead of a native 44.1/48 kHz keeps beat positions well
+within tracking tolerance while halving the STFT and tracking work.
+
+Long recordings (AUDIO_STREAMING_MIN_SECONDS, 10 minutes by default) are
+analysed by StreamingAudioAnalyzer instead, which never holds the decoded
+signal: blocks are read, downmixed and resampled as a stream, and the
+onset envelope is built frame by frame, carrying the STFT overlap across
+block boundaries so the envelope is continuous. Beat tracking then runs
+once over the whole envelope (about 43 values per second), with the tempo
+taken from a tempogram accumulated in chunks rather than materialised for
+the full duration.
+"""
+import os
+import logging
+from functools import cached_property
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import librosa
+import soundfile as sf
+import soxr
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ANALYSIS_SR = int(os.getenv("AUDIO_ANALYSIS_SR", "22050"))
+STREAMING_MIN_SECONDS = float(os.getenv("AUDIO_STREAMING_MIN_SECONDS", "600"))
+STREAM_BLOCK_SECONDS = 10.0
+HOP_LENGTH = 512
+# librosa's onset_strength defaults
+N_FFT = 2048
+N_MELS = 128
+TOP_DB = 80.0
+# Seconds of onset envelope per autocorrelation window (librosa's tempo default)
+TEMPO_AC_SECONDS = 8.0
+# Tempogram columns computed at once when estimating the tempo
+TEMPOGRAM_CHUNK = 1024
+# Downbeats assume 4/4 time, the most common signature
+BEATS_PER_BAR = 4
+
+
+class AudioAnalyzer:
+    """Beat analysis of one decoded signal, computed on demand and cached."""
+
+    def __init__(self, y: np.ndarray, sr: int, hop_length: int = HOP_LENGTH):
+        """
+        Wrap an already decoded mono signal.
+
+        Args:
+            y: Mono audio samples
+            sr: Sample rate of y
+            hop_length: Samples between onset envelope frames
+        """
+        self.y = y
+        self.sr = sr
+        self.hop_length = hop_length
+
+    @classmethod
+    def load(cls, audio_path: str, sr: Optional[int] = None, hop_length: int = HOP_LENGTH) -> "AudioAnalyzer":
+        """
+        Decode a file once, as mono at the analysis rate.
+
+        Args:
+            audio_path: Path to the audio file
+            sr: Analysis sample rate (default: AUDIO_ANALYSIS_SR; 0 for the native rate)
+            hop_length: Samples between onset envelope frames
+
+        Raises:
+            FileNotFoundError: If the file does not exist
+        """
+        if not os.path.exists(audio_path):
+            raise FileNotFoundError(f"Audio file not found: {audio_path}")
+        sr = DEFAULT_ANALYSIS_SR if sr is None else sr
+        y, sr = librosa.load(audio_path, sr=sr or None, mono=True)
+        return cls(y, sr, hop_length)
+
+    @property
+    def duration(self) -> float:
+        """Length of the signal in seconds."""
+        return len(self.y) / self.sr
+
+    @cached_property
+    def onset_envelope(self) -> np.ndarray:
+        """Onset strength per frame, shared by beat tracking and tempo."""
+        return librosa.onset.onset_strength(y=self.y, sr=self.sr, hop_length=self.hop_length)
+
+    @cached_property
+    def _beat_track(self):
+        tempo, frames = librosa.beat.beat_track(
+            onset_envelope=self.onset_envelope, sr=self.sr, hop_length=self.hop_length
+        )
+        return float(np.atleast_1d(tempo)[0]), frames
+
+    @cached_property
+    def beat_times(self) -> np.ndarray:
+        """Beat timestamps in seconds."""
+        return librosa.frames_to_time(self._beat_track[1], sr=self.sr, hop_length=self.hop_length)
+
+    @property
+    def estimated_tempo(self) -> float:
+        """Global tempo estimate from the beat tracker, in BPM."""
+        return self._beat_track[0]
+
+    @property
+    def downbeat_times(self) -> np.ndarray:
+        """Every BEATS_PER_BAR-th beat, starting with the first."""
+        return self.beat_times[::BEATS_PER_BAR]
+
+    @cached_property
+    def beat_intervals(self) -> np.ndarray:
+        """Seconds between consecutive beats."""
+        return np.diff(self.beat_times)
+
+    @property
+    def tempo(self) -> float:
+        """Average tempo over the detected beats, in BPM (0 with fewer than two beats)."""
+        return 60.0 / float(np.mean(self.beat_intervals)) if len(self.beat_intervals) else 0.0
+
+    @property
+    def regularity(self) -> float:
+        """Standard deviation of the beat intervals (lower = more regular)."""
+        return float(np.std(self.beat_intervals)) if len(self.beat_intervals) > 1 else 0.0
+
+    def summary(self) -> Dict[str, Any]:
+        """
+        JSON-ready analysis in the format returned by analyze_beats.
+        """
+        return {
+            "beat_timestamps": self.beat_times.tolist(),
+            "downbeat_timestamps": self.downbeat_times.tolist(),
+            "tempo_bpm": self.tempo,
+            "beat_intervals": self.beat_intervals.tolist(),
+            "beat_regularity": self.regularity,
+            "total_beats": len(self.beat_times),
+            "duration": self.duration
+        }
+
+
+class _OnsetStream:
+    """
+    Incremental onset strength, equal to librosa.onset.onset_strength over
+    the concatenated input.
+
+    Frames are centred as in librosa (n_fft // 2 zeros of padding at both
+    ends); the samples a frame shares with the next block are kept in the
+    buffer. The only difference is the 80 dB floor of the log-mel
+    spectrogram, which follows the loudest value seen so far instead of
+    the loudest in the whole file.
+    """
+
+    def __init__(self, sr: int, hop_length: int = HOP_LENGTH, n_fft: int = N_FFT):
+        self.sr = sr
+        self.hop_length = hop_length
+        self.n_fft = n_fft
+        self.buffer = np.zeros(n_fft // 2, dtype=np.float32)
+        self.previous: Optional[np.ndarray] = None
+        self.db_max = -np.inf
+        self.chunks: List[np.ndarray] = []
+        self.n_frames = 0
+
+    def _frames(self, samples: np.ndarray) -> None:
+        n = 1 + (len(samples) - self.n_fft) // self.hop_length if len(samples) >= self.n_fft else 0
+        if n <= 0:
+            self.buffer = samples
+            return
+        mel = librosa.feature.melspectrogram(
+            y=samples[:(n - 1) * self.hop_length + self.n_fft],
+            sr=self.sr, n_fft=self.n_fft, hop_length=self.hop_length, n_mels=N_MELS, center=False
+        )
+        db = librosa.power_to_db(mel, top_db=None)
+        self.db_max = max(self.db_max, float(db.max()))
+        db = np.maximum(db, self.db_max - TOP_DB)
+        if self.previous is not None:
+            db = np.concatenate([self.previous, db], axis=1)
+        self.chunks.append(np.maximum(0.0, db[:, 1:] - db[:, :-1]).mean(axis=0))
+        self.previous = db[:, -1:]
+        self.n_frames += n
+        self.buffer = samples[n * self.hop_length:]
+
+    def push(self, samples: np.ndarray) -> None:
+        """Add the next samples of the signal."""
+        self._frames(np.concatenate([self.buffer, samples]))
+
+    def finish(self) -> np.ndarray:
+        """Flush the last frames and return the onset envelope."""
+        self._frames(np.concatenate([self.buffer, np.zeros(self.n_fft // 2, dtype=np.float32)]))
+        # Frame 0 has no predecessor; the lag and centring offset are zero-padded
+        pad = 1 + self.n_fft // (2 * self.hop_length)
+        envelope = np.concatenate([np.zeros(pad, dtype=np.float32)] + self.chunks)
+        return envelope[:self.n_frames]
+
+
+def _mean_tempogram(onset_envelope: np.ndarray, sr: int, hop_length: int) -> np.ndarray:
+    """
+    Time-averaged autocorrelation tempogram, as librosa.feature.tempo
+    aggregates it, computed TEMPOGRAM_CHUNK columns at a time.
+    """
+    win_length = int(librosa.time_to_frames(TEMPO_AC_SECONDS, sr=sr, hop_length=hop_length))
+    half = win_length // 2
+    # Same linear-ramp padding as tempogram(center=True)
+    padded = np.pad(onset_envelope, (half, half), mode="linear_ramp", end_values=(0, 0))
+    n = len(onset_envelope)
+    total = np.zeros(win_length)
+    for start in range(0, n, TEMPOGRAM_CHUNK):
+        stop = min(start + TEMPOGRAM_CHUNK, n)
+        tempogram = librosa.feature.tempogram(
+            onset_envelope=padded[start:stop + win_length - 1],
+            sr=sr, hop_length=hop_length, win_length=win_length, center=False
+        )
+        total += tempogram.sum(axis=1)
+    return total / max(n, 1)
+
+
+class StreamingAudioAnalyzer(AudioAnalyzer):
+    """
+    Beat analysis of a long recording without holding its samples.
+
+    Memory is bounded by the block size; the onset envelope kept for beat
+    tracking grows by under a megabyte per hour of audio.
+    """
+
+    def __init__(self, onset_envelope: np.ndarray, sr: int, duration: float, hop_length: int = HOP_LENGTH):
+        """
+        Wrap an onset envelope computed by load().
+
+        Args:
+            onset_envelope: Onset strength per frame
+            sr: Analysis sample rate the envelope was computed at
+            duration: Length of the signal in seconds
+            hop_length: Samples between onset envelope frames
+        """
+        self.y = None
+        self.sr = sr
+        self.hop_length = hop_length
+        self.onset_envelope = onset_envelope
+        self._duration = duration
+
+    @classmethod
+    def load(
+        cls,
+        audio_path: str,
+        sr: Optional[int] = None,
+        hop_length: int = HOP_LENGTH,
+        block_seconds: float = STREAM_BLOCK_SECONDS
+    ) -> "StreamingAudioAnalyzer":
+        """
+        Stream a file block by block into an onset envelope.
+
+        Args:
+            audio_path: Path to an audio file readable by soundfile
+            sr: Analysis sample rate (default: AUDIO_ANALYSIS_SR; 0 for the native rate)
+            hop_length: Samples between onset envelope frames
+            block_seconds: Seconds of audio decoded at a time
+
+        Raises:
+            FileNotFoundError: If the file does not exist
+            soundfile.LibsndfileError: If soundfile cannot decode the file
+        """
+        if not os.path.exists(audio_path):
+            raise FileNotFoundError(f"Audio file not found: {audio_path}")
+        sr = DEFAULT_ANALYSIS_SR if sr is None else sr
+
+        with sf.SoundFile(audio_path) as audio:
+            native_sr = audio.samplerate
+            sr = sr or native_sr
+            resampler = soxr.ResampleStream(native_sr, sr, 1, dtype="float32", quality="HQ") if sr != native_sr else None
+            onsets = _OnsetStream(sr, hop_length)
+            n_samples = 0
+            block_frames = max(int(block_seconds * native_sr), N_FFT)
+            while True:
+                block = audio.read(block_frames, dtype="float32", always_2d=True)
+                last = len(block) < block_frames
+                # Downmix as librosa.to_mono does, then resample
+                mono = block.mean(axis=1)
+                if resampler is not None:
+                    mono = resampler.resample_chunk(mono, last=last)
+                onsets.push(mono)
+                n_samples += len(mono)
+                if last:
+                    break
+
+        logger.debug(f"Streamed {audio_path}: {n_samples / sr:.1f}s at {sr} Hz")
+        return cls(onsets.finish(), sr, n_samples / sr, hop_length)
+
+    @property
+    def duration(self) -> float:
+        """Length of the signal in seconds."""
+        return self._duration
+
+    @cached_property
+    def _beat_track(self):
+        if not self.onset_envelope.any():
+            return 0.0, np.array([], dtype=int)
+        bpm = librosa.feature.tempo(
+            tg=_mean_tempogram(self.onset_envelope, self.sr, self.hop_length)[:, None],
+            sr=self.sr, hop_length=self.hop_length, aggregate=None
+        )
+        tempo, frames = librosa.beat.beat_track(
+            onset_envelope=self.onset_envelope, sr=self.sr, hop_length=self.hop_length, bpm=float(bpm[0])
+        )
+        return float(np.atleast_1d(tempo)[0]), frames
+
+
+def open_analyzer(audio_path: str, sr: Optional[int] = None, streaming: Optional[bool] = None) -> AudioAnalyzer:
+    """
+    Analyzer for a file, streaming it if it is long.
+
+    Args:
+        audio_path: Path to the audio file
+        sr: Analysis sample rate (default: AUDIO_ANALYSIS_SR; 0 for the native rate)
+        streaming: Force (True) or skip (False) streaming; by default files of
+            AUDIO_STREAMING_MIN_SECONDS or more that soundfile can read are streamed
+    """
+    if not os.path.exists(audio_path):
+        raise FileNotFoundError(f"Audio file not found: {audio_path}")
+    if streaming is None:
+        try:
+            streaming = sf.info(audio_path).duration >= STREAMING_MIN_SECONDS
+        except sf.LibsndfileError:
+            # Formats soundfile cannot read are decoded whole by librosa (audioread)
+            streaming = False
+    if streaming:
+        return StreamingAudioAnalyzer.load(audio_path, sr)
+    return AudioAnalyzer.load(audio_path, sr)
+
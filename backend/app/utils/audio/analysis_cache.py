@@ -0,0 +1,174 @@
+"""
+Content-hash cache of audio analysis results.
+
+Users re-upload the same backing track many times while iterating on a
+video, so analysis results are keyed by the SHA-256 of the audio content
+(computed during ingest) plus a fingerprint of the analysis parameters,
+and stored in the audio_analyses table. A bounded in-process LRU sits in
+front of the database, so a repeat upload is answered in milliseconds
+without decoding anything. The database is optional: if it is not
+configured or unreachable, only the in-process cache is used, and the
+store is skipped for a growing back-off period after each failure so
+requests do not wait on a connect timeout every time.
+"""
+import json
+import asyncio
+import hashlib
+import time
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import librosa
+
+from .analysis import BEATS_PER_BAR, DEFAULT_ANALYSIS_SR, HOP_LENGTH, STREAMING_MIN_SECONDS
+
+logger = logging.getLogger(__name__)
+
+# Bump when the analysis algorithm changes so old results are not reused
+ANALYSIS_VERSION = 2
+
+# Seconds the store is skipped after a failure, doubling up to the maximum
+STORE_RETRY_SECONDS = 30.0
+STORE_RETRY_MAX_SECONDS = 600.0
+
+Analysis = Dict[str, Any]
+Loader = Callable[[str, str], Optional[Analysis]]
+Saver = Callable[[str, str, Analysis], None]
+
+
+def analysis_params_key(sr: Optional[int] = None, hop_length: int = HOP_LENGTH) -> str:
+    """Fingerprint of everything besides the audio that affects the result."""
+    params = {
+        "version": ANALYSIS_VERSION,
+        "librosa": librosa.__version__,
+        "sr": DEFAULT_ANALYSIS_SR if sr is None else sr,
+        "hop_length": hop_length,
+        "beats_per_bar": BEATS_PER_BAR,
+        "streaming_min_seconds": STREAMING_MIN_SECONDS,
+    }
+    return hashlib.sha256(json.dumps(params, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def _db_load(content_hash: str, params_key: str) -> Optional[Analysis]:
+    from app.db.database import SessionLocal
+    from app.db import crud
+
+    db = SessionLocal()
+    try:
+        record = crud.get_audio_analysis_by_hash(db, content_hash, params_key)
+        return record.analysis if record is not None else None
+    finally:
+        db.close()
+
+
+def _db_save(content_hash: str, params_key: str, analysis: Analysis) -> None:
+    from app.db.database import SessionLocal
+    from app.db import crud
+
+    db = SessionLocal()
+    try:
+        crud.save_audio_analysis(db, content_hash, params_key, analysis)
+    finally:
+        db.close()
+
+
+class AnalysisCache:
+    """In-process LRU in front of persistent analysis storage."""
+
+    def __init__(
+        self,
+        max_entries: int = 256,
+        load: Optional[Loader] = _db_load,
+        save: Optional[Saver] = _db_save,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        """
+        Initialize the cache.
+
+        Args:
+            max_entries: Results kept in process memory
+            load: Blocking lookup of a stored result by (content hash, params key)
+            save: Blocking write of a result
+            clock: Monotonic time source for the store back-off
+        """
+        self.max_entries = max_entries
+        self._load = load
+        self._save = save
+        self._memory: "OrderedDict[Tuple[str, str], Analysis]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._clock = clock
+        # The store is skipped until this clock value after a failure
+        self._store_retry_at = 0.0
+        self._store_backoff = 0.0
+
+    def _remember(self, key: Tuple[str, str], analysis: Analysis) -> None:
+        with self._lock:
+            self._memory[key] = analysis
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+    def _persistent(self, func: Optional[Callable], *args):
+        if func is None or self._clock() < self._store_retry_at:
+            return None
+        try:
+            result = func(*args)
+        except Exception as e:
+            # Log only when the store goes down; a missing database should not fill the logs
+            if not self._store_backoff:
+                logger.warning(f"Audio analysis store unavailable, using memory cache only: {e}")
+            self._store_backoff = min(STORE_RETRY_MAX_SECONDS, self._store_backoff * 2 or STORE_RETRY_SECONDS)
+            self._store_retry_at = self._clock() + self._store_backoff
+            return None
+        if self._store_backoff:
+            logger.info("Audio analysis store is available again")
+            self._store_backoff = 0.0
+        return result
+
+    def get(self, content_hash: str, params_key: str) -> Optional[Analysis]:
+        """Cached result, from memory or from the store (blocking)."""
+        key = (content_hash, params_key)
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                return self._memory[key]
+        analysis = self._persistent(self._load, content_hash, params_key)
+        if analysis is not None:
+            self._remember(key, analysis)
+        return analysis
+
+    def put(self, content_hash: str, params_key: str, analysis: Analysis) -> None:
+        """Store a result in memory and persistently (blocking)."""
+        self._remember((content_hash, params_key), analysis)
+        self._persistent(self._save, content_hash, params_key, analysis)
+
+    async def get_or_compute(
+        self,
+        content_hash: str,
+        compute: Callable[[], Any],
+        params_key: Optional[str] = None
+    ) -> Tuple[Analysis, bool]:
+        """
+        Return the cached analysis for some audio or compute and store it.
+
+        Args:
+            content_hash: SHA-256 of the audio content (AudioHandle.sha256)
+            compute: Async function (no arguments) producing the analysis
+            params_key: Analysis parameter fingerprint (default: current settings)
+
+        Returns:
+            (analysis, whether it came from the cache)
+        """
+        params_key = params_key or analysis_params_key()
+        analysis = await asyncio.to_thread(self.get, content_hash, params_key)
+        if analysis is not None:
+            return analysis, True
+        analysis = await compute()
+        await asyncio.to_thread(self.put, content_hash, params_key, analysis)
+        return analysis, False
+
+
+# Create singleton instance
+analysis_cache = AnalysisCache()
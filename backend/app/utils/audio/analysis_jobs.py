@@ -0,0 +1,182 @@
+"""
+Background audio analysis jobs.
+
+Very long files can take longer to analyse than a client wants to hold a
+request open, so an upload can instead be submitted as a job: it is
+spooled to a private directory, an analysis id is returned immediately and
+the analysis runs in the process pool. Clients poll the job or subscribe to
+its status changes. Results go through the content-hash cache, so a job
+for audio analysed before completes on submission.
+
+Jobs live in process memory; the oldest finished ones are dropped beyond
+AUDIO_ANALYSIS_MAX_JOBS.
+"""
+import os
+import time
+import uuid
+import shutil
+import asyncio
+import logging
+import tempfile
+from collections import OrderedDict
+from typing import Any, AsyncIterator, Dict, Optional
+
+from fastapi import UploadFile
+from pydantic import BaseModel
+
+from .analysis_cache import AnalysisCache, analysis_cache, analysis_params_key
+from .analysis_pool import AnalysisPool, AnalysisPoolError, analysis_pool
+from .beat_detector import analyze_beats
+from .ingest import ingest_upload
+
+logger = logging.getLogger(__name__)
+
+TERMINAL_STATUSES = ("completed", "failed")
+
+
+class AnalysisJob(BaseModel):
+    """Status of one background analysis."""
+    analysis_id: str
+    status: str = "queued"  # queued, running, completed, failed
+    content_hash: str
+    filename: Optional[str] = None
+    cached: bool = False
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    created_at: float
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+
+
+class AnalysisJobManager:
+    """Submits uploads for analysis in the background and tracks their status."""
+
+    def __init__(
+        self,
+        pool: AnalysisPool = analysis_pool,
+        cache: AnalysisCache = analysis_cache,
+        max_jobs: int = 1000,
+        timeout: Optional[float] = None
+    ):
+        """
+        Initialize the manager.
+
+        Args:
+            pool: Process pool the analyses run in
+            cache: Content-hash cache for results
+            max_jobs: Jobs remembered; the oldest finished ones are dropped first
+            timeout: Seconds a job may run (default: the pool's)
+        """
+        self.pool = pool
+        self.cache = cache
+        self.max_jobs = max_jobs
+        self.timeout = timeout
+        self._jobs: "OrderedDict[str, AnalysisJob]" = OrderedDict()
+        self._changed: Dict[str, asyncio.Event] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+
+    def get(self, analysis_id: str) -> Optional[AnalysisJob]:
+        """Current status of a job, or None if unknown."""
+        return self._jobs.get(analysis_id)
+
+    def _update(self, job: AnalysisJob, **changes: Any) -> None:
+        for key, value in changes.items():
+            setattr(job, key, value)
+        # Wake subscribers; each waits on the event current when it looked
+        event = self._changed.pop(job.analysis_id, None)
+        if event is not None:
+            event.set()
+
+    def _add(self, job: AnalysisJob) -> None:
+        self._jobs[job.analysis_id] = job
+        while len(self._jobs) > self.max_jobs:
+            finished = next((key for key, old in self._jobs.items() if old.status in TERMINAL_STATUSES), None)
+            if finished is None:
+                break
+            del self._jobs[finished]
+
+    async def submit(self, upload: UploadFile, max_bytes: Optional[int] = None) -> AnalysisJob:
+        """
+        Spool an upload and start analysing it in the background.
+
+        Args:
+            upload: FastAPI upload
+            max_bytes: Size limit (default: AUDIO_MAX_BYTES)
+
+        Returns:
+            The job; already completed if the audio was analysed before
+
+        Raises:
+            AudioIngestError: If the upload is empty or too large
+            AnalysisPoolError: If the analysis backlog is full (503)
+        """
+        work_dir = tempfile.mkdtemp(prefix="audio_job_")
+        try:
+            audio = await ingest_upload(upload, work_dir, max_bytes=max_bytes)
+            params_key = analysis_params_key()
+            job = AnalysisJob(
+                analysis_id=str(uuid.uuid4()),
+                content_hash=audio.sha256,
+                filename=upload.filename,
+                created_at=time.time()
+            )
+
+            cached = await asyncio.to_thread(self.cache.get, audio.sha256, params_key)
+            if cached is not None:
+                shutil.rmtree(work_dir, ignore_errors=True)
+                job.status, job.cached, job.result, job.finished_at = "completed", True, cached, job.created_at
+                self._add(job)
+                return job
+
+            if not self.pool.has_capacity():
+                raise AnalysisPoolError("Audio analysis backlog is full, try again later", status_code=503)
+        except BaseException:
+            shutil.rmtree(work_dir, ignore_errors=True)
+            raise
+
+        self._add(job)
+        task = asyncio.create_task(self._run(job, str(audio.path), work_dir, params_key))
+        self._tasks[job.analysis_id] = task
+        task.add_done_callback(lambda _: self._tasks.pop(job.analysis_id, None))
+        return job
+
+    async def _run(self, job: AnalysisJob, audio_path: str, work_dir: str, params_key: str) -> None:
+        def started():
+            self._update(job, status="running", started_at=time.time())
+
+        async def compute():
+            return await self.pool.run(analyze_beats, audio_path, timeout=self.timeout, on_start=started)
+
+        try:
+            result, cached = await self.cache.get_or_compute(job.content_hash, compute, params_key)
+            self._update(job, status="completed", result=result, cached=cached, finished_at=time.time())
+        except Exception as e:
+            logger.error(f"Audio analysis {job.analysis_id} failed: {e}")
+            self._update(job, status="failed", error=str(e), finished_at=time.time())
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    async def watch(self, analysis_id: str) -> AsyncIterator[AnalysisJob]:
+        """
+        Yield a job's status now and after every change until it finishes.
+
+        Yields nothing for an unknown id.
+        """
+        while True:
+            job = self._jobs.get(analysis_id)
+            if job is None:
+                return
+            if job.status in TERMINAL_STATUSES:
+                yield job.model_copy()
+                return
+            # Taken before yielding, so no change can slip in unnoticed
+            event = self._changed.setdefault(analysis_id, asyncio.Event())
+            yield job.model_copy()
+            await event.wait()
+
+
+# Create singleton instance
+analysis_jobs = AnalysisJobManager(
+    max_jobs=int(os.getenv("AUDIO_ANALYSIS_MAX_JOBS", "1000")),
+    timeout=float(os.getenv("AUDIO_ANALYSIS_JOB_TIMEOUT", "900"))
+)
@@ -0,0 +1,219 @@
+"""
+Process pool for CPU-heavy audio analysis.
+
+librosa decoding and beat tracking hold the CPU (and largely the GIL) for
+seconds on a long track, so running them in a thread still slows down the
+event loop. The shared `analysis_pool` runs them in worker processes
+instead, and:
+
+- caps concurrent analyses at the worker count (AUDIO_ANALYSIS_WORKERS,
+  default: CPU count), handing free workers to waiters in arrival order;
+- bounds the backlog of waiting analyses (AUDIO_ANALYSIS_BACKLOG) and
+  rejects work beyond it instead of queueing without limit;
+- enforces a per-job timeout measured from when the job starts running,
+  killing the workers of a pool whose job overran (a running job cannot be
+  cancelled otherwise); other jobs hit by the restart are retried once.
+"""
+import os
+import time
+import asyncio
+import logging
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Deque, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class AnalysisPoolError(Exception):
+    """Raised when an analysis is rejected or fails in the pool; status_code is the matching HTTP status."""
+
+    def __init__(self, message: str, status_code: int = 500):
+        self.status_code = status_code
+        super().__init__(message)
+
+
+class AnalysisPool:
+    """
+    Bounded pool of analysis worker processes.
+
+    Workers are started on first use and kept for later jobs, so each one
+    imports librosa only once.
+    """
+
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        max_backlog: Optional[int] = None,
+        timeout: float = 120.0,
+        start_method: str = "spawn"
+    ):
+        """
+        Initialize the pool.
+
+        Args:
+            max_workers: Worker processes (default: CPU count)
+            max_backlog: Jobs allowed to wait for a worker (default: 4 per worker)
+            timeout: Default seconds a job may run before its worker is killed
+            start_method: multiprocessing start method for the workers
+        """
+        self.max_workers = max_workers or os.cpu_count() or 2
+        self.max_backlog = self.max_workers * 4 if max_backlog is None else max_backlog
+        self.timeout = timeout
+        self.start_method = start_method
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._running = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._counters = {"completed": 0, "failed": 0, "timed_out": 0, "rejected": 0, "restarts": 0}
+
+    # --- slot management -------------------------------------------------
+
+    def _queued(self) -> int:
+        return sum(1 for future in self._waiters if not future.done())
+
+    def has_capacity(self) -> bool:
+        """Whether a new job would be accepted right now."""
+        return self._running < self.max_workers or self._queued() < self.max_backlog
+
+    async def _acquire(self) -> None:
+        if self._running < self.max_workers and not self._queued():
+            self._running += 1
+            return
+        if self._queued() >= self.max_backlog:
+            self._counters["rejected"] += 1
+            raise AnalysisPoolError("Audio analysis backlog is full, try again later", status_code=503)
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.append(future)
+        try:
+            await future
+        except asyncio.CancelledError:
+            # The slot may have been handed over just as we were cancelled
+            if future.done() and not future.cancelled():
+                self._release()
+            raise
+
+    def _release(self) -> None:
+        while self._waiters:
+            future = self._waiters.popleft()
+            if not future.done():
+                # Hand the slot straight to the next waiter
+                future.set_result(None)
+                return
+        self._running -= 1
+
+    # --- workers -----------------------------------------------------------
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context(self.start_method)
+            )
+        return self._executor
+
+    def _restart(self, executor: ProcessPoolExecutor) -> None:
+        """Kill the workers of an executor; the next job starts a fresh one."""
+        if self._executor is executor:
+            self._executor = None
+            self._counters["restarts"] += 1
+        # ProcessPoolExecutor has no public way to stop a running call
+        processes = list((getattr(executor, "_processes", None) or {}).values())
+        executor.shutdown(wait=False, cancel_futures=True)
+        for process in processes:
+            if process.is_alive():
+                process.kill()
+
+    def shutdown(self) -> None:
+        """Stop the workers (at application shutdown)."""
+        executor, self._executor = self._executor, None
+        if executor is not None:
+            self._restart(executor)
+
+    # --- execution ---------------------------------------------------------
+
+    async def run(
+        self,
+        func: Callable[..., Any],
+        *args: Any,
+        timeout: Optional[float] = None,
+        on_start: Optional[Callable[[], None]] = None
+    ) -> Any:
+        """
+        Run a picklable module-level function in a worker process.
+
+        Args:
+            func: Function to call, e.g. analyze_beats
+            *args: Picklable arguments
+            timeout: Seconds the job may run once started (default: the pool's)
+            on_start: Called when the job leaves the backlog and starts
+
+        Returns:
+            The function's return value
+
+        Raises:
+            AnalysisPoolError: If the backlog is full (503), the job timed out
+                (504) or its worker died (500)
+            Exception: Whatever func raised
+        """
+        timeout = timeout or self.timeout
+        await self._acquire()
+        if on_start is not None:
+            on_start()
+        started = time.perf_counter()
+        release_now = True
+        try:
+            for attempt in range(2):
+                executor = self._get_executor()
+                job = None
+                try:
+                    job = executor.submit(func, *args)
+                    result = await asyncio.wait_for(asyncio.wrap_future(job), timeout)
+                except asyncio.TimeoutError:
+                    self._counters["timed_out"] += 1
+                    self._restart(executor)
+                    raise AnalysisPoolError(f"Audio analysis timed out after {timeout:.0f}s", status_code=504)
+                except asyncio.CancelledError:
+                    # The worker keeps going; hold the slot until it is free again
+                    if job is not None and not job.done():
+                        loop = asyncio.get_running_loop()
+                        job.add_done_callback(lambda _: loop.call_soon_threadsafe(self._release))
+                        release_now = False
+                    raise
+                except BrokenProcessPool:
+                    if executor is not self._executor and attempt == 0:
+                        # Killed because another job overran; this one did nothing wrong
+                        logger.info("Retrying audio analysis after a pool restart")
+                        continue
+                    self._counters["failed"] += 1
+                    self._restart(executor)
+                    raise AnalysisPoolError("Audio analysis worker died", status_code=500)
+                except Exception:
+                    self._counters["failed"] += 1
+                    raise
+                self._counters["completed"] += 1
+                logger.debug(f"{getattr(func, '__name__', 'job')} finished in {time.perf_counter() - started:.2f}s")
+                return result
+        finally:
+            if release_now:
+                self._release()
+
+    def metrics(self) -> Dict[str, Any]:
+        """Current load and cumulative outcomes."""
+        return {
+            "max_workers": self.max_workers,
+            "max_backlog": self.max_backlog,
+            "running": self._running,
+            "queued": self._queued(),
+            **self._counters
+        }
+
+
+# Create singleton instance
+analysis_pool = AnalysisPool(
+    max_workers=int(os.getenv("AUDIO_ANALYSIS_WORKERS", "0")) or None,
+    max_backlog=int(os.getenv("AUDIO_ANALYSIS_BACKLOG")) if os.getenv("AUDIO_ANALYSIS_BACKLOG") else None,
+    timeout=float(os.getenv("AUDIO_ANALYSIS_TIMEOUT", "120")),
+    start_method=os.getenv("AUDIO_ANALYSIS_START_METHOD", "spawn")
+)
@@ -3,14 +3,15 @@ Beat Detection Module
 
 This module provides functionality to detect beats in audio files using librosa.
 It includes different algorithms for beat detection and returns timestamps for each detected beat.
+All functions decode the file once through AudioAnalyzer (streamed block by
+block for long recordings, see open_analyzer); analyze_beats derives every
+metric from a single decode and a single beat-tracking pass.
 """
 
 import os
-import numpy as np
 from typing import List, Optional, Dict, Any, Tuple, Union
 
-# Import librosa for audio processing
-import librosa
+from .analysis import open_analyzer
 
 def get_beat_timestamps(audio_path: str) -> List[float]:
     """
@@ -32,7 +33,8 @@ def get_beats_librosa(audio_path: str) -> List[float]:
     Extract beat timestamps using librosa.
     
     This function uses librosa's beat tracking algorithm, which is based on 
-    dynamic programming and tempo estimation.
+    dynamic programming and tempo estimation, on a mono signal at the
+    analysis rate (see AudioAnalyzer); long files are streamed.
     
     Args:
         audio_path (str): Path to the audio file
@@ -40,16 +42,7 @@ def get_beats_librosa(audio_path: str) -> List[float]:
     Returns:
         List[float]: List of beat timestamps in seconds
     """
-    # Load the audio file
-    y, sr = librosa.load(audio_path, sr=None)
-    
-    # Extract tempo and beat frames
-    tempo, beat_frames = librosa.beat.beat_track(y=y, sr=sr)
-    
-    # Convert beat frames to timestamps
-    beat_times = librosa.frames_to_time(beat_frames, sr=sr)
-    
-    return beat_times.tolist()
+    return open_analyzer(audio_path).beat_times.tolist()
 
 def get_downbeats(audio_path: str) -> List[float]:
     """
@@ -61,13 +54,8 @@ def get_downbeats(audio_path: str) -> List[float]:
     Returns:
         List[float]: List of estimated downbeat timestamps in seconds
     """
-    # Get beats
-    beats = get_beats_librosa(audio_path)
-    
     # Assume 4/4 time signature (most common) - take every 4th beat
-    downbeats = [beats[i] for i in range(0, len(beats), 4)]
-    
-    return downbeats
+    return open_analyzer(audio_path).downbeat_times.tolist()
 
 def analyze_beats(audio_path: str) -> Dict[str, Any]:
     """
@@ -86,33 +74,9 @@ def analyze_beats(audio_path: str) -> Dict[str, Any]:
     Returns:
         Dict[str, Any]: Dictionary with beat analysis results
     """
-    # Get basic beat timestamps
-    beat_times = get_beat_timestamps(audio_path)
-    
-    # Get simple downbeats (every 4 beats)
-    downbeat_times = get_downbeats(audio_path)
-    
-    # Calculate intervals between beats
-    beat_intervals = np.diff(beat_times).tolist() if len(beat_times) > 1 else []
-    
-    # Calculate average tempo (BPM)
-    if beat_intervals:
-        avg_beat_interval = np.mean(beat_intervals)
-        bpm = 60.0 / avg_beat_interval
-    else:
-        bpm = 0
-    
-    # Measure beat regularity (lower std dev = more regular)
-    beat_regularity = np.std(beat_intervals) if len(beat_intervals) > 1 else 0
-    
-    return {
-        "beat_timestamps": beat_times,
-        "downbeat_timestamps": downbeat_times,
-        "tempo_bpm": bpm,
-        "beat_intervals": beat_intervals,
-        "beat_regularity": beat_regularity,
-        "total_beats": len(beat_times)
-    }
+    # One decode and one beat-tracking pass; downbeats (every 4 beats),
+    # intervals, average tempo and regularity all derive from the same beats
+    return open_analyzer(audio_path).summary()
 
 if __name__ == "__main__":
     # Example usage
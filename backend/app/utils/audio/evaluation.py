@@ -0,0 +1,104 @@
+"""
+Beat tracking accuracy and cost metrics.
+
+Accuracy follows the usual beat-tracking evaluation: an estimated beat is
+correct if it lies within a tolerance window (70 ms, as in MIREX) of a
+reference beat, each reference beat matching at most one estimate. The
+F-measure combines precision and recall; the timing error is measured
+over the matched pairs. measure() reports wall time and peak traced
+memory of one call, so speed and accuracy can be tracked together.
+"""
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, Sequence, Tuple
+
+import numpy as np
+
+F_MEASURE_WINDOW = 0.07
+
+
+def match_beats(
+    estimated: Sequence[float],
+    reference: Sequence[float],
+    window: float = F_MEASURE_WINDOW
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    One-to-one matching of estimated to reference beats within the window.
+
+    Both sequences are sorted, so walking them together and pairing the
+    closest candidates finds the largest matching as long as the window is
+    under half the beat period.
+
+    Returns:
+        (indices into estimated, indices into reference) of the matched pairs
+    """
+    estimated = np.sort(np.asarray(estimated, dtype=float))
+    reference = np.sort(np.asarray(reference, dtype=float))
+    est_idx, ref_idx = [], []
+    i = j = 0
+    while i < len(estimated) and j < len(reference):
+        delta = estimated[i] - reference[j]
+        if abs(delta) <= window:
+            est_idx.append(i)
+            ref_idx.append(j)
+            i += 1
+            j += 1
+        elif delta < 0:
+            i += 1
+        else:
+            j += 1
+    return np.array(est_idx, dtype=int), np.array(ref_idx, dtype=int)
+
+
+def beat_scores(
+    estimated: Sequence[float],
+    reference: Sequence[float],
+    window: float = F_MEASURE_WINDOW
+) -> Dict[str, float]:
+    """
+    F-measure, precision, recall and timing error of estimated beats.
+
+    Returns:
+        Dictionary with f_measure, precision, recall, mean_error_ms,
+        max_error_ms and mean_offset_ms (signed: positive when estimates are
+        late), all errors over matched beats and 0 when nothing matched
+    """
+    est_idx, ref_idx = match_beats(estimated, reference, window)
+    matched = len(est_idx)
+    precision = matched / len(estimated) if len(estimated) else 0.0
+    recall = matched / len(reference) if len(reference) else 0.0
+    f_measure = 2 * precision * recall / (precision + recall) if matched else 0.0
+    offsets = (np.sort(np.asarray(estimated, dtype=float))[est_idx]
+               - np.sort(np.asarray(reference, dtype=float))[ref_idx]) * 1000
+    errors = np.abs(offsets)
+    return {
+        "f_measure": f_measure,
+        "precision": precision,
+        "recall": recall,
+        "mean_error_ms": float(errors.mean()) if matched else 0.0,
+        "max_error_ms": float(errors.max()) if matched else 0.0,
+        "mean_offset_ms": float(offsets.mean()) if matched else 0.0
+    }
+
+
+def measure(func: Callable[..., Any], *args: Any) -> Tuple[Any, float, float]:
+    """
+    Call a function, tracing its wall time and peak Python/NumPy allocations.
+
+    Returns:
+        (result, seconds, peak MiB)
+    """
+    tracing = tracemalloc.is_tracing()
+    if not tracing:
+        tracemalloc.start()
+    tracemalloc.reset_peak()
+    baseline = tracemalloc.get_traced_memory()[0]
+    start = time.perf_counter()
+    try:
+        result = func(*args)
+    finally:
+        seconds = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1] - baseline
+        if not tracing:
+            tracemalloc.stop()
+    return result, seconds, peak / 2 ** 20
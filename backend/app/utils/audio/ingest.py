@@ -0,0 +1,236 @@
+"""
+Streaming audio ingest.
+
+Uploads, URL downloads and base64 payloads are spooled to disk in chunks
+with async file I/O while a SHA-256 of the content is computed on the fly,
+so large WAV/FLAC files never sit whole in memory and the event loop is
+never blocked on a copy. Size limits are enforced as early as possible:
+from the declared size or Content-Length before reading, otherwise as soon
+as the running total crosses the limit.
+
+Every ingest returns an AudioHandle (path, hash, size), which analysis and
+muxing take as is; the hash identifies the audio for caching.
+"""
+import os
+import re
+import uuid
+import base64
+import hashlib
+import logging
+import mimetypes
+import tempfile
+import shutil
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import AsyncIterator, Optional, Union
+from urllib.parse import urlparse
+
+import aiofiles
+import httpx
+from fastapi import UploadFile
+from pydantic import BaseModel
+
+from ..http_pool import get_http_client
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 1 << 20
+DEFAULT_MAX_BYTES = int(os.getenv("AUDIO_MAX_BYTES", str(200 * 1024 * 1024)))
+
+PathLike = Union[str, Path]
+
+
+class AudioIngestError(Exception):
+    """Raised when audio cannot be ingested; status_code is the matching HTTP status."""
+
+    def __init__(self, message: str, status_code: int = 400):
+        self.status_code = status_code
+        super().__init__(message)
+
+
+class AudioHandle(BaseModel):
+    """Audio spooled to disk."""
+    path: Path
+    sha256: str
+    size: int
+    content_type: Optional[str] = None
+
+    def unlink(self) -> None:
+        """Delete the spooled file."""
+        self.path.unlink(missing_ok=True)
+
+
+def _suffix(name: Optional[str], content_type: Optional[str]) -> str:
+    """File extension from a file name or URL path, else from the content type."""
+    suffix = Path(name or "").suffix.lower()
+    if suffix:
+        return suffix
+    if content_type:
+        guessed = mimetypes.guess_extension(content_type.split(";")[0].strip())
+        if guessed:
+            return guessed
+    return ".audio"
+
+
+def _check_declared(size: Optional[int], max_bytes: int) -> None:
+    if size is not None and size > max_bytes:
+        raise AudioIngestError(f"Audio is {size} bytes; the limit is {max_bytes}", status_code=413)
+
+
+class _Spool:
+    """Writes chunks to a temporary file, hashing and counting as it goes."""
+
+    def __init__(self, dest_dir: Path, max_bytes: int):
+        dest_dir.mkdir(parents=True, exist_ok=True)
+        self.dest_dir = dest_dir
+        self.max_bytes = max_bytes
+        self.partial = dest_dir / f".ingest-{uuid.uuid4().hex}.part"
+        self.digest = hashlib.sha256()
+        self.size = 0
+
+    async def write_all(self, chunks: AsyncIterator[bytes]) -> None:
+        try:
+            async with aiofiles.open(self.partial, "wb") as f:
+                async for chunk in chunks:
+                    self.size += len(chunk)
+                    if self.size > self.max_bytes:
+                        raise AudioIngestError(f"Audio exceeds the limit of {self.max_bytes} bytes", status_code=413)
+                    self.digest.update(chunk)
+                    await f.write(chunk)
+        except BaseException:
+            self.partial.unlink(missing_ok=True)
+            raise
+        if self.size == 0:
+            self.partial.unlink(missing_ok=True)
+            raise AudioIngestError("Audio is empty")
+
+    def finish(self, filename: Optional[str], suffix: str, content_type: Optional[str]) -> AudioHandle:
+        sha256 = self.digest.hexdigest()
+        # Without a requested name the file is content-addressed
+        path = self.dest_dir / (filename or f"{sha256[:16]}{suffix}")
+        os.replace(self.partial, path)
+        return AudioHandle(path=path, sha256=sha256, size=self.size, content_type=content_type)
+
+
+async def ingest_upload(
+    upload: UploadFile,
+    dest_dir: PathLike,
+    filename: Optional[str] = None,
+    max_bytes: Optional[int] = None
+) -> AudioHandle:
+    """
+    Spool an uploaded file to disk.
+
+    Args:
+        upload: FastAPI upload
+        dest_dir: Directory for the spooled file
+        filename: Name of the file in dest_dir (default: content hash + extension)
+        max_bytes: Size limit (default: AUDIO_MAX_BYTES, 200 MB)
+
+    Raises:
+        AudioIngestError: If the upload is empty or too large (413)
+    """
+    max_bytes = max_bytes or DEFAULT_MAX_BYTES
+    _check_declared(getattr(upload, "size", None), max_bytes)
+
+    async def chunks():
+        while True:
+            chunk = await upload.read(CHUNK_SIZE)
+            if not chunk:
+                return
+            yield chunk
+
+    spool = _Spool(Path(dest_dir), max_bytes)
+    await spool.write_all(chunks())
+    return spool.finish(filename, _suffix(upload.filename, upload.content_type), upload.content_type)
+
+
+async def ingest_url(
+    url: str,
+    dest_dir: PathLike,
+    filename: Optional[str] = None,
+    max_bytes: Optional[int] = None,
+    client: Optional[httpx.AsyncClient] = None
+) -> AudioHandle:
+    """
+    Stream a remote audio file to disk over the pooled HTTP client.
+
+    Raises:
+        AudioIngestError: On a failed download (502) or oversized audio (413)
+    """
+    max_bytes = max_bytes or DEFAULT_MAX_BYTES
+    client = client or get_http_client()
+    async with client.stream("GET", url) as response:
+        if response.status_code != 200:
+            raise AudioIngestError(f"Audio download failed with status {response.status_code}", status_code=502)
+        length = response.headers.get("content-length")
+        _check_declared(int(length) if length and length.isdigit() else None, max_bytes)
+        content_type = response.headers.get("content-type")
+        spool = _Spool(Path(dest_dir), max_bytes)
+        await spool.write_all(response.aiter_bytes(CHUNK_SIZE))
+    return spool.finish(filename, _suffix(urlparse(url).path, content_type), content_type)
+
+
+async def ingest_base64(
+    data: str,
+    dest_dir: PathLike,
+    filename: Optional[str] = None,
+    max_bytes: Optional[int] = None
+) -> AudioHandle:
+    """
+    Decode base64 audio (optionally a data: URL) to disk chunk by chunk.
+
+    Raises:
+        AudioIngestError: If the data is not valid base64 or decodes too large (413)
+    """
+    max_bytes = max_bytes or DEFAULT_MAX_BYTES
+    content_type = None
+    if data.startswith("data:"):
+        header, _, data = data.partition(",")
+        content_type = header[5:].split(";")[0] or None
+    if re.search(r"\s", data):
+        data = "".join(data.split())
+    _check_declared(len(data) * 3 // 4 - data[-2:].count("="), max_bytes)
+
+    # Decode whole 4-character groups at a time
+    step = CHUNK_SIZE // 3 * 4
+
+    async def chunks():
+        for start in range(0, len(data), step):
+            try:
+                yield base64.b64decode(data[start:start + step], validate=True)
+            except ValueError as e:
+                raise AudioIngestError(f"Invalid base64 audio: {e}")
+
+    spool = _Spool(Path(dest_dir), max_bytes)
+    await spool.write_all(chunks())
+    return spool.finish(filename, _suffix(None, content_type), content_type)
+
+
+async def ingest_audio(
+    source: str,
+    dest_dir: PathLike,
+    filename: Optional[str] = None,
+    max_bytes: Optional[int] = None
+) -> AudioHandle:
+    """Ingest audio given as an http(s) URL or as base64 data."""
+    parsed = urlparse(source)
+    if parsed.scheme in ("http", "https") and parsed.netloc:
+        return await ingest_url(source, dest_dir, filename, max_bytes)
+    return await ingest_base64(source, dest_dir, filename, max_bytes)
+
+
+@asynccontextmanager
+async def spooled_upload(upload: UploadFile, max_bytes: Optional[int] = None) -> AsyncIterator[AudioHandle]:
+    """
+    Spool an upload into a private temporary directory for the duration of a request.
+
+    Example:
+        async with spooled_upload(file) as audio:
+            beats = await asyncio.to_thread(get_beat_timestamps, str(audio.path))
+    """
+    temp_dir = tempfile.mkdtemp(prefix="audio_")
+    try:
+        yield await ingest_upload(upload, temp_dir, max_bytes=max_bytes)
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
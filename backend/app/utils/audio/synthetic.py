@@ -0,0 +1,125 @@
+"""
+Synthetic click tracks with known beats, for accuracy and speed benchmarks.
+
+Each TrackSpec describes a track (tempo or tempo ramp, swung off-beats,
+background noise, length); synthesize() renders it with NumPy and returns
+the exact beat and downbeat times alongside the samples. Downbeats get a
+louder, higher click so trackers that follow bar accents can be checked
+too. Everything is generated offline from a seed, so the corpus is the
+same on every run and needs no audio fixtures in the repository.
+"""
+from pathlib import Path
+from typing import List, Optional, Tuple, Union
+
+import numpy as np
+import soundfile as sf
+from pydantic import BaseModel
+
+CLICK_SECONDS = 0.03
+
+
+class TrackSpec(BaseModel):
+    """Parameters of one synthetic track."""
+    name: str
+    bpm: float
+    # Tempo at the end of the track for a linear ramp (default: constant tempo)
+    end_bpm: Optional[float] = None
+    duration: float = 30.0
+    # Position of the off-beat eighth within the beat (0.5 straight, ~0.67 swung)
+    swing: Optional[float] = None
+    # Signal-to-noise ratio of white background noise in dB (default: near silence)
+    snr_db: Optional[float] = None
+    beats_per_bar: int = 4
+    first_beat: float = 0.5
+    sr: int = 44100
+    seed: int = 0
+
+
+class GroundTruth(BaseModel):
+    """Beat times a synthetic track was rendered from."""
+    beats: List[float]
+    downbeats: List[float]
+    offbeats: List[float] = []
+
+
+def beat_times(spec: TrackSpec) -> np.ndarray:
+    """
+    Beat times for a constant tempo or a linear tempo ramp.
+
+    With a ramp the beat phase is the integral of the tempo, so beat k
+    falls where bpm0 * t + (bpm1 - bpm0) * t^2 / (2 * duration) = 60 * k.
+    """
+    span = spec.duration - spec.first_beat - CLICK_SECONDS
+    start, end = spec.bpm / 60.0, (spec.end_bpm or spec.bpm) / 60.0
+    # Beats per second grow linearly from start to end over the duration
+    a = (end - start) / (2 * spec.duration)
+    total = start * span + a * span ** 2
+    k = np.arange(int(np.floor(total)) + 1)
+    if abs(a) < 1e-12:
+        t = k / start
+    else:
+        t = (-start + np.sqrt(start ** 2 + 4 * a * k)) / (2 * a)
+    return spec.first_beat + t
+
+
+def _click(sr: int, frequency: float) -> np.ndarray:
+    t = np.arange(int(CLICK_SECONDS * sr)) / sr
+    return np.sin(2 * np.pi * frequency * t) * np.exp(-t * 100)
+
+
+def synthesize(spec: TrackSpec) -> Tuple[np.ndarray, int, GroundTruth]:
+    """
+    Render a track.
+
+    Returns:
+        (stereo float32 samples, sample rate, ground truth)
+    """
+    sr = spec.sr
+    y = np.zeros(int(spec.duration * sr))
+    beats = beat_times(spec)
+    downbeats = beats[::spec.beats_per_bar]
+    offbeats = beats[:-1] + spec.swing * np.diff(beats) if spec.swing else np.empty(0)
+
+    for times, click in (
+        (beats, 0.6 * _click(sr, 1000.0)),
+        (downbeats, 0.4 * _click(sr, 1600.0)),
+        (offbeats, 0.3 * _click(sr, 2000.0)),
+    ):
+        for time in times:
+            start = int(round(time * sr))
+            end = min(start + len(click), len(y))
+            y[start:end] += click[:end - start]
+
+    rng = np.random.default_rng(spec.seed)
+    if spec.snr_db is not None:
+        signal_power = float(np.mean(y ** 2))
+        y += rng.standard_normal(len(y)) * np.sqrt(signal_power / 10 ** (spec.snr_db / 10))
+    else:
+        y += 0.001 * rng.standard_normal(len(y))
+    # Keep headroom so the 16-bit WAV does not clip
+    y *= 0.9 / max(1.0, float(np.abs(y).max()))
+
+    truth = GroundTruth(beats=beats.tolist(), downbeats=downbeats.tolist(), offbeats=offbeats.tolist())
+    return np.stack([y, y], axis=1).astype(np.float32), sr, truth
+
+
+def write_track(spec: TrackSpec, directory: Union[str, Path]) -> Tuple[Path, GroundTruth]:
+    """Render a track to a 16-bit WAV named after the spec; returns (path, ground truth)."""
+    y, sr, truth = synthesize(spec)
+    path = Path(directory) / f"{spec.name}.wav"
+    sf.write(path, y, sr, subtype="PCM_16")
+    return path, truth
+
+
+# Tempos, a ramp, swing and noise, 30 seconds each
+CORPUS = [
+    TrackSpec(name="steady_90", bpm=90),
+    TrackSpec(name="steady_120", bpm=120),
+    TrackSpec(name="steady_128", bpm=128, seed=1),
+    TrackSpec(name="steady_150", bpm=150, seed=2),
+    TrackSpec(name="ramp_100_130", bpm=100, end_bpm=130, seed=3),
+    TrackSpec(name="swing_110", bpm=110, swing=2 / 3, seed=4),
+    TrackSpec(name="straight_eighths_100", bpm=100, swing=0.5, seed=5),
+    TrackSpec(name="noisy_120_snr0", bpm=120, snr_db=0.0, seed=6),
+    TrackSpec(name="noisy_140_snr-6", bpm=140, snr_db=-6.0, seed=7),
+]
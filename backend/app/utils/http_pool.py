@@ -0,0 +1,182 @@
+"""
+Shared pooled HTTP client and binary artifact transfer.
+
+Calls to the generation services go through one httpx.AsyncClient per
+event loop (`get_http_client()`), so connections are kept alive and reused
+instead of a new client and TCP/TLS handshake per clip.
+
+Generated videos are moved with the binary transfer mode: the request
+carries {"transfer": "binary"} and a service that supports it answers
+either with the artifact itself as application/octet-stream, or with a
+job handle
+
+    {"job_id": "...", "artifact_url": "/artifacts/<job_id>", "size": 123456}
+
+whose artifact is then downloaded as application/octet-stream. Either way
+the bytes are streamed to disk in chunks. Services that ignore the field
+keep answering with the whole file base64-encoded in JSON, which is still
+decoded as a compatibility fallback.
+"""
+import os
+import base64
+import asyncio
+import logging
+import weakref
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple, Union
+from urllib.parse import urljoin
+
+import aiofiles
+import httpx
+
+logger = logging.getLogger(__name__)
+
+TRANSFER_BINARY = "binary"
+BINARY_CONTENT_TYPES = ("application/octet-stream", "video/", "image/")
+# JSON fields older services put the base64-encoded artifact in
+BASE64_FIELDS = ("video_data", "video_base64")
+CHUNK_SIZE = 1 << 20
+
+PathLike = Union[str, Path]
+
+# httpx clients are bound to the event loop they were first used on; the
+# sync wrappers that spin up their own loops get a client of their own
+_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = weakref.WeakKeyDictionary()
+
+
+class ArtifactError(Exception):
+    """Raised when a service rejects a request or an artifact transfer fails."""
+
+    def __init__(self, message: str, status_code: Optional[int] = None, body: str = ""):
+        self.status_code = status_code
+        self.body = body
+        super().__init__(message)
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """
+    Get the pooled client for the running event loop, creating it on first use.
+
+    Pool size and timeouts come from HTTP_MAX_CONNECTIONS (100),
+    HTTP_MAX_KEEPALIVE (20) and HTTP_READ_TIMEOUT (300 seconds).
+    """
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None or client.is_closed:
+        client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=int(os.getenv("HTTP_MAX_CONNECTIONS", "100")),
+                max_keepalive_connections=int(os.getenv("HTTP_MAX_KEEPALIVE", "20"))
+            ),
+            timeout=httpx.Timeout(10.0, read=float(os.getenv("HTTP_READ_TIMEOUT", "300"))),
+            follow_redirects=True
+        )
+        _clients[loop] = client
+    return client
+
+
+async def close_http_client() -> None:
+    """Close the running loop's pooled client (call on application shutdown)."""
+    client = _clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
+
+
+def _is_binary(response: httpx.Response) -> bool:
+    content_type = response.headers.get("content-type", "")
+    return content_type.startswith(BINARY_CONTENT_TYPES)
+
+
+async def _write_stream(response: httpx.Response, dest: Path, expected_size: Optional[int] = None) -> Path:
+    """Stream a response body to dest through a temporary file, then rename it into place."""
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    partial = dest.with_name(dest.name + ".part")
+    written = 0
+    try:
+        async with aiofiles.open(partial, "wb") as f:
+            async for chunk in response.aiter_bytes(CHUNK_SIZE):
+                await f.write(chunk)
+                written += len(chunk)
+        if expected_size is not None and written != expected_size:
+            raise ArtifactError(f"Artifact truncated: got {written} of {expected_size} bytes")
+        os.replace(partial, dest)
+    except BaseException:
+        partial.unlink(missing_ok=True)
+        raise
+    return dest
+
+
+async def download_artifact(url: str, dest: PathLike, client: Optional[httpx.AsyncClient] = None, expected_size: Optional[int] = None) -> Path:
+    """
+    Stream an artifact to disk.
+
+    Raises:
+        ArtifactError: On a non-200 response or a short transfer
+    """
+    client = client or get_http_client()
+    async with client.stream("GET", url, headers={"Accept": "application/octet-stream"}) as response:
+        if response.status_code != 200:
+            body = (await response.aread()).decode(errors="replace")
+            raise ArtifactError(f"Artifact download failed with status {response.status_code}", response.status_code, body)
+        return await _write_stream(response, Path(dest), expected_size)
+
+
+def _write_base64(data: str, dest: Path) -> Path:
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    with open(dest, "wb") as f:
+        f.write(base64.b64decode(data))
+    return dest
+
+
+async def request_artifact(
+    url: str,
+    payload: Dict[str, Any],
+    dest: PathLike,
+    client: Optional[httpx.AsyncClient] = None,
+    timeout: Optional[float] = None
+) -> Tuple[Dict[str, Any], Optional[Path]]:
+    """
+    POST a generation request and save the artifact it produces.
+
+    Handles all three reply styles: a binary body, a JSON job handle with
+    an artifact_url (resolved against url), and base64 inside JSON.
+
+    Args:
+        url: Generation endpoint
+        payload: JSON request body; {"transfer": "binary"} is added
+        dest: Where to write the artifact
+        client: HTTP client (default: the pooled client)
+        timeout: Read timeout for the generation request
+
+    Returns:
+        (JSON metadata without any base64 payload, path of the saved artifact
+        or None if the reply carried no artifact)
+
+    Raises:
+        ArtifactError: If the service answers with an error status or the transfer fails
+    """
+    client = client or get_http_client()
+    dest = Path(dest)
+    request_timeout = httpx.Timeout(10.0, read=timeout) if timeout else httpx.USE_CLIENT_DEFAULT
+    body = {**payload, "transfer": TRANSFER_BINARY}
+
+    async with client.stream("POST", url, json=body, timeout=request_timeout) as response:
+        if response.status_code != 200:
+            text = (await response.aread()).decode(errors="replace")
+            raise ArtifactError(f"{url} returned status {response.status_code}", response.status_code, text)
+        if _is_binary(response):
+            return {}, await _write_stream(response, dest)
+        await response.aread()
+    result = response.json()
+
+    artifact_url = result.get("artifact_url")
+    if artifact_url:
+        size = result.get("size")
+        return result, await download_artifact(urljoin(url, artifact_url), dest, client, int(size) if size else None)
+
+    for field in BASE64_FIELDS:
+        data = result.pop(field, None)
+        if data:
+            logger.info(f"{url} does not support binary transfer; decoding base64 {field}")
+            return result, await asyncio.to_thread(_write_base64, data, dest)
+    return result, None
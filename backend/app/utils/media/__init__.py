@@ -0,0 +1,30 @@
+"""
+Media utilities for assembling and post-processing video segments.
+"""
+
+from .executor import MediaExecutor, MediaJobResult, MediaProcessError, media_executor, run_ffmpeg
+from .hls import HLSPlaylist, build_playlist
+from .probe import MediaInfo, MediaProbe, MediaProbeError, media_probe, concat_compatible
+from .segment_planner import Segment, plan_from_analysis, plan_segments
+from .stitch import TargetProfile, choose_target_profile, stitch_segments
+
+__all__ = [
+    "MediaExecutor",
+    "MediaJobResult",
+    "MediaProcessError",
+    "media_executor",
+    "run_ffmpeg",
+    "HLSPlaylist",
+    "build_playlist",
+    "MediaInfo",
+    "MediaProbe",
+    "MediaProbeError",
+    "media_probe",
+    "concat_compatible",
+    "Segment",
+    "plan_segments",
+    "plan_from_analysis",
+    "TargetProfile",
+    "choose_target_profile",
+    "stitch_segments",
+]
@@ -0,0 +1,312 @@
+"""
+Bounded asynchronous executor for ffmpeg/ffprobe subprocesses.
+
+Every media subprocess started from async code goes through the shared
+`media_executor`, which:
+
+- runs commands with asyncio.create_subprocess_exec, so the event loop is
+  never blocked by an encode;
+- caps the number of concurrent processes (MEDIA_MAX_PROCESSES, default:
+  CPU count) and hands free slots to the highest-priority waiter first;
+- starts processes with a per-job niceness (MEDIA_NICENESS by default);
+- kills the process when the awaiting task is cancelled or times out;
+- keeps only the tail of stderr and records timing metrics per tool.
+"""
+import os
+import time
+import heapq
+import asyncio
+import itertools
+import logging
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from pydantic import BaseModel
+
+logger = logging.getLogger(__name__)
+
+STDERR_TAIL_BYTES = 8192
+
+# Priorities for slot hand-out; lower runs first
+PRIORITY_PROBE = -10
+PRIORITY_DEFAULT = 0
+PRIORITY_BACKGROUND = 10
+
+
+class MediaProcessError(RuntimeError):
+    """Raised when a media subprocess exits with an error or times out."""
+
+    def __init__(self, message: str, cmd: List[str], returncode: Optional[int] = None, stderr_tail: str = ""):
+        super().__init__(message)
+        self.cmd = cmd
+        self.returncode = returncode
+        self.stderr_tail = stderr_tail
+
+
+class MediaJobResult(BaseModel):
+    """Outcome of one media subprocess."""
+    cmd: List[str]
+    returncode: int
+    stdout: Optional[bytes] = None
+    stderr_tail: str = ""
+    queued_seconds: float = 0.0
+    run_seconds: float = 0.0
+    job_id: Optional[str] = None
+
+
+def _tool_name(cmd: List[str]) -> str:
+    name = os.path.basename(cmd[0]) if cmd else "unknown"
+    return name[:-4] if name.lower().endswith(".exe") else name
+
+
+def _preexec(niceness: int):
+    """Build a preexec_fn lowering the child's scheduling priority (POSIX only)."""
+    if niceness <= 0 or not hasattr(os, "nice"):
+        return None
+
+    def lower_priority():
+        os.nice(niceness)
+
+    return lower_priority
+
+
+async def _read_tail(stream: Optional[asyncio.StreamReader], limit: int) -> bytes:
+    """Drain a stream, keeping only its last `limit` bytes."""
+    if stream is None:
+        return b""
+    tail = bytearray()
+    while True:
+        chunk = await stream.read(65536)
+        if not chunk:
+            break
+        tail += chunk
+        if len(tail) > limit:
+            del tail[:len(tail) - limit]
+    return bytes(tail)
+
+
+class MediaExecutor:
+    """
+    Shared pool of media subprocess slots.
+
+    The pool is a counting gate rather than a set of long-lived workers:
+    each call starts its own process once a slot is free.
+    """
+
+    def __init__(self, max_processes: Optional[int] = None, default_niceness: int = 0):
+        """
+        Initialize the executor.
+
+        Args:
+            max_processes: Maximum concurrent subprocesses (default: CPU count)
+            default_niceness: Niceness applied when a call does not pass one
+        """
+        self.max_processes = max_processes or os.cpu_count() or 4
+        self.default_niceness = default_niceness
+        self._running = 0
+        self._waiters: List[Tuple[int, int, asyncio.Future]] = []
+        self._sequence = itertools.count()
+        self._stats: Dict[str, Dict[str, float]] = {}
+        self._counters = {"completed": 0, "failed": 0, "cancelled": 0, "timed_out": 0}
+
+    # --- slot management -------------------------------------------------
+
+    async def _acquire(self, priority: int) -> None:
+        if self._running < self.max_processes and not self._waiters:
+            self._running += 1
+            return
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._sequence), future))
+        try:
+            await future
+        except asyncio.CancelledError:
+            # The slot may have been handed over just as we were cancelled
+            if future.done() and not future.cancelled():
+                self._release()
+            raise
+
+    def _release(self) -> None:
+        while self._waiters:
+            _, _, future = heapq.heappop(self._waiters)
+            if not future.done():
+                # Hand the slot straight to the next waiter
+                future.set_result(None)
+                return
+        self._running -= 1
+
+    # --- metrics -----------------------------------------------------------
+
+    def _record(self, cmd: List[str], queued: float, run: float, outcome: str) -> None:
+        stats = self._stats.setdefault(_tool_name(cmd), {
+            "count": 0, "run_seconds": 0.0, "queued_seconds": 0.0, "max_run_seconds": 0.0
+        })
+        stats["count"] += 1
+        stats["run_seconds"] += run
+        stats["queued_seconds"] += queued
+        stats["max_run_seconds"] = max(stats["max_run_seconds"], run)
+        self._counters[outcome] += 1
+
+    def metrics(self) -> Dict[str, Any]:
+        """Current load and cumulative timings per tool."""
+        return {
+            "max_processes": self.max_processes,
+            "running": self._running,
+            "queued": sum(1 for _, _, f in self._waiters if not f.done()),
+            **self._counters,
+            "tools": {
+                tool: {key: round(value, 3) for key, value in stats.items()}
+                for tool, stats in self._stats.items()
+            }
+        }
+
+    # --- execution ---------------------------------------------------------
+
+    @asynccontextmanager
+    async def open_process(
+        self,
+        cmd: List[str],
+        priority: int = PRIORITY_DEFAULT,
+        niceness: Optional[int] = None,
+        stdin: Optional[int] = None,
+        stdout: Optional[int] = asyncio.subprocess.DEVNULL,
+        stderr: Optional[int] = asyncio.subprocess.PIPE
+    ) -> AsyncIterator[asyncio.subprocess.Process]:
+        """
+        Hold a slot and yield a started process, e.g. for writing frames to stdin.
+
+        The process is killed if the block exits before it has finished.
+        """
+        queued_at = time.perf_counter()
+        await self._acquire(priority)
+        started = time.perf_counter()
+        outcome = "failed"
+        process = None
+        try:
+            process = await asyncio.create_subprocess_exec(
+                *cmd,
+                stdin=stdin,
+                stdout=stdout,
+                stderr=stderr,
+                preexec_fn=_preexec(self.default_niceness if niceness is None else niceness)
+            )
+            yield process
+            outcome = "completed" if process.returncode == 0 else "failed"
+        except asyncio.CancelledError:
+            outcome = "cancelled"
+            raise
+        finally:
+            if process is not None and process.returncode is None:
+                await self._kill(process)
+            self._release()
+            self._record(cmd, started - queued_at, time.perf_counter() - started, outcome)
+
+    async def run(
+        self,
+        cmd: List[str],
+        job_id: Optional[str] = None,
+        priority: int = PRIORITY_DEFAULT,
+        niceness: Optional[int] = None,
+        capture_stdout: bool = False,
+        timeout: Optional[float] = None,
+        check: bool = True
+    ) -> MediaJobResult:
+        """
+        Run a command to completion.
+
+        Args:
+            cmd: Command and arguments
+            job_id: Optional job identifier for logs
+            priority: Slot priority; lower values are served first
+            niceness: OS niceness for the child (POSIX); defaults to the executor's
+            capture_stdout: Return stdout bytes (e.g. ffprobe JSON)
+            timeout: Seconds before the process is killed
+            check: Raise MediaProcessError on a non-zero exit status
+
+        Returns:
+            Result with exit status, optional stdout, stderr tail and timings
+
+        Raises:
+            MediaProcessError: On failure (if check) or timeout
+        """
+        queued_at = time.perf_counter()
+        await self._acquire(priority)
+        started = time.perf_counter()
+        outcome = "failed"
+        process = None
+        try:
+            process = await asyncio.create_subprocess_exec(
+                *cmd,
+                stdin=asyncio.subprocess.DEVNULL,
+                stdout=asyncio.subprocess.PIPE if capture_stdout else asyncio.subprocess.DEVNULL,
+                stderr=asyncio.subprocess.PIPE,
+                preexec_fn=_preexec(self.default_niceness if niceness is None else niceness)
+            )
+            readers = asyncio.gather(
+                process.stdout.read() if capture_stdout else asyncio.sleep(0, result=None),
+                _read_tail(process.stderr, STDERR_TAIL_BYTES),
+                process.wait()
+            )
+            try:
+                stdout, stderr, returncode = await asyncio.wait_for(readers, timeout)
+            except asyncio.TimeoutError:
+                outcome = "timed_out"
+                await self._kill(process)
+                raise MediaProcessError(f"{_tool_name(cmd)} timed out after {timeout}s", cmd)
+
+            outcome = "completed" if returncode == 0 else "failed"
+        except asyncio.CancelledError:
+            outcome = "cancelled"
+            raise
+        finally:
+            if process is not None and process.returncode is None:
+                await self._kill(process)
+            self._release()
+            elapsed = time.perf_counter() - started
+            self._record(cmd, started - queued_at, elapsed, outcome)
+
+        result = MediaJobResult(
+            cmd=cmd,
+            returncode=returncode,
+            stdout=stdout,
+            stderr_tail=stderr.decode(errors="replace"),
+            queued_seconds=started - queued_at,
+            run_seconds=elapsed,
+            job_id=job_id
+        )
+        logger.debug(
+            f"{_tool_name(cmd)}{f' [{job_id}]' if job_id else ''} exited {returncode} "
+            f"after {result.run_seconds:.2f}s (queued {result.queued_seconds:.2f}s)"
+        )
+        if check and returncode != 0:
+            raise MediaProcessError(
+                f"{_tool_name(cmd)} exited with status {returncode}: {result.stderr_tail[-2000:]}",
+                cmd,
+                returncode,
+                result.stderr_tail
+            )
+        return result
+
+    async def _kill(self, process: asyncio.subprocess.Process) -> None:
+        """Terminate a process, escalating to SIGKILL if it does not exit."""
+        try:
+            process.terminate()
+            try:
+                await asyncio.wait_for(process.wait(), 5)
+            except asyncio.TimeoutError:
+                process.kill()
+                await process.wait()
+        except ProcessLookupError:
+            pass
+
+
+async def run_ffmpeg(cmd: List[str], priority: int = PRIORITY_DEFAULT) -> Tuple[int, str]:
+    """Run an ffmpeg command through the shared executor; returns (returncode, stderr tail)."""
+    result = await media_executor.run(cmd, priority=priority, check=False)
+    return result.returncode, result.stderr_tail
+
+
+# Create singleton instance
+media_executor = MediaExecutor(
+    max_processes=int(os.getenv("MEDIA_MAX_PROCESSES", "0")) or None,
+    default_niceness=int(os.getenv("MEDIA_NICENESS", "5"))
+)
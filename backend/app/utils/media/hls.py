@@ -0,0 +1,266 @@
+"""
+Incremental HLS assembly for segmented video jobs.
+
+Each generated segment is remuxed into MPEG-TS as soon as it lands on disk and
+appended to an EVENT playlist, so playback can start after the first segment
+instead of after the whole job. The final MP4 is a stream-copy concat of the
+already remuxed pieces.
+"""
+import os
+import re
+import math
+import asyncio
+import logging
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+
+from .executor import run_ffmpeg
+from .probe import media_probe, MediaProbeError
+
+logger = logging.getLogger(__name__)
+
+# Codecs that can be stream-copied into MPEG-TS without re-encoding
+TS_VIDEO_CODECS = {"h264", "hevc", "mpeg2video"}
+TS_AUDIO_CODECS = {"aac", "mp3", "ac3"}
+
+# ffmpeg prints the input duration on stderr, e.g. "Duration: 00:00:03.04, start: ..."
+_DURATION_RE = re.compile(r"Duration:\s*(\d+):(\d+):(\d+(?:\.\d+)?)")
+
+
+def parse_ffmpeg_duration(stderr: str) -> Optional[float]:
+    """
+    Extract the input duration in seconds from ffmpeg's stderr output.
+
+    Args:
+        stderr: Decoded stderr of an ffmpeg invocation
+
+    Returns:
+        Duration in seconds, or None if ffmpeg did not report one
+    """
+    match = _DURATION_RE.search(stderr or "")
+    if not match:
+        return None
+    hours, minutes, seconds = match.groups()
+    return int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+
+
+def build_playlist(entries: List[Tuple[str, float]], target_duration: float, ended: bool = False) -> str:
+    """
+    Render an HLS EVENT playlist.
+
+    Every segment is remuxed independently and starts its own timeline, so a
+    discontinuity tag separates consecutive entries.
+
+    Args:
+        entries: Ordered (uri, duration) pairs
+        target_duration: Nominal segment duration in seconds
+        ended: Whether to close the playlist with EXT-X-ENDLIST
+
+    Returns:
+        Playlist text
+    """
+    longest = max([target_duration] + [duration for _, duration in entries])
+    lines = [
+        "#EXTM3U",
+        "#EXT-X-VERSION:3",
+        "#EXT-X-PLAYLIST-TYPE:EVENT",
+        f"#EXT-X-TARGETDURATION:{int(math.ceil(longest))}",
+        "#EXT-X-MEDIA-SEQUENCE:0",
+    ]
+    for position, (uri, duration) in enumerate(entries):
+        if position > 0:
+            lines.append("#EXT-X-DISCONTINUITY")
+        lines.append(f"#EXTINF:{duration:.3f},")
+        lines.append(uri)
+    if ended:
+        lines.append("#EXT-X-ENDLIST")
+    return "\n".join(lines) + "\n"
+
+
+class HLSPlaylist:
+    """
+    HLS playlist that grows as video segments are produced.
+
+    Segments can arrive in any order. A segment is only published once every
+    earlier segment has either arrived or been skipped, so players always see
+    an ordered timeline without holes.
+    """
+
+    def __init__(
+        self,
+        output_dir: Union[str, Path],
+        target_duration: float,
+        ffmpeg_path: str = "ffmpeg",
+        playlist_name: str = "playlist.m3u8",
+        segment_dir_name: str = "hls"
+    ):
+        """
+        Initialize an empty playlist in the given job directory.
+
+        Args:
+            output_dir: Job output directory (served under /output)
+            target_duration: Nominal duration of each segment in seconds
+            ffmpeg_path: FFmpeg executable to use for remuxing
+            playlist_name: File name of the playlist inside output_dir
+            segment_dir_name: Sub-directory holding the TS segments
+        """
+        self.output_dir = Path(output_dir)
+        self.segment_dir = self.output_dir / segment_dir_name
+        self.playlist_path = self.output_dir / playlist_name
+        self.target_duration = target_duration
+        self.ffmpeg_path = ffmpeg_path
+        self.ended = False
+
+        # index -> (ts path, duration), or None for a skipped segment
+        self._arrived: Dict[int, Optional[Tuple[Path, float]]] = {}
+        self._published: List[Tuple[Path, float]] = []
+        self._next_index = 0
+        self._lock = asyncio.Lock()
+
+        os.makedirs(self.segment_dir, exist_ok=True)
+        self._write_playlist()
+
+    @property
+    def segment_paths(self) -> List[Path]:
+        """TS segments published so far, in playback order."""
+        return [path for path, _ in self._published]
+
+    @property
+    def published_duration(self) -> float:
+        """Total playable duration of the published segments in seconds."""
+        return sum(duration for _, duration in self._published)
+
+    async def add_segment(self, index: int, source_path: Optional[Union[str, Path]]) -> bool:
+        """
+        Remux a finished segment and publish everything that is now contiguous.
+
+        Args:
+            index: Zero-based position of the segment in the final video
+            source_path: Path to the generated segment, or None if it failed
+
+        Returns:
+            True if the segment was remuxed, False if it was skipped
+        """
+        entry = None
+        if source_path is not None:
+            try:
+                entry = await self._remux(index, Path(source_path))
+            except Exception as e:
+                logger.error(f"Failed to remux segment {index} for HLS: {e}")
+
+        async with self._lock:
+            self._arrived[index] = entry
+            while self._next_index in self._arrived:
+                published = self._arrived.pop(self._next_index)
+                if published is not None:
+                    self._published.append(published)
+                self._next_index += 1
+            self._write_playlist()
+
+        return entry is not None
+
+    async def finalize(self, output_path: Union[str, Path]) -> str:
+        """
+        Close the playlist and concat the published segments into an MP4.
+
+        Args:
+            output_path: Where to write the final MP4
+
+        Returns:
+            Path to the final video
+
+        Raises:
+            ValueError: If no segment was published
+            RuntimeError: If the ffmpeg concat fails
+        """
+        async with self._lock:
+            self.ended = True
+            self._write_playlist()
+
+        if not self._published:
+            raise ValueError("No HLS segments available to assemble")
+
+        list_path = self.segment_dir / "concat_list.txt"
+        with open(list_path, "w") as f:
+            for path in self.segment_paths:
+                f.write(f"file '{path.resolve()}'\n")
+
+        cmd = [
+            self.ffmpeg_path, "-y",
+            "-f", "concat", "-safe", "0",
+            "-i", str(list_path),
+            "-c", "copy",
+            "-bsf:a", "aac_adtstoasc",
+            "-movflags", "+faststart",
+            str(output_path)
+        ]
+        try:
+            returncode, stderr = await self._run(cmd)
+        finally:
+            if list_path.exists():
+                os.remove(list_path)
+
+        if returncode != 0:
+            raise RuntimeError(f"FFmpeg concat of HLS segments failed: {stderr[-2000:]}")
+
+        logger.info(f"Assembled {len(self._published)} HLS segments into {output_path}")
+        return str(output_path)
+
+    async def _remux(self, index: int, source_path: Path) -> Tuple[Path, float]:
+        """Remux one segment into MPEG-TS, transcoding only if stream copy cannot work."""
+        ts_path = self.segment_dir / f"segment_{index:03d}.ts"
+
+        try:
+            info = await media_probe.probe(source_path)
+        except MediaProbeError as e:
+            logger.debug(f"Probing segment {index} failed, trying stream copy: {e}")
+            info = None
+
+        copyable = info is None or (
+            info.video_codec in TS_VIDEO_CODECS
+            and (not info.has_audio or info.audio_codec in TS_AUDIO_CODECS)
+        )
+
+        returncode, stderr = 1, ""
+        if copyable:
+            cmd = [
+                self.ffmpeg_path, "-y",
+                "-i", str(source_path),
+                "-c", "copy",
+                "-f", "mpegts",
+                str(ts_path)
+            ]
+            returncode, stderr = await self._run(cmd)
+            if returncode != 0:
+                logger.warning(f"Stream copy of segment {index} into TS failed, transcoding instead")
+
+        if returncode != 0:
+            cmd = [
+                self.ffmpeg_path, "-y",
+                "-i", str(source_path),
+                "-c:v", "libx264", "-preset", "veryfast", "-pix_fmt", "yuv420p",
+                "-c:a", "aac",
+                "-f", "mpegts",
+                str(ts_path)
+            ]
+            returncode, stderr = await self._run(cmd)
+            if returncode != 0:
+                raise RuntimeError(stderr[-2000:])
+
+        duration = (info.duration if info else None) or parse_ffmpeg_duration(stderr) or self.target_duration
+        return ts_path, duration
+
+    async def _run(self, cmd: List[str]) -> Tuple[int, str]:
+        """Run an ffmpeg command through the shared media executor."""
+        return await run_ffmpeg(cmd)
+
+    def _write_playlist(self) -> None:
+        """Atomically rewrite the playlist so players never read a partial file."""
+        entries = [
+            (os.path.relpath(path, self.playlist_path.parent).replace(os.sep, "/"), duration)
+            for path, duration in self._published
+        ]
+        temp_path = self.playlist_path.with_suffix(".m3u8.tmp")
+        with open(temp_path, "w") as f:
+            f.write(build_playlist(entries, self.target_duration, self.ended))
+        os.replace(temp_path, self.playlist_path)
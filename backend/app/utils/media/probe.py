@@ -0,0 +1,312 @@
+"""
+Cached media metadata from ffprobe.
+
+Stitching and muxing decisions only need a handful of stream properties, so
+every file is probed once with a single ffprobe call and the parsed result
+is cached under (path, size, mtime). Async batches are probed concurrently
+through the shared media executor, ahead of queued encodes.
+"""
+import os
+import json
+import shutil
+import asyncio
+import logging
+import threading
+import subprocess
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from fractions import Fraction
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from pydantic import BaseModel
+
+from .executor import media_executor, PRIORITY_PROBE
+
+logger = logging.getLogger(__name__)
+
+# Only the first few seconds of packets are read to estimate the GOP length
+GOP_PROBE_SECONDS = 5
+
+PathLike = Union[str, Path]
+CacheKey = Tuple[str, int, int]
+
+
+class MediaProbeError(RuntimeError):
+    """Raised when ffprobe is missing or cannot read a file."""
+
+
+class MediaInfo(BaseModel):
+    """Stream properties relevant to concat and mux decisions."""
+    path: str
+    size: int = 0
+    format_name: Optional[str] = None
+    duration: Optional[float] = None
+
+    # Video
+    video_codec: Optional[str] = None
+    pix_fmt: Optional[str] = None
+    width: Optional[int] = None
+    height: Optional[int] = None
+    frame_rate: Optional[str] = None
+    time_base: Optional[str] = None
+    gop: Optional[int] = None
+
+    # Audio
+    audio_codec: Optional[str] = None
+    sample_rate: Optional[int] = None
+    channels: Optional[int] = None
+    channel_layout: Optional[str] = None
+
+    @property
+    def has_video(self) -> bool:
+        return self.video_codec is not None
+
+    @property
+    def has_audio(self) -> bool:
+        return self.audio_codec is not None
+
+    @property
+    def fps(self) -> Optional[float]:
+        """Frame rate as a float, or None if unknown."""
+        if not self.frame_rate:
+            return None
+        try:
+            rate = Fraction(self.frame_rate)
+        except (ValueError, ZeroDivisionError):
+            return None
+        return float(rate) if rate else None
+
+    @property
+    def video_signature(self) -> Tuple:
+        """Properties that must match for a stream-copy concat of the video track."""
+        return (self.video_codec, self.pix_fmt, self.width, self.height, self.frame_rate, self.time_base)
+
+    @property
+    def audio_signature(self) -> Tuple:
+        """Properties that must match for a stream-copy concat of the audio track."""
+        return (self.audio_codec, self.sample_rate, self.channels, self.channel_layout)
+
+
+def find_ffprobe() -> Optional[str]:
+    """Locate ffprobe on PATH or next to the ffmpeg binary."""
+    ffprobe = shutil.which("ffprobe")
+    if ffprobe:
+        return ffprobe
+    ffmpeg = shutil.which("ffmpeg")
+    if ffmpeg:
+        candidate = Path(os.path.realpath(ffmpeg)).with_name("ffprobe")
+        if candidate.exists():
+            return str(candidate)
+    return None
+
+
+def ffprobe_command(ffprobe_path: str, path: PathLike) -> List[str]:
+    """Single ffprobe invocation returning format, streams and early packet flags."""
+    return [
+        ffprobe_path, "-v", "error",
+        "-print_format", "json",
+        "-show_entries", "format:stream:packet=stream_index,flags",
+        "-read_intervals", f"%+{GOP_PROBE_SECONDS}",
+        str(path)
+    ]
+
+
+def _to_int(value: Any) -> Optional[int]:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _to_float(value: Any) -> Optional[float]:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _estimate_gop(packets: List[Dict[str, Any]], stream_index: int) -> Optional[int]:
+    """Longest distance between keyframes among the probed video packets."""
+    keyframes = [
+        position
+        for position, packet in enumerate(p for p in packets if p.get("stream_index") == stream_index)
+        if "K" in packet.get("flags", "")
+    ]
+    if len(keyframes) < 2:
+        return None
+    return max(b - a for a, b in zip(keyframes, keyframes[1:]))
+
+
+def parse_ffprobe_output(path: PathLike, data: Dict[str, Any], size: int = 0) -> MediaInfo:
+    """
+    Build a MediaInfo from ffprobe's JSON output.
+
+    Args:
+        path: File that was probed
+        data: Parsed JSON printed by ffprobe_command
+        size: File size in bytes
+
+    Returns:
+        Parsed metadata; missing fields are None
+    """
+    streams = data.get("streams") or []
+    fmt = data.get("format") or {}
+    video = next((s for s in streams if s.get("codec_type") == "video"), None)
+    audio = next((s for s in streams if s.get("codec_type") == "audio"), None)
+
+    info = MediaInfo(
+        path=str(path),
+        size=size,
+        format_name=fmt.get("format_name"),
+        duration=_to_float(fmt.get("duration"))
+    )
+    if video:
+        frame_rate = video.get("r_frame_rate")
+        info.video_codec = video.get("codec_name")
+        info.pix_fmt = video.get("pix_fmt")
+        info.width = _to_int(video.get("width"))
+        info.height = _to_int(video.get("height"))
+        info.frame_rate = frame_rate if frame_rate and frame_rate != "0/0" else None
+        info.time_base = video.get("time_base")
+        info.gop = _estimate_gop(data.get("packets") or [], video.get("index", 0))
+        if info.duration is None:
+            info.duration = _to_float(video.get("duration"))
+    if audio:
+        info.audio_codec = audio.get("codec_name")
+        info.sample_rate = _to_int(audio.get("sample_rate"))
+        info.channels = _to_int(audio.get("channels"))
+        info.channel_layout = audio.get("channel_layout")
+    return info
+
+
+def concat_compatible(infos: List[MediaInfo]) -> bool:
+    """Whether the files can be joined with the concat demuxer and stream copy."""
+    if not infos:
+        return False
+    first = infos[0]
+    return all(
+        info.video_signature == first.video_signature
+        and info.audio_signature == first.audio_signature
+        for info in infos[1:]
+    )
+
+
+class MediaProbe:
+    """
+    Concurrent, cached ffprobe front-end.
+
+    Results are cached in memory, keyed by absolute path, size and mtime, so
+    a file that is rewritten is probed again automatically.
+    """
+
+    def __init__(self, ffprobe_path: Optional[str] = None, max_concurrency: Optional[int] = None, cache_size: int = 1024):
+        """
+        Initialize the probe.
+
+        Args:
+            ffprobe_path: ffprobe executable; located lazily if not given
+            max_concurrency: Maximum ffprobe processes for blocking batches (default: CPU count);
+                async probes are bounded by the shared media executor
+            cache_size: Maximum number of cached entries
+        """
+        self._ffprobe_path = ffprobe_path
+        self.max_concurrency = max_concurrency or os.cpu_count() or 4
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[CacheKey, MediaInfo]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def ffprobe_path(self) -> str:
+        if self._ffprobe_path is None:
+            self._ffprobe_path = find_ffprobe()
+        if self._ffprobe_path is None:
+            raise MediaProbeError("ffprobe is not available")
+        return self._ffprobe_path
+
+    def clear_cache(self) -> None:
+        with self._lock:
+            self._cache.clear()
+
+    def _cache_key(self, path: PathLike) -> CacheKey:
+        abs_path = os.path.abspath(path)
+        try:
+            stat = os.stat(abs_path)
+        except OSError as e:
+            raise MediaProbeError(f"Cannot probe {path}: {e}") from e
+        return abs_path, stat.st_size, stat.st_mtime_ns
+
+    def _cached(self, key: CacheKey) -> Optional[MediaInfo]:
+        with self._lock:
+            info = self._cache.get(key)
+            if info is not None:
+                self._cache.move_to_end(key)
+            return info
+
+    def _store(self, key: CacheKey, info: MediaInfo) -> None:
+        with self._lock:
+            self._cache[key] = info
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def _parse(self, key: CacheKey, returncode: int, stdout: str, stderr: str) -> MediaInfo:
+        if returncode != 0:
+            raise MediaProbeError(f"ffprobe failed for {key[0]}: {stderr.strip()[-500:]}")
+        try:
+            data = json.loads(stdout or "{}")
+        except ValueError as e:
+            raise MediaProbeError(f"Unreadable ffprobe output for {key[0]}: {e}") from e
+        info = parse_ffprobe_output(key[0], data, size=key[1])
+        self._store(key, info)
+        return info
+
+    async def probe(self, path: PathLike) -> MediaInfo:
+        """
+        Probe one file, using the cache when the file is unchanged.
+
+        Raises:
+            MediaProbeError: If ffprobe is unavailable or fails
+        """
+        key = self._cache_key(path)
+        info = self._cached(key)
+        if info is not None:
+            return info
+
+        result = await media_executor.run(
+            ffprobe_command(self.ffprobe_path, key[0]),
+            priority=PRIORITY_PROBE,
+            capture_stdout=True,
+            check=False
+        )
+        return self._parse(key, result.returncode, (result.stdout or b"").decode(errors="replace"), result.stderr_tail)
+
+    async def probe_many(self, paths: List[PathLike]) -> List[MediaInfo]:
+        """Probe several files concurrently, preserving order."""
+        return list(await asyncio.gather(*(self.probe(path) for path in paths)))
+
+    def probe_sync(self, path: PathLike) -> MediaInfo:
+        """Blocking variant of probe for synchronous callers."""
+        key = self._cache_key(path)
+        info = self._cached(key)
+        if info is not None:
+            return info
+
+        result = subprocess.run(
+            ffprobe_command(self.ffprobe_path, key[0]),
+            capture_output=True,
+            text=True,
+            errors="replace"
+        )
+        return self._parse(key, result.returncode, result.stdout, result.stderr)
+
+    def probe_many_sync(self, paths: List[PathLike]) -> List[MediaInfo]:
+        """Blocking batch probe running up to max_concurrency ffprobe processes at once."""
+        if len(paths) <= 1:
+            return [self.probe_sync(path) for path in paths]
+        with ThreadPoolExecutor(max_workers=min(self.max_concurrency, len(paths))) as pool:
+            return list(pool.map(self.probe_sync, paths))
+
+
+# Create singleton instance
+media_probe = MediaProbe()
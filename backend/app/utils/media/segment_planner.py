@@ -0,0 +1,223 @@
+"""
+Beat-aligned segment planning with exact frame budgets.
+
+Generated clips are cut to the music afterwards, so every frame a model
+renders past its cut point is wasted GPU time. plan_segments() decides the
+cuts up front: the timeline is divided into evenly spaced (or fixed-length)
+segments, each cut is moved to the nearest downbeat or, failing that, the
+nearest beat within a snapping window, and the cuts are then quantized to
+the frame grid. Segments are whole frames that add up to exactly
+round(duration * fps), so the clips concatenate to the length of the audio
+and each one can be requested with the frame count it will actually show.
+split_segment() breaks a segment longer than the model's frame limit into
+beat-aligned parts that can each be rendered in one request.
+"""
+import math
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+from pydantic import BaseModel
+
+# Largest distance a cut may move to reach a beat, as a share of the segment length
+SNAP_WINDOW = 0.25
+
+
+class Segment(BaseModel):
+    """One planned segment of the timeline."""
+    index: int
+    start: float
+    end: float
+    start_frame: int
+    num_frames: int
+    # What the segment's end was aligned to: "downbeat", "beat" or None (the end of the timeline or no beat nearby)
+    anchor: Optional[str] = None
+
+
+def _nearest(times: np.ndarray, target: float, window: float) -> Optional[float]:
+    """Time in sorted times closest to target, if within window."""
+    if not len(times):
+        return None
+    i = int(np.searchsorted(times, target))
+    candidates = times[max(0, i - 1):i + 1]
+    best = float(candidates[np.argmin(np.abs(candidates - target))])
+    return best if abs(best - target) <= window else None
+
+
+def plan_segments(
+    duration: float,
+    fps: float,
+    count: Optional[int] = None,
+    target_seconds: Optional[float] = None,
+    beats: Sequence[float] = (),
+    downbeats: Sequence[float] = (),
+    min_frames: int = 1,
+    max_frames: Optional[int] = None,
+    snap_window: float = SNAP_WINDOW
+) -> List[Segment]:
+    """
+    Split a timeline into beat-aligned segments of whole frames.
+
+    With count the timeline is divided evenly; with target_seconds the cuts
+    fall every target_seconds and the last segment takes the remainder.
+    Each cut is then snapped to the nearest downbeat within snap_window of
+    a segment length, else to the nearest beat, and rounded to a frame.
+    Frame limits win over beats: a cut that would leave a segment outside
+    [min_frames, max_frames], or leave too few or too many frames for the
+    remaining segments, is clamped.
+
+    Args:
+        duration: Timeline length in seconds (usually the audio length)
+        fps: Frames per second of the generated clips
+        count: Number of segments
+        target_seconds: Segment length, used when count is not given
+        beats: Beat times in seconds
+        downbeats: Downbeat times in seconds, preferred over beats
+        min_frames: Shortest allowed segment
+        max_frames: Longest allowed segment, e.g. the model's frame limit;
+            raises the number of segments if target_seconds needs more
+        snap_window: Largest move of a cut towards a beat, as a share of
+            the segment length
+
+    Returns:
+        Segments in timeline order; their num_frames add up to round(duration * fps)
+
+    Raises:
+        ValueError: If the arguments are invalid or count segments cannot
+            fit the frame limits
+    """
+    if duration <= 0 or fps <= 0:
+        raise ValueError("duration and fps must be positive")
+    if min_frames < 1 or (max_frames is not None and max_frames < min_frames):
+        raise ValueError("Frame limits must satisfy 1 <= min_frames <= max_frames")
+
+    total = max(1, int(round(duration * fps)))
+    if count is None:
+        if not target_seconds or target_seconds <= 0:
+            raise ValueError("Either count or a positive target_seconds is required")
+        step = target_seconds
+        count = math.ceil(total / max(1, round(target_seconds * fps)))
+        if max_frames is not None and count < math.ceil(total / max_frames):
+            count = math.ceil(total / max_frames)
+            step = duration / count
+        # A remainder shorter than min_frames is made up from the previous segment below
+        count = max(1, min(count, total // min_frames))
+    else:
+        if count < 1:
+            raise ValueError("count must be at least 1")
+        step = duration / count
+    if count * min_frames > total or (max_frames is not None and count * max_frames < total):
+        raise ValueError(f"{total} frames do not fit {count} segments of {min_frames}-{max_frames} frames")
+
+    beats = np.sort(np.asarray(beats, dtype=float))
+    downbeats = np.sort(np.asarray(downbeats, dtype=float))
+    window = snap_window * step
+    upper = max_frames if max_frames is not None else total
+
+    boundaries = [0]
+    anchors: List[Optional[str]] = []
+    for k in range(1, count):
+        ideal = min(k * step, duration)
+        cut, anchor = ideal, None
+        for name, times in (("downbeat", downbeats), ("beat", beats)):
+            snapped = _nearest(times, ideal, window)
+            if snapped is not None:
+                cut, anchor = snapped, name
+                break
+        frame = int(round(cut * fps))
+        remaining = count - k
+        low = max(boundaries[-1] + min_frames, total - remaining * upper)
+        high = min(boundaries[-1] + upper, total - remaining * min_frames)
+        if not low <= frame <= high:
+            frame = min(max(frame, low), high)
+            anchor = None
+        boundaries.append(frame)
+        anchors.append(anchor)
+    boundaries.append(total)
+    anchors.append(None)
+
+    return [
+        Segment(
+            index=i,
+            start=boundaries[i] / fps,
+            end=boundaries[i + 1] / fps,
+            start_frame=boundaries[i],
+            num_frames=boundaries[i + 1] - boundaries[i],
+            anchor=anchors[i]
+        )
+        for i in range(count)
+    ]
+
+
+def split_segment(
+    segment: Segment,
+    fps: float,
+    max_frames: int,
+    beats: Sequence[float] = (),
+    downbeats: Sequence[float] = (),
+    snap_window: float = SNAP_WINDOW
+) -> List[Segment]:
+    """
+    Split a segment into beat-aligned parts of at most max_frames.
+
+    The segment is divided into as few parts as the limit allows, with the
+    cuts snapped to beats as in plan_segments. A segment within the limit
+    is returned as a single part.
+
+    Args:
+        segment: Segment to split
+        fps: Frames per second the segment was planned at
+        max_frames: Longest allowed part
+        beats: Beat times in seconds, on the timeline of the segment
+        downbeats: Downbeat times in seconds, preferred over beats
+        snap_window: Largest move of a cut towards a beat, as a share of
+            the part length
+
+    Returns:
+        Parts in timeline order, on the same timeline and frame grid as the
+        segment, with index numbering the parts; their num_frames add up to
+        segment.num_frames and the last part keeps the segment's anchor
+    """
+    if segment.num_frames <= max_frames:
+        return [segment.model_copy(update={"index": 0})]
+
+    offset = segment.start_frame / fps
+    parts = plan_segments(
+        segment.num_frames / fps,
+        fps,
+        count=math.ceil(segment.num_frames / max_frames),
+        beats=np.asarray(beats, dtype=float) - offset,
+        downbeats=np.asarray(downbeats, dtype=float) - offset,
+        max_frames=max_frames,
+        snap_window=snap_window
+    )
+    shifted = []
+    for part in parts:
+        start_frame = segment.start_frame + part.start_frame
+        shifted.append(part.model_copy(update={
+            "start": start_frame / fps,
+            "end": (start_frame + part.num_frames) / fps,
+            "start_frame": start_frame
+        }))
+    shifted[-1].anchor = segment.anchor
+    return shifted
+
+
+def plan_from_analysis(analysis: Dict[str, Any], fps: float, **kwargs: Any) -> List[Segment]:
+    """
+    Plan segments over a track from its analyze_beats result.
+
+    Args:
+        analysis: Output of analyze_beats (duration, beat and downbeat timestamps)
+        fps: Frames per second of the generated clips
+        **kwargs: count, target_seconds and frame limits, as for plan_segments
+
+    Returns:
+        Beat-aligned segments covering the whole track
+    """
+    return plan_segments(
+        analysis["duration"],
+        fps,
+        beats=analysis.get("beat_timestamps", ()),
+        downbeats=analysis.get("downbeat_timestamps", ()),
+        **kwargs
+    )
@@ -0,0 +1,325 @@
+"""
+Segment stitching with selective re-encoding.
+
+Segments are probed, the stream profile covering most of the runtime is
+chosen as the target, and only segments that differ from it are transcoded
+(concurrently, one ffmpeg process each). Everything is then joined with the
+concat demuxer and stream copy, so one odd segment costs one short
+transcode instead of a re-encode of the whole video.
+"""
+import os
+import shutil
+import asyncio
+import logging
+import tempfile
+from collections import defaultdict
+from fractions import Fraction
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+
+from pydantic import BaseModel
+
+from .executor import run_ffmpeg
+from .probe import MediaInfo, MediaProbe, MediaProbeError, media_probe
+
+logger = logging.getLogger(__name__)
+
+PathLike = Union[str, Path]
+
+# Audio codecs that can be stream-copied into MP4
+MP4_AUDIO_COPY_CODECS = {"aac", "mp3", "alac"}
+
+# Encoders used to conform a segment to the target video codec
+VIDEO_ENCODERS = {
+    "h264": ["-c:v", "libx264", "-preset", "veryfast", "-crf", "18"],
+    "hevc": ["-c:v", "libx265", "-preset", "veryfast", "-crf", "20"],
+    "mpeg4": ["-c:v", "mpeg4", "-q:v", "2"],
+}
+AUDIO_ENCODERS = {
+    "aac": ["-c:a", "aac", "-b:a", "192k"],
+    "mp3": ["-c:a", "libmp3lame", "-b:a", "192k"],
+}
+
+
+class TargetProfile(BaseModel):
+    """Stream parameters every segment must share before a stream-copy concat."""
+    video_codec: str = "h264"
+    pix_fmt: str = "yuv420p"
+    width: int
+    height: int
+    frame_rate: str = "30/1"
+    time_base: Optional[str] = None
+    audio_codec: Optional[str] = None
+    sample_rate: Optional[int] = None
+    channels: Optional[int] = None
+    channel_layout: Optional[str] = None
+
+    @property
+    def video_signature(self) -> Tuple:
+        return (self.video_codec, self.pix_fmt, self.width, self.height, self.frame_rate, self.time_base)
+
+    @property
+    def audio_signature(self) -> Tuple:
+        return (self.audio_codec, self.sample_rate, self.channels, self.channel_layout)
+
+
+def choose_target_profile(infos: List[MediaInfo]) -> TargetProfile:
+    """
+    Pick the profile shared by the largest share of the total runtime.
+
+    Segments are grouped by their video and audio signatures; the group with
+    the longest combined duration wins, so the fewest seconds need
+    re-encoding. If the winning codec has no encoder here, h264 is used.
+
+    Args:
+        infos: Probed metadata of the segments, in any order
+
+    Returns:
+        Target profile for the stitched output
+
+    Raises:
+        ValueError: If no segment has a video stream
+    """
+    weights: Dict[Tuple, float] = defaultdict(float)
+    representative: Dict[Tuple, MediaInfo] = {}
+    for info in infos:
+        if not info.has_video or not info.width or not info.height:
+            continue
+        key = (info.video_signature, info.audio_signature)
+        weights[key] += info.duration or 1.0
+        representative.setdefault(key, info)
+
+    if not weights:
+        raise ValueError("No segment has a usable video stream")
+
+    best = representative[max(weights, key=weights.get)]
+    profile = TargetProfile(
+        video_codec=best.video_codec,
+        pix_fmt=best.pix_fmt or "yuv420p",
+        width=best.width,
+        height=best.height,
+        frame_rate=best.frame_rate or "30/1",
+        time_base=best.time_base,
+        audio_codec=best.audio_codec,
+        sample_rate=best.sample_rate,
+        channels=best.channels,
+        channel_layout=best.channel_layout
+    )
+
+    if profile.video_codec not in VIDEO_ENCODERS:
+        profile.video_codec = "h264"
+        profile.pix_fmt = "yuv420p"
+        profile.time_base = None
+    if profile.audio_codec is not None and profile.audio_codec not in AUDIO_ENCODERS:
+        profile.audio_codec = "aac"
+    return profile
+
+
+def needs_transcode(info: MediaInfo, target: TargetProfile, compare_audio: bool = True) -> bool:
+    """
+    Whether a segment has to be conformed before it can be stream-copied.
+
+    With compare_audio=False only the video track matters, for when the
+    segments' own audio is replaced by a separate track.
+    """
+    video_signature = info.video_signature
+    if target.time_base is None:
+        # No preferred time base; any time base of the right codec is fine
+        video_signature = video_signature[:-1] + (None,)
+    if video_signature != target.video_signature:
+        return True
+    return compare_audio and info.audio_signature != target.audio_signature
+
+
+def conform_command(
+    ffmpeg_path: str,
+    info: MediaInfo,
+    target: TargetProfile,
+    output_path: PathLike,
+    max_frames: Optional[int] = None
+) -> List[str]:
+    """
+    ffmpeg command that transcodes one segment to the target profile.
+
+    The picture is scaled to fit and padded, the frame rate is resampled,
+    and audio is added as silence or dropped to match the target layout.
+    With max_frames the segment is also cut to that many frames.
+    """
+    width, height = target.width, target.height
+    video_filter = (
+        f"scale={width}:{height}:force_original_aspect_ratio=decrease,"
+        f"pad={width}:{height}:(ow-iw)/2:(oh-ih)/2,setsar=1,"
+        f"fps={target.frame_rate},format={target.pix_fmt}"
+    )
+
+    cmd = [ffmpeg_path, "-y", "-i", info.path]
+    if target.audio_codec and not info.has_audio:
+        layout = target.channel_layout or "stereo"
+        cmd += ["-f", "lavfi", "-i", f"anullsrc=channel_layout={layout}:sample_rate={target.sample_rate or 44100}"]
+
+    cmd += ["-map", "0:v:0"]
+    if target.audio_codec:
+        cmd += ["-map", "0:a:0" if info.has_audio else "1:a:0"]
+
+    cmd += ["-vf", video_filter] + VIDEO_ENCODERS[target.video_codec]
+    if target.time_base:
+        cmd += ["-video_track_timescale", str(Fraction(target.time_base).denominator)]
+
+    if target.audio_codec:
+        cmd += AUDIO_ENCODERS[target.audio_codec]
+        if target.sample_rate:
+            cmd += ["-ar", str(target.sample_rate)]
+        if target.channels:
+            cmd += ["-ac", str(target.channels)]
+        if not info.has_audio:
+            cmd += ["-shortest"]
+    else:
+        cmd += ["-an"]
+
+    if max_frames is not None:
+        cmd += ["-frames:v", str(max_frames)]
+        if target.audio_codec:
+            cmd += ["-t", f"{float(max_frames / Fraction(target.frame_rate)):.6f}"]
+
+    cmd.append(str(output_path))
+    return cmd
+
+
+def concat_command(
+    ffmpeg_path: str,
+    list_path: PathLike,
+    output_path: PathLike,
+    audio_path: Optional[PathLike] = None,
+    copy_audio: bool = False
+) -> List[str]:
+    """
+    ffmpeg command joining the listed segments with stream copy.
+
+    With audio_path the segments' own audio is dropped and the external
+    track is muxed in the same pass, cut to the shorter of the two.
+    """
+    cmd = [ffmpeg_path, "-y", "-f", "concat", "-safe", "0", "-i", str(list_path)]
+    if audio_path is None:
+        cmd += ["-c", "copy"]
+    else:
+        cmd += [
+            "-i", str(audio_path),
+            "-map", "0:v:0", "-map", "1:a:0",
+            "-c:v", "copy",
+        ]
+        cmd += ["-c:a", "copy"] if copy_audio else AUDIO_ENCODERS["aac"]
+        cmd += ["-shortest"]
+    cmd += ["-movflags", "+faststart", str(output_path)]
+    return cmd
+
+
+def write_concat_list(paths: List[PathLike], list_path: PathLike) -> None:
+    """Write a concat demuxer list with absolute, quote-escaped paths."""
+    with open(list_path, "w") as f:
+        for path in paths:
+            safe_path = os.path.abspath(path).replace("'", "'\\''")
+            f.write(f"file '{safe_path}'\n")
+
+
+async def stitch_segments(
+    segment_paths: List[PathLike],
+    output_path: PathLike,
+    ffmpeg_path: str = "ffmpeg",
+    probe: MediaProbe = media_probe,
+    max_workers: Optional[int] = None,
+    audio_path: Optional[PathLike] = None,
+    frame_counts: Optional[List[Optional[int]]] = None
+) -> str:
+    """
+    Concatenate segments, re-encoding only those that differ from the target profile.
+
+    When audio_path is given it replaces the segments' audio in the same
+    ffmpeg invocation as the concat, so no intermediate file is written.
+    frame_counts caps how many frames each entry shows; an entry longer
+    than its budget (e.g. a reused clip rendered for a longer occurrence)
+    is cut while it is conformed.
+
+    Args:
+        segment_paths: Segments in playback order
+        output_path: Where to write the stitched MP4
+        ffmpeg_path: FFmpeg executable
+        probe: Metadata service used to inspect the segments
+        max_workers: Maximum concurrent transcodes (default: half the CPUs)
+        audio_path: Optional soundtrack to mux over the stitched video
+        frame_counts: Optional frame budget per entry at the target frame
+            rate (None for no limit)
+
+    Returns:
+        Path to the stitched video
+
+    Raises:
+        ValueError: If no segments are given, none has video or
+            frame_counts does not match the segments
+        RuntimeError: If a transcode or the final concat fails
+    """
+    if not segment_paths:
+        raise ValueError("No segments provided to stitch")
+    if frame_counts is not None and len(frame_counts) != len(segment_paths):
+        raise ValueError("frame_counts must have one entry per segment")
+
+    infos = await probe.probe_many(segment_paths)
+    target = choose_target_profile(infos)
+    copy_audio = False
+    if audio_path is not None:
+        # Segment audio is discarded, so it never forces a transcode
+        target.audio_codec = target.sample_rate = target.channels = target.channel_layout = None
+        try:
+            copy_audio = (await probe.probe(audio_path)).audio_codec in MP4_AUDIO_COPY_CODECS
+        except MediaProbeError as e:
+            logger.warning(f"Could not probe {audio_path}, re-encoding it to AAC: {e}")
+    fps = Fraction(target.frame_rate)
+    # Frame limit of every entry that runs past its budget
+    cuts: Dict[int, int] = {
+        i: budget for i, budget in enumerate(frame_counts or [])
+        if budget is not None and infos[i].duration and round(infos[i].duration * fps) > budget
+    }
+    mismatched = [
+        i for i, info in enumerate(infos)
+        if i in cuts or needs_transcode(info, target, compare_audio=audio_path is None)
+    ]
+    logger.info(
+        f"Stitching {len(infos)} segments as {target.video_codec} {target.width}x{target.height}@{target.frame_rate}; "
+        f"re-encoding {len(mismatched)} ({len(cuts)} cut to their frame budget)"
+    )
+
+    output_path = Path(output_path)
+    os.makedirs(output_path.parent, exist_ok=True)
+    work_dir = Path(tempfile.mkdtemp(prefix=".stitch_", dir=output_path.parent))
+    try:
+        inputs = [Path(info.path) for info in infos]
+        semaphore = asyncio.Semaphore(max_workers or max(1, (os.cpu_count() or 2) // 2))
+
+        async def conform(index: int) -> None:
+            conformed = work_dir / f"conformed_{index:03d}.mp4"
+            async with semaphore:
+                returncode, stderr = await run_ffmpeg(
+                    conform_command(ffmpeg_path, infos[index], target, conformed, cuts.get(index))
+                )
+            if returncode != 0:
+                raise RuntimeError(f"Re-encoding segment {infos[index].path} failed: {stderr[-2000:]}")
+            inputs[index] = conformed
+
+        # Repeated segments (e.g. a reused chorus clip) are conformed once per frame budget
+        first_of: Dict[Tuple[str, Optional[int]], int] = {}
+        for i in mismatched:
+            first_of.setdefault((infos[i].path, cuts.get(i)), i)
+        await asyncio.gather(*(conform(i) for i in first_of.values()))
+        for i in mismatched:
+            inputs[i] = inputs[first_of[(infos[i].path, cuts.get(i))]]
+
+        list_path = work_dir / "concat_list.txt"
+        write_concat_list(inputs, list_path)
+        returncode, stderr = await run_ffmpeg(
+            concat_command(ffmpeg_path, list_path, output_path, audio_path, copy_audio)
+        )
+        if returncode != 0:
+            raise RuntimeError(f"FFmpeg concat failed: {stderr[-2000:]}")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    return str(output_path)
@@ -0,0 +1,293 @@
+"""
+Subtitle rendering with ffmpeg.
+
+Subtitle entries are written as SRT or ASS and then either burned into the
+picture with a single ffmpeg `subtitles` filter pass (libass), or muxed as a
+soft mov_text track with stream copy and no re-encode at all.
+"""
+import os
+import logging
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+from .probe import media_probe, MediaProbeError
+from .executor import run_ffmpeg
+
+logger = logging.getLogger(__name__)
+
+PathLike = Union[str, Path]
+
+DEFAULT_STYLE = {
+    "font_size": 24,
+    "font_color": "white",
+    "background": True,
+    "background_color": "black",
+    "background_opacity": 0.5,
+    "position": "bottom",
+}
+
+# Named colours accepted in subtitle styles, as RGB hex
+NAMED_COLORS = {
+    "white": "FFFFFF",
+    "black": "000000",
+    "yellow": "FFFF00",
+    "red": "FF0000",
+    "green": "00FF00",
+    "blue": "0000FF",
+    "gray": "808080",
+    "grey": "808080",
+}
+
+# ASS numpad alignment for the supported positions
+ALIGNMENT = {"bottom": 2, "middle": 5, "top": 8}
+
+
+def _entry_fields(entry: Any) -> tuple:
+    """(start, end, text) from a dict or SubtitleEntry-like object."""
+    if isinstance(entry, dict):
+        start = entry.get("start", entry.get("start_time"))
+        end = entry.get("end", entry.get("end_time"))
+        text = entry.get("text", "")
+    else:
+        start = getattr(entry, "start", getattr(entry, "start_time", None))
+        end = getattr(entry, "end", getattr(entry, "end_time", None))
+        text = getattr(entry, "text", "")
+    return float(start), float(end), str(text)
+
+
+def format_srt_timestamp(seconds: float) -> str:
+    """Format seconds as HH:MM:SS,mmm."""
+    millis = int(round(max(seconds, 0.0) * 1000))
+    hours, millis = divmod(millis, 3_600_000)
+    minutes, millis = divmod(millis, 60_000)
+    secs, millis = divmod(millis, 1000)
+    return f"{hours:02}:{minutes:02}:{secs:02},{millis:03}"
+
+
+def format_ass_timestamp(seconds: float) -> str:
+    """Format seconds as H:MM:SS.cc."""
+    centis = int(round(max(seconds, 0.0) * 100))
+    hours, centis = divmod(centis, 360_000)
+    minutes, centis = divmod(centis, 6000)
+    secs, centis = divmod(centis, 100)
+    return f"{hours}:{minutes:02}:{secs:02}.{centis:02}"
+
+
+def segment_cues(texts: List[str], frame_counts: List[int], fps: float) -> List[Dict[str, Any]]:
+    """
+    One subtitle entry per video segment, timed from the segments' frames.
+
+    Cue boundaries are summed in whole frames, so each cue starts and ends
+    on the cut between segments however long the segments are.
+
+    Args:
+        texts: Cue text for each segment
+        frame_counts: Frames each segment was rendered with
+        fps: Frame rate of the segments
+
+    Returns:
+        Entries for build_srt or build_ass
+    """
+    if len(texts) != len(frame_counts):
+        raise ValueError(f"{len(texts)} cues for {len(frame_counts)} segments")
+    entries = []
+    elapsed = 0
+    for text, frames in zip(texts, frame_counts):
+        entries.append({"start": elapsed / fps, "end": (elapsed + frames) / fps, "text": text})
+        elapsed += frames
+    return entries
+
+
+def build_srt(entries: List[Any]) -> str:
+    """
+    Render subtitle entries as SRT.
+
+    Args:
+        entries: Dicts with start/end/text (or start_time/end_time), or SubtitleEntry objects
+
+    Returns:
+        SRT document
+    """
+    blocks = []
+    for number, entry in enumerate(entries, start=1):
+        start, end, text = _entry_fields(entry)
+        text = text.replace("\r", "").strip()
+        blocks.append(f"{number}\n{format_srt_timestamp(start)} --> {format_srt_timestamp(end)}\n{text}\n")
+    return "\n".join(blocks)
+
+
+def _ass_color(color: str, opacity: float = 1.0) -> str:
+    """Convert a colour name or #RRGGBB into ASS &HAABBGGRR notation."""
+    rgb = NAMED_COLORS.get(color.lower(), color.lstrip("#")) if color else "FFFFFF"
+    if len(rgb) != 6:
+        rgb = "FFFFFF"
+    alpha = int(round((1.0 - max(0.0, min(1.0, opacity))) * 255))
+    return f"&H{alpha:02X}{rgb[4:6]}{rgb[2:4]}{rgb[0:2]}".upper()
+
+
+def build_ass(entries: List[Any], style: Optional[Dict[str, Any]] = None, width: int = 1920, height: int = 1080) -> str:
+    """
+    Render subtitle entries as ASS with the given style.
+
+    The script resolution matches the video, so font_size is in pixels just
+    like the old MoviePy TextClip.
+
+    Args:
+        entries: Subtitle entries (see build_srt)
+        style: SubtitleStyle-like dict; missing keys use DEFAULT_STYLE
+        width: Video width in pixels
+        height: Video height in pixels
+
+    Returns:
+        ASS document
+    """
+    style = {**DEFAULT_STYLE, **(style or {})}
+    primary = _ass_color(style["font_color"])
+    if style["background"]:
+        # BorderStyle 3 draws an opaque box behind the text
+        border_style, outline = 3, 4
+        back = _ass_color(style["background_color"], style["background_opacity"])
+    else:
+        border_style, outline = 1, 2
+        back = _ass_color("black", 0.0)
+    alignment = ALIGNMENT.get(style.get("position", "bottom"), 2)
+
+    lines = [
+        "[Script Info]",
+        "ScriptType: v4.00+",
+        f"PlayResX: {width}",
+        f"PlayResY: {height}",
+        "WrapStyle: 0",
+        "ScaledBorderAndShadow: yes",
+        "",
+        "[V4+ Styles]",
+        "Format: Name, Fontname, Fontsize, PrimaryColour, SecondaryColour, OutlineColour, BackColour, "
+        "Bold, Italic, Underline, StrikeOut, ScaleX, ScaleY, Spacing, Angle, BorderStyle, Outline, Shadow, "
+        "Alignment, MarginL, MarginR, MarginV, Encoding",
+        f"Style: Default,Arial,{style['font_size']},{primary},{primary},{back},{back},"
+        f"0,0,0,0,100,100,0,0,{border_style},{outline},0,{alignment},20,20,{max(10, height // 20)},1",
+        "",
+        "[Events]",
+        "Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text",
+    ]
+    for entry in entries:
+        start, end, text = _entry_fields(entry)
+        text = text.replace("\r", "").strip().replace("\n", "\\N").replace("{", "(").replace("}", ")")
+        lines.append(f"Dialogue: 0,{format_ass_timestamp(start)},{format_ass_timestamp(end)},Default,,0,0,0,,{text}")
+    return "\n".join(lines) + "\n"
+
+
+def escape_filter_path(path: PathLike) -> str:
+    """
+    Escape a file path for use as an ffmpeg filter option value in a filtergraph.
+
+    ffmpeg unescapes the value twice, first when splitting the filtergraph
+    and then when parsing the filter's options, so the path is escaped for
+    the option level and the result again for the graph level. Backslashes
+    become forward slashes, which ffmpeg accepts on Windows too.
+    """
+    escaped = str(path).replace("\\", "/")
+    # Option level: ':' separates options, "'" quotes
+    for char in ("'", ":"):
+        escaped = escaped.replace(char, "\\" + char)
+    # Graph level: also escapes the backslashes added above
+    escaped = escaped.replace("\\", "\\\\")
+    for char in ("'", ",", "[", "]", ";"):
+        escaped = escaped.replace(char, "\\" + char)
+    return escaped
+
+
+async def burn_subtitle_file(
+    video_path: PathLike,
+    subtitle_path: PathLike,
+    output_path: PathLike,
+    ffmpeg_path: str = "ffmpeg"
+) -> str:
+    """
+    Burn an SRT or ASS file into a video with one ffmpeg pass.
+
+    Audio is stream-copied; only the picture is re-encoded.
+
+    Raises:
+        RuntimeError: If ffmpeg fails
+    """
+    cmd = [
+        ffmpeg_path, "-y",
+        "-i", str(video_path),
+        "-vf", f"subtitles=filename={escape_filter_path(os.path.abspath(subtitle_path))}",
+        "-c:v", "libx264", "-preset", "veryfast", "-crf", "18", "-pix_fmt", "yuv420p",
+        "-c:a", "copy",
+        "-movflags", "+faststart",
+        str(output_path)
+    ]
+    returncode, stderr = await run_ffmpeg(cmd)
+    if returncode != 0:
+        raise RuntimeError(f"FFmpeg subtitle burn-in failed: {stderr[-2000:]}")
+    return str(output_path)
+
+
+async def burn_subtitles(
+    video_path: PathLike,
+    entries: List[Any],
+    output_path: PathLike,
+    style: Optional[Dict[str, Any]] = None,
+    ffmpeg_path: str = "ffmpeg"
+) -> str:
+    """
+    Render styled subtitle entries into the picture.
+
+    Args:
+        video_path: Source video
+        entries: Subtitle entries (see build_srt)
+        output_path: Where to write the subtitled video
+        style: SubtitleStyle-like dict
+        ffmpeg_path: FFmpeg executable
+
+    Returns:
+        Path to the subtitled video
+    """
+    width, height = 1920, 1080
+    try:
+        info = await media_probe.probe(video_path)
+        width, height = info.width or width, info.height or height
+    except MediaProbeError as e:
+        logger.warning(f"Could not probe {video_path} for subtitle layout, assuming {width}x{height}: {e}")
+
+    ass_path = Path(output_path).with_suffix(".ass")
+    with open(ass_path, "w", encoding="utf-8") as f:
+        f.write(build_ass(entries, style, width, height))
+    try:
+        return await burn_subtitle_file(video_path, ass_path, output_path, ffmpeg_path)
+    finally:
+        if ass_path.exists():
+            os.remove(ass_path)
+
+
+async def mux_soft_subtitles(
+    video_path: PathLike,
+    subtitle_path: PathLike,
+    output_path: PathLike,
+    language: str = "eng",
+    ffmpeg_path: str = "ffmpeg"
+) -> str:
+    """
+    Add a subtitle file as a selectable mov_text track without re-encoding.
+
+    Raises:
+        RuntimeError: If ffmpeg fails
+    """
+    cmd = [
+        ffmpeg_path, "-y",
+        "-i", str(video_path),
+        "-i", str(subtitle_path),
+        "-map", "0:v", "-map", "0:a?", "-map", "1:0",
+        "-c", "copy",
+        "-c:s", "mov_text",
+        "-metadata:s:s:0", f"language={language}",
+        "-movflags", "+faststart",
+        str(output_path)
+    ]
+    returncode, stderr = await run_ffmpeg(cmd)
+    if returncode != 0:
+        raise RuntimeError(f"FFmpeg subtitle mux failed: {stderr[-2000:]}")
+    return str(output_path)
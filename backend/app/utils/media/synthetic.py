@@ -0,0 +1,85 @@
+"""
+Placeholder clips rendered with NumPy and piped into ffmpeg.
+
+Frames come from the shared synthetic_video generator (an animated gradient
+with the prompt text, laid out once per clip); raw RGB frames are written
+straight to ffmpeg's stdin through the media executor, so nothing touches
+the disk except the encoded output and the event loop is never blocked on
+the encoder.
+"""
+import asyncio
+import logging
+from pathlib import Path
+from typing import Iterable, Union
+
+import numpy as np
+
+from .executor import media_executor, MediaProcessError, PRIORITY_BACKGROUND
+from synthetic_video import encode_command, synthetic_frames
+
+logger = logging.getLogger(__name__)
+
+PathLike = Union[str, Path]
+
+
+async def encode_frames(
+    frames: Iterable[np.ndarray],
+    output_path: PathLike,
+    width: int,
+    height: int,
+    fps: int,
+    ffmpeg_path: str = "ffmpeg",
+    priority: int = PRIORITY_BACKGROUND
+) -> str:
+    """
+    Stream raw RGB frames into an ffmpeg encoder through the media executor.
+
+    Raises:
+        MediaProcessError: If ffmpeg exits with an error
+    """
+    cmd = encode_command(str(output_path), width, height, fps, ffmpeg_path)
+    async with media_executor.open_process(cmd, priority=priority, stdin=asyncio.subprocess.PIPE) as process:
+        stderr_task = asyncio.create_task(process.stderr.read())
+        try:
+            for frame in frames:
+                process.stdin.write(frame.tobytes())
+                await process.stdin.drain()
+        except (BrokenPipeError, ConnectionResetError):
+            # ffmpeg quit early; its exit status and stderr say why
+            pass
+        finally:
+            process.stdin.close()
+        returncode = await process.wait()
+        stderr = (await stderr_task).decode(errors="replace")
+    if returncode != 0:
+        raise MediaProcessError(f"ffmpeg raw encode failed: {stderr[-2000:]}", cmd, returncode, stderr)
+    return str(output_path)
+
+
+async def render_placeholder_clip(
+    prompt: str,
+    output_path: PathLike,
+    width: int = 640,
+    height: int = 360,
+    fps: int = 24,
+    duration: float = 5.0,
+    ffmpeg_path: str = "ffmpeg"
+) -> str:
+    """
+    Render a placeholder clip showing the prompt text.
+
+    Args:
+        prompt: Text to show in the middle of the frame
+        output_path: Where to write the MP4
+        width: Frame width in pixels
+        height: Frame height in pixels
+        fps: Frames per second
+        duration: Clip length in seconds
+        ffmpeg_path: FFmpeg executable
+
+    Returns:
+        Path to the encoded clip
+    """
+    num_frames = max(1, int(round(duration * fps)))
+    frames = synthetic_frames(width, height, num_frames, fps, text=prompt, moving_disc=False)
+    return await encode_frames(frames, output_path, width, height, fps, ffmpeg_path)
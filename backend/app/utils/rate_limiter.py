@@ -0,0 +1,109 @@
+"""
+Shared outbound rate limiting.
+
+Everything that calls the same upstream API takes its slots from one
+limiter per upstream (`get_rate_limiter("openai")`), so concurrent jobs
+together stay under the provider's request rate instead of each pacing
+itself with fixed sleeps.
+
+The limiter is a GCRA token bucket: each caller reserves the next free
+slot under a thread lock and then sleeps until it, so it is FIFO-fair and
+works across event loops and threads.
+"""
+import os
+import time
+import asyncio
+import logging
+import threading
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_REQUESTS_PER_SECOND = 10.0
+
+
+class RateLimiter:
+    """Token bucket allowing `burst` immediate requests, then `rate` per second."""
+
+    def __init__(self, rate: float, burst: Optional[int] = None, name: str = "default"):
+        """
+        Initialize the limiter.
+
+        Args:
+            rate: Sustained requests per second
+            burst: Requests allowed back to back (default: one second's worth)
+            name: Upstream name for logs
+        """
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = rate
+        self.burst = max(1, burst if burst is not None else int(rate))
+        self.name = name
+        self._interval = 1.0 / rate
+        # Theoretical arrival time of the next request
+        self._tat = 0.0
+        self._lock = threading.Lock()
+
+    def _reserve(self) -> float:
+        """Reserve the next slot and return how long to wait for it."""
+        with self._lock:
+            now = time.monotonic()
+            tat = max(self._tat, now) + self._interval
+            self._tat = tat
+            return max(0.0, tat - self.burst * self._interval - now)
+
+    async def acquire(self) -> float:
+        """
+        Wait for a request slot.
+
+        Returns:
+            Seconds spent waiting
+        """
+        delay = self._reserve()
+        if delay > 0:
+            logger.debug(f"Rate limiter {self.name}: waiting {delay:.2f}s")
+            await asyncio.sleep(delay)
+        return delay
+
+    def penalize(self, seconds: float) -> None:
+        """Push every pending and future slot back, e.g. after an HTTP 429 with Retry-After."""
+        with self._lock:
+            self._tat = max(self._tat, time.monotonic()) + seconds
+
+    async def __aenter__(self) -> "RateLimiter":
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        return False
+
+
+_limiters: Dict[str, RateLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(name: str, rate: Optional[float] = None, burst: Optional[int] = None) -> RateLimiter:
+    """
+    Get the shared limiter for an upstream, creating it on first use.
+
+    Unless given explicitly, the rate and burst come from
+    <NAME>_REQUESTS_PER_SECOND and <NAME>_BURST, e.g. OPENAI_REQUESTS_PER_SECOND.
+
+    Args:
+        name: Upstream name, e.g. "openai"
+        rate: Requests per second for a new limiter
+        burst: Burst size for a new limiter
+
+    Returns:
+        The limiter shared by all callers using this name
+    """
+    with _limiters_lock:
+        limiter = _limiters.get(name)
+        if limiter is None:
+            prefix = name.upper().replace("-", "_")
+            if rate is None:
+                rate = float(os.getenv(f"{prefix}_REQUESTS_PER_SECOND", DEFAULT_REQUESTS_PER_SECOND))
+            if burst is None and os.getenv(f"{prefix}_BURST"):
+                burst = int(os.getenv(f"{prefix}_BURST"))
+            limiter = _limiters[name] = RateLimiter(rate, burst, name=name)
+        return limiter
@@ -0,0 +1,90 @@
+"""
+Benchmark analyze_beats: legacy double decode vs the single-decode engine.
+
+Times:
+  - legacy:  the previous analyze_beats (librosa.load at the native rate and
+             beat_track once for the beats and again for the downbeats)
+  - engine:  app.utils.audio.analysis.AudioAnalyzer (one decode at the
+             analysis rate, one onset envelope, one beat-tracking pass)
+  - stream:  app.utils.audio.analysis.StreamingAudioAnalyzer (the same,
+             decoded and analysed block by block), with peak traced memory
+
+All are checked against each other: the number of beats and the average
+tempo should agree.
+
+Usage (from backend/):
+    python -m benchmarks.bench_audio_analysis path/to/song.wav [--repeat 3]
+"""
+import sys
+import time
+import argparse
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+import librosa
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.utils.audio.analysis import AudioAnalyzer, StreamingAudioAnalyzer  # noqa: E402
+
+
+def legacy_beats(audio_path: str) -> list:
+    y, sr = librosa.load(audio_path, sr=None)
+    _, beat_frames = librosa.beat.beat_track(y=y, sr=sr)
+    return librosa.frames_to_time(beat_frames, sr=sr).tolist()
+
+
+def legacy_analyze(audio_path: str) -> dict:
+    """analyze_beats as it was: beats and downbeats each decode and track the file."""
+    beat_times = legacy_beats(audio_path)
+    downbeats = legacy_beats(audio_path)[::4]
+    intervals = np.diff(beat_times)
+    return {
+        "beat_timestamps": beat_times,
+        "downbeat_timestamps": downbeats,
+        "tempo_bpm": 60.0 / np.mean(intervals) if len(intervals) else 0,
+        "total_beats": len(beat_times)
+    }
+
+
+def best_of(func, path: str, repeat: int):
+    times = []
+    tracemalloc.start()
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(path)
+        times.append(time.perf_counter() - start)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return min(times), peak, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("audio", help="Audio file to analyse")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per variant (best is reported)")
+    args = parser.parse_args()
+
+    duration = librosa.get_duration(path=args.audio)
+    print(f"{args.audio}: {duration:.1f}s")
+
+    variants = [
+        ("legacy", legacy_analyze),
+        ("engine", lambda path: AudioAnalyzer.load(path).summary()),
+        ("stream", lambda path: StreamingAudioAnalyzer.load(path).summary()),
+    ]
+    timings = {}
+    for name, func in variants:
+        seconds, peak, result = best_of(func, args.audio, args.repeat)
+        timings[name] = seconds
+        print(
+            f"{name:<8} {seconds:8.2f}s  peak {peak / 2**20:7.1f} MiB  "
+            f"{result['total_beats']} beats, {result['tempo_bpm']:.1f} BPM"
+        )
+    print(f"speedup: {timings['legacy'] / timings['engine']:.1f}x (engine), "
+          f"{timings['legacy'] / timings['stream']:.1f}x (stream)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Beat detector accuracy and speed on synthetic click tracks with known beats.
+
+For every track in app.utils.audio.synthetic.CORPUS (tempos, a tempo ramp,
+swing, noise) this times and scores:
+  - get_beat_timestamps  beats vs ground truth
+  - get_downbeats        downbeats vs ground truth
+  - analyze_beats        both, from its single analysis
+
+and reports F-measure (70 ms window), mean timing error and signed offset,
+wall time and peak traced memory. Results can be saved with --json and compared with a
+previous run with --baseline; the run fails if any F-measure drops by more
+than --tolerance, so an optimisation of the audio path cannot silently
+cost accuracy.
+
+Usage (from backend/):
+    python -m benchmarks.bench_beats [--streaming] [--json out.json] [--baseline old.json]
+"""
+import sys
+import json
+import argparse
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.utils.audio import analysis  # noqa: E402
+from app.utils.audio.beat_detector import analyze_beats, get_beat_timestamps, get_downbeats  # noqa: E402
+from app.utils.audio.evaluation import beat_scores, measure  # noqa: E402
+from app.utils.audio.synthetic import CORPUS, write_track  # noqa: E402
+
+
+def run_track(path: Path, truth) -> dict:
+    beats, beats_s, beats_mb = measure(get_beat_timestamps, str(path))
+    downbeats, down_s, down_mb = measure(get_downbeats, str(path))
+    summary, full_s, full_mb = measure(analyze_beats, str(path))
+    return {
+        "get_beat_timestamps": {"seconds": beats_s, "peak_mib": beats_mb, **beat_scores(beats, truth.beats)},
+        "get_downbeats": {"seconds": down_s, "peak_mib": down_mb, **beat_scores(downbeats, truth.downbeats)},
+        "analyze_beats": {
+            "seconds": full_s,
+            "peak_mib": full_mb,
+            **beat_scores(summary["beat_timestamps"], truth.beats),
+            "downbeat_f_measure": beat_scores(summary["downbeat_timestamps"], truth.downbeats)["f_measure"]
+        }
+    }
+
+
+def regressions(results: dict, baseline: dict, tolerance: float) -> list:
+    """F-measures that fell by more than the tolerance against the baseline."""
+    found = []
+    for track, functions in results.items():
+        for function, scores in functions.items():
+            old = baseline.get(track, {}).get(function, {})
+            for key in ("f_measure", "downbeat_f_measure"):
+                if key in scores and key in old and scores[key] < old[key] - tolerance:
+                    found.append(f"{track} {function} {key}: {old[key]:.3f} -> {scores[key]:.3f}")
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tracks", help="Comma-separated track names (default: the whole corpus)")
+    parser.add_argument("--streaming", action="store_true", help="Force the block-wise streaming analysis path")
+    parser.add_argument("--json", help="Write the results to this file")
+    parser.add_argument("--baseline", help="Results of an earlier run to compare F-measures against")
+    parser.add_argument("--tolerance", type=float, default=0.02, help="Allowed F-measure drop against the baseline")
+    args = parser.parse_args()
+
+    specs = CORPUS
+    if args.tracks:
+        wanted = set(args.tracks.split(","))
+        specs = [spec for spec in CORPUS if spec.name in wanted]
+    if args.streaming:
+        analysis.STREAMING_MIN_SECONDS = 0
+
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="bench_beats_") as work_dir:
+        tracks = [(spec, *write_track(spec, work_dir)) for spec in specs]
+        # Warm up (librosa's numba kernels compile on first use)
+        analyze_beats(str(tracks[0][1]))
+
+        print(f"{'track':<22} {'function':<20} {'F':>6} {'down F':>6} {'err ms':>7} {'off ms':>7} {'time s':>7} {'peak MiB':>9}")
+        for spec, path, truth in tracks:
+            results[spec.name] = run_track(path, truth)
+            for function, scores in results[spec.name].items():
+                # get_downbeats is scored against the downbeats, the others against the beats
+                down = scores.get("downbeat_f_measure")
+                print(
+                    f"{spec.name:<22} {function:<20} {scores['f_measure']:6.3f} "
+                    f"{'' if down is None else f'{down:.3f}':>6} "
+                    f"{scores['mean_error_ms']:7.1f} {scores['mean_offset_ms']:7.1f} {scores['seconds']:7.2f} {scores['peak_mib']:9.1f}"
+                )
+
+    mean_f = sum(r["get_beat_timestamps"]["f_measure"] for r in results.values()) / len(results)
+    total = sum(f["seconds"] for r in results.values() for f in r.values())
+    print(f"\nmean beat F-measure {mean_f:.3f}, total time {total:.2f}s")
+
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, indent=2))
+    if args.baseline:
+        found = regressions(results, json.loads(Path(args.baseline).read_text()), args.tolerance)
+        for line in found:
+            print(f"REGRESSION {line}")
+        if found:
+            sys.exit(1)
+        print("no accuracy regressions against the baseline")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Benchmark placeholder clip rendering: per-pixel loop + JPEGs vs NumPy + pipe.
+
+Times:
+  - legacy:  the previous _create_placeholder_clip (nested Python loop per
+             pixel, one JPEG per frame, ffmpeg image2 input). Only
+             --legacy-frames frames are rendered and the total is extrapolated,
+             since a full clip takes minutes.
+  - numpy:   synthetic_video.synthetic_frames alone (no encode)
+  - clip:    app.utils.media.synthetic.render_placeholder_clip end to end
+
+Usage (from backend/):
+    python -m benchmarks.bench_placeholder --size 640x360 --fps 24 --duration 5
+"""
+import os
+import sys
+import time
+import asyncio
+import argparse
+import tempfile
+import subprocess
+from pathlib import Path
+
+import cv2
+import numpy as np
+from synthetic_video import synthetic_frames
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.utils.media.synthetic import render_placeholder_clip  # noqa: E402
+
+PROMPT = "A person looking hopeful as the sunrise bathes their face in warm golden light."
+
+
+def legacy_frame(i: int, width: int, height: int, fps: int) -> np.ndarray:
+    """One frame as the old implementation drew it."""
+    frame = np.zeros((height, width, 3), dtype=np.uint8)
+    for y in range(height):
+        for x in range(width):
+            frame[y, x] = [
+                int(100 + 50 * np.sin(i / (fps * 2) + x / 100)),
+                int(100 + 50 * np.cos(i / (fps * 2) + y / 100)),
+                int(150 + 50 * np.sin(i / (fps * 2) + (x+y) / 200))
+            ]
+    cv2.putText(frame, PROMPT[:40], (20, height // 2), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
+    return frame
+
+
+def legacy_clip(work_dir: str, frames: int, width: int, height: int, fps: int, ffmpeg_path: str) -> None:
+    for i in range(frames):
+        cv2.imwrite(os.path.join(work_dir, f"frame_{i:04d}.jpg"), legacy_frame(i, width, height, fps))
+    subprocess.run([
+        ffmpeg_path, "-y", "-loglevel", "error",
+        "-framerate", str(fps), "-i", os.path.join(work_dir, "frame_%04d.jpg"),
+        "-c:v", "libx264", "-pix_fmt", "yuv420p",
+        os.path.join(work_dir, "legacy.mp4")
+    ], check=True)
+
+
+def timed(func, *args) -> float:
+    start = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", default="640x360", help="Frame size WxH")
+    parser.add_argument("--fps", type=int, default=24)
+    parser.add_argument("--duration", type=float, default=5.0, help="Clip length in seconds")
+    parser.add_argument("--legacy-frames", type=int, default=3, help="Frames to render with the legacy loop (0 to skip)")
+    parser.add_argument("--ffmpeg", default="ffmpeg", help="FFmpeg executable")
+    args = parser.parse_args()
+
+    width, height = (int(v) for v in args.size.split("x"))
+    total_frames = int(round(args.duration * args.fps))
+    print(f"{total_frames} frames at {width}x{height}@{args.fps}")
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        legacy = None
+        if args.legacy_frames:
+            sample = min(args.legacy_frames, total_frames)
+            elapsed = timed(legacy_clip, work_dir, sample, width, height, args.fps, args.ffmpeg)
+            legacy = elapsed / sample * total_frames
+            print(f"{'legacy':<8} {legacy:8.2f}s  (extrapolated from {sample} frames)")
+
+        frames = timed(lambda: sum(1 for _ in synthetic_frames(width, height, total_frames, args.fps, text=PROMPT, moving_disc=False)))
+        print(f"{'numpy':<8} {frames:8.2f}s  ({frames / total_frames * 1000:.2f} ms/frame, render only)")
+
+        clip = timed(lambda: asyncio.run(render_placeholder_clip(
+            PROMPT, os.path.join(work_dir, "clip.mp4"), width, height, args.fps, args.duration, args.ffmpeg)))
+        print(f"{'clip':<8} {clip:8.2f}s  (render + encode)")
+
+        if legacy:
+            print(f"clip speedup vs legacy: {legacy / clip:.0f}x")
+
+
+if __name__ == "__main__":
+    main()
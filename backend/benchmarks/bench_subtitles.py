@@ -0,0 +1,118 @@
+"""
+Benchmark subtitle rendering: legacy MoviePy compositor vs ffmpeg.
+
+Generates a synthetic test clip (synthetic_video), then times:
+  - moviepy:  the previous add_subtitles_to_video implementation
+              (TextClip per cue via ImageMagick, CompositeVideoClip, re-encode)
+  - burn:     app.utils.media.subtitles.burn_subtitles (one libass filter pass)
+  - soft:     app.utils.media.subtitles.mux_soft_subtitles (stream copy)
+
+Usage (from backend/):
+    python -m benchmarks.bench_subtitles --duration 30 --size 1280x720 --cues 10
+"""
+import os
+import sys
+import time
+import asyncio
+import argparse
+import tempfile
+from pathlib import Path
+
+from synthetic_video import render_clip
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.utils.media.subtitles import build_srt, burn_subtitles, mux_soft_subtitles  # noqa: E402
+
+
+def make_test_clip(path: str, duration: int, size: str, fps: int, ffmpeg_path: str) -> None:
+    """Render a synthetic test clip with a sine tone."""
+    width, height = (int(v) for v in size.split("x"))
+    render_clip(path, width, height, fps, duration, tone_hz=440, frame_counter=True, ffmpeg_path=ffmpeg_path)
+
+
+def make_cues(duration: int, count: int):
+    step = duration / count
+    return [
+        {"start": i * step, "end": (i + 1) * step, "text": f"Subtitle number {i + 1} of {count}"}
+        for i in range(count)
+    ]
+
+
+def moviepy_burn(video_path: str, subtitles, subtitle_style, output_path: str) -> str:
+    """The MoviePy implementation that add_subtitles_to_video used to run."""
+    import moviepy.editor as mp
+    from moviepy.video.tools.subtitles import SubtitlesClip
+
+    video = mp.VideoFileClip(video_path)
+    subs = [((sub["start"], sub["end"]), sub["text"]) for sub in subtitles]
+
+    def generator(txt):
+        return mp.TextClip(
+            txt,
+            font='Arial',
+            fontsize=subtitle_style.get("font_size", 24),
+            color=subtitle_style.get("font_color", "white"),
+            bg_color=subtitle_style.get("background_color", "black"),
+            size=(video.w, None),
+            method='caption'
+        ).set_opacity(subtitle_style.get("background_opacity", 0.5))
+
+    subtitles_clip = SubtitlesClip(subs, generator).set_position(lambda t: ('center', 'bottom'))
+    final_video = mp.CompositeVideoClip([video, subtitles_clip])
+    final_video.write_videofile(output_path, codec="libx264", audio_codec="aac", logger=None)
+    video.close()
+    return output_path
+
+
+def timed(label, func, *args):
+    start = time.perf_counter()
+    try:
+        func(*args)
+    except Exception as e:
+        print(f"{label:<10} skipped ({type(e).__name__}: {str(e).splitlines()[0] if str(e) else ''})")
+        return None
+    elapsed = time.perf_counter() - start
+    print(f"{label:<10} {elapsed:8.2f}s")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--duration", type=int, default=30, help="Clip length in seconds")
+    parser.add_argument("--size", default="1280x720", help="Clip size WxH")
+    parser.add_argument("--fps", type=int, default=30)
+    parser.add_argument("--cues", type=int, default=10, help="Number of subtitle cues")
+    parser.add_argument("--ffmpeg", default="ffmpeg", help="FFmpeg executable")
+    parser.add_argument("--skip-moviepy", action="store_true", help="Do not run the legacy MoviePy path")
+    args = parser.parse_args()
+
+    style = {"font_size": 36, "font_color": "white", "background": True,
+             "background_color": "black", "background_opacity": 0.5}
+    cues = make_cues(args.duration, args.cues)
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        clip = os.path.join(work_dir, "clip.mp4")
+        srt = os.path.join(work_dir, "subs.srt")
+        make_test_clip(clip, args.duration, args.size, args.fps, args.ffmpeg)
+        with open(srt, "w", encoding="utf-8") as f:
+            f.write(build_srt(cues))
+
+        print(f"{args.duration}s {args.size}@{args.fps} clip, {args.cues} cues")
+        results = {}
+        if not args.skip_moviepy:
+            results["moviepy"] = timed("moviepy", moviepy_burn, clip, cues, style, os.path.join(work_dir, "moviepy.mp4"))
+        results["burn"] = timed("burn", lambda: asyncio.run(
+            burn_subtitles(clip, cues, os.path.join(work_dir, "burn.mp4"), style, ffmpeg_path=args.ffmpeg)))
+        results["soft"] = timed("soft", lambda: asyncio.run(
+            mux_soft_subtitles(clip, srt, os.path.join(work_dir, "soft.mp4"), ffmpeg_path=args.ffmpeg)))
+
+        baseline = results.get("moviepy")
+        if baseline:
+            for label in ("burn", "soft"):
+                if results.get(label):
+                    print(f"{label} speedup vs moviepy: {baseline / results[label]:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
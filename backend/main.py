@@ -12,6 +12,9 @@ from fastapi.responses import JSONResponse, RedirectResponse
 from app.routes import video, lyrics, audio, upload
 from app.utils.config import get_settings, verify_settings
 from app.services.video_queue import video_queue # Import queue
+from app.services.lyrics_service import lyrics_service
+from app.utils.http_pool import close_http_client
+from app.utils.audio.analysis_pool import analysis_pool
 from pathlib import Path
 import re
 import random
@@ -55,10 +58,16 @@ async def lifespan(app: FastAPI):
     # Startup: Start the queue processor
     print("Application startup: Starting video queue processor...")
     await video_queue.start_processor()
+    # Startup: Resume lyrics jobs interrupted by the last shutdown
+    resumed = await lyrics_service.resume_unfinished_jobs()
+    if resumed:
+        print(f"Application startup: Resumed {len(resumed)} lyrics job(s)")
     yield
     # Shutdown: Stop the queue processor
     print("Application shutdown: Stopping video queue processor...")
     await video_queue.stop_processor()
+    await close_http_client()
+    analysis_pool.shutdown()
     print("Application shutdown complete.")
 
 app = FastAPI(
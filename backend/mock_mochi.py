@@ -1,14 +1,19 @@
 import uvicorn
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from fastapi.responses import FileResponse
+from pydantic import BaseModel, Field
+from starlette.background import BackgroundTask
+from typing import Optional
 import base64
-import cv2
-import numpy as np
+import asyncio
 import tempfile
+import uuid
 import os
 from pathlib import Path
 
+from synthetic_video import render_clip
+
 app = FastAPI(title="Mock Mochi-1 Service")
 
 # CORS configuration
@@ -20,14 +25,28 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Rendered clips waiting to be fetched in binary transfer mode
+ARTIFACT_DIR = Path(tempfile.mkdtemp(prefix="mock_mochi_"))
+
 class VideoRequest(BaseModel):
     prompt: str
+    # Exact clip length in frames, e.g. from a beat-aligned plan (default: 3 seconds)
+    num_frames: Optional[int] = Field(None, gt=0)
+    fps: int = Field(24, gt=0)
+    # "binary": reply with a job handle and serve the MP4 from /artifacts
+    transfer: Optional[str] = None
 
 class VideoResponse(BaseModel):
-    video_data: str
     prompt: str
+    # Base64 MP4 (compatibility mode)
+    video_data: Optional[str] = None
+    # Job handle (binary transfer mode)
+    job_id: Optional[str] = None
+    artifact_url: Optional[str] = None
+    content_type: Optional[str] = None
+    size: Optional[int] = None
 
-@app.post("/generate", response_model=VideoResponse)
+@app.post("/generate", response_model=VideoResponse, response_model_exclude_none=True)
 async def generate_video(request: VideoRequest):
     """
     Mock endpoint for video generation.
@@ -35,58 +54,32 @@ async def generate_video(request: VideoRequest):
     """
     prompt = request.prompt
     
-    # Create a simple text video (3 seconds at 24fps)
+    # Create a simple text video, exactly num_frames long when requested
     width, height = 640, 360
-    fps = 24
-    duration = 3
+    fps = request.fps
+    duration = request.num_frames / fps if request.num_frames else 3
+    
+    if request.transfer == "binary":
+        job_id = uuid.uuid4().hex
+        video_path = ARTIFACT_DIR / f"{job_id}.mp4"
+        await asyncio.to_thread(
+            render_clip, str(video_path), width, height, fps, duration,
+            text=f"Prompt: {prompt}", frame_counter=True
+        )
+        return {
+            "prompt": prompt,
+            "job_id": job_id,
+            "artifact_url": f"/artifacts/{job_id}",
+            "content_type": "video/mp4",
+            "size": video_path.stat().st_size
+        }
     
     with tempfile.TemporaryDirectory() as temp_dir:
-        # Create a temporary video file
         video_path = Path(temp_dir) / "temp_video.mp4"
-        
-        # Initialize video writer
-        fourcc = cv2.VideoWriter_fourcc(*'mp4v')
-        video = cv2.VideoWriter(str(video_path), fourcc, fps, (width, height))
-        
-        # Generate frames
-        for i in range(fps * duration):
-            # Create a frame with gradient background
-            frame = np.zeros((height, width, 3), dtype=np.uint8)
-            
-            # Add a gradient background
-            for y in range(height):
-                for x in range(width):
-                    # Create color gradient based on position and time
-                    frame[y, x] = [
-                        int(100 + 50 * np.sin(i / (fps * 2) + x / 100)),
-                        int(100 + 50 * np.cos(i / (fps * 2) + y / 100)),
-                        int(150 + 50 * np.sin(i / (fps * 2) + (x+y) / 200))
-                    ]
-            
-            # Add text
-            font = cv2.FONT_HERSHEY_SIMPLEX
-            text = f"Prompt: {prompt}"
-            # Simple text wrapping by truncating
-            if len(text) > 40:
-                text = text[:37] + "..."
-            
-            text_size = cv2.getTextSize(text, font, 0.7, 2)[0]
-            text_x = (width - text_size[0]) // 2
-            text_y = height // 2
-            
-            # Add outline for better visibility
-            cv2.putText(frame, text, (text_x+2, text_y+2), 
-                        font, 0.7, (0, 0, 0), 2)
-            cv2.putText(frame, text, (text_x, text_y), 
-                        font, 0.7, (255, 255, 255), 2)
-            
-            # Add frame count
-            cv2.putText(frame, f"Frame: {i}/{fps*duration}", (10, height-20), 
-                        font, 0.5, (255, 255, 255), 1)
-            
-            video.write(frame)
-        
-        video.release()
+        await asyncio.to_thread(
+            render_clip, str(video_path), width, height, fps, duration,
+            text=f"Prompt: {prompt}", frame_counter=True
+        )
         
         # Read the video file as bytes
         with open(video_path, "rb") as f:
@@ -97,12 +90,27 @@ async def generate_video(request: VideoRequest):
         
         return {"video_data": video_base64, "prompt": prompt}
 
+@app.get("/artifacts/{job_id}")
+async def get_artifact(job_id: str):
+    """
+    Stream a clip rendered in binary transfer mode; it is deleted once sent.
+    """
+    video_path = ARTIFACT_DIR / f"{Path(job_id).name}.mp4"
+    if not video_path.exists():
+        raise HTTPException(status_code=404, detail="Unknown artifact")
+    return FileResponse(
+        video_path,
+        media_type="application/octet-stream",
+        background=BackgroundTask(os.remove, video_path)
+    )
+
 @app.get("/")
 def read_root():
     return {
         "message": "Mock Mochi-1 Video Generation Service",
         "endpoints": {
-            "generate": "/generate - POST request with {prompt: string}"
+            "generate": "/generate - POST request with {prompt: string, transfer?: \"binary\"}",
+            "artifacts": "/artifacts/{job_id} - GET the MP4 of a binary-transfer job"
         }
     }
 
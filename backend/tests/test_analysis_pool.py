@@ -0,0 +1,133 @@
+import asyncio
+import io
+import os
+import time
+
+import pytest
+from starlette.datastructures import Headers, UploadFile
+
+from app.utils.audio.analysis_cache import AnalysisCache
+from app.utils.audio.analysis_jobs import AnalysisJobManager
+from app.utils.audio.analysis_pool import AnalysisPool, AnalysisPoolError
+
+# Jobs are module-level builtins so the spawned workers can unpickle them
+
+
+@pytest.mark.asyncio
+async def test_runs_in_worker_processes():
+    """Test that jobs run in other processes and results come back."""
+    pool = AnalysisPool(max_workers=2)
+    try:
+        pids = await asyncio.gather(*(pool.run(os.getpid) for _ in range(4)))
+        assert os.getpid() not in pids
+        assert await pool.run(pow, 2, 10) == 1024
+        assert pool.metrics()["completed"] == 5
+    finally:
+        pool.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_backlog_is_bounded():
+    """Test that work beyond the workers plus the backlog is rejected."""
+    pool = AnalysisPool(max_workers=1, max_backlog=1)
+    try:
+        results = await asyncio.gather(*(pool.run(time.sleep, 0.3) for _ in range(3)), return_exceptions=True)
+
+        rejected = [r for r in results if isinstance(r, AnalysisPoolError)]
+        assert len(rejected) == 1
+        assert rejected[0].status_code == 503
+        assert pool.metrics()["completed"] == 2
+        assert pool.has_capacity()
+    finally:
+        pool.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_timeout_kills_the_job_and_spares_the_others():
+    """Test that an overrunning job is stopped and a job sharing the pool is retried."""
+    pool = AnalysisPool(max_workers=2, timeout=30)
+    try:
+        start = time.perf_counter()
+        stuck, neighbour = await asyncio.gather(
+            pool.run(time.sleep, 30, timeout=1),
+            pool.run(time.sleep, 1.5),
+            return_exceptions=True
+        )
+
+        assert isinstance(stuck, AnalysisPoolError) and stuck.status_code == 504
+        assert neighbour is None
+        assert time.perf_counter() - start < 10
+        metrics = pool.metrics()
+        assert (metrics["timed_out"], metrics["restarts"], metrics["running"]) == (1, 1, 0)
+    finally:
+        pool.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_errors_and_crashes():
+    """Test that job exceptions propagate and a dead worker is replaced."""
+    pool = AnalysisPool(max_workers=1)
+    try:
+        with pytest.raises(ValueError):
+            await pool.run(int, "not a number")
+        with pytest.raises(AnalysisPoolError) as crashed:
+            await pool.run(os._exit, 1)
+        assert crashed.value.status_code == 500
+        assert await pool.run(pow, 3, 2) == 9
+    finally:
+        pool.shutdown()
+
+
+class FakePool:
+    """Runs jobs inline, recording them."""
+
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.calls = []
+
+    def has_capacity(self):
+        return True
+
+    async def run(self, func, *args, timeout=None, on_start=None):
+        self.calls.append(args)
+        on_start()
+        await asyncio.sleep(0.01)
+        if self.fail:
+            raise AnalysisPoolError("Audio analysis timed out after 1s", status_code=504)
+        return {"beat_timestamps": [0.5, 1.0], "total_beats": 2}
+
+
+def make_upload(data=b"RIFF" + bytes(1000)):
+    return UploadFile(io.BytesIO(data), filename="song.wav", headers=Headers({"content-type": "audio/wav"}))
+
+
+@pytest.mark.asyncio
+async def test_job_reports_progress_and_result():
+    """Test that a job can be watched to completion and repeat content completes at once."""
+    pool = FakePool()
+    jobs = AnalysisJobManager(pool=pool, cache=AnalysisCache(load=None, save=None))
+
+    job = await jobs.submit(make_upload())
+    statuses = [update.status async for update in jobs.watch(job.analysis_id)]
+
+    assert statuses == ["queued", "running", "completed"]
+    assert jobs.get(job.analysis_id).result["total_beats"] == 2
+    # The spooled audio is removed once analysed
+    assert not os.path.exists(os.path.dirname(pool.calls[0][0]))
+
+    again = await jobs.submit(make_upload())
+    assert (again.status, again.cached) == ("completed", True)
+    assert len(pool.calls) == 1
+
+
+@pytest.mark.asyncio
+async def test_failed_job_keeps_the_error():
+    """Test that a failing analysis ends the job with its error."""
+    jobs = AnalysisJobManager(pool=FakePool(fail=True), cache=AnalysisCache(load=None, save=None))
+
+    job = await jobs.submit(make_upload())
+    updates = [update async for update in jobs.watch(job.analysis_id)]
+
+    assert updates[-1].status == "failed"
+    assert "timed out" in updates[-1].error
+    assert jobs.get("unknown") is None
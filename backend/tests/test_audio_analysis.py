@@ -0,0 +1,78 @@
+import numpy as np
+import pytest
+import soundfile as sf
+
+from app.utils.audio import analysis, beat_detector
+from app.utils.audio.analysis import AudioAnalyzer, StreamingAudioAnalyzer, open_analyzer
+
+
+def click_track(bpm=120.0, duration=20.0, sr=44100):
+    """Stereo clicks every beat from 0.5s on, over light noise."""
+    y = 0.01 * np.random.default_rng(0).standard_normal(int(sr * duration))
+    click = np.sin(2 * np.pi * 1000 * np.arange(int(0.03 * sr)) / sr) * np.exp(-np.arange(int(0.03 * sr)) / sr * 100)
+    for beat in np.arange(0.5, duration - 0.1, 60.0 / bpm):
+        start = int(beat * sr)
+        y[start:start + len(click)] += click
+    return np.stack([y, y], axis=1).astype(np.float32), sr
+
+
+def test_analyze_beats_decodes_once(tmp_path, monkeypatch):
+    """Test that one decode yields beats, downbeats, tempo and regularity."""
+    path = tmp_path / "clicks.wav"
+    sf.write(path, *click_track())
+    loads = []
+    real_load = analysis.librosa.load
+    monkeypatch.setattr(analysis.librosa, "load", lambda *a, **k: loads.append(k) or real_load(*a, **k))
+
+    result = beat_detector.analyze_beats(str(path))
+
+    assert len(loads) == 1 and loads[0]["sr"] == analysis.DEFAULT_ANALYSIS_SR and loads[0]["mono"]
+    assert abs(result["tempo_bpm"] - 120) < 2
+    assert result["beat_regularity"] < 0.02
+    assert result["downbeat_timestamps"] == result["beat_timestamps"][::4]
+    assert result["total_beats"] == len(result["beat_timestamps"]) == len(result["beat_intervals"]) + 1
+    assert isinstance(result["beat_regularity"], float)
+    assert result["duration"] == pytest.approx(sf.info(path).duration, abs=1e-3)
+
+
+def test_beats_land_on_clicks():
+    """Test beat positions against the known click times."""
+    y, sr = click_track(bpm=100)
+    analyzer = AudioAnalyzer(y.mean(axis=1), sr)
+    truth = np.arange(0.5, 19.9, 0.6)
+
+    errors = np.abs(analyzer.beat_times[:, None] - truth[None, :]).min(axis=1)
+
+    assert len(analyzer.beat_times) >= len(truth) - 2
+    assert np.median(errors) < 0.03
+    assert analyzer.onset_envelope is analyzer.onset_envelope
+
+
+@pytest.mark.parametrize("sr", [None, 0])
+def test_streaming_matches_full_load(tmp_path, sr):
+    """Test that block-wise analysis reproduces the full-load envelope and beats."""
+    path = tmp_path / "clicks.wav"
+    sf.write(path, *click_track(bpm=128, duration=40))
+    full = AudioAnalyzer.load(str(path), sr=sr)
+    # Blocks that do not line up with the hop, so frames straddle every boundary
+    streamed = StreamingAudioAnalyzer.load(str(path), sr=sr, block_seconds=2.7)
+
+    assert streamed.sr == full.sr
+    assert streamed.duration == pytest.approx(full.duration, abs=1e-3)
+    assert streamed.y is None
+    np.testing.assert_allclose(streamed.onset_envelope, full.onset_envelope, atol=1e-4 * full.onset_envelope.max())
+    assert streamed.estimated_tempo == pytest.approx(full.estimated_tempo)
+    np.testing.assert_allclose(streamed.beat_times, full.beat_times, atol=1e-6)
+
+
+def test_long_files_are_streamed(tmp_path, monkeypatch):
+    """Test that open_analyzer streams files beyond the duration threshold."""
+    path = tmp_path / "clicks.wav"
+    sf.write(path, *click_track(duration=12))
+
+    assert type(open_analyzer(str(path))) is AudioAnalyzer
+    monkeypatch.setattr(analysis, "STREAMING_MIN_SECONDS", 10)
+    streamed = open_analyzer(str(path))
+    assert isinstance(streamed, StreamingAudioAnalyzer)
+    assert abs(streamed.summary()["tempo_bpm"] - 120) < 2
+
@@ -0,0 +1,121 @@
+import asyncio
+
+from app.utils.audio.analysis_cache import STORE_RETRY_SECONDS, AnalysisCache, analysis_params_key
+
+ANALYSIS = {"beat_timestamps": [0.5, 1.0, 1.5], "tempo_bpm": 120.0, "total_beats": 3}
+
+
+class Store:
+    """In-memory stand-in for the audio_analyses table."""
+
+    def __init__(self):
+        self.rows = {}
+        self.loads = 0
+
+    def load(self, content_hash, params_key):
+        self.loads += 1
+        return self.rows.get((content_hash, params_key))
+
+    def save(self, content_hash, params_key, analysis):
+        self.rows[(content_hash, params_key)] = analysis
+
+
+def counting_compute(calls):
+    async def compute():
+        calls.append(1)
+        return dict(ANALYSIS)
+    return compute
+
+
+def test_repeat_content_is_computed_once():
+    """Test that a second request for the same content is served from the cache."""
+    store = Store()
+    cache = AnalysisCache(load=store.load, save=store.save)
+    calls = []
+
+    first, first_cached = asyncio.run(cache.get_or_compute("abc", counting_compute(calls), "p"))
+    second, second_cached = asyncio.run(cache.get_or_compute("abc", counting_compute(calls), "p"))
+
+    assert first == second == ANALYSIS
+    assert (first_cached, second_cached) == (False, True)
+    assert len(calls) == 1
+    assert store.rows == {("abc", "p"): ANALYSIS}
+
+
+def test_params_change_is_a_miss():
+    """Test that the same content under other analysis parameters is recomputed."""
+    cache = AnalysisCache(load=None, save=None)
+    calls = []
+
+    asyncio.run(cache.get_or_compute("abc", counting_compute(calls), analysis_params_key(sr=22050)))
+    asyncio.run(cache.get_or_compute("abc", counting_compute(calls), analysis_params_key(sr=44100)))
+
+    assert analysis_params_key(sr=22050) != analysis_params_key(sr=44100)
+    assert analysis_params_key(sr=22050) == analysis_params_key(sr=22050)
+    assert len(calls) == 2
+
+
+def test_memory_lru_falls_back_to_store():
+    """Test that evicted entries are reloaded from the persistent store."""
+    store = Store()
+    cache = AnalysisCache(max_entries=2, load=store.load, save=store.save)
+    for content_hash in ("a", "b", "c"):
+        cache.put(content_hash, "p", {"hash": content_hash})
+
+    assert cache.get("c", "p") == {"hash": "c"}
+    assert store.loads == 0
+    assert cache.get("a", "p") == {"hash": "a"}
+    assert store.loads == 1
+    # Reloading "a" made it recent again
+    assert cache.get("a", "p") == {"hash": "a"}
+    assert store.loads == 1
+
+
+def test_store_errors_fall_back_to_memory():
+    """Test that an unavailable database does not break analysis."""
+    def broken(*args):
+        raise ConnectionError("database is down")
+
+    cache = AnalysisCache(load=broken, save=broken)
+    calls = []
+
+    asyncio.run(cache.get_or_compute("abc", counting_compute(calls), "p"))
+    analysis, cached = asyncio.run(cache.get_or_compute("abc", counting_compute(calls), "p"))
+
+    assert analysis == ANALYSIS
+    assert cached is True
+    assert len(calls) == 1
+
+
+def test_store_is_skipped_after_a_failure():
+    """Test that a down database is not retried on every request, and is used again after the back-off."""
+    now = [1000.0]
+    attempts = []
+    store = Store()
+    down = True
+
+    def load(content_hash, params_key):
+        attempts.append(content_hash)
+        if down:
+            raise ConnectionError("database is down")
+        return store.load(content_hash, params_key)
+
+    cache = AnalysisCache(load=load, save=store.save, clock=lambda: now[0])
+
+    assert cache.get("a", "p") is None
+    assert cache.get("b", "p") is None
+    assert attempts == ["a"]
+
+    # Retried once the back-off has passed; a second failure doubles it
+    now[0] += STORE_RETRY_SECONDS
+    assert cache.get("c", "p") is None
+    now[0] += STORE_RETRY_SECONDS
+    assert cache.get("d", "p") is None
+    assert attempts == ["a", "c"]
+
+    down = False
+    store.rows[("e", "p")] = ANALYSIS
+    now[0] += STORE_RETRY_SECONDS
+    assert cache.get("e", "p") == ANALYSIS
+    assert cache.get("f", "p") is None
+    assert attempts == ["a", "c", "e", "f"]
@@ -0,0 +1,85 @@
+import asyncio
+import base64
+import hashlib
+import io
+
+import httpx
+import pytest
+from starlette.datastructures import Headers, UploadFile
+
+from app.utils.audio import ingest
+from app.utils.audio.ingest import AudioIngestError, ingest_base64, ingest_upload, ingest_url, spooled_upload
+
+AUDIO = bytes(range(256)) * 9000  # a little over two ingest chunks
+
+
+def make_upload(data, filename="song.WAV", size=None):
+    return UploadFile(io.BytesIO(data), size=size, filename=filename, headers=Headers({"content-type": "audio/wav"}))
+
+
+def test_upload_is_spooled_with_hash(tmp_path):
+    """Test that an upload lands on disk with its content hash and size."""
+    audio = asyncio.run(ingest_upload(make_upload(AUDIO), tmp_path))
+
+    assert audio.path.read_bytes() == AUDIO
+    assert audio.sha256 == hashlib.sha256(AUDIO).hexdigest()
+    assert audio.size == len(AUDIO)
+    assert audio.path.name == f"{audio.sha256[:16]}.wav"
+    assert [p.name for p in tmp_path.iterdir()] == [audio.path.name]
+
+
+def test_size_limit_is_enforced(tmp_path):
+    """Test the declared-size check and the running-total check."""
+    with pytest.raises(AudioIngestError) as declared:
+        asyncio.run(ingest_upload(make_upload(AUDIO, size=len(AUDIO)), tmp_path, max_bytes=1000))
+    with pytest.raises(AudioIngestError) as streamed:
+        asyncio.run(ingest_upload(make_upload(AUDIO), tmp_path, max_bytes=ingest.CHUNK_SIZE + 1))
+
+    assert declared.value.status_code == streamed.value.status_code == 413
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_base64_is_decoded_in_chunks(tmp_path):
+    """Test wrapped and data-URL base64 payloads and invalid input."""
+    encoded = base64.encodebytes(AUDIO).decode()
+    audio = asyncio.run(ingest_base64(encoded, tmp_path, filename="audio.mp3"))
+    data_url = asyncio.run(ingest_base64("data:audio/wav;base64," + base64.b64encode(AUDIO[:999]).decode(), tmp_path))
+
+    assert audio.path == tmp_path / "audio.mp3"
+    assert audio.path.read_bytes() == AUDIO
+    assert data_url.path.read_bytes() == AUDIO[:999]
+    assert data_url.content_type == "audio/wav"
+    with pytest.raises(AudioIngestError):
+        asyncio.run(ingest_base64("not base64!", tmp_path))
+
+
+def test_url_download_streams_and_checks_length(tmp_path):
+    """Test URL ingest, including rejection by Content-Length before reading."""
+    def handler(request):
+        if request.url.path == "/big.flac":
+            return httpx.Response(200, content=AUDIO, headers={"content-type": "audio/flac"})
+        return httpx.Response(404)
+
+    async def main():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            audio = await ingest_url("http://cdn/big.flac", tmp_path, client=client)
+            with pytest.raises(AudioIngestError) as too_big:
+                await ingest_url("http://cdn/big.flac", tmp_path, max_bytes=10, client=client)
+            with pytest.raises(AudioIngestError) as missing:
+                await ingest_url("http://cdn/missing.flac", tmp_path, client=client)
+            return audio, too_big.value, missing.value
+
+    audio, too_big, missing = asyncio.run(main())
+
+    assert audio.path.suffix == ".flac" and audio.path.read_bytes() == AUDIO
+    assert (too_big.status_code, missing.status_code) == (413, 502)
+
+
+def test_spooled_upload_removes_file_afterwards():
+    """Test the per-request temporary spool used by the audio routes."""
+    async def main():
+        async with spooled_upload(make_upload(AUDIO)) as audio:
+            assert audio.path.read_bytes() == AUDIO
+        return audio.path
+
+    assert not asyncio.run(main()).exists()
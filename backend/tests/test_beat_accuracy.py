@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+
+from app.utils.audio import analysis
+from app.utils.audio.beat_detector import analyze_beats, get_downbeats
+from app.utils.audio.evaluation import beat_scores, match_beats
+from app.utils.audio.synthetic import CORPUS, TrackSpec, beat_times, synthesize, write_track
+
+# Floors for the synthetic corpus; every track currently scores at least 0.96
+MIN_F_MEASURE = 0.95
+# librosa reports onsets about one 23 ms analysis frame late
+MAX_MEAN_ERROR_MS = 40.0
+
+
+def test_ground_truth_follows_the_spec():
+    """Test beat spacing for a constant tempo, a ramp and swung off-beats."""
+    steady = beat_times(TrackSpec(name="steady", bpm=120, duration=10))
+    ramp = beat_times(TrackSpec(name="ramp", bpm=100, end_bpm=140, duration=60))
+    y, sr, truth = synthesize(TrackSpec(name="swing", bpm=90, swing=2 / 3, duration=5))
+
+    np.testing.assert_allclose(np.diff(steady), 0.5)
+    assert steady[0] == 0.5 and steady[-1] < 10
+    assert np.all(np.diff(ramp, 2) < 0)
+    assert 60 / np.diff(ramp)[0] == pytest.approx(100, abs=1)
+    assert 60 / np.diff(ramp)[-1] == pytest.approx(140, abs=2)
+    assert truth.downbeats == truth.beats[::4]
+    np.testing.assert_allclose(np.array(truth.offbeats) - truth.beats[:-1], 2 / 3 * 60 / 90)
+    assert y.shape == (5 * sr, 2) and np.abs(y).max() <= 0.9
+
+
+def test_beat_scores():
+    """Test matching, F-measure and timing error on hand-made sequences."""
+    reference = np.arange(0.5, 10, 0.5)
+
+    assert beat_scores(reference, reference)["f_measure"] == 1.0
+    assert beat_scores(reference + 0.1, reference)["f_measure"] == 0.0
+    assert beat_scores([], reference)["f_measure"] == 0.0
+
+    half = beat_scores(reference[::2] + 0.02, reference)
+    assert half["precision"] == 1.0 and half["recall"] == pytest.approx(0.5, abs=0.03)
+    assert half["mean_error_ms"] == pytest.approx(20) and half["mean_offset_ms"] == pytest.approx(20)
+    # Each reference beat is matched once, even with two estimates nearby
+    est, ref = match_beats([0.49, 0.51], [0.5])
+    assert len(est) == len(ref) == 1
+
+
+@pytest.mark.parametrize("streaming", [False, True], ids=["full", "streaming"])
+@pytest.mark.parametrize("spec", CORPUS, ids=[spec.name for spec in CORPUS])
+def test_corpus_accuracy(tmp_path, monkeypatch, spec, streaming):
+    """Regression floor for beat accuracy on every synthetic track, on both analysis paths."""
+    if streaming:
+        monkeypatch.setattr(analysis, "STREAMING_MIN_SECONDS", 0)
+    path, truth = write_track(spec, tmp_path)
+
+    result = analyze_beats(str(path))
+    scores = beat_scores(result["beat_timestamps"], truth.beats)
+
+    assert scores["f_measure"] >= MIN_F_MEASURE
+    assert scores["mean_error_ms"] <= MAX_MEAN_ERROR_MS
+    assert get_downbeats(str(path)) == result["downbeat_timestamps"]
@@ -0,0 +1,41 @@
+import pytest
+
+from app.utils.media.hls import build_playlist, parse_ffmpeg_duration
+
+
+def test_parse_ffmpeg_duration():
+    """Test parsing the input duration from ffmpeg stderr."""
+    stderr = "Input #0, mov,mp4 from 'segment_1.mp4':\n  Duration: 00:01:03.50, start: 0.000000, bitrate: 512 kb/s"
+    assert parse_ffmpeg_duration(stderr) == pytest.approx(63.5)
+    assert parse_ffmpeg_duration("no duration here") is None
+    assert parse_ffmpeg_duration("") is None
+
+
+def test_build_playlist_in_progress():
+    """Test that an unfinished playlist has no end tag and separates segments."""
+    playlist = build_playlist([("hls/segment_000.ts", 3.0), ("hls/segment_001.ts", 2.5)], 3)
+    lines = playlist.splitlines()
+
+    assert lines[0] == "#EXTM3U"
+    assert "#EXT-X-PLAYLIST-TYPE:EVENT" in lines
+    assert "#EXT-X-TARGETDURATION:3" in lines
+    assert "#EXT-X-ENDLIST" not in lines
+    assert lines.count("#EXT-X-DISCONTINUITY") == 1
+    assert lines[-2:] == ["#EXTINF:2.500,", "hls/segment_001.ts"]
+
+
+def test_build_playlist_ended():
+    """Test that a finished playlist is closed and the target duration covers every segment."""
+    playlist = build_playlist([("hls/segment_000.ts", 4.2)], 3, ended=True)
+    lines = playlist.splitlines()
+
+    assert lines[-1] == "#EXT-X-ENDLIST"
+    assert "#EXT-X-TARGETDURATION:5" in lines
+    assert "#EXT-X-DISCONTINUITY" not in lines
+
+
+def test_build_playlist_empty():
+    """Test that an empty playlist is still a valid header."""
+    playlist = build_playlist([], 3)
+    assert playlist.startswith("#EXTM3U\n")
+    assert "#EXTINF" not in playlist
@@ -0,0 +1,98 @@
+import asyncio
+import base64
+import json
+
+import httpx
+import pytest
+
+from app.utils.http_pool import ArtifactError, get_http_client, request_artifact
+
+VIDEO = bytes(range(256)) * 4000
+
+
+def make_client(handler):
+    return httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+
+def test_binary_reply_is_streamed_to_disk(tmp_path):
+    """Test a service that answers the generation request with the file itself."""
+    def handler(request):
+        assert json.loads(request.content) == {"prompt": "p", "transfer": "binary"}
+        return httpx.Response(200, content=VIDEO, headers={"content-type": "application/octet-stream"})
+
+    async def main():
+        async with make_client(handler) as client:
+            return await request_artifact("http://svc/generate", {"prompt": "p"}, tmp_path / "clip.mp4", client)
+
+    meta, path = asyncio.run(main())
+
+    assert meta == {}
+    assert path.read_bytes() == VIDEO
+    assert not (tmp_path / "clip.mp4.part").exists()
+
+
+def test_job_handle_is_resolved_and_downloaded(tmp_path):
+    """Test a job handle whose artifact_url is fetched relative to the service."""
+    def handler(request):
+        if request.url.path == "/generate":
+            return httpx.Response(200, json={"job_id": "j1", "artifact_url": "/artifacts/j1", "size": len(VIDEO)})
+        assert request.url.path == "/artifacts/j1"
+        return httpx.Response(200, content=VIDEO, headers={"content-type": "application/octet-stream"})
+
+    async def main():
+        async with make_client(handler) as client:
+            return await request_artifact("http://svc/generate", {"prompt": "p"}, tmp_path / "out" / "clip.mp4", client)
+
+    meta, path = asyncio.run(main())
+
+    assert meta["job_id"] == "j1"
+    assert path.read_bytes() == VIDEO
+
+
+def test_truncated_artifact_is_rejected(tmp_path):
+    """Test that a short download leaves no file behind."""
+    def handler(request):
+        if request.url.path == "/generate":
+            return httpx.Response(200, json={"artifact_url": "/artifacts/j1", "size": len(VIDEO) + 1})
+        return httpx.Response(200, content=VIDEO, headers={"content-type": "application/octet-stream"})
+
+    async def main():
+        async with make_client(handler) as client:
+            await request_artifact("http://svc/generate", {"prompt": "p"}, tmp_path / "clip.mp4", client)
+
+    with pytest.raises(ArtifactError):
+        asyncio.run(main())
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_base64_fallback_and_errors(tmp_path):
+    """Test the compatibility path for services that only speak base64 JSON."""
+    def handler(request):
+        if request.url.path == "/broken":
+            return httpx.Response(503, text="busy")
+        return httpx.Response(200, json={"video_base64": base64.b64encode(VIDEO).decode(), "seed": 7})
+
+    async def main():
+        async with make_client(handler) as client:
+            result = await request_artifact("http://svc/generate", {}, tmp_path / "clip.mp4", client)
+            with pytest.raises(ArtifactError) as error:
+                await request_artifact("http://svc/broken", {}, tmp_path / "other.mp4", client)
+            return result, error.value
+
+    (meta, path), error = asyncio.run(main())
+
+    assert meta == {"seed": 7}
+    assert path.read_bytes() == VIDEO
+    assert (error.status_code, error.body) == (503, "busy")
+
+
+def test_pooled_client_is_shared_per_loop():
+    """Test that callers on one loop share a client and other loops get their own."""
+    async def pair():
+        return get_http_client(), get_http_client()
+
+    first, again = asyncio.run(pair())
+    other, _ = asyncio.run(pair())
+
+    assert first is again
+    assert other is not first
@@ -0,0 +1,48 @@
+import time
+from pathlib import Path
+
+from app.services.lyrics_job_store import LyricsJobStore
+
+
+def make_job(job_id, status="processing", **fields):
+    return {"id": job_id, "status": status, "lyrics": "la la", "clips": [], "prompts": [], **fields}
+
+
+def test_jobs_persist_across_instances(tmp_path):
+    """Test that a restarted process sees jobs and their progress."""
+    path = tmp_path / "jobs.sqlite3"
+    store = LyricsJobStore(path)
+    store.save(make_job("a", output_path=Path("/out/a.mp4")))
+    store.save(make_job("a", clips=["clip_000.mp4"]))
+    store.save(make_job("b", status="completed"))
+    store.close()
+
+    reopened = LyricsJobStore(path)
+
+    assert reopened.get("a")["clips"] == ["clip_000.mp4"]
+    assert reopened.get("missing") is None
+    assert [job["id"] for job in reopened.unfinished()] == ["a"]
+
+
+def test_terminal_jobs_are_evicted_oldest_first(tmp_path):
+    """Test the limit on finished jobs; running jobs are never evicted."""
+    store = LyricsJobStore(tmp_path / "jobs.sqlite3", max_terminal_jobs=2)
+    store.save(make_job("running"))
+    for job_id in ("old", "mid", "new"):
+        store.save(make_job(job_id, status="completed"))
+        time.sleep(0.01)
+
+    assert store.get("old") is None
+    assert store.get("mid") and store.get("new") and store.get("running")
+
+
+def test_expired_terminal_jobs_are_evicted(tmp_path):
+    """Test the retention period for finished and failed jobs."""
+    store = LyricsJobStore(tmp_path / "jobs.sqlite3", retention_seconds=0.05)
+    store.save(make_job("failed", status="failed"))
+    store.save(make_job("running"))
+    time.sleep(0.06)
+
+    assert store.prune() == 1
+    assert store.get("failed") is None
+    assert store.get("running") is not None
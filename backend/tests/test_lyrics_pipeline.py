@@ -0,0 +1,125 @@
+import asyncio
+
+import pytest
+
+import app.services.lyrics_service as lyrics_module
+from app.services.lyrics_job_store import LyricsJobStore
+from app.services.lyrics_service import LyricsService
+
+LYRICS = "First line\nSecond line\nfirst line!\nThird line"
+
+
+@pytest.fixture
+def service(tmp_path):
+    service = LyricsService()
+    service.output_dir = tmp_path
+    service.job_store = LyricsJobStore(tmp_path / "jobs.sqlite3")
+    return service
+
+
+@pytest.mark.asyncio
+async def test_clips_render_while_prompts_stream(service):
+    """Test that a clip starts before the last prompt arrives and repeated lines render once."""
+    events = []
+    first_clip_started = asyncio.Event()
+    stitched = []
+
+    async def stream_prompts(lyrics, language="english", style=None):
+        lines = service._split_lyrics(lyrics)
+        events.append("prompt 0")
+        yield {"index": 0, "line": lines[0], "prompt": "prompt for line 0"}
+        # The rest of the song only arrives once a clip is already rendering
+        await asyncio.wait_for(first_clip_started.wait(), 5)
+        for i in range(1, len(lines)):
+            events.append(f"prompt {i}")
+            yield {"index": i, "line": lines[i], "prompt": f"prompt for line {i}"}
+
+    async def generate_clip(prompt, output_path, num_frames=None):
+        events.append(f"clip {prompt}")
+        first_clip_started.set()
+        output_path.write_bytes(b"clip")
+        return output_path
+
+    async def stitch_clips(clip_paths, output_path, audio_path=None, frame_counts=None):
+        stitched.extend(path.name for path in clip_paths)
+        output_path.write_bytes(b"video")
+        return output_path
+
+    service.stream_prompts_from_lyrics = stream_prompts
+    service._generate_clip = generate_clip
+    service._stitch_clips = stitch_clips
+
+    result = await service.generate_video_from_lyrics(LYRICS, "english")
+    await service._job_tasks[result["video_id"]]
+
+    job = service.job_store.get(result["video_id"])
+    assert job["status"] == "completed", job.get("error")
+    assert events.index("clip prompt for line 0") < events.index("prompt 1")
+
+    # "first line!" repeats line 0: its prompt is ignored and its clip reused
+    clips = [event for event in events if event.startswith("clip")]
+    assert sorted(clips) == ["clip prompt for line 0", "clip prompt for line 1", "clip prompt for line 3"]
+    assert stitched == ["clip_000.mp4", "clip_001.mp4", "clip_000.mp4", "clip_003.mp4"]
+    assert job["prompts"] == ["prompt for line 0", "prompt for line 1", "prompt for line 0", "prompt for line 3"]
+
+
+class AnalysisCacheStub:
+    """Serves a fixed beat analysis instead of analysing the audio."""
+
+    def __init__(self, analysis):
+        self.analysis = analysis
+
+    async def get_or_compute(self, content_hash, compute, params_key=None):
+        return self.analysis, True
+
+
+@pytest.mark.asyncio
+async def test_long_lines_are_rendered_in_parts(service, tmp_path, monkeypatch):
+    """Test that no clip request exceeds max_clip_frames and the parts still cover the song."""
+    beats = [0.5 * k for k in range(1, 120)]
+    monkeypatch.setattr(
+        lyrics_module,
+        "analysis_cache",
+        AnalysisCacheStub({"duration": 60.0, "beat_timestamps": beats, "downbeat_timestamps": beats[::4]})
+    )
+    audio = tmp_path / "song.mp3"
+    audio.write_bytes(b"audio")
+    requested = []
+    stitched = {}
+
+    async def stream_prompts(lyrics, language="english", style=None):
+        for i, line in enumerate(service._split_lyrics(lyrics)):
+            yield {"index": i, "line": line, "prompt": f"prompt for line {i}"}
+
+    async def process_audio(audio_file, job_dir):
+        return audio
+
+    async def generate_clip(prompt, output_path, num_frames=None):
+        requested.append((output_path.name, num_frames))
+        output_path.write_bytes(b"clip")
+        return output_path
+
+    async def stitch_clips(clip_paths, output_path, audio_path=None, frame_counts=None):
+        stitched.update(clips=[path.name for path in clip_paths], frame_counts=frame_counts)
+        output_path.write_bytes(b"video")
+        return output_path
+
+    service.stream_prompts_from_lyrics = stream_prompts
+    service._process_audio = process_audio
+    service._generate_clip = generate_clip
+    service._stitch_clips = stitch_clips
+
+    # Three 20 second lines at 24 fps, the first one repeated
+    result = await service.generate_video_from_lyrics("Chorus\nVerse\nChorus", "english", audio_file="song.mp3")
+    await service._job_tasks[result["video_id"]]
+
+    job = service.job_store.get(result["video_id"])
+    assert job["status"] == "completed", job.get("error")
+    assert max(frames for _, frames in requested) <= service.max_clip_frames
+    assert sum(stitched["frame_counts"]) == 60 * 24
+    assert len(stitched["clips"]) == len(stitched["frame_counts"]) > len(requested)
+    # Each part is rendered once; the repeated line reuses the first one's parts
+    names = [name for name, _ in requested]
+    assert len(set(names)) == len(names) == len(job["clips"])
+    assert set(stitched["clips"]) == set(names)
+    assert not any(name.startswith("clip_002") for name in names)
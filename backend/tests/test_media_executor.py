@@ -0,0 +1,102 @@
+import asyncio
+import sys
+import time
+
+import pytest
+
+from app.utils.media.executor import MediaExecutor, MediaProcessError
+
+
+def python_cmd(code):
+    return [sys.executable, "-c", code]
+
+
+@pytest.mark.asyncio
+async def test_concurrency_is_bounded():
+    """Test that no more than max_processes subprocesses run at once."""
+    executor = MediaExecutor(max_processes=2)
+    peak = 0
+
+    async def sample():
+        nonlocal peak
+        while True:
+            peak = max(peak, executor.metrics()["running"])
+            await asyncio.sleep(0.01)
+
+    sampler = asyncio.create_task(sample())
+    start = time.perf_counter()
+    await asyncio.gather(*(executor.run(python_cmd("import time; time.sleep(0.3)")) for _ in range(4)))
+    elapsed = time.perf_counter() - start
+    sampler.cancel()
+
+    assert peak == 2
+    assert elapsed >= 0.6
+    metrics = executor.metrics()
+    assert metrics["completed"] == 4
+    assert metrics["running"] == 0
+
+
+@pytest.mark.asyncio
+async def test_failure_reports_stderr_tail():
+    """Test that a failing command raises with the end of its stderr."""
+    executor = MediaExecutor(max_processes=1)
+    cmd = python_cmd("import sys; sys.stderr.write('x' * 100000 + 'the end'); sys.exit(3)")
+
+    with pytest.raises(MediaProcessError) as excinfo:
+        await executor.run(cmd)
+    assert excinfo.value.returncode == 3
+    assert excinfo.value.stderr_tail.endswith("the end")
+    assert len(excinfo.value.stderr_tail) <= 8192
+
+    result = await executor.run(cmd, check=False)
+    assert result.returncode == 3
+    assert executor.metrics()["failed"] == 2
+
+
+@pytest.mark.asyncio
+async def test_stdout_capture():
+    """Test that stdout is returned when requested."""
+    executor = MediaExecutor(max_processes=1)
+    result = await executor.run(python_cmd("print('{\"ok\": true}')"), capture_stdout=True)
+    assert result.stdout.strip() == b'{"ok": true}'
+
+
+@pytest.mark.asyncio
+async def test_cancellation_kills_process_and_frees_slot():
+    """Test that cancelling the caller terminates the child and releases its slot."""
+    executor = MediaExecutor(max_processes=1)
+    task = asyncio.create_task(executor.run(python_cmd("import time; time.sleep(30)")))
+    await asyncio.sleep(0.2)
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+
+    assert executor.metrics()["cancelled"] == 1
+    result = await asyncio.wait_for(executor.run(python_cmd("pass")), 5)
+    assert result.returncode == 0
+
+
+@pytest.mark.asyncio
+async def test_timeout_kills_process():
+    """Test that a hung command is killed after its timeout."""
+    executor = MediaExecutor(max_processes=1)
+    with pytest.raises(MediaProcessError):
+        await executor.run(python_cmd("import time; time.sleep(30)"), timeout=0.2)
+    assert executor.metrics()["timed_out"] == 1
+
+
+@pytest.mark.asyncio
+async def test_priority_orders_waiters():
+    """Test that a freed slot goes to the lowest priority value first."""
+    executor = MediaExecutor(max_processes=1)
+    order = []
+
+    async def job(name, priority):
+        await executor.run(python_cmd("pass"), priority=priority)
+        order.append(name)
+
+    blocker = asyncio.create_task(executor.run(python_cmd("import time; time.sleep(0.2)")))
+    await asyncio.sleep(0.05)
+    await asyncio.gather(job("background", 10), job("probe", -10), job("default", 0), blocker)
+
+    assert order == ["probe", "default", "background"]
@@ -0,0 +1,110 @@
+import json
+import os
+import stat
+import sys
+
+import pytest
+
+from app.utils.media.probe import MediaProbe, concat_compatible, parse_ffprobe_output
+
+FFPROBE_OUTPUT = {
+    "streams": [
+        {
+            "index": 0, "codec_type": "video", "codec_name": "h264", "pix_fmt": "yuv420p",
+            "width": 1280, "height": 720, "r_frame_rate": "30/1", "time_base": "1/15360"
+        },
+        {
+            "index": 1, "codec_type": "audio", "codec_name": "aac", "sample_rate": "44100",
+            "channels": 2, "channel_layout": "stereo"
+        }
+    ],
+    "format": {"format_name": "mov,mp4,m4a,3gp,3g2,mj2", "duration": "3.000000"},
+    "packets": (
+        [{"stream_index": 0, "flags": "K__"}]
+        + [{"stream_index": 0, "flags": "___"}] * 29
+        + [{"stream_index": 1, "flags": "K__"}] * 5
+        + [{"stream_index": 0, "flags": "K__"}]
+        + [{"stream_index": 0, "flags": "___"}] * 9
+        + [{"stream_index": 0, "flags": "K__"}]
+    )
+}
+
+
+def test_parse_ffprobe_output():
+    """Test that codec, timing, GOP and audio layout are extracted."""
+    info = parse_ffprobe_output("clip.mp4", FFPROBE_OUTPUT, size=1234)
+
+    assert info.video_codec == "h264"
+    assert info.pix_fmt == "yuv420p"
+    assert (info.width, info.height) == (1280, 720)
+    assert info.fps == 30.0
+    assert info.time_base == "1/15360"
+    assert info.gop == 30
+    assert info.duration == pytest.approx(3.0)
+    assert info.audio_codec == "aac"
+    assert (info.sample_rate, info.channels, info.channel_layout) == (44100, 2, "stereo")
+
+
+def test_parse_ffprobe_output_video_only():
+    """Test a file without audio and without enough packets for a GOP estimate."""
+    data = {"streams": [FFPROBE_OUTPUT["streams"][0]], "format": {}}
+    info = parse_ffprobe_output("clip.mp4", data)
+
+    assert not info.has_audio
+    assert info.gop is None
+    assert info.duration is None
+
+
+def test_concat_compatible():
+    """Test that any differing stream property rules out stream copy."""
+    first = parse_ffprobe_output("a.mp4", FFPROBE_OUTPUT)
+    second = parse_ffprobe_output("b.mp4", FFPROBE_OUTPUT)
+    assert concat_compatible([first, second])
+
+    second.frame_rate = "24/1"
+    assert not concat_compatible([first, second])
+    assert not concat_compatible([])
+
+
+@pytest.fixture
+def fake_ffprobe(tmp_path):
+    """An ffprobe stand-in that prints fixed JSON and counts its invocations."""
+    counter = tmp_path / "calls.txt"
+    output = tmp_path / "output.json"
+    output.write_text(json.dumps(FFPROBE_OUTPUT))
+    script = tmp_path / "ffprobe"
+    script.write_text(
+        f"#!{sys.executable}\n"
+        "import sys\n"
+        f"open({str(counter)!r}, 'a').write('x')\n"
+        f"sys.stdout.write(open({str(output)!r}).read())\n"
+    )
+    script.chmod(script.stat().st_mode | stat.S_IEXEC)
+
+    def calls():
+        return len(counter.read_text()) if counter.exists() else 0
+
+    return str(script), calls
+
+
+@pytest.mark.asyncio
+async def test_probe_cache_is_keyed_on_file_state(tmp_path, fake_ffprobe):
+    """Test that unchanged files are served from cache and modified files are probed again."""
+    ffprobe_path, calls = fake_ffprobe
+    clips = [tmp_path / f"clip_{i}.mp4" for i in range(3)]
+    for clip in clips:
+        clip.write_bytes(b"data")
+
+    probe = MediaProbe(ffprobe_path=ffprobe_path, max_concurrency=2)
+    infos = await probe.probe_many(clips)
+    assert [info.path for info in infos] == [str(clip) for clip in clips]
+    assert calls() == 3
+
+    await probe.probe_many(clips)
+    probe.probe_many_sync(clips)
+    assert calls() == 3
+
+    clips[0].write_bytes(b"longer data")
+    os.utime(clips[0], ns=(0, 0))
+    probe.probe_sync(clips[0])
+    assert calls() == 4
@@ -0,0 +1,98 @@
+from app.utils.media.probe import MediaInfo
+from app.utils.media.stitch import choose_target_profile, concat_command, conform_command, needs_transcode
+
+
+def make_info(path, width=1280, height=720, frame_rate="30/1", codec="h264", duration=3.0, audio=True):
+    return MediaInfo(
+        path=path,
+        duration=duration,
+        video_codec=codec,
+        pix_fmt="yuv420p",
+        width=width,
+        height=height,
+        frame_rate=frame_rate,
+        time_base="1/15360",
+        audio_codec="aac" if audio else None,
+        sample_rate=44100 if audio else None,
+        channels=2 if audio else None,
+        channel_layout="stereo" if audio else None
+    )
+
+
+def test_target_profile_follows_majority_runtime():
+    """Test that the profile covering the most seconds wins, not the first segment."""
+    infos = [
+        make_info("odd.mp4", width=640, height=480, duration=3.0),
+        make_info("a.mp4"),
+        make_info("b.mp4"),
+    ]
+    target = choose_target_profile(infos)
+
+    assert (target.width, target.height) == (1280, 720)
+    assert [info.path for info in infos if needs_transcode(info, target)] == ["odd.mp4"]
+
+
+def test_target_profile_weights_by_duration():
+    """Test that one long segment outweighs several short ones."""
+    infos = [
+        make_info("long.mp4", frame_rate="24/1", duration=30.0),
+        make_info("a.mp4", duration=3.0),
+        make_info("b.mp4", duration=3.0),
+    ]
+    assert choose_target_profile(infos).frame_rate == "24/1"
+
+
+def test_target_profile_falls_back_to_h264():
+    """Test that a codec without a known encoder is replaced by h264."""
+    target = choose_target_profile([make_info("a.mp4", codec="vp9")])
+
+    assert target.video_codec == "h264"
+    assert target.time_base is None
+    assert not needs_transcode(make_info("b.mp4"), target)
+
+
+def test_conform_command_adds_silence_for_missing_audio():
+    """Test that a silent segment gets a silent track matching the target layout."""
+    target = choose_target_profile([make_info("a.mp4"), make_info("b.mp4")])
+    cmd = conform_command("ffmpeg", make_info("silent.mp4", audio=False), target, "out.mp4")
+
+    assert "anullsrc=channel_layout=stereo:sample_rate=44100" in cmd
+    assert cmd[cmd.index("-map", cmd.index("0:v:0")) + 1] == "1:a:0"
+    assert "-shortest" in cmd
+    assert cmd[cmd.index("-video_track_timescale") + 1] == "15360"
+    assert cmd[-1] == "out.mp4"
+
+
+def test_external_audio_ignores_segment_audio():
+    """Test that segment audio differences do not force a transcode when the soundtrack is replaced."""
+    target = choose_target_profile([make_info("a.mp4"), make_info("b.mp4")])
+    silent = make_info("silent.mp4", audio=False)
+
+    assert needs_transcode(silent, target)
+    assert not needs_transcode(silent, target, compare_audio=False)
+
+
+def test_concat_command_muxes_audio_in_one_pass():
+    """Test that the soundtrack is mapped into the concat invocation itself."""
+    cmd = concat_command("ffmpeg", "list.txt", "out.mp4", audio_path="song.mp3", copy_audio=True)
+
+    assert cmd.count("-i") == 2
+    assert cmd[cmd.index("-c:v") + 1] == "copy"
+    assert cmd[cmd.index("-c:a") + 1] == "copy"
+    assert "-shortest" in cmd
+    assert cmd[-1] == "out.mp4"
+
+    plain = concat_command("ffmpeg", "list.txt", "out.mp4")
+    assert plain.count("-i") == 1
+    assert "-shortest" not in plain
+
+
+def test_conform_command_cuts_to_frame_budget():
+    """Test that a frame budget cuts the video and, with a target audio track, the audio too."""
+    target = choose_target_profile([make_info("a.mp4")])
+    cmd = conform_command("ffmpeg", make_info("long.mp4"), target, "out.mp4", max_frames=45)
+
+    assert cmd[cmd.index("-frames:v") + 1] == "45"
+    assert float(cmd[cmd.index("-t") + 1]) == 1.5
+    assert cmd[-1] == "out.mp4"
+    assert "-frames:v" not in conform_command("ffmpeg", make_info("long.mp4"), target, "out.mp4")
@@ -0,0 +1,56 @@
+import json
+
+from app.services.prompt_batching import (
+    build_batch_messages,
+    chunk_by_token_budget,
+    line_cost,
+    parse_batch_response
+)
+
+
+def test_chunks_respect_token_budget_and_order():
+    """Test that lines are grouped in song order without exceeding the budget."""
+    lines = [(i, f"lyric line number {i}") for i in range(10)]
+    budget = line_cost(lines[0][1]) * 3
+
+    chunks = chunk_by_token_budget(lines, budget)
+
+    assert [len(chunk) for chunk in chunks] == [3, 3, 3, 1]
+    assert [item for chunk in chunks for item in chunk] == lines
+    assert chunk_by_token_budget(lines, budget=1)[0] == [lines[0]]
+    assert len(chunk_by_token_budget(lines, budget=10**6, max_lines=4)) == 3
+
+
+def test_batch_messages_carry_indices():
+    """Test that the user message lists every line with its index."""
+    messages = build_batch_messages("You are a director.", [(4, "line a"), (5, "line b")])
+
+    assert messages[0]["content"].startswith("You are a director.")
+    assert json.loads(messages[1]["content"]) == [{"index": 4, "line": "line a"}, {"index": 5, "line": "line b"}]
+
+
+def test_parse_well_formed_response():
+    """Test the shape the model is asked for."""
+    text = json.dumps({"prompts": [{"index": 0, "prompt": " A "}, {"index": 1, "prompt": "B"}]})
+
+    assert parse_batch_response(text, [0, 1]) == {0: "A", 1: "B"}
+
+
+def test_parse_repairs_common_shapes():
+    """Test fenced, prose-wrapped, trailing-comma, mapping and positional replies."""
+    fenced = 'Sure!\n```json\n[{"line_index": "2", "scene": "C"}, {"index": 3, "text": "D"},]\n```'
+    assert parse_batch_response(fenced, [2, 3]) == {2: "C", 3: "D"}
+
+    prose = 'Here you go: {"results": {"2": "C", "3": {"prompt": "D"}}} Enjoy.'
+    assert parse_batch_response(prose, [2, 3]) == {2: "C", 3: "D"}
+
+    assert parse_batch_response('["C", "D"]', [2, 3]) == {2: "C", 3: "D"}
+    assert parse_batch_response('["C"]', [2, 3]) == {}
+
+
+def test_parse_drops_unknown_and_empty_entries():
+    """Test that only requested lines with real prompts are returned, leaving the rest for per-line calls."""
+    text = json.dumps([{"index": 0, "prompt": "A"}, {"index": 9, "prompt": "X"}, {"index": 1, "prompt": "  "}])
+
+    assert parse_batch_response(text, [0, 1]) == {0: "A"}
+    assert parse_batch_response("not json at all", [0, 1]) == {}
@@ -0,0 +1,62 @@
+import time
+
+from app.services.prompt_cache import PromptCache, normalize_line
+
+
+def test_normalize_line():
+    """Test that case, spacing and surrounding punctuation are ignored."""
+    assert normalize_line("  Jab tak  hai JAAN! ") == "jab tak hai jaan"
+    assert normalize_line("Chorus here...") == normalize_line("chorus here")
+    assert normalize_line("don't stop") != normalize_line("dont stop")
+
+
+def test_lookup_is_keyed_by_language_style_and_model(tmp_path):
+    """Test that a prompt is only reused for the same language, style and model."""
+    cache = PromptCache(tmp_path / "prompts.sqlite3")
+    cache.store({"Hello world": "A sunrise"}, "english", "cinematic", "model-a")
+
+    assert cache.lookup(["hello world!"], "english", "cinematic", "model-a") == {"hello world!": "A sunrise"}
+    assert cache.lookup(["hello world"], "english", "animated", "model-a") == {}
+    assert cache.lookup(["hello world"], "english", "cinematic", "model-b") == {}
+    assert cache.lookup(["hello world"], "hindi", "cinematic", "model-a") == {}
+
+
+def test_pinned_seeds_match_any_style_and_lose_to_exact_entries(tmp_path):
+    """Test that seeded translations are fallbacks for every style and model."""
+    cache = PromptCache(tmp_path / "prompts.sqlite3", ttl_seconds=0.01)
+    cache.seed({"Jab tak hai jaan": "A couple on a beach"}, "hindi")
+    time.sleep(0.02)
+
+    assert cache.lookup(["jab tak hai jaan"], "hindi", "noir", "model-a") == {"jab tak hai jaan": "A couple on a beach"}
+
+    cache.ttl_seconds = None
+    cache.store({"Jab tak hai jaan": "A noir beach"}, "hindi", "noir", "model-a")
+    assert cache.lookup(["Jab tak hai jaan"], "hindi", "noir", "model-a") == {"Jab tak hai jaan": "A noir beach"}
+
+
+def test_ttl_expiry_and_lru_eviction(tmp_path):
+    """Test that old entries expire and the least recently used are evicted first."""
+    cache = PromptCache(tmp_path / "prompts.sqlite3", max_entries=2, ttl_seconds=0.05)
+    cache.store({"a": "A"}, "english", None, "m")
+    time.sleep(0.06)
+    assert cache.lookup(["a"], "english", None, "m") == {}
+
+    cache.ttl_seconds = None
+    cache.store({"b": "B"}, "english", None, "m")
+    time.sleep(0.01)
+    cache.store({"c": "C"}, "english", None, "m")
+    time.sleep(0.01)
+    cache.lookup(["b"], "english", None, "m")
+    cache.store({"d": "D"}, "english", None, "m")
+
+    assert cache.lookup(["b", "c", "d"], "english", None, "m") == {"b": "B", "d": "D"}
+
+
+def test_entries_persist_across_instances(tmp_path):
+    """Test that a new process sees prompts cached by an earlier one."""
+    path = tmp_path / "prompts.sqlite3"
+    first = PromptCache(path)
+    first.store({"line": "prompt"}, "english", None, "m")
+    first.close()
+
+    assert PromptCache(path).lookup(["line"], "english", None, "m") == {"line": "prompt"}
@@ -0,0 +1,46 @@
+import asyncio
+import time
+
+import pytest
+
+from app.utils.rate_limiter import RateLimiter, get_rate_limiter
+
+
+@pytest.mark.asyncio
+async def test_burst_then_steady_rate():
+    """Test that a burst passes immediately and later requests are paced."""
+    limiter = RateLimiter(rate=20, burst=5)
+    start = time.perf_counter()
+    waits = await asyncio.gather(*(limiter.acquire() for _ in range(10)))
+    elapsed = time.perf_counter() - start
+
+    assert waits[:5] == [0.0] * 5
+    assert all(wait > 0 for wait in waits[5:])
+    # Five extra requests at 20/s need about a quarter of a second
+    assert 0.2 <= elapsed < 0.5
+
+
+@pytest.mark.asyncio
+async def test_penalize_delays_next_request():
+    """Test that a penalty (e.g. after HTTP 429) pushes the next slot back."""
+    limiter = RateLimiter(rate=100, burst=1)
+    limiter.penalize(0.2)
+
+    assert await limiter.acquire() >= 0.15
+
+
+def test_registry_shares_limiters(monkeypatch):
+    """Test that callers of the same upstream share one limiter configured from the environment."""
+    monkeypatch.setenv("TEST_UPSTREAM_REQUESTS_PER_SECOND", "3")
+    monkeypatch.setenv("TEST_UPSTREAM_BURST", "7")
+
+    limiter = get_rate_limiter("test-upstream")
+    assert limiter is get_rate_limiter("test-upstream")
+    assert (limiter.rate, limiter.burst) == (3.0, 7)
+    assert get_rate_limiter("another-upstream") is not limiter
+
+
+def test_rejects_non_positive_rate():
+    """Test that a zero rate is refused instead of blocking forever."""
+    with pytest.raises(ValueError):
+        RateLimiter(rate=0)
@@ -0,0 +1,101 @@
+import numpy as np
+import pytest
+
+from app.utils.media.segment_planner import plan_from_analysis, plan_segments, split_segment
+
+
+def test_frames_add_up_to_the_timeline():
+    """Test that segments are contiguous whole frames covering round(duration * fps)."""
+    segments = plan_segments(181.37, 24, count=7, beats=np.arange(0.3, 181, 0.47))
+
+    assert sum(s.num_frames for s in segments) == round(181.37 * 24)
+    assert segments[0].start_frame == 0
+    for previous, segment in zip(segments, segments[1:]):
+        assert segment.start_frame == previous.start_frame + previous.num_frames
+        assert segment.start == previous.end
+    assert [s.index for s in segments] == list(range(7))
+
+
+def test_cuts_prefer_downbeats_then_beats():
+    """Test that each cut moves to the nearest downbeat in the window, else to a beat."""
+    beats = np.arange(0.5, 60, 0.5)
+    downbeats = beats[::4]
+    segments = plan_segments(60, 24, count=4, beats=beats, downbeats=downbeats)
+
+    # Ideal cuts at 15, 30 and 45 s; the nearest downbeats are 14.5, 30.5 and 44.5 s
+    assert [s.end for s in segments[:-1]] == [14.5, 30.5, 44.5]
+    assert [s.anchor for s in segments] == ["downbeat", "downbeat", "downbeat", None]
+
+    # With a window narrower than the distance to any downbeat, beats are used
+    segments = plan_segments(60, 24, count=4, beats=beats, downbeats=downbeats, snap_window=0.02)
+    assert [s.end for s in segments[:-1]] == [15.0, 30.0, 45.0]
+    assert {s.anchor for s in segments[:-1]} == {"beat"}
+
+
+def test_without_beats_cuts_are_even():
+    """Test the even split when the track has no beats."""
+    segments = plan_segments(10, 24, count=3)
+
+    assert [s.num_frames for s in segments] == [80, 80, 80]
+    assert all(s.anchor is None for s in segments)
+
+
+def test_target_seconds_stops_at_the_end():
+    """Test fixed-length segments where the last one takes only the remainder."""
+    segments = plan_segments(10, 30, target_seconds=3)
+
+    assert [s.num_frames for s in segments] == [90, 90, 90, 30]
+
+
+def test_frame_limits_win_over_beats():
+    """Test that max_frames adds segments and clamps cuts that would exceed it."""
+    segments = plan_segments(20, 30, target_seconds=5, max_frames=96)
+    assert len(segments) == 7
+    assert max(s.num_frames for s in segments) <= 96
+    assert sum(s.num_frames for s in segments) == 600
+
+    # A downbeat late in the window would make the first segment too long
+    segments = plan_segments(8, 24, count=2, downbeats=[4.9], max_frames=100)
+    assert segments[0].num_frames == 100 and segments[0].anchor is None
+
+    with pytest.raises(ValueError):
+        plan_segments(10, 24, count=2, max_frames=96)
+    with pytest.raises(ValueError):
+        plan_segments(1, 24, count=5, min_frames=12)
+    with pytest.raises(ValueError):
+        plan_segments(10, 24)
+
+
+def test_split_segment_fits_the_frame_limit():
+    """Test that a long segment is split into beat-aligned parts within max_frames."""
+    beats = np.arange(0.5, 60, 0.5)
+    segment = plan_segments(60, 24, count=2, beats=beats)[1]
+    assert segment.num_frames == 720
+
+    parts = split_segment(segment, 24, max_frames=96, beats=beats)
+
+    assert len(parts) == 8
+    assert max(p.num_frames for p in parts) <= 96
+    assert sum(p.num_frames for p in parts) == segment.num_frames
+    assert parts[0].start_frame == segment.start_frame and parts[-1].end == segment.end
+    for previous, part in zip(parts, parts[1:]):
+        assert part.start_frame == previous.start_frame + previous.num_frames
+    # Inner cuts land on beats of the song's timeline
+    assert all(p.anchor == "beat" and p.end in beats for p in parts[:-1])
+    assert [p.index for p in parts] == list(range(8))
+
+    short = plan_segments(60, 24, count=20)[3]
+    assert split_segment(short, 24, max_frames=96) == [short.model_copy(update={"index": 0})]
+
+
+def test_plan_from_analysis():
+    """Test planning straight from an analyze_beats result."""
+    analysis = {
+        "duration": 12.0,
+        "beat_timestamps": [0.5 * k for k in range(1, 24)],
+        "downbeat_timestamps": [0.5 + 2.0 * k for k in range(6)],
+    }
+    segments = plan_from_analysis(analysis, 24, count=3)
+
+    assert [s.end for s in segments] == [4.5, 8.5, 12.0]
+    assert sum(s.num_frames for s in segments) == 288
@@ -0,0 +1,87 @@
+import shutil
+
+import pytest
+
+from app.utils.media.segment_planner import plan_segments
+from app.utils.media.subtitles import build_ass, build_srt, burn_subtitle_file, escape_filter_path, format_srt_timestamp, segment_cues
+from synthetic_video import render_clip
+
+
+def test_format_srt_timestamp():
+    """Test SRT timestamps, including rounding and hour rollover."""
+    assert format_srt_timestamp(0) == "00:00:00,000"
+    assert format_srt_timestamp(61.25) == "00:01:01,250"
+    assert format_srt_timestamp(3725.5) == "01:02:05,500"
+
+
+
+def test_segment_cues_follow_frame_limited_segments():
+    """Test cues for 5 s segments at 24 fps, which the 96 frame model limit makes shorter."""
+    frames = [segment.num_frames for segment in plan_segments(22, 24, target_seconds=5, max_frames=96)]
+    assert len(frames) == 6 and max(frames) <= 96
+
+    cues = segment_cues([f"prompt {i}" for i in range(6)], frames, 24)
+
+    assert [cue["text"] for cue in cues] == [f"prompt {i}" for i in range(6)]
+    assert cues[0]["start"] == 0 and cues[-1]["end"] == 22
+    for previous, cue, count in zip(cues, cues[1:], frames):
+        assert cue["start"] == previous["end"]
+        assert round(cue["start"] * 24) == round(previous["start"] * 24) + count
+    with pytest.raises(ValueError):
+        segment_cues(["only one"], frames, 24)
+
+def test_build_srt_accepts_both_entry_shapes():
+    """Test that route-style and SubtitleEntry-style entries render the same."""
+    srt = build_srt([
+        {"start": 0, "end": 3, "text": "First line"},
+        {"start_time": 3, "end_time": 6.5, "text": " Second line "},
+    ])
+
+    assert srt == (
+        "1\n00:00:00,000 --> 00:00:03,000\nFirst line\n"
+        "\n"
+        "2\n00:00:03,000 --> 00:00:06,500\nSecond line\n"
+    )
+
+
+def test_build_ass_applies_style():
+    """Test that the style maps onto the ASS style line and events are escaped."""
+    ass = build_ass(
+        [{"start": 1, "end": 2.25, "text": "Line one\nline {two}"}],
+        {"font_size": 48, "font_color": "yellow", "background_opacity": 0.5, "position": "top"},
+        width=1280,
+        height=720
+    )
+
+    assert "PlayResX: 1280" in ass
+    assert "PlayResY: 720" in ass
+    style_line = next(line for line in ass.splitlines() if line.startswith("Style: Default"))
+    fields = style_line[len("Style: "):].split(",")
+    assert fields[2] == "48"
+    assert fields[3] == "&H0000FFFF"
+    assert fields[5] == "&H80000000"
+    assert fields[15] == "3"
+    assert fields[18] == "8"
+    assert "Dialogue: 0,0:00:01.00,0:00:02.25,Default,,0,0,0,,Line one\\Nline (two)" in ass
+
+
+def test_escape_filter_path():
+    """Test escaping for both the option and the filtergraph level."""
+    assert escape_filter_path("/tmp/it's a:b,c.ass") == "/tmp/it\\\\\\'s a\\\\:b\\,c.ass"
+    assert escape_filter_path("C:\\subs\\a.srt") == "C\\\\:/subs/a.srt"
+
+
+@pytest.mark.asyncio
+@pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="ffmpeg not available")
+async def test_burn_subtitles_from_awkward_path(tmp_path):
+    """Test burning subtitles from a path containing ':', "'" and ','."""
+    video = render_clip(str(tmp_path / "clip.mp4"), width=160, height=90, fps=8, duration=1)
+    subtitle_dir = tmp_path / "it's a:b,c"
+    subtitle_dir.mkdir()
+    srt = subtitle_dir / "subs.srt"
+    srt.write_text(build_srt([{"start": 0, "end": 1, "text": "hello"}]))
+    output = tmp_path / "burned.mp4"
+
+    await burn_subtitle_file(video, srt, output, ffmpeg_path=shutil.which("ffmpeg"))
+
+    assert output.stat().st_size > 0
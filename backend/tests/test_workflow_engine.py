@@ -0,0 +1,146 @@
+import asyncio
+from pathlib import Path
+
+import pytest
+
+from app.services.workflow_engine import Node, Workflow, WorkflowError
+
+
+@pytest.mark.asyncio
+async def test_independent_nodes_run_concurrently():
+    """Test that nodes without a dependency between them overlap."""
+    running = 0
+    peak = 0
+
+    async def work(value: int) -> int:
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.05)
+        running -= 1
+        return value
+
+    async def total(parts):
+        return sum(parts)
+
+    workflow = Workflow("concurrency")
+    names = [workflow.add(Node(f"part_{i}", work, params={"value": i}, output_type=int)).name for i in range(3)]
+    workflow.add(Node("total", total, deps={"parts": names}, output_type=int))
+
+    outputs = await workflow.run()
+
+    assert outputs["total"] == 3
+    assert peak == 3
+    assert set(workflow.timings) == {"part_0", "part_1", "part_2", "total"}
+
+
+@pytest.mark.asyncio
+async def test_full_pool_does_not_hold_global_slots():
+    """Test that nodes waiting on a full pool leave the global slots to other nodes."""
+    released = asyncio.Event()
+
+    async def render(index: int) -> int:
+        await released.wait()
+        return index
+
+    async def unrelated() -> str:
+        # The renders can only finish once this node has run
+        released.set()
+        return "done"
+
+    workflow = Workflow("pools", max_concurrency=2, pools={"gpu": 1})
+    for i in range(3):
+        workflow.add(Node(f"render_{i}", render, params={"index": i}, output_type=int, pool="gpu"))
+    workflow.add(Node("unrelated", unrelated, output_type=str))
+
+    outputs = await asyncio.wait_for(workflow.run(), timeout=5)
+
+    assert outputs["unrelated"] == "done"
+    assert [outputs[f"render_{i}"] for i in range(3)] == [0, 1, 2]
+
+
+@pytest.mark.asyncio
+async def test_resume_skips_completed_nodes(tmp_path):
+    """Test that a failed run resumes from checkpoints and only redoes what failed."""
+    calls = {"write": 0, "flaky": 0}
+    fail = True
+
+    async def write() -> Path:
+        calls["write"] += 1
+        path = tmp_path / "artifact.txt"
+        path.write_text("data")
+        return path
+
+    async def flaky(artifact: Path) -> str:
+        calls["flaky"] += 1
+        if fail:
+            raise RuntimeError("boom")
+        return artifact.read_text()
+
+    async def report(text: str) -> str:
+        return text.upper()
+
+    def build():
+        workflow = Workflow("resume", store_dir=tmp_path / "workflow")
+        workflow.add(Node("write", write, output_type=Path))
+        workflow.add(Node("flaky", flaky, deps={"artifact": "write"}, output_type=str))
+        workflow.add(Node("report", report, deps={"text": "flaky"}, output_type=str))
+        return workflow
+
+    first = build()
+    with pytest.raises(WorkflowError) as excinfo:
+        await first.run()
+    assert set(excinfo.value.failed) == {"flaky"}
+    assert excinfo.value.skipped == ["report"]
+
+    fail = False
+    second = build()
+    outputs = await second.run()
+
+    assert outputs["report"] == "DATA"
+    assert calls == {"write": 1, "flaky": 2}
+    assert second.runs["write"].status == "cached"
+
+
+@pytest.mark.asyncio
+async def test_missing_file_artifact_is_recomputed(tmp_path):
+    """Test that a checkpoint pointing at a deleted file is not reused."""
+    calls = 0
+
+    async def write() -> Path:
+        nonlocal calls
+        calls += 1
+        path = tmp_path / "clip.mp4"
+        path.write_bytes(b"x")
+        return path
+
+    for _ in range(2):
+        workflow = Workflow("files", store_dir=tmp_path / "workflow")
+        workflow.add(Node("write", write, output_type=Path))
+        await workflow.run()
+        (tmp_path / "clip.mp4").unlink()
+
+    assert calls == 2
+
+
+@pytest.mark.asyncio
+async def test_output_type_is_checked():
+    """Test that a node returning the wrong type fails the workflow."""
+    async def wrong() -> str:
+        return "not a path"
+
+    workflow = Workflow("types")
+    workflow.add(Node("wrong", wrong, output_type=Path))
+
+    with pytest.raises(WorkflowError):
+        await workflow.run()
+
+
+def test_unknown_dependency_is_rejected():
+    """Test that nodes must be added after the nodes they depend on."""
+    async def noop():
+        return None
+
+    workflow = Workflow("validation")
+    with pytest.raises(ValueError):
+        workflow.add(Node("orphan", noop, deps={"x": "missing"}))
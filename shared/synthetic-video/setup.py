@@ -0,0 +1,13 @@
+from setuptools import setup
+
+setup(
+    name="synthetic-video",
+    version="0.1.0",
+    py_modules=["synthetic_video"],
+    install_requires=[
+        "numpy>=1.24.0",
+        "opencv-python>=4.7.0",
+    ],
+    description="Deterministic synthetic video clips for demos, mocks and benchmarks",
+    author="Video Generator",
+)
@@ -0,0 +1,277 @@
+"""
+Deterministic synthetic video clips for demos, mocks and benchmarks.
+
+This module only needs NumPy, OpenCV and an ffmpeg binary. It is the
+synthetic-video distribution in shared/synthetic-video, which the backend
+and ai_engine both install from their requirements.
+
+Frames are rendered with NumPy broadcasting over coordinate grids built
+once per clip: an animated gradient, an orbiting disc and optional text
+rasterised once into masks. Raw RGB frames are piped straight into an
+H.264/yuv420p encoder, so clips play in browsers and nothing but the
+final file touches the disk. The same seed always gives the same pixels.
+"""
+import os
+import subprocess
+from collections import deque
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+FONT = cv2.FONT_HERSHEY_SIMPLEX
+FONT_SCALE = 0.7
+FONT_THICKNESS = 2
+LINE_HEIGHT = 30
+SHADOW_OFFSET = 2
+
+
+class GradientGrids:
+    """Per-clip coordinate terms of the animated background gradient."""
+
+    def __init__(self, width: int, height: int, offsets: Tuple[float, float, float] = (0.0, 0.0, 0.0)):
+        x = np.arange(width, dtype=np.float32)[None, :]
+        y = np.arange(height, dtype=np.float32)[:, None]
+        self.terms = (
+            # (RGB channel, position term, base, function)
+            (0, (x + y) / 200 + offsets[0], 150, np.sin),
+            (1, np.broadcast_to(y / 100 + offsets[1], (height, width)), 100, np.cos),
+            (2, np.broadcast_to(x / 100 + offsets[2], (height, width)), 100, np.sin),
+        )
+        self._scratch = np.empty((height, width), dtype=np.float32)
+
+    def render(self, phase: float, out: np.ndarray) -> np.ndarray:
+        """Fill `out` (HxWx3 uint8 RGB) with base + 50 * f(phase + position) per channel."""
+        scratch = self._scratch
+        for channel, grid, base, func in self.terms:
+            np.add(grid, phase, out=scratch)
+            func(scratch, out=scratch)
+            scratch *= 50
+            scratch += base
+            # Truncating cast; values stay within 50..200
+            out[:, :, channel] = scratch
+        return out
+
+
+def layout_text(text: str, width: int, height: int, margin: int = 20) -> List[Tuple[str, int, int]]:
+    """
+    Word-wrap text to the frame width and centre it.
+
+    Returns:
+        (line, x, y) baseline positions for cv2.putText
+    """
+    lines: List[str] = []
+    current_line = ""
+    max_width = width - 2 * margin
+    for word in text.split():
+        test_line = current_line + word + " "
+        text_width = cv2.getTextSize(test_line, FONT, FONT_SCALE, FONT_THICKNESS)[0][0]
+        if text_width > max_width and current_line:
+            lines.append(current_line)
+            current_line = word + " "
+        else:
+            current_line = test_line
+    if current_line:
+        lines.append(current_line)
+
+    placed = []
+    y_position = height // 2 - (len(lines) * LINE_HEIGHT) // 2
+    for line in lines:
+        text_width = cv2.getTextSize(line, FONT, FONT_SCALE, FONT_THICKNESS)[0][0]
+        placed.append((line, (width - text_width) // 2, y_position))
+        y_position += LINE_HEIGHT
+    return placed
+
+
+def text_masks(layout: List[Tuple[str, int, int]], width: int, height: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Rasterise laid-out text once into boolean (shadow, text) masks.
+
+    Drawing is not anti-aliased, so stamping the masks is identical to
+    calling cv2.putText on every frame.
+    """
+    shadow = np.zeros((height, width), dtype=np.uint8)
+    text = np.zeros((height, width), dtype=np.uint8)
+    for line, x, y in layout:
+        cv2.putText(shadow, line, (x + SHADOW_OFFSET, y + SHADOW_OFFSET), FONT, FONT_SCALE, 255, FONT_THICKNESS)
+        cv2.putText(text, line, (x, y), FONT, FONT_SCALE, 255, FONT_THICKNESS)
+    return shadow.astype(bool), text.astype(bool)
+
+
+def _disc(radius: int) -> np.ndarray:
+    offsets = np.arange(-radius, radius + 1)
+    return offsets[:, None] ** 2 + offsets[None, :] ** 2 <= radius ** 2
+
+
+def _stamp(frame: np.ndarray, mask: np.ndarray, cx: int, cy: int, color: Tuple[int, int, int]) -> None:
+    """Paint a square mask centred at (cx, cy), clipped to the frame."""
+    radius = mask.shape[0] // 2
+    height, width = frame.shape[:2]
+    top, left = cy - radius, cx - radius
+    y0, y1 = max(top, 0), min(top + mask.shape[0], height)
+    x0, x1 = max(left, 0), min(left + mask.shape[1], width)
+    if y0 >= y1 or x0 >= x1:
+        return
+    frame[y0:y1, x0:x1][mask[y0 - top:y1 - top, x0 - left:x1 - left]] = color
+
+
+def synthetic_frames(
+    width: int = 640,
+    height: int = 360,
+    num_frames: int = 120,
+    fps: int = 24,
+    text: Optional[str] = None,
+    seed: int = 0,
+    moving_disc: bool = True,
+    frame_counter: bool = False
+) -> Iterator[np.ndarray]:
+    """
+    Yield deterministic animated RGB uint8 frames.
+
+    The same buffer is reused for every frame; copy it if you keep it.
+
+    Args:
+        width: Frame width in pixels
+        height: Frame height in pixels
+        num_frames: Number of frames
+        fps: Frame rate; the gradient drifts by half a radian per second
+        text: Optional text, word-wrapped and centred
+        seed: Varies gradient phases and disc colour; 0 keeps the classic look
+        moving_disc: Draw a disc orbiting the centre twice per clip
+        frame_counter: Draw "frame i/N" in the bottom-left corner
+    """
+    rng = np.random.default_rng(seed)
+    offsets = tuple(rng.uniform(0, 2 * np.pi, 3)) if seed else (0.0, 0.0, 0.0)
+    disc_color = tuple(int(v) for v in rng.integers(128, 256, 3)) if seed else (255, 255, 255)
+
+    grids = GradientGrids(width, height, offsets)
+    shadow, mask = text_masks(layout_text(text, width, height), width, height) if text else (None, None)
+    disc = _disc(max(2, min(width, height) // 10))
+    frame = np.empty((height, width, 3), dtype=np.uint8)
+
+    for i in range(num_frames):
+        grids.render(i / (fps * 2), frame)
+        if moving_disc:
+            t = i / max(num_frames, 1)
+            _stamp(
+                frame, disc,
+                int(width / 2 + width / 3 * np.sin(t * 4 * np.pi)),
+                int(height / 2 + height / 3 * np.cos(t * 4 * np.pi)),
+                disc_color
+            )
+        if text:
+            frame[shadow] = 0
+            frame[mask] = 255
+        if frame_counter:
+            cv2.putText(frame, f"frame {i + 1}/{num_frames}", (10, height - 15), FONT, 0.5, (255, 255, 255), 1)
+        yield frame
+
+
+def encode_command(
+    output_path: str,
+    width: int,
+    height: int,
+    fps: int,
+    ffmpeg_path: Optional[str] = None,
+    pix_fmt: str = "rgb24",
+    tone_hz: Optional[float] = None,
+    preset: str = "veryfast"
+) -> List[str]:
+    """
+    ffmpeg command reading raw frames on stdin and writing H.264/yuv420p MP4.
+
+    Args:
+        tone_hz: Add a sine tone of this frequency as an AAC track
+    """
+    cmd = [
+        ffmpeg_path or os.getenv("FFMPEG_PATH", "ffmpeg"), "-y", "-loglevel", "error",
+        "-f", "rawvideo", "-pix_fmt", pix_fmt,
+        "-s", f"{width}x{height}", "-r", str(fps),
+        "-i", "pipe:0"
+    ]
+    if tone_hz:
+        cmd += [
+            "-f", "lavfi", "-i", f"sine=frequency={tone_hz}:sample_rate=44100",
+            "-map", "0:v:0", "-map", "1:a:0", "-c:a", "aac", "-shortest"
+        ]
+    cmd += [
+        "-c:v", "libx264", "-preset", preset, "-pix_fmt", "yuv420p",
+        # 4:2:0 needs even dimensions
+        "-vf", "pad=ceil(iw/2)*2:ceil(ih/2)*2",
+        "-movflags", "+faststart",
+        str(output_path)
+    ]
+    return cmd
+
+
+def write_clip(
+    frames: Iterable[np.ndarray],
+    output_path: str,
+    width: int,
+    height: int,
+    fps: int,
+    ffmpeg_path: Optional[str] = None,
+    tone_hz: Optional[float] = None
+) -> str:
+    """
+    Pipe RGB frames into ffmpeg (blocking).
+
+    Raises:
+        RuntimeError: If ffmpeg fails
+    """
+    cmd = encode_command(output_path, width, height, fps, ffmpeg_path, tone_hz=tone_hz)
+    process = subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    try:
+        for frame in frames:
+            process.stdin.write(memoryview(np.ascontiguousarray(frame)))
+    except BrokenPipeError:
+        # ffmpeg quit early; its exit status and stderr say why
+        pass
+    except BaseException:
+        process.kill()
+        process.wait()
+        raise
+    finally:
+        try:
+            process.stdin.close()
+        except BrokenPipeError:
+            pass
+    stderr = deque(process.stderr, maxlen=20)
+    if process.wait() != 0:
+        raise RuntimeError(f"ffmpeg failed to encode {output_path}: {b''.join(stderr).decode(errors='replace')}")
+    return str(output_path)
+
+
+def render_clip(
+    output_path: str,
+    width: int = 640,
+    height: int = 360,
+    fps: int = 24,
+    duration: float = 5.0,
+    text: Optional[str] = None,
+    seed: int = 0,
+    tone_hz: Optional[float] = None,
+    frame_counter: bool = False,
+    ffmpeg_path: Optional[str] = None
+) -> str:
+    """
+    Render and encode a synthetic clip in one call.
+
+    Args:
+        output_path: Where to write the MP4
+        width: Frame width in pixels
+        height: Frame height in pixels
+        fps: Frames per second
+        duration: Clip length in seconds
+        text: Optional centred text, e.g. the prompt
+        seed: Deterministic variation (see synthetic_frames)
+        tone_hz: Add a sine tone soundtrack, e.g. for mux benchmarks
+        frame_counter: Draw the frame number
+        ffmpeg_path: FFmpeg executable (default: $FFMPEG_PATH or "ffmpeg")
+
+    Returns:
+        Path to the encoded clip
+    """
+    num_frames = max(1, int(round(duration * fps)))
+    frames = synthetic_frames(width, height, num_frames, fps, text=text, seed=seed, frame_counter=frame_counter)
+    return write_clip(frames, output_path, width, height, fps, ffmpeg_path, tone_hz=tone_hz)